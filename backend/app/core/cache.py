@@ -0,0 +1,269 @@
+"""
+In-process response cache for router functions.
+
+    @router.get("/industries/overview")
+    @cached(ttl=3600)
+    def get_industries_overview(response: Response): ...
+
+Entries are keyed by the call's arguments (Request / Response / BackgroundTasks
+are left out), evicted least-recently-used beyond `maxsize`, expire after
+`ttl` seconds, and are dropped all at once when the ETL data_version changes
+(etl_state row bumped at the end of run_all_etl), so cached analytics are never
+older than the last load. Headers the function sets on its Response are
+replayed on hits. With shared=True a second tier in the shared backend
+(app.core.shared_cache) lets every worker reuse one computation; the ETL's
+pub/sub message clears the in-process tier right away.
+
+Cached values are shared between requests - callers must not mutate them.
+"""
+import os
+import time
+import asyncio
+import inspect
+import logging
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+
+import orjson
+from fastapi import BackgroundTasks, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.core.payload import dumps
+from app.core.shared_cache import get_backend, versioned_key, INVALIDATION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# etl_state.job_name bumped by etl.run_all_etl / maintenance.py (etl.orchestrator.DATA_VERSION_JOB)
+DATA_VERSION_JOB = "data_version"
+# How often a worker asks the database for the data_version (seconds)
+DATA_VERSION_CHECK_SECONDS = float(os.getenv("DATA_VERSION_CHECK_SECONDS", "30"))
+
+_version = {"value": None, "checked_at": 0.0}
+_version_lock = threading.Lock()
+
+_MISSING = object()
+_UNKEYED = (Request, Response, BackgroundTasks)
+
+
+def _version_check_due() -> bool:
+    return time.monotonic() - _version["checked_at"] >= DATA_VERSION_CHECK_SECONDS
+
+
+def data_version():
+    """Last ETL load stamp, re-read from etl_state at most every DATA_VERSION_CHECK_SECONDS"""
+    if not _version_check_due():
+        return _version["value"]
+    with _version_lock:
+        if _version_check_due():
+            try:
+                with engine.connect() as conn:
+                    _version["value"] = conn.execute(text(
+                        "SELECT last_success_at FROM etl_state WHERE job_name = :job"
+                    ), {"job": DATA_VERSION_JOB}).scalar()
+            except Exception as e:
+                # etl_state missing / database down - keep serving with the last known version
+                logger.debug(f"data_version check failed: {e}")
+            _version["checked_at"] = time.monotonic()
+    return _version["value"]
+
+
+async def current_data_version():
+    """data_version() for async code - the database is only asked (in the threadpool) when a check is due"""
+    if _version_check_due():
+        return await run_in_threadpool(data_version)
+    return _version["value"]
+
+
+class TTLCache:
+    """Bounded LRU mapping with one TTL for every entry; thread-safe"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        with self._lock:
+            if version != self.version:
+                self._data.clear()
+                self.version = version
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            if version != self.version:
+                # ETL finished while we were computing - the value may predate it
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+            }
+
+
+_caches = {}
+
+
+def cache_stats() -> dict:
+    return {"data_version": _version["value"], "caches": {name: c.stats() for name, c in _caches.items()}}
+
+
+def clear_caches():
+    for c in _caches.values():
+        c.clear()
+
+
+def _freeze(value):
+    """Arguments -> hashable key part (lists from Query(...), request bodies, dicts)"""
+    if isinstance(value, BaseModel):
+        return _freeze(value.model_dump())
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def _shared_key(cache: TTLCache, version, key) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return versioned_key(version, "fn", cache.name, digest)
+
+
+def _shared_get(cache: TTLCache, version, key):
+    """(value, headers) from the shared backend, or _MISSING"""
+    body = get_backend().get(_shared_key(cache, version, key))
+    if body is None:
+        return _MISSING
+    entry = orjson.loads(body)
+    return entry["value"], entry["headers"]
+
+
+def _shared_set(cache: TTLCache, version, key, entry):
+    value, headers = entry
+    body = dumps({"value": jsonable_encoder(value), "headers": headers})
+    get_backend().set(_shared_key(cache, version, key), body, cache.ttl)
+
+
+def cached(ttl: float, maxsize: int = 256, name: str = None, shared: bool = False):
+    """
+    Caches a (sync or async) router function's result per argument values; see module docstring.
+    shared=True adds the cross-worker backend (app.core.shared_cache) behind the in-process
+    LRU - the value is stored as JSON, so hits return plain dicts / lists.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        cache = TTLCache(name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}", maxsize, ttl)
+        _caches[cache.name] = cache
+
+        def call_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            response = next((v for v in bound.arguments.values() if isinstance(v, Response)), None)
+            key = tuple((k, _freeze(v)) for k, v in bound.arguments.items() if not isinstance(v, _UNKEYED))
+            return key, response
+
+        def replay(entry, response):
+            value, headers = entry
+            if response is not None:
+                response.headers.update(headers)
+            return value
+
+        def headers_set(response, before):
+            if response is None:
+                return {}
+            return {k: v for k, v in response.headers.items() if before.get(k) != v}
+
+        def succeeded(response):
+            # e.g. get_industry_detail sets 500 and returns {"error": ...} - not cached
+            return response is None or not response.status_code or response.status_code < 400
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                version = await current_data_version()
+                key, response = call_key(args, kwargs)
+                entry = cache.get(key, version)
+                if entry is _MISSING and shared:
+                    entry = await run_in_threadpool(_shared_get, cache, version, key)
+                    if entry is not _MISSING:
+                        cache.set(key, entry, version)
+                if entry is not _MISSING:
+                    return replay(entry, response)
+                before = dict(response.headers) if response is not None else {}
+                value = await fn(*args, **kwargs)
+                if succeeded(response):
+                    entry = (value, headers_set(response, before))
+                    cache.set(key, entry, version)
+                    if shared:
+                        await run_in_threadpool(_shared_set, cache, version, key, entry)
+                return value
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            version = data_version()
+            key, response = call_key(args, kwargs)
+            entry = cache.get(key, version)
+            if entry is _MISSING and shared:
+                entry = _shared_get(cache, version, key)
+                if entry is not _MISSING:
+                    cache.set(key, entry, version)
+            if entry is not _MISSING:
+                return replay(entry, response)
+            before = dict(response.headers) if response is not None else {}
+            value = fn(*args, **kwargs)
+            if succeeded(response):
+                entry = (value, headers_set(response, before))
+                cache.set(key, entry, version)
+                if shared:
+                    _shared_set(cache, version, key, entry)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def invalidate(message: str = None):
+    """ETL finished (INVALIDATION_CHANNEL): drop in-process entries, re-read data_version on next call"""
+    _version["checked_at"] = 0.0
+    clear_caches()
+    logger.info(f"🧹 Response caches invalidated ({message or 'local'})")
+
+
+def start_invalidation_listener():
+    """Subscribes this worker to the ETL's invalidation messages (called from the app lifespan)"""
+    get_backend().subscribe(INVALIDATION_CHANNEL, invalidate)
@@ -1,6 +1,7 @@
 import os
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -29,3 +30,43 @@ engine = create_engine(
 )
 
 logger.info(f"Initialized API Database Engine with pool_size=20")
+
+
+# Async engine (asyncpg) for the async def endpoints - queries do not block the event loop.
+# Same database, separate pool. asyncpg takes ssl instead of libpq's sslmode.
+_async_url = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+_sslmode = _async_url.query.get("sslmode")
+_async_url = _async_url.difference_update_query(["sslmode"])
+ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "20"))
+
+async_engine = create_async_engine(
+    _async_url,
+    pool_size=ASYNC_POOL_SIZE,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    connect_args={"ssl": _sslmode} if _sslmode and _sslmode != "disable" else {},
+)
+
+
+async def fetch_all(query, params: dict = None) -> list:
+    """Runs one query on its own pooled connection - independent queries can be asyncio.gather()-ed."""
+    async with async_engine.connect() as conn:
+        result = await conn.execute(query, params or {})
+        return result.fetchall()
+
+
+async def fetch_one(query, params: dict = None):
+    async with async_engine.connect() as conn:
+        result = await conn.execute(query, params or {})
+        return result.fetchone()
+
+
+async def run_sync(fn, *args, **kwargs):
+    """
+    Runs a sync helper that takes `conn` as its first argument (e.g. load_cached_graph)
+    on an async connection - the helper's queries do not block the event loop.
+    """
+    async with async_engine.connect() as conn:
+        return await conn.run_sync(fn, *args, **kwargs)
@@ -0,0 +1,138 @@
+"""
+Conditional GET for read-only endpoints: strong ETags keyed on the ETL data_version.
+
+    @router.get("/regions/overview")
+    @etag()
+    @cached(ttl=3600)
+    def get_regions_overview(response: Response, year: int = None): ...
+
+The tag is a hash of (path, query parameters, data_version[, access flag]), so it
+is known before the handler runs: a matching If-None-Match is answered with 304
+without touching the body. The data only changes when the ETL bumps
+data_version, which changes every tag at once.
+
+vary_access=True adds check_access() to the tag for company pages - the access
+decision is cheap, the body is not, and a login / logout still gets a new body.
+variant= adds a cheap per-request stamp for bodies that can change without a new
+data_version (company profiles rebuilt by stale-while-revalidate).
+version= replaces data_version for responses that change on deploy instead of on
+ETL (static map files). Without a known version no ETag is sent.
+"""
+import asyncio
+import inspect
+import hashlib
+import logging
+import functools
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.cache import current_data_version
+from app.utils import access_control
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_PARAM = "_etag_request"
+_RESPONSE_PARAM = "_etag_response"
+
+
+def compute_etag(request: Request, version, variant=None) -> str:
+    """Strong validator for this URL + data version (+ access variant / negotiated encoding)"""
+    parts = [
+        request.url.path,
+        "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items())),
+        str(version),
+        str(variant),
+        # gzip / br bodies differ byte for byte - a strong ETag must differ too
+        request.headers.get("accept-encoding", ""),
+    ]
+    return '"' + hashlib.sha256("|".join(parts).encode()).hexdigest()[:32] + '"'
+
+
+def _param_of_type(signature: inspect.Signature, cls):
+    return next((name for name, p in signature.parameters.items()
+                 if isinstance(p.annotation, type) and issubclass(p.annotation, cls)), None)
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(c.strip().removeprefix("W/") == tag for c in if_none_match.split(","))
+
+
+def etag(vary_access: bool = False, version=None, variant=None, cache_control: str = None,
+         on_not_modified=None):
+    """
+    ETag / 304 for a (sync or async) router function; see module docstring.
+
+    version: callable returning the validator version (default: ETL data_version).
+    variant: async callable(**handler_kwargs) whose result is added to the tag (e.g.
+        updated_at of the cache row the body is served from).
+    cache_control: Cache-Control for both 200 and 304 (e.g. "private, no-cache" so
+        browsers revalidate instead of re-downloading); handlers' own header otherwise.
+    on_not_modified: async callable(**handler_kwargs) for side effects that must run
+        even when the body is skipped (view history).
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        is_async = asyncio.iscoroutinefunction(fn)
+        # FastAPI injects one Request / Response parameter per endpoint - reuse the handler's own
+        request_name = _param_of_type(signature, Request)
+        response_name = _param_of_type(signature, Response)
+
+        async def resolve_version():
+            if version is None:
+                return await current_data_version()
+            return await run_in_threadpool(version)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.get(request_name) if request_name else kwargs.pop(_REQUEST_PARAM, None)
+            response = kwargs.get(response_name) if response_name else kwargs.pop(_RESPONSE_PARAM, None)
+            if request is None:
+                # called directly from Python (tests, other routers) - no conditional request
+                return await fn(*args, **kwargs) if is_async else fn(*args, **kwargs)
+
+            current = await resolve_version()
+            tag = None
+            if current is not None:
+                access = None
+                if vary_access:
+                    access = await access_control.check_access(request)
+                stamp = await variant(*args, **kwargs) if variant is not None else None
+                tag = compute_etag(request, current, access if stamp is None else (access, stamp))
+                headers = {"ETag": tag}
+                if cache_control:
+                    headers["Cache-Control"] = cache_control
+                if etag_matches(request.headers.get("if-none-match"), tag):
+                    if on_not_modified is not None:
+                        await on_not_modified(*args, **kwargs)
+                    return Response(status_code=304, headers=headers)
+
+            result = await fn(*args, **kwargs) if is_async else await run_in_threadpool(fn, *args, **kwargs)
+            if tag is None:
+                return result
+
+            # Errors (404 JSONResponse, status set on the injected response) get no validator
+            target = result if isinstance(result, Response) else response
+            if target.status_code and target.status_code >= 400:
+                return result
+            target.headers.update(headers)
+            return result
+
+        # FastAPI reads the signature: the handler's own parameters + Request / Response if missing
+        extra = []
+        if not request_name:
+            extra.append(inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        if not response_name:
+            extra.append(inspect.Parameter(_RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+        params = list(signature.parameters.values())
+        var_keyword = [p for p in params if p.kind == inspect.Parameter.VAR_KEYWORD]
+        params = [p for p in params if p.kind != inspect.Parameter.VAR_KEYWORD] + extra + var_keyword
+        wrapper.__signature__ = signature.replace(parameters=params)
+        wrapper.etag = True
+        return wrapper
+    return decorator
@@ -0,0 +1,117 @@
+"""
+Ready-to-send JSON payloads for cached responses.
+
+A cached profile is stored as orjson bytes without the per-request access
+flags, plus gzip / brotli variants for both access states. A cache hit only
+prepends the flags envelope (or picks a precompressed variant) - no JSON
+parse, no re-encode, no recompression. GZipMiddleware leaves responses that
+already carry Content-Encoding alone.
+"""
+import gzip
+import math
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # optional - without it clients get gzip
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+ACCESS_FLAGS = ("has_full_access", "is_locked")
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return str(value)
+
+
+def dumps(data) -> bytes:
+    """orjson with the types our rows carry (Decimal -> float, anything else -> str)"""
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def with_access_flags(body: bytes, has_full_access: bool) -> bytes:
+    """Prepends {"has_full_access":..,"is_locked":..} to a serialized JSON object"""
+    envelope = b'{"has_full_access":true,"is_locked":false' if has_full_access \
+        else b'{"has_full_access":false,"is_locked":true'
+    return envelope + (b'}' if body == b'{}' else b',' + body[1:])
+
+
+def encode_payload(profile: dict) -> dict:
+    """
+    Cache columns for one profile:
+      payload      - JSON without the access flags
+      payload_gzip - [locked, full access] gzip bodies
+      payload_br   - [locked, full access] brotli bodies (None without brotli)
+    """
+    body = dumps({k: v for k, v in profile.items() if k not in ACCESS_FLAGS})
+    variants = [with_access_flags(body, access) for access in (False, True)]
+    return {
+        "payload": body,
+        "payload_gzip": [gzip.compress(v, compresslevel=GZIP_LEVEL, mtime=0) for v in variants],
+        "payload_br": [brotli.compress(v, quality=BROTLI_QUALITY) for v in variants] if brotli else None,
+    }
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Accept-Encoding header -> encodings the client takes (q=0 means refused)"""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip())
+    return accepted
+
+
+class PayloadResponse(Response):
+    """
+    JSON response from already-serialized bytes.
+
+    content is raw JSON bytes; `variants` maps encoding -> precompressed body and
+    the best one the client accepts is sent as-is (br, then gzip, then identity).
+    """
+    media_type = "application/json"
+
+    def __init__(self, content: bytes, request=None, variants: dict = None, **kwargs):
+        encoding = None
+        if variants and request is not None:
+            accepted = accepted_encodings(request.headers.get("accept-encoding"))
+            encoding = next((e for e in ("br", "gzip") if variants.get(e) and (e in accepted or "*" in accepted)), None)
+        super().__init__(variants[encoding] if encoding else content, **kwargs)
+        if variants:
+            self.headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            self.headers["Content-Encoding"] = encoding
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def profile_response(payload: bytes, gzip_body: bytes, br_body: bytes, has_full_access: bool, request,
+                     **kwargs) -> PayloadResponse:
+    """Profile without access flags + precompressed bodies for this access state -> PayloadResponse"""
+    return PayloadResponse(with_access_flags(bytes(payload), has_full_access), request,
+                           {"gzip": gzip_body, "br": br_body}, **kwargs)
+
+
+def access_variant(bodies: list, has_full_access: bool):
+    """[locked, full access] list from encode_payload -> body for this access state"""
+    return bodies[int(has_full_access)] if bodies else None
+
+
+# Postgres arrays are 1-based: [1] = locked, [2] = full access (:access = 1 + has_full_access)
+PROFILE_VARIANT_COLUMNS = "payload, payload_gzip[:access] AS payload_gzip, payload_br[:access] AS payload_br"
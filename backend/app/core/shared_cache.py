@@ -0,0 +1,183 @@
+"""
+Shared cache backend: one copy of cached payloads for every uvicorn worker / replica.
+
+    backend = get_backend()
+    backend.set_many({"profile:1:payload": b"...", ...}, ttl=3600)   # one pipelined round-trip
+    payload, gzip_body = backend.get_many(["profile:1:payload", "profile:1:gzip:1"])
+
+Values are bytes. REDIS_URL selects RedisBackend (redis-py, optional); without it
+LocalBackend keeps the same interface in process memory - what tests and a
+single-worker deployment use.
+
+Keys are namespaced by the ETL data_version (versioned_key), so everything
+cached before a load becomes unreachable at once and expires by TTL. The ETL
+also publishes on INVALIDATION_CHANNEL so workers drop their in-process caches
+immediately instead of at the next data_version poll.
+
+A backend that is down behaves like an empty cache - requests never fail on it.
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # optional - LocalBackend without it
+    redis = None
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "ur")
+# Same channel name as etl.orchestrator.INVALIDATION_CHANNEL
+INVALIDATION_CHANNEL = "ur:cache:invalidate"
+
+
+class CacheBackend:
+    """Interface: bytes values, per-key TTL (seconds), pipelined multi-get/set, pub/sub"""
+
+    def get(self, key: str):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: list) -> list:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback):
+        """callback(message: str) for every message published on channel (from a background thread)"""
+        raise NotImplementedError
+
+
+class LocalBackend(CacheBackend):
+    """In-process stand-in: dict with expiry; pub/sub reaches subscribers in this process only"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def get_many(self, keys: list) -> list:
+        now = time.monotonic()
+        with self._lock:
+            values = []
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._data[key]
+                    entry = None
+                values.append(entry[1] if entry else None)
+            return values
+
+    def set_many(self, items: dict, ttl: float):
+        expires = time.monotonic() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires, bytes(value))
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def publish(self, channel: str, message: str):
+        for callback in list(self._subscribers.get(channel, [])):
+            callback(message)
+
+    def subscribe(self, channel: str, callback):
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend(CacheBackend):
+    """Redis protocol (Redis / Valkey / KeyDB) via redis-py; MGET for multi-get, pipelines for writes"""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get_many(self, keys: list) -> list:
+        if not keys:
+            return []
+        try:
+            return self.client.mget(keys)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Shared cache get failed: {e}")
+            return [None] * len(keys)
+
+    def set_many(self, items: dict, ttl: float):
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            for key, value in items.items():
+                pipe.set(key, value, ex=max(1, int(ttl)))
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Shared cache set failed: {e}")
+
+    def delete(self, *keys):
+        try:
+            self.client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Shared cache delete failed: {e}")
+
+    def publish(self, channel: str, message: str):
+        try:
+            self.client.publish(channel, message)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Shared cache publish failed: {e}")
+
+    def subscribe(self, channel: str, callback):
+        def listen():
+            # Reconnects after Redis restarts; subscriptions do not survive a dropped connection
+            while True:
+                try:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(channel)
+                    for message in pubsub.listen():
+                        data = message["data"]
+                        callback(data.decode() if isinstance(data, bytes) else str(data))
+                except Exception as e:
+                    logger.warning(f"⚠️ Shared cache subscription lost, retrying: {e}")
+                    time.sleep(5)
+
+        threading.Thread(target=listen, name=f"subscribe-{channel}", daemon=True).start()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = RedisBackend(REDIS_URL) if REDIS_URL else LocalBackend()
+                logger.info(f"🗄️ Shared cache backend: {type(_backend).__name__}")
+    return _backend
+
+
+def set_backend(backend: CacheBackend):
+    """Swap the backend (tests, or a custom implementation)"""
+    global _backend
+    _backend = backend
+
+
+def versioned_key(version, *parts) -> str:
+    """prefix:data_version:part:part... - a new ETL load starts a new key space"""
+    return ":".join([CACHE_PREFIX, str(version or 0).replace(" ", "T"), *map(str, parts)])
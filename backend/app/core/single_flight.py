@@ -0,0 +1,144 @@
+"""
+Single-flight for cache rebuilds: one computation per key, everyone else waits for it.
+
+Two levels:
+  - process-local: concurrent requests for the same key share one Future
+  - cross-process: the leader holds a Postgres advisory lock for the key, so
+    other workers / replicas wait for it (misses) or skip (background refresh)
+
+The function a leader runs should re-check the cache first - when the lock was
+held by another process, the entry is usually fresh by the time we get it.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+# A miss waits this long for another process's rebuild before computing anyway
+LOCK_TIMEOUT_SECONDS = 60
+
+
+def advisory_lock_key(namespace: str, key) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock (hash() differs between processes)"""
+    digest = hashlib.blake2b(f"{namespace}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(lock_key: int, wait: bool = True, timeout_seconds: float = LOCK_TIMEOUT_SECONDS):
+    """
+    Session advisory lock on a dedicated pooled connection; yields whether it was acquired.
+    wait=False tries once (pg_try_advisory_lock); wait=True gives up after timeout_seconds.
+    """
+    with engine.connect() as conn:
+        acquired = False
+        try:
+            if wait:
+                # lock_timeout only for this transaction, the session lock outlives it
+                conn.execute(text("SELECT set_config('lock_timeout', :t, true)"),
+                             {"t": f"{int(timeout_seconds * 1000)}ms"})
+                conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": lock_key})
+                acquired = True
+            else:
+                acquired = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": lock_key}).scalar()
+            conn.commit()
+        except OperationalError as e:
+            conn.rollback()
+            logger.warning(f"⏳ Advisory lock {lock_key} not acquired: {e.orig}")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": lock_key})
+                conn.commit()
+
+
+class SingleFlight:
+    """
+    Coalesces computations per key.
+
+        flight = SingleFlight("profile")
+        flight.run(key, fn, *args)               # sync: compute or wait for the running one
+        await flight.run_async(key, fn, *args)   # same from async code (fn runs in the threadpool)
+        flight.refresh(key, fn, *args)           # background rebuild, no-op if one is running
+    """
+
+    def __init__(self, namespace: str, background_workers: int = 2):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=background_workers,
+                                            thread_name_prefix=f"refresh-{namespace}")
+
+    def _claim(self, key):
+        """Returns (future, is_leader)"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _lead(self, key, future: Future, wait: bool, fn, args):
+        try:
+            with advisory_lock(advisory_lock_key(self.namespace, key), wait=wait) as acquired:
+                # Background refresh: another process is already rebuilding this key
+                result = fn(*args) if acquired or wait else None
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def run(self, key, fn, *args):
+        while True:
+            future, is_leader = self._claim(key)
+            if is_leader:
+                return self._lead(key, future, True, fn, args)
+            logger.info(f"🔁 [{self.namespace}] waiting for running computation of {key}")
+            result = future.result()
+            # None: it was a background refresh that another process handled - compute ourselves
+            if result is not None:
+                return result
+
+    async def run_async(self, key, fn, *args):
+        while True:
+            future, is_leader = self._claim(key)
+            if is_leader:
+                return await run_in_threadpool(self._lead, key, future, True, fn, args)
+            logger.info(f"🔁 [{self.namespace}] waiting for running computation of {key}")
+            result = await asyncio.wrap_future(future)
+            if result is not None:
+                return result
+
+    def refresh(self, key, fn, *args) -> bool:
+        """Schedules fn in the background; False if a computation for key is already running"""
+        future, is_leader = self._claim(key)
+        if not is_leader:
+            return False
+
+        def background():
+            try:
+                self._lead(key, future, False, fn, args)
+            except Exception as e:
+                logger.error(f"❌ [{self.namespace}] background refresh of {key} failed: {e}")
+
+        self._executor.submit(background)
+        return True
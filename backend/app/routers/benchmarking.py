@@ -5,6 +5,7 @@ Adds industry comparison and competitor analysis features.
 from fastapi import APIRouter
 from sqlalchemy import text
 from app.core.database import engine
+from app.core.cache import cached
 import logging
 
 router = APIRouter()
@@ -12,6 +13,7 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/companies/{regcode}/benchmark")
+@cached(ttl=3600, maxsize=2048)
 def get_company_benchmark(regcode: int):
     """
     Calculate company's position within its industry.
@@ -127,6 +129,7 @@ def get_company_benchmark(regcode: int):
 
 
 @router.get("/companies/{regcode}/competitors")
+@cached(ttl=3600, maxsize=2048)
 def get_top_competitors(regcode: str, limit: int = 5):
     """
     Find nearest neighbors in the same industry by turnover.
@@ -217,6 +220,7 @@ def get_top_competitors(regcode: str, limit: int = 5):
 
 
 @router.get("/industries")
+@cached(ttl=3600, maxsize=1)
 def get_industry_statistics():
     """
     Get statistics for all industries.
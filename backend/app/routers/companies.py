@@ -1,6 +1,15 @@
 from fastapi import APIRouter, HTTPException, Response, Request, Depends, Query, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import text
-from app.core.database import engine
+from sqlalchemy.exc import ProgrammingError
+from app.core.database import engine, async_engine, fetch_all, fetch_one, run_sync
+from app.core.payload import encode_payload, profile_response, access_variant, dumps, PROFILE_VARIANT_COLUMNS
+from app.core.single_flight import SingleFlight
+from app.core.shared_cache import get_backend, versioned_key
+from app.core.cache import data_version, current_data_version
+from app.core.etag import etag
+import orjson
+import asyncio
 import logging
 import math
 from concurrent.futures import ThreadPoolExecutor
@@ -9,6 +18,7 @@ from app.routers.auth import get_current_user
 from typing import Optional
 import json
 import time
+from types import SimpleNamespace
 from app.routers.benchmarking import get_company_benchmark, get_top_competitors
 
 def time_execution(name, func, *args, **kwargs):
@@ -45,6 +55,16 @@ def safe_float(val):
     except (ValueError, TypeError):
         return None
 
+def parse_regcode(regcode: str) -> int:
+    """
+    Path regcode -> int. asyncpg sends typed parameters, so '40003...' is not
+    cast to BIGINT by the server as it was with psycopg2's literal strings.
+    """
+    try:
+        return int(regcode)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=404, detail="Company not found")
+
 def bulk_fetch_financials(conn, regcodes: list, year: int) -> dict:
     """
     Fetch financial data for multiple companies in a single query.
@@ -112,252 +132,330 @@ def calculate_company_size(employees: int, turnover: float, assets: float) -> st
 # REUSABLE SERVICE LOGIC
 # ==========================
 
+FINANCIAL_HISTORY_QUERY = text("""
+    SELECT year, turnover, profit, employees, cash_balance,
+           current_ratio, quick_ratio, cash_ratio,
+           net_profit_margin, roe, roa, debt_to_equity, equity_ratio, ebitda,
+           interest_expenses, depreciation_expenses, provision_for_income_taxes, by_nature_labour_expenses,
+           accounts_receivable, inventories, current_liabilities, non_current_liabilities, equity, total_assets, total_current_assets,
+           cfo_im_net_operating_cash_flow, cff_net_financing_cash_flow, cfi_acquisition_of_fixed_assets_intangible_assets,
+           cfo_im_income_taxes_paid
+    FROM financial_reports 
+    WHERE company_regcode = :r AND (source_type IS NULL OR source_type = 'UGP') 
+    ORDER BY year DESC
+""")
+
 def get_financial_history(regcode: int):
     with engine.connect() as conn:
-        fin_rows = conn.execute(text("""
-            SELECT year, turnover, profit, employees, cash_balance,
-                   current_ratio, quick_ratio, cash_ratio,
-                   net_profit_margin, roe, roa, debt_to_equity, equity_ratio, ebitda,
-                   interest_expenses, depreciation_expenses, provision_for_income_taxes, by_nature_labour_expenses,
-                   accounts_receivable, inventories, current_liabilities, non_current_liabilities, equity, total_assets, total_current_assets,
-                   cfo_im_net_operating_cash_flow, cff_net_financing_cash_flow, cfi_acquisition_of_fixed_assets_intangible_assets,
-                   cfo_im_income_taxes_paid
-            FROM financial_reports 
-            WHERE company_regcode = :r AND (source_type IS NULL OR source_type = 'UGP') 
-            ORDER BY year DESC
-        """), {"r": regcode}).fetchall()
-        
-        history = []
-        prev_turnover = None
-        prev_profit = None
-        
-        fin_list = list(fin_rows)
-        fin_list.reverse()
+        fin_rows = conn.execute(FINANCIAL_HISTORY_QUERY, {"r": regcode}).fetchall()
+    return financial_history_from_rows(fin_rows)
+
+def financial_history_from_rows(fin_rows):
+    """FINANCIAL_HISTORY_QUERY rows (newest first) -> history with year-over-year growth"""
+    history = []
+    prev_turnover = None
+    prev_profit = None
+    
+    fin_list = list(fin_rows)
+    fin_list.reverse()
+    
+    for f in fin_list:
+        row = {
+            "year": f.year,
+            "turnover": safe_float(f.turnover),
+            "profit": safe_float(f.profit),
+            "employees": f.employees,
+            "cash_balance": safe_float(f.cash_balance),
+            "turnover_growth": None,
+            "profit_growth": None,
+            "current_ratio": safe_float(f.current_ratio),
+            "quick_ratio": safe_float(f.quick_ratio),
+            "cash_ratio": safe_float(f.cash_ratio),
+            "net_profit_margin": safe_float(f.net_profit_margin),
+            "roe": safe_float(f.roe),
+            "roa": safe_float(f.roa),
+            "debt_to_equity": safe_float(f.debt_to_equity),
+            "equity_ratio": safe_float(f.equity_ratio),
+            "ebitda": safe_float(f.ebitda),
+            # Extended fields
+            "interest_payment": safe_float(f.interest_expenses),
+            "depreciation": safe_float(f.depreciation_expenses),
+            "corporate_income_tax": safe_float(f.provision_for_income_taxes),
+            "labour_costs": safe_float(f.by_nature_labour_expenses),
+            "accounts_receivable": safe_float(f.accounts_receivable),
+            "inventories": safe_float(f.inventories),
+            "current_liabilities": safe_float(f.current_liabilities),
+            "non_current_liabilities": safe_float(f.non_current_liabilities),
+            "equity": safe_float(f.equity),
+            "total_assets": safe_float(f.total_assets),
+            "total_current_assets": safe_float(f.total_current_assets),
+            "cfo": safe_float(f.cfo_im_net_operating_cash_flow),
+            "cff": safe_float(f.cff_net_financing_cash_flow),
+            "cfi": safe_float(f.cfi_acquisition_of_fixed_assets_intangible_assets),
+            "taxes_paid_cf": safe_float(f.cfo_im_income_taxes_paid)
+        }
         
-        for f in fin_list:
-            row = {
-                "year": f.year,
-                "turnover": safe_float(f.turnover),
-                "profit": safe_float(f.profit),
-                "employees": f.employees,
-                "cash_balance": safe_float(f.cash_balance),
-                "turnover_growth": None,
-                "profit_growth": None,
-                "current_ratio": safe_float(f.current_ratio),
-                "quick_ratio": safe_float(f.quick_ratio),
-                "cash_ratio": safe_float(f.cash_ratio),
-                "net_profit_margin": safe_float(f.net_profit_margin),
-                "roe": safe_float(f.roe),
-                "roa": safe_float(f.roa),
-                "debt_to_equity": safe_float(f.debt_to_equity),
-                "equity_ratio": safe_float(f.equity_ratio),
-                "ebitda": safe_float(f.ebitda),
-                # Extended fields
-                "interest_payment": safe_float(f.interest_expenses),
-                "depreciation": safe_float(f.depreciation_expenses),
-                "corporate_income_tax": safe_float(f.provision_for_income_taxes),
-                "labour_costs": safe_float(f.by_nature_labour_expenses),
-                "accounts_receivable": safe_float(f.accounts_receivable),
-                "inventories": safe_float(f.inventories),
-                "current_liabilities": safe_float(f.current_liabilities),
-                "non_current_liabilities": safe_float(f.non_current_liabilities),
-                "equity": safe_float(f.equity),
-                "total_assets": safe_float(f.total_assets),
-                "total_current_assets": safe_float(f.total_current_assets),
-                "cfo": safe_float(f.cfo_im_net_operating_cash_flow),
-                "cff": safe_float(f.cff_net_financing_cash_flow),
-                "cfi": safe_float(f.cfi_acquisition_of_fixed_assets_intangible_assets),
-                "taxes_paid_cf": safe_float(f.cfo_im_income_taxes_paid)
-            }
-            
-            turnover_val = safe_float(f.turnover)
-            profit_val = safe_float(f.profit)
-            if prev_turnover and turnover_val and prev_turnover != 0:
-                row["turnover_growth"] = round(((turnover_val - prev_turnover) / abs(prev_turnover)) * 100, 1)
-            if prev_profit and profit_val and prev_profit != 0:
-                row["profit_growth"] = round(((profit_val - prev_profit) / abs(prev_profit)) * 100, 1)
-            
-            prev_turnover = turnover_val
-            prev_profit = profit_val
-            history.append(row)
+        turnover_val = safe_float(f.turnover)
+        profit_val = safe_float(f.profit)
+        if prev_turnover and turnover_val and prev_turnover != 0:
+            row["turnover_growth"] = round(((turnover_val - prev_turnover) / abs(prev_turnover)) * 100, 1)
+        if prev_profit and profit_val and prev_profit != 0:
+            row["profit_growth"] = round(((profit_val - prev_profit) / abs(prev_profit)) * 100, 1)
         
-        history.reverse()
-        return history
+        prev_turnover = turnover_val
+        prev_profit = profit_val
+        history.append(row)
+    
+    history.reverse()
+    return history
+
+TAX_HISTORY_QUERY = text("""
+    SELECT tp.year, tp.total_tax_paid, tp.labor_tax_iin, tp.social_tax_vsaoi, 
+           tp.avg_employees, tp.nace_code, cm.avg_gross_salary, cm.avg_net_salary
+    FROM tax_payments tp
+    LEFT JOIN company_computed_metrics cm ON tp.company_regcode = cm.company_regcode AND tp.year = cm.year
+    WHERE tp.company_regcode = :r ORDER BY tp.year DESC
+""")
 
 def get_tax_history(regcode: int):
     with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT tp.year, tp.total_tax_paid, tp.labor_tax_iin, tp.social_tax_vsaoi, 
-                   tp.avg_employees, tp.nace_code, cm.avg_gross_salary, cm.avg_net_salary
-            FROM tax_payments tp
-            LEFT JOIN company_computed_metrics cm ON tp.company_regcode = cm.company_regcode AND tp.year = cm.year
-            WHERE tp.company_regcode = :r ORDER BY tp.year DESC
-        """), {"r": regcode}).fetchall()
+        rows = conn.execute(TAX_HISTORY_QUERY, {"r": regcode}).fetchall()
+    return tax_history_from_rows(rows)
+
+def tax_history_from_rows(rows):
+    """TAX_HISTORY_QUERY rows -> history, salaries estimated from VSAOI where metrics are missing"""
+    VSAOI_RATE = 0.3409
+    history = []
+    for t in rows:
+        avg_gross = safe_float(t.avg_gross_salary)
+        avg_net = safe_float(t.avg_net_salary)
+        if avg_gross is None and t.social_tax_vsaoi and t.avg_employees and float(t.avg_employees) > 0:
+            vsaoi = float(t.social_tax_vsaoi)
+            employees = float(t.avg_employees)
+            avg_gross = round((vsaoi / VSAOI_RATE) / employees / 12, 2)
+            vsaoi_emp = avg_gross * 0.105
+            iin = (avg_gross - vsaoi_emp) * 0.20
+            avg_net = round(avg_gross - vsaoi_emp - iin, 2)
         
-        VSAOI_RATE = 0.3409
-        history = []
-        for t in rows:
-            avg_gross = safe_float(t.avg_gross_salary)
-            avg_net = safe_float(t.avg_net_salary)
-            if avg_gross is None and t.social_tax_vsaoi and t.avg_employees and float(t.avg_employees) > 0:
-                vsaoi = float(t.social_tax_vsaoi)
-                employees = float(t.avg_employees)
-                avg_gross = round((vsaoi / VSAOI_RATE) / employees / 12, 2)
-                vsaoi_emp = avg_gross * 0.105
-                iin = (avg_gross - vsaoi_emp) * 0.20
-                avg_net = round(avg_gross - vsaoi_emp - iin, 2)
-            
-            history.append({
-                "year": t.year,
-                "total_tax_paid": safe_float(t.total_tax_paid),
-                "labor_tax_iin": safe_float(t.labor_tax_iin),
-                "social_tax_vsaoi": safe_float(t.social_tax_vsaoi),
-                "avg_employees": safe_float(t.avg_employees),
-                "nace_code": t.nace_code,
-                "avg_gross_salary": avg_gross,
-                "avg_net_salary": avg_net
-            })
-        return history
+        history.append({
+            "year": t.year,
+            "total_tax_paid": safe_float(t.total_tax_paid),
+            "labor_tax_iin": safe_float(t.labor_tax_iin),
+            "social_tax_vsaoi": safe_float(t.social_tax_vsaoi),
+            "avg_employees": safe_float(t.avg_employees),
+            "nace_code": t.nace_code,
+            "avg_gross_salary": avg_gross,
+            "avg_net_salary": avg_net
+        })
+    return history
+
+RATING_QUERY = text("""
+    SELECT rating_grade, rating_explanation, last_evaluated_on FROM company_ratings WHERE company_regcode = :r
+""")
 
 def get_rating(regcode: int):
     with engine.connect() as conn:
-        res = conn.execute(text("SELECT rating_grade, rating_explanation, last_evaluated_on FROM company_ratings WHERE company_regcode = :r"), {"r": regcode}).fetchone()
-        if res:
-            return {"grade": res.rating_grade, "explanation": res.rating_explanation, "date": str(res.last_evaluated_on) if res.last_evaluated_on else None}
-        return None
+        res = conn.execute(RATING_QUERY, {"r": regcode}).fetchone()
+    return rating_from_row(res)
+
+def rating_from_row(res):
+    if res:
+        return {"grade": res.rating_grade, "explanation": res.rating_explanation, "date": str(res.last_evaluated_on) if res.last_evaluated_on else None}
+    return None
+
+RISKS_QUERY = text("""
+    SELECT risk_type, description, start_date, risk_score, active,
+           sanction_program, sanction_list_text, legal_base_url,
+           suspension_code, suspension_grounds,
+           measure_type, institution_name, case_number,
+           liquidation_type, liquidation_grounds
+    FROM risks WHERE company_regcode = :r
+    ORDER BY COALESCE(active, TRUE) DESC, risk_score DESC, start_date DESC
+""")
 
 def get_risks(regcode: int):
     with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT risk_type, description, start_date, risk_score, active,
-                   sanction_program, sanction_list_text, legal_base_url,
-                   suspension_code, suspension_grounds,
-                   measure_type, institution_name, case_number,
-                   liquidation_type, liquidation_grounds
-            FROM risks WHERE company_regcode = :r
-            ORDER BY COALESCE(active, TRUE) DESC, risk_score DESC, start_date DESC
-        """), {"r": regcode}).fetchall()
+        rows = conn.execute(RISKS_QUERY, {"r": regcode}).fetchall()
+    return risks_from_rows(rows)
+
+def risks_from_rows(rows):
+    """RISKS_QUERY rows -> (risks by type, total active risk score)"""
+    # Default scores if missing in DB
+    DEFAULT_SCORES = {
+        'sanction': 100,
+        'liquidation': 50,
+        'suspension': 30,
+        'securing_measure': 10
+    }
+    
+    total_score = 0
+    by_type = {'sanctions': [], 'liquidations': [], 'suspensions': [], 'securing_measures': []}
+    for r in rows:
+        is_active = r.active if r.active is not None else True
         
-        # Default scores if missing in DB
-        DEFAULT_SCORES = {
-            'sanction': 100,
-            'liquidation': 50,
-            'suspension': 30,
-            'securing_measure': 10
-        }
+        # Use DB score if provided and >0, else fallback to default
+        current_score = r.risk_score if (r.risk_score and r.risk_score > 0) else DEFAULT_SCORES.get(r.risk_type, 0)
         
-        total_score = 0
-        by_type = {'sanctions': [], 'liquidations': [], 'suspensions': [], 'securing_measures': []}
-        for r in rows:
-            is_active = r.active if r.active is not None else True
-            
-            # Use DB score if provided and >0, else fallback to default
-            current_score = r.risk_score if (r.risk_score and r.risk_score > 0) else DEFAULT_SCORES.get(r.risk_type, 0)
+        if is_active:
+            total_score += current_score
             
-            if is_active:
-                total_score += current_score
-                
-            risk = {
-                "type": r.risk_type,
-                "description": r.description,
-                "date": str(r.start_date) if r.start_date else None,
-                "score": current_score,
-                "active": is_active
-            }
-            if r.risk_type == 'sanction':
-                risk.update({"program": r.sanction_program, "list_text": r.sanction_list_text, "legal_base_url": r.legal_base_url})
-                by_type['sanctions'].append(risk)
-            elif r.risk_type == 'liquidation':
-                risk.update({"liquidation_type": r.liquidation_type, "grounds": r.liquidation_grounds})
-                by_type['liquidations'].append(risk)
-            elif r.risk_type == 'suspension':
-                risk.update({"suspension_code": r.suspension_code, "grounds": r.suspension_grounds})
-                by_type['suspensions'].append(risk)
-            elif r.risk_type == 'securing_measure':
-                risk.update({"measure_type": r.measure_type, "institution": r.institution_name, "case_number": r.case_number})
-                by_type['securing_measures'].append(risk)
-        return by_type, total_score
+        risk = {
+            "type": r.risk_type,
+            "description": r.description,
+            "date": str(r.start_date) if r.start_date else None,
+            "score": current_score,
+            "active": is_active
+        }
+        if r.risk_type == 'sanction':
+            risk.update({"program": r.sanction_program, "list_text": r.sanction_list_text, "legal_base_url": r.legal_base_url})
+            by_type['sanctions'].append(risk)
+        elif r.risk_type == 'liquidation':
+            risk.update({"liquidation_type": r.liquidation_type, "grounds": r.liquidation_grounds})
+            by_type['liquidations'].append(risk)
+        elif r.risk_type == 'suspension':
+            risk.update({"suspension_code": r.suspension_code, "grounds": r.suspension_grounds})
+            by_type['suspensions'].append(risk)
+        elif r.risk_type == 'securing_measure':
+            risk.update({"measure_type": r.measure_type, "institution": r.institution_name, "case_number": r.case_number})
+            by_type['securing_measures'].append(risk)
+    return by_type, total_score
+
+PERSONS_QUERY = text("""
+    SELECT person_name, role, share_percent, date_from, person_code, birth_date,
+           position, rights_of_representation, representation_with_at_least,
+           number_of_shares, share_nominal_value, share_currency, legal_entity_regcode,
+           nationality, residence, entity_type
+    FROM persons WHERE company_regcode = :r
+""")
+
+COMPANY_CAPITAL_QUERY = text("SELECT total_capital FROM companies WHERE regcode = :r")
 
 def get_persons(regcode: int):
     with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT person_name, role, share_percent, date_from, person_code, birth_date,
-                   position, rights_of_representation, representation_with_at_least,
-                   number_of_shares, share_nominal_value, share_currency, legal_entity_regcode,
-                   nationality, residence, entity_type
-            FROM persons WHERE company_regcode = :r
-        """), {"r": regcode}).fetchall()
+        rows = conn.execute(PERSONS_QUERY, {"r": regcode}).fetchall()
         
         # Try to get total capital from company first if possible
-        company_reg = conn.execute(text("SELECT total_capital FROM companies WHERE regcode = :r"), {"r": regcode}).fetchone()
-        db_total_capital = float(company_reg.total_capital) if company_reg and company_reg.total_capital else 0
-        
-        calc_total_capital = sum((float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)) for p in rows if p.role == 'member')
-        total_capital = max(calc_total_capital, db_total_capital)
-        
-        ubos, members, officers = [], [], []
-        for p in rows:
-            birth_date = str(p.birth_date) if hasattr(p, 'birth_date') and p.birth_date else None
-            try:
-                entity_type = p.entity_type if hasattr(p, 'entity_type') else None
+        company_reg = conn.execute(COMPANY_CAPITAL_QUERY, {"r": regcode}).fetchone()
+    return persons_from_rows(rows, company_reg.total_capital if company_reg else None)
+
+def persons_from_rows(rows, company_total_capital):
+    """PERSONS_QUERY rows -> (ubos, members, officers, total_capital)"""
+    db_total_capital = float(company_total_capital) if company_total_capital else 0
+    
+    calc_total_capital = sum((float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)) for p in rows if p.role == 'member')
+    total_capital = max(calc_total_capital, db_total_capital)
+    
+    ubos, members, officers = [], [], []
+    for p in rows:
+        birth_date = str(p.birth_date) if hasattr(p, 'birth_date') and p.birth_date else None
+        try:
+            entity_type = p.entity_type if hasattr(p, 'entity_type') else None
+            
+            if p.role == 'ubo':
+                ubos.append({
+                    "name": p.person_name, "person_code": p.person_code, "nationality": p.nationality, "residence": p.residence,
+                    "registered_on": str(p.date_from) if p.date_from else None, "birth_date": birth_date
+                })
+            elif p.role == 'member':
+                share_value = float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)
+                percent = (share_value / total_capital * 100) if total_capital > 0 else 0
                 
-                if p.role == 'ubo':
-                    ubos.append({
-                        "name": p.person_name, "person_code": p.person_code, "nationality": p.nationality, "residence": p.residence,
-                        "registered_on": str(p.date_from) if p.date_from else None, "birth_date": birth_date
-                    })
-                elif p.role == 'member':
-                    share_value = float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)
-                    percent = (share_value / total_capital * 100) if total_capital > 0 else 0
-                    
-                    # Fallback to stored percent
-                    if (percent == 0 or percent is None) and hasattr(p, 'share_percent') and p.share_percent:
-                        percent = float(p.share_percent)
-                    
-                    # If we have percent but share_value is 0, back-calculate from total_capital
-                    if share_value == 0 and percent > 0 and total_capital > 0:
-                        share_value = total_capital * (percent / 100)
-                    
-                    # Determine if entity has a profile page
-                    # FOREIGN_ENTITY = no profile, others = has profile
-                    legal_regcode = None
-                    if p.legal_entity_regcode:
-                        try:
-                            legal_regcode = int(str(p.legal_entity_regcode)) 
-                        except ValueError:
-                            pass # Keep as None if not a valid integer
-                            
-                    has_profile = entity_type != 'FOREIGN_ENTITY'  # FOREIGN_ENTITY never has profile
-                    
-                    members.append({
-                        "name": p.person_name, "person_code": p.person_code,
-                        "legal_entity_regcode": legal_regcode,
-                        "has_profile": has_profile,  # Based on entity_type from DB
-                        "entity_type": entity_type,  # Pass through for debugging/future use
-                        "number_of_shares": int(p.number_of_shares) if p.number_of_shares else None,
-                        "share_value": round(share_value, 2), "share_currency": p.share_currency or "EUR",
-                        "percent": round(percent, 2), "date_from": str(p.date_from) if p.date_from else None, "birth_date": birth_date
-                    })
-                elif p.role == 'officer':
-                    officers.append({
-                        "name": p.person_name, "person_code": p.person_code, "position": p.position,
-                        "rights_of_representation": p.rights_of_representation,
-                        "representation_with_at_least": int(p.representation_with_at_least) if p.representation_with_at_least else None,
-                        "registered_on": str(p.date_from) if p.date_from else None, "birth_date": birth_date
-                    })
-            except Exception as e:
-                logger.error(f"Error processing person row: {e}")
-                logger.error(f"Row data: {p}")
-                # Continue to next row instead of crashing request
-                continue
-        return ubos, members, officers, total_capital
+                # Fallback to stored percent
+                if (percent == 0 or percent is None) and hasattr(p, 'share_percent') and p.share_percent:
+                    percent = float(p.share_percent)
+                
+                # If we have percent but share_value is 0, back-calculate from total_capital
+                if share_value == 0 and percent > 0 and total_capital > 0:
+                    share_value = total_capital * (percent / 100)
+                
+                # Determine if entity has a profile page
+                # FOREIGN_ENTITY = no profile, others = has profile
+                legal_regcode = None
+                if p.legal_entity_regcode:
+                    try:
+                        legal_regcode = int(str(p.legal_entity_regcode)) 
+                    except ValueError:
+                        pass # Keep as None if not a valid integer
+                        
+                has_profile = entity_type != 'FOREIGN_ENTITY'  # FOREIGN_ENTITY never has profile
+                
+                members.append({
+                    "name": p.person_name, "person_code": p.person_code,
+                    "legal_entity_regcode": legal_regcode,
+                    "has_profile": has_profile,  # Based on entity_type from DB
+                    "entity_type": entity_type,  # Pass through for debugging/future use
+                    "number_of_shares": int(p.number_of_shares) if p.number_of_shares else None,
+                    "share_value": round(share_value, 2), "share_currency": p.share_currency or "EUR",
+                    "percent": round(percent, 2), "date_from": str(p.date_from) if p.date_from else None, "birth_date": birth_date
+                })
+            elif p.role == 'officer':
+                officers.append({
+                    "name": p.person_name, "person_code": p.person_code, "position": p.position,
+                    "rights_of_representation": p.rights_of_representation,
+                    "representation_with_at_least": int(p.representation_with_at_least) if p.representation_with_at_least else None,
+                    "registered_on": str(p.date_from) if p.date_from else None, "birth_date": birth_date
+                })
+        except Exception as e:
+            logger.error(f"Error processing person row: {e}")
+            logger.error(f"Row data: {p}")
+            # Continue to next row instead of crashing request
+            continue
+    return ubos, members, officers, total_capital
+
+PROCUREMENTS_QUERY = text("""
+    SELECT authority_name, subject, amount, contract_date FROM procurements WHERE winner_regcode = :r ORDER BY contract_date DESC LIMIT 10
+""")
 
 def get_procurements(regcode: int):
     with engine.connect() as conn:
-        rows = conn.execute(text("SELECT authority_name, subject, amount, contract_date FROM procurements WHERE winner_regcode = :r ORDER BY contract_date DESC LIMIT 10"), {"r": regcode}).fetchall()
-        return [{"authority": p.authority_name, "subject": p.subject, "amount": safe_float(p.amount), "date": str(p.contract_date)} for p in rows]
+        rows = conn.execute(PROCUREMENTS_QUERY, {"r": regcode}).fetchall()
+    return procurements_from_rows(rows)
+
+def procurements_from_rows(rows):
+    return [{"authority": p.authority_name, "subject": p.subject, "amount": safe_float(p.amount), "date": str(p.contract_date)} for p in rows]
+
+def _json_rows(query) -> str:
+    """A section query as a json array of its rows (json_agg keeps the subquery's ORDER BY)"""
+    return f"(SELECT COALESCE(json_agg(s), '[]'::json) FROM ({query.text}) s)"
+
+# Profile sections: name -> query. After each section the statement takes clock_timestamp(),
+# so the difference to the previous one is the server time of that section's subquery
+# (scalar subqueries are evaluated in select-list order).
+PROFILE_SECTIONS = {
+    "get_financial_history": FINANCIAL_HISTORY_QUERY,
+    "get_risks": RISKS_QUERY,
+    "get_persons": PERSONS_QUERY,
+    "get_procurements": PROCUREMENTS_QUERY,
+    "get_rating": RATING_QUERY,
+    "get_tax_history": TAX_HISTORY_QUERY,
+}
+
+def _profile_query(with_persons: bool):
+    columns = ["clock_timestamp() AS t_start"]
+    for name, query in PROFILE_SECTIONS.items():
+        if name == "get_persons" and not with_persons:
+            continue
+        columns.append(f"{_json_rows(query)} AS {name}")
+        if name == "get_persons":
+            columns.append(f"({COMPANY_CAPITAL_QUERY.text}) AS company_total_capital")
+        columns.append(f"clock_timestamp() AS t_{name}")
+    return text("SELECT\n    " + ",\n    ".join(columns))
+
+PROFILE_QUERY = {with_persons: _profile_query(with_persons) for with_persons in (True, False)}
+
+def time_section(name, sql_seconds, func, *args):
+    """time_execution for one section of PROFILE_QUERY: its subquery's server time + processing"""
+    start = time.time()
+    result = func(*args)
+    logger.info(f"[{name}] took {sql_seconds + time.time() - start:.4f}s (sql {sql_seconds:.4f}s)")
+    return result
 
 def build_full_profile(regcode: int, base_company_info: dict):
+    """
+    Every section in one statement on one pooled connection (PROFILE_QUERY):
+    each section comes back as a json array of rows and goes through the same
+    *_from_rows processing as the single-section helpers.
+    """
     start_time = time.time()
 
     # 1. Try to load persons from Cache FIRST to avoid unnecessary DB call
@@ -365,49 +463,56 @@ def build_full_profile(regcode: int, base_company_info: dict):
     ubos, members, officers, total_capital = [], [], [], 0
     persons_loaded = False
     
-    try:
-        with engine.connect() as conn:
-             row = conn.execute(text("SELECT graph_data FROM company_graph_cache WHERE company_regcode = :r"), {"r": regcode}).fetchone()
-             if row and row.graph_data:
-                 cached_graph = row.graph_data
-                 # Check if graph has new structure (officers/members/ubos)
-                 if 'officers' in cached_graph:
-                     ubos = cached_graph.get('ubos', [])
-                     members = cached_graph.get('members', [])
-                     officers = cached_graph.get('officers', [])
-                     total_capital = cached_graph.get('total_capital', 0)
-                     persons_loaded = True
-                     # Inject graph into result to avoid another query later if needed
-                     base_company_info['graph'] = cached_graph
-                     logger.info(f"[{regcode}] Cache HIT for persons graph")
-    except Exception as e:
-        logger.error(f"Failed to load generic cache: {e}")
-    
-    # 2. Concurrent fetching of heavy data
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        f_fin = executor.submit(lambda: time_execution("get_financial_history", get_financial_history, regcode))
-        f_risk = executor.submit(lambda: time_execution("get_risks", get_risks, regcode))
+    with engine.connect() as conn:
+        try:
+            graph_data, is_stale = load_cached_graph(conn, regcode)
+            if graph_data and not is_stale:
+                cached_graph = graph_data
+                # Check if graph has new structure (officers/members/ubos)
+                if 'officers' in cached_graph:
+                    ubos = cached_graph.get('ubos', [])
+                    members = cached_graph.get('members', [])
+                    officers = cached_graph.get('officers', [])
+                    total_capital = cached_graph.get('total_capital', 0)
+                    persons_loaded = True
+                    # Inject graph into result to avoid another query later if needed
+                    base_company_info['graph'] = cached_graph
+                    logger.info(f"[{regcode}] Cache HIT for persons graph")
+        except Exception as e:
+            logger.error(f"Failed to load generic cache: {e}")
+            conn.rollback()
         
-        # Only fetch persons if not in cache
-        if not persons_loaded:
-            f_pers = executor.submit(lambda: time_execution("get_persons", get_persons, regcode))
-        else:
-            f_pers = None
-            
-        f_proc = executor.submit(lambda: time_execution("get_procurements", get_procurements, regcode))
-        f_rate = executor.submit(lambda: time_execution("get_rating", get_rating, regcode))
-        f_tax = executor.submit(lambda: time_execution("get_tax_history", get_tax_history, regcode))
-
-    logger.info(f"[{regcode}] Concurrent execution setup took {time.time() - start_time:.4f}s")
-    
-    financial_history = f_fin.result()
-    tax_history = f_tax.result()
-    rating = f_rate.result()
-    risks_by_type, total_risk_score = f_risk.result()
-    procurements = f_proc.result()
-    
-    if not persons_loaded and f_pers:
-        ubos, members, officers, total_capital = f_pers.result()
+        # 2. All sections in one round-trip (persons only if not in cache)
+        query_start = time.time()
+        row = conn.execute(PROFILE_QUERY[not persons_loaded], {"r": regcode}).fetchone()
+    logger.info(f"[{regcode}] Profile query took {time.time() - query_start:.4f}s")
+
+    sections = {}
+    previous = row.t_start
+    for name in PROFILE_SECTIONS:
+        if name == "get_persons" and persons_loaded:
+            continue
+        finished = getattr(row, f"t_{name}")
+        sections[name] = ([SimpleNamespace(**r) for r in getattr(row, name)], (finished - previous).total_seconds())
+        previous = finished
+
+    financial_history = time_section("get_financial_history", sections["get_financial_history"][1],
+                                     financial_history_from_rows, sections["get_financial_history"][0])
+    tax_history = time_section("get_tax_history", sections["get_tax_history"][1],
+                               tax_history_from_rows, sections["get_tax_history"][0])
+    rating_rows, rating_seconds = sections["get_rating"]
+    rating = time_section("get_rating", rating_seconds, rating_from_row, rating_rows[0] if rating_rows else None)
+    risks_by_type, total_risk_score = time_section("get_risks", sections["get_risks"][1],
+                                                   risks_from_rows, sections["get_risks"][0])
+    procurements = time_section("get_procurements", sections["get_procurements"][1],
+                                procurements_from_rows, sections["get_procurements"][0])
+    
+    if not persons_loaded:
+        ubos, members, officers, total_capital = time_section(
+            "get_persons", sections["get_persons"][1], persons_from_rows,
+            sections["get_persons"][0], row.company_total_capital)
+
+    logger.info(f"[{regcode}] Profile assembled in {time.time() - start_time:.4f}s")
 
     full_data = base_company_info.copy()
     full_data["financial_history"] = financial_history
@@ -476,48 +581,111 @@ def get_sitemap_ids(page: int = Query(1, ge=1), limit: int = Query(50000, le=500
             ]
         }
 
-@router.get("/companies/{regcode}")
-async def get_company_details(regcode: str, response: Response, request: Request, background_tasks: BackgroundTasks):
-    # NO HTTP CACHE - Access control must run every time
-    response.headers["Cache-Control"] = "no-store"
-    
-    # Check Access Level
-    has_full_access = await check_access(request)
-    
-    # 1. Main Info - Get this first to ensure company exists
-    with engine.connect() as conn:
-        res = conn.execute(text("SELECT * FROM companies WHERE regcode = :r"), {"r": regcode}).fetchone()
-        if not res:
-            raise HTTPException(status_code=404, detail="Company not found")
-            
-        # Basic company object
-        company = {
-            "regcode": res.regcode,
-            "name": res.name,
-            "name_in_quotes": res.name_in_quotes if hasattr(res, 'name_in_quotes') else None,
-            "type": res.type if hasattr(res, 'type') else None,
-            "type_text": res.type_text if hasattr(res, 'type_text') else None,
-            "addressid": res.addressid if hasattr(res, 'addressid') else None,
-            "address": res.address,
-            "registration_date": str(res.registration_date),
-            "status": res.status,
-            "sepa_identifier": res.sepa_identifier,
-            "pvn_number": res.pvn_number if hasattr(res, 'pvn_number') else None,
-            "is_pvn_payer": res.is_pvn_payer if hasattr(res, 'is_pvn_payer') else False,
-            "company_size_badge": res.company_size_badge,
-            "latest_size_year": res.latest_size_year if hasattr(res, 'latest_size_year') else None,
-            "size_changed_recently": res.size_changed_recently if hasattr(res, 'size_changed_recently') else False,
-            "nace_code": res.nace_code,
-            "nace_text": res.nace_text,
-            "nace_section": res.nace_section,
-            "nace_section_text": res.nace_section_text,
-            "employee_count": res.employee_count,
-            "tax_data_year": res.tax_data_year,
-            # Add access flag to response so Frontend knows whether to show Teaser UI
-            "has_full_access": has_full_access
-        }
-    
-    # Log view history in background (if user is authenticated)
+_profile_cache_ready = False
+
+async def ensure_profile_cache_table():
+    """CREATE TABLE IF NOT EXISTS once per process instead of on every request"""
+    global _profile_cache_ready
+    if _profile_cache_ready:
+        return
+    async with async_engine.begin() as conn:
+        await conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS company_profile_cache (
+                company_regcode BIGINT PRIMARY KEY,
+                profile_data JSONB,
+                payload BYTEA,
+                payload_gzip BYTEA[],
+                payload_br BYTEA[],
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        # Tables created before the payload columns: ALTER only when needed (it takes an exclusive lock)
+        has_payload = (await conn.execute(text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'company_profile_cache' AND column_name = 'payload_br'
+        """))).fetchone()
+        if not has_payload:
+            await conn.execute(text("""
+                ALTER TABLE company_profile_cache
+                    ADD COLUMN IF NOT EXISTS payload BYTEA,
+                    ADD COLUMN IF NOT EXISTS payload_gzip BYTEA[],
+                    ADD COLUMN IF NOT EXISTS payload_br BYTEA[]
+            """))
+    _profile_cache_ready = True
+
+# profile_data is only read for rows written before the payload columns (or by db/generate_cache.sql)
+# Rows older than PROFILE_CACHE_TTL are still served (stale-while-revalidate) and rebuilt in the background
+PROFILE_CACHE_TTL = "24 HOURS"
+
+PROFILE_CACHE_LOOKUP_QUERY = text(f"""
+    SELECT {PROFILE_VARIANT_COLUMNS},
+           CASE WHEN payload IS NULL THEN profile_data END AS profile_data,
+           updated_at, updated_at > NOW() - INTERVAL '{PROFILE_CACHE_TTL}' AS is_fresh
+    FROM company_profile_cache
+    WHERE company_regcode = :r
+""")
+
+PROFILE_CACHE_FRESH_QUERY = text(f"""
+    SELECT payload, payload_gzip, payload_br, updated_at
+    FROM company_profile_cache
+    WHERE company_regcode = :r AND payload IS NOT NULL
+      AND updated_at > NOW() - INTERVAL '{PROFILE_CACHE_TTL}'
+""")
+
+PROFILE_CACHE_STAMP_QUERY = text("""
+    SELECT updated_at FROM company_profile_cache WHERE company_regcode = :r
+""")
+
+PROFILE_CACHE_SAVE_QUERY = text("""
+    INSERT INTO company_profile_cache (company_regcode, profile_data, payload, payload_gzip, payload_br, updated_at)
+    VALUES (:r, NULL, :payload, :payload_gzip, :payload_br, NOW())
+    ON CONFLICT (company_regcode) DO UPDATE SET
+        profile_data = NULL, payload = EXCLUDED.payload, payload_gzip = EXCLUDED.payload_gzip,
+        payload_br = EXCLUDED.payload_br, updated_at = NOW()
+    RETURNING updated_at
+""")
+
+# Legacy JSONB row -> payload columns, keeping its updated_at (converting does not make it fresher)
+PROFILE_CACHE_CONVERT_QUERY = text("""
+    UPDATE company_profile_cache
+    SET profile_data = NULL, payload = :payload, payload_gzip = :payload_gzip, payload_br = :payload_br
+    WHERE company_regcode = :r AND payload IS NULL
+""")
+
+# One profile build per regcode: concurrent misses wait for it, stale hits schedule one refresh
+profile_flight = SingleFlight("company_profile")
+
+# Shared cache (all workers) in front of company_profile_cache - a hit needs no database query
+PROFILE_SHARED_TTL = 3600
+
+def profile_stamp(updated_at):
+    """company_profile_cache.updated_at as the ETag stamp of that stored profile"""
+    return updated_at.isoformat() if updated_at else None
+
+def profile_stamp_key(version, regcode: int) -> str:
+    return versioned_key(version, "profile", regcode, "stamp")
+
+def profile_shared_keys(version, regcode: int, has_full_access: bool) -> list:
+    """name, payload, gzip and brotli body for one access state - fetched with one multi-get"""
+    access = int(has_full_access)
+    return [versioned_key(version, "profile", regcode, part)
+            for part in ("name", "payload", f"gzip:{access}", f"br:{access}")]
+
+def share_profile(version, regcode: int, name: str, payload: bytes, variants: dict, stamp: str = None):
+    """variants: {has_full_access: (gzip_body, br_body)} - whatever we have at hand; stamp: profile_stamp()"""
+    items = {versioned_key(version, "profile", regcode, "name"): (name or "").encode(),
+             versioned_key(version, "profile", regcode, "payload"): bytes(payload)}
+    if stamp:
+        items[profile_stamp_key(version, regcode)] = stamp.encode()
+    for has_full_access, bodies in variants.items():
+        _, _, gzip_key, br_key = profile_shared_keys(version, regcode, has_full_access)
+        for key, body in ((gzip_key, bodies[0]), (br_key, bodies[1])):
+            if body is not None:
+                items[key] = bytes(body)
+    get_backend().set_many(items, PROFILE_SHARED_TTL)
+
+async def log_company_view(request: Request, background_tasks: BackgroundTasks, regcode: str, name: str):
+    """Log view history in background (if user is authenticated)"""
     try:
         current_user = await get_current_user(request)
         if current_user:
@@ -527,53 +695,181 @@ async def get_company_details(regcode: str, response: Response, request: Request
                 str(current_user.id),
                 str(regcode),
                 'company',
-                company['name'],
+                name,
                 None  # db parameter not used anymore
             )
     except Exception as e:
         # Silently fail if user is not authenticated
         logger.debug(f"History tracking skipped: {e}")
 
-    # Create Cache Table if not exists
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS company_profile_cache (
-                company_regcode BIGINT PRIMARY KEY,
-                profile_data JSONB,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
+async def log_not_modified_view(regcode: str, request: Request, background_tasks: BackgroundTasks, **_):
+    """304 for /companies/{regcode}: the body is skipped, the view still goes to history"""
+    try:
+        if await get_current_user(request) is None:
+            return
+        res = await fetch_one(text("SELECT name FROM companies WHERE regcode = :r"), {"r": parse_regcode(regcode)})
+        if res:
+            await log_company_view(request, background_tasks, regcode, res.name)
+    except Exception as e:
+        logger.debug(f"History tracking skipped: {e}")
 
-    # 2. Try Cache
-    full_profile = None
-    with engine.connect() as conn:
-        row = conn.execute(text("SELECT profile_data FROM company_profile_cache WHERE company_regcode = :r AND updated_at > NOW() - INTERVAL '24 HOURS'"), {"r": regcode}).fetchone()
-        if row and row.profile_data:
-            full_profile = row.profile_data
-            full_profile["has_full_access"] = has_full_access
-            logger.info(f"[CACHE] Hit for company profile {regcode}")
 
-    if not full_profile:
-        logger.info(f"[CACHE] Miss for company profile {regcode}. Calculating...")
-        full_profile = build_full_profile(regcode, company)
-        full_profile["has_full_access"] = has_full_access
+# Company pages: browsers revalidate every time (access is re-checked), 304 while
+# data_version and the access flag (and, for /companies/{regcode}, the stored profile) are unchanged
+COMPANY_CACHE_CONTROL = "private, no-cache"
+
+
+async def profile_cache_stamp(regcode: str, **_):
+    """
+    updated_at of the stored profile, part of the /companies/{regcode} ETag: the profile
+    is rebuilt on its own TTL (stale-while-revalidate), not on data_version, and a
+    rebuilt body must not be answered with 304.
+    """
+    r = parse_regcode(regcode)
+    # Shared cache first (written together with the shared body), so a shared hit stays database-free
+    version = await current_data_version()
+    stamp = await run_in_threadpool(get_backend().get, profile_stamp_key(version, r))
+    if stamp is not None:
+        return stamp.decode()
+    try:
+        row = await fetch_one(PROFILE_CACHE_STAMP_QUERY, {"r": r})
+    except Exception as e:
+        # company_profile_cache not created yet - the handler creates it
+        logger.debug(f"Profile cache stamp unavailable: {e}")
+        return None
+    return profile_stamp(row.updated_at) if row else None
+
+
+def company_from_row(res) -> dict:
+    """Basic company object (SELECT * FROM companies row) that build_full_profile starts from"""
+    return {
+        "regcode": res.regcode,
+        "name": res.name,
+        "name_in_quotes": res.name_in_quotes if hasattr(res, 'name_in_quotes') else None,
+        "type": res.type if hasattr(res, 'type') else None,
+        "type_text": res.type_text if hasattr(res, 'type_text') else None,
+        "addressid": res.addressid if hasattr(res, 'addressid') else None,
+        "address": res.address,
+        "registration_date": str(res.registration_date),
+        "status": res.status,
+        "sepa_identifier": res.sepa_identifier,
+        "pvn_number": res.pvn_number if hasattr(res, 'pvn_number') else None,
+        "is_pvn_payer": res.is_pvn_payer if hasattr(res, 'is_pvn_payer') else False,
+        "company_size_badge": res.company_size_badge,
+        "latest_size_year": res.latest_size_year if hasattr(res, 'latest_size_year') else None,
+        "size_changed_recently": res.size_changed_recently if hasattr(res, 'size_changed_recently') else False,
+        "nace_code": res.nace_code,
+        "nace_text": res.nace_text,
+        "nace_section": res.nace_section,
+        "nace_section_text": res.nace_section_text,
+        "employee_count": res.employee_count,
+        "tax_data_year": res.tax_data_year,
+    }
+
+def refresh_profile_cache(regcode: int, company: dict) -> dict:
+    """
+    Fresh payload columns for one company (runs as the profile_flight leader).
+    Another worker may have rebuilt it while we waited for the lock - reuse that.
+    """
+    version = data_version()
+    with engine.connect() as conn:
+        row = conn.execute(PROFILE_CACHE_FRESH_QUERY, {"r": regcode}).fetchone()
+    stamp = None
+    if row:
+        stamp = profile_stamp(row.updated_at)
+        encoded = {
+            "payload": bytes(row.payload),
+            "payload_gzip": [bytes(b) for b in row.payload_gzip] if row.payload_gzip else None,
+            "payload_br": [bytes(b) for b in row.payload_br] if row.payload_br else None,
+        }
+    else:
+        start = time.time()
+        # serialization + compression done once here, reused by every hit
+        encoded = encode_payload(build_full_profile(regcode, company))
         try:
-            with engine.connect() as conn:
-                conn.execute(text("INSERT INTO company_profile_cache (company_regcode, profile_data, updated_at) VALUES (:r, :d, NOW()) ON CONFLICT (company_regcode) DO UPDATE SET profile_data = :d, updated_at = NOW()"), {"r": regcode, "d": json.dumps(full_profile, default=str)})
-                conn.commit()
+            with engine.begin() as conn:
+                saved = conn.execute(PROFILE_CACHE_SAVE_QUERY, {"r": regcode, **encoded}).fetchone()
+            stamp = profile_stamp(saved.updated_at) if saved else None
         except Exception as e:
             logger.error(f"[CACHE] Error saving profile: {e}")
+        logger.info(f"[CACHE] Rebuilt company profile {regcode} in {time.time() - start:.2f}s")
+
+    share_profile(version, regcode, company["name"], encoded["payload"], {
+        access: (access_variant(encoded["payload_gzip"], access), access_variant(encoded["payload_br"], access))
+        for access in (False, True)
+    }, stamp)
+    return encoded
+
+@router.get("/companies/{regcode}")
+@etag(vary_access=True, variant=profile_cache_stamp, cache_control=COMPANY_CACHE_CONTROL,
+      on_not_modified=log_not_modified_view)
+async def get_company_details(regcode: str, response: Response, request: Request, background_tasks: BackgroundTasks):
+    # Revalidated on every request - access control runs every time (@etag)
+    cache_headers = {"Cache-Control": COMPANY_CACHE_CONTROL}
+    
+    # Check Access Level
+    has_full_access = await check_access(request)
+    
+    r = parse_regcode(regcode)
+
+    # 0. Shared cache: everything for this access state in one multi-get, no database query
+    version = await current_data_version()
+    name, payload_body, gzip_body, br_body = await run_in_threadpool(
+        get_backend().get_many, profile_shared_keys(version, r, has_full_access))
+    if payload_body is not None and gzip_body is not None and name is not None:
+        logger.info(f"[CACHE] Shared hit for company profile {regcode}")
+        await log_company_view(request, background_tasks, regcode, name.decode())
+        return profile_response(payload_body, gzip_body, br_body, has_full_access, request, headers=cache_headers)
+
+    await ensure_profile_cache_table()
 
-    # Access Control - Don't scrub data, just add flag for frontend
+    # 1. Main Info + 2. Cache lookup - independent, run concurrently
+    res, cached_row = await asyncio.gather(
+        fetch_one(text("SELECT * FROM companies WHERE regcode = :r"), {"r": r}),
+        fetch_one(PROFILE_CACHE_LOOKUP_QUERY, {"r": r, "access": 1 + int(has_full_access)}),
+    )
+    if not res:
+        raise HTTPException(status_code=404, detail="Company not found")
+
+    await log_company_view(request, background_tasks, regcode, res.name)
+
+    # Stale entry: served below as-is, one background rebuild per regcode (across workers)
+    if cached_row and not cached_row.is_fresh:
+        if profile_flight.refresh(r, refresh_profile_cache, r, company_from_row(res)):
+            logger.info(f"[CACHE] Stale company profile {regcode}, refreshing in background")
+
+    # 2. Try Cache - stored bytes go out as-is, only the access flags envelope is added
+    # Access Control - Don't scrub data, just add flags for frontend
     # Frontend decides what to show/hide based on tab and access level
-    # Overview tab always shows officers summary, other tabs may be locked
-    full_profile["is_locked"] = not has_full_access
+    if cached_row and cached_row.payload is not None:
+        logger.info(f"[CACHE] Hit for company profile {regcode}")
+        if cached_row.is_fresh:
+            await run_in_threadpool(share_profile, version, r, res.name, cached_row.payload,
+                                    {has_full_access: (cached_row.payload_gzip, cached_row.payload_br)},
+                                    profile_stamp(cached_row.updated_at))
+        return profile_response(cached_row.payload, cached_row.payload_gzip, cached_row.payload_br,
+                                has_full_access, request, headers=cache_headers)
+
+    if cached_row and cached_row.profile_data:
+        logger.info(f"[CACHE] Hit for company profile {regcode} (JSONB row, converting)")
+        encoded = await run_in_threadpool(encode_payload, cached_row.profile_data)
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(PROFILE_CACHE_CONVERT_QUERY, {"r": r, **encoded})
+        except Exception as e:
+            logger.error(f"[CACHE] Error saving profile: {e}")
+    else:
+        logger.info(f"[CACHE] Miss for company profile {regcode}. Calculating...")
+        # Concurrent misses for the same regcode share one build (build_full_profile is sync -> threadpool)
+        encoded = await profile_flight.run_async(r, refresh_profile_cache, r, company_from_row(res))
 
-    return full_profile
+    return profile_response(encoded["payload"], access_variant(encoded["payload_gzip"], has_full_access),
+                            access_variant(encoded["payload_br"], has_full_access),
+                            has_full_access, request, headers=cache_headers)
 
 
 @router.get("/companies/{regcode}/quick")
+@etag(vary_access=True, cache_control=COMPANY_CACHE_CONTROL)
 async def get_company_quick(regcode: str, response: Response, request: Request):
     """
     Ultra-fast endpoint for initial page render.
@@ -582,15 +878,17 @@ async def get_company_quick(regcode: str, response: Response, request: Request):
     
     Target: <200ms response time (vs 900ms for full /companies/{regcode})
     """
-    # NO CACHE - Access control must run every time
-    response.headers["Cache-Control"] = "no-store"
+    # Revalidated on every request - access control runs every time (@etag)
+    response.headers["Cache-Control"] = COMPANY_CACHE_CONTROL
     
     # Check Access Level
     has_full_access = await check_access(request)
     
-    with engine.connect() as conn:
-        # Single query: Company + Latest Financial + Rating in one round-trip
-        res = conn.execute(text("""
+    r = parse_regcode(regcode)
+
+    # Company + Latest Financial + Rating in one query, risk summary concurrently on a second connection
+    res, risks_summary = await asyncio.gather(
+        fetch_one(text("""
             SELECT 
                 c.*,
                 f.year as fin_year, f.turnover, f.profit, f.employees as fin_employees,
@@ -609,13 +907,9 @@ async def get_company_quick(regcode: str, response: Response, request: Request):
                 ist.nace_code = SUBSTRING(c.nace_code FROM 1 FOR 3)
                 AND ist.nace_level = 3
             WHERE c.regcode = :r
-        """), {"r": regcode}).fetchone()
-        
-        if not res:
-            raise HTTPException(status_code=404, detail="Company not found")
-        
-        # Get active risks count and total score (single query with fallback scoring)
-        risks_summary = conn.execute(text("""
+        """), {"r": r}),
+        # Active risks count and total score (single query with fallback scoring)
+        fetch_one(text("""
             SELECT 
                 COUNT(*) as count, 
                 SUM(COALESCE(NULLIF(risk_score, 0), 
@@ -636,68 +930,99 @@ async def get_company_quick(regcode: str, response: Response, request: Request):
                 END) as max_severity
             FROM risks 
             WHERE company_regcode = :r AND (active = TRUE OR active IS NULL)
-        """), {"r": regcode}).fetchone()
-        
-        total_risk_score = int(risks_summary.total_score) if risks_summary and risks_summary.total_score else 0
-        
-        return {
-            "regcode": res.regcode,
-            "name": res.name,
-            "name_in_quotes": res.name_in_quotes if hasattr(res, 'name_in_quotes') else None,
-            "type": res.type if hasattr(res, 'type') else None,
-            "type_text": res.type_text if hasattr(res, 'type_text') else None,
-            "addressid": res.addressid if hasattr(res, 'addressid') else None,
-            "address": res.address,
-            "registration_date": str(res.registration_date),
-            "status": res.status,
-            "nace_code": res.nace_code,
-            "nace_text": res.nace_text,
-            "company_size_badge": res.company_size_badge,
-            "pvn_number": res.pvn_number if hasattr(res, 'pvn_number') else None,
-            "is_pvn_payer": res.is_pvn_payer if hasattr(res, 'is_pvn_payer') else False,
-            "industry_avg_salary": res.industry_avg_salary if hasattr(res, 'industry_avg_salary') else None,
-            # Latest finances (just the most recent year)
-            "finances": {
-                "year": res.fin_year,
-                "turnover": safe_float(res.turnover),
-                "profit": safe_float(res.profit),
-                "employees": res.fin_employees
-            },
-            # Rating
-            "rating": {
-                "grade": res.rating_grade,
-                "explanation": res.rating_explanation
-            } if res.rating_grade else None,
-            # Risk summary (not full list)
-            "risk_summary": {
-                "count": risks_summary.count if risks_summary else 0,
-                "total_score": total_risk_score,
-                "level": "CRITICAL" if total_risk_score >= 100 else "HIGH" if total_risk_score >= 50 else "MEDIUM" if total_risk_score >= 30 else "LOW" if total_risk_score > 0 else "NONE"
-            }
+        """), {"r": r}),
+    )
+    
+    if not res:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    total_risk_score = int(risks_summary.total_score) if risks_summary and risks_summary.total_score else 0
+    
+    return {
+        "regcode": res.regcode,
+        "name": res.name,
+        "name_in_quotes": res.name_in_quotes if hasattr(res, 'name_in_quotes') else None,
+        "type": res.type if hasattr(res, 'type') else None,
+        "type_text": res.type_text if hasattr(res, 'type_text') else None,
+        "addressid": res.addressid if hasattr(res, 'addressid') else None,
+        "address": res.address,
+        "registration_date": str(res.registration_date),
+        "status": res.status,
+        "nace_code": res.nace_code,
+        "nace_text": res.nace_text,
+        "company_size_badge": res.company_size_badge,
+        "pvn_number": res.pvn_number if hasattr(res, 'pvn_number') else None,
+        "is_pvn_payer": res.is_pvn_payer if hasattr(res, 'is_pvn_payer') else False,
+        "industry_avg_salary": res.industry_avg_salary if hasattr(res, 'industry_avg_salary') else None,
+        # Latest finances (just the most recent year)
+        "finances": {
+            "year": res.fin_year,
+            "turnover": safe_float(res.turnover),
+            "profit": safe_float(res.profit),
+            "employees": res.fin_employees
+        },
+        # Rating
+        "rating": {
+            "grade": res.rating_grade,
+            "explanation": res.rating_explanation
+        } if res.rating_grade else None,
+        # Risk summary (not full list)
+        "risk_summary": {
+            "count": risks_summary.count if risks_summary else 0,
+            "total_score": total_risk_score,
+            "level": "CRITICAL" if total_risk_score >= 100 else "HIGH" if total_risk_score >= 50 else "MEDIUM" if total_risk_score >= 30 else "LOW" if total_risk_score > 0 else "NONE"
         }
+    }
 
 
 # ================================================================================
 # OPTIMIZED FULL DATA ENDPOINT (Replaces 9 separate API calls with 1)
 # ================================================================================
 
+# One graph computation per regcode: concurrent misses wait for it, stale hits schedule one refresh
+graph_flight = SingleFlight("company_graph")
+GRAPH_SHARED_TTL = 3600
+
 # Helper for graph data (Unified logic for full profile and graph endpoint)
 def _get_graph_data_internal(conn, regcode: int, year: int = 2024):
     """
     Retrieves or calculates comprehensive company graph data.
-    - Checks cache first
-    - If miss: Calculates chain effects, physical person control, etc.
+    - Checks cache first; a stale entry is returned as-is and recalculated in the background
+    - If miss: one calculation per regcode (graph_flight), other requests wait for it
+    """
+    # 1. Try Cache - shared (all workers), then company_graph_cache
+    shared_key = versioned_key(data_version(), "graph", regcode)
+    body = get_backend().get(shared_key)
+    if body is not None:
+        return orjson.loads(body)
+
+    cached_graph, is_stale = load_cached_graph(conn, regcode)
+    if cached_graph:
+        if not is_stale:
+            get_backend().set(shared_key, dumps(cached_graph), GRAPH_SHARED_TTL)
+        elif graph_flight.refresh(regcode, _refresh_graph, regcode, year):
+            logger.info(f"[GRAPH] Cache stale for {regcode}, recalculating in background")
+        return cached_graph
+
+    logger.info(f"[GRAPH] Cache miss for {regcode}, calculating...")
+    return graph_flight.run(regcode, _refresh_graph, regcode, year)
+
+def _refresh_graph(regcode: int, year: int = 2024):
+    """graph_flight leader: re-check the cache (another worker may have just saved it), else calculate"""
+    with engine.connect() as conn:
+        cached_graph, is_stale = load_cached_graph(conn, regcode)
+        graph = cached_graph if cached_graph and not is_stale else _calculate_graph(conn, regcode, year)
+    get_backend().set(versioned_key(data_version(), "graph", regcode), dumps(graph), GRAPH_SHARED_TTL)
+    return graph
+
+def _calculate_graph(conn, regcode: int, year: int = 2024):
+    """
+    - Calculates chain effects, physical person control, etc.
     - Fetches financials
     - Enriches and formats data
     - Saves to cache
     """
-    # 1. Try Cache
-    cached_graph = conn.execute(text("SELECT graph_data FROM company_graph_cache WHERE company_regcode = :r"), {"r": regcode}).fetchone()
-    if cached_graph and cached_graph.graph_data:
-        return cached_graph.graph_data
-
     # 2. Calculate
-    logger.info(f"[GRAPH] Cache miss for {regcode}, calculating...")
     comp = find_all_linked_entities(conn, regcode, year)
     
     # 3. Collect regs for financials
@@ -761,6 +1086,7 @@ def _get_graph_data_internal(conn, regcode: int, year: int = 2024):
     return result
 
 @router.get("/companies/{regcode}/full")
+@etag(vary_access=True, cache_control=COMPANY_CACHE_CONTROL)
 async def get_company_full_data(regcode: str, response: Response, request: Request):
     """
     🚀 PERFORMANCE OPTIMIZED: Returns ALL company data in a single response.
@@ -769,31 +1095,23 @@ async def get_company_full_data(regcode: str, response: Response, request: Reque
     
     Result: 9x faster page load + reduced server load.
     """
-    response.headers["Cache-Control"] = "no-store"  # Access control requires fresh check
+    response.headers["Cache-Control"] = COMPANY_CACHE_CONTROL  # Access control requires fresh check
     
     # Check Access Level
     has_full_access = await check_access(request)
     
-    # 🚀 PARALLEL OPTIMIZATION: Start benchmark and competitors in background threads
-    # These use separate DB connections and can run concurrently with main queries
-    executor = ThreadPoolExecutor(max_workers=2)
-    benchmark_future = executor.submit(get_company_benchmark, int(regcode))
-    competitors_future = executor.submit(get_top_competitors, regcode, 5)
+    r = parse_regcode(regcode)
+    params = {"r": r}
     
     try:
-        with engine.connect() as conn:
-            # 1. Get basic company info
-            company_row = conn.execute(
-                text("SELECT * FROM companies WHERE regcode = :r"), 
-                {"r": regcode}
-            ).fetchone()
-            
-            if not company_row:
-                executor.shutdown(wait=False)
-                raise HTTPException(status_code=404, detail="Company not found")
-            
-            # 2. Sequential fetching of base data
-            fin_history_rows = conn.execute(text("""
+        # 🚀 PARALLEL: every query on its own async connection, benchmark/competitors
+        # (sync helpers with their own connections) in the thread pool - all awaited together
+        (company_row, fin_history_rows, rating_row, persons_rows, risk_rows, tax_rows, proc_rows,
+         (cached_graph, is_stale), benchmark, competitors) = await asyncio.gather(
+            # 1. Basic company info
+            fetch_one(text("SELECT * FROM companies WHERE regcode = :r"), params),
+            # 2. Base data
+            fetch_all(text("""
                 SELECT year, turnover, profit, employees, cash_balance,
                        current_ratio, quick_ratio, cash_ratio,
                        net_profit_margin, roe, roa, debt_to_equity, equity_ratio, ebitda,
@@ -804,106 +1122,24 @@ async def get_company_full_data(regcode: str, response: Response, request: Reque
                 FROM financial_reports 
                 WHERE company_regcode = :r 
                 ORDER BY year DESC
-            """), {"r": regcode}).fetchall()
-            
-            rating_row = conn.execute(text("""
+            """), params),
+            fetch_one(text("""
                 SELECT cr.rating_grade, cr.last_evaluated_on, cr.rating_explanation, c.nace_code, c.nace_text
                 FROM companies c
                 LEFT JOIN company_ratings cr ON c.regcode = cr.company_regcode
                 WHERE c.regcode = :r
-            """), {"r": regcode}).fetchone()
-
-            persons_rows = conn.execute(text("""
+            """), params),
+            fetch_all(text("""
                 SELECT person_name, person_code, role, share_percent, date_from, 
                        position, rights_of_representation, representation_with_at_least,
                        number_of_shares, share_nominal_value, share_currency, legal_entity_regcode,
                        nationality, residence, entity_type
                 FROM persons WHERE company_regcode = :r
-            """), {"r": regcode}).fetchall()
-
-            # Derive latest_fin from history (guarantees consistency with charts)
-            latest_fin = fin_history_rows[0] if fin_history_rows else None
-            
-            # 4. Get persons (officers, members, ubos) from single 'persons' table
-            
-            # Process persons by role
-            officers, members, ubos = [], [], []
-            db_total_capital = float(company_row.total_capital) if hasattr(company_row, 'total_capital') and company_row.total_capital else 0
-            calc_total_capital = sum((float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)) 
-                              for p in persons_rows if p.role == 'member')
-            total_capital = max(calc_total_capital, db_total_capital)
-            
-            for p in persons_rows:
-                birth_date = str(p.birth_date) if hasattr(p, 'birth_date') and p.birth_date else None
-                if p.role == 'ubo':
-                    ubos.append({
-                        "name": p.person_name,
-                        "person_hash": p.person_code,
-                        "person_code": p.person_code,
-                        "birth_date": birth_date
-                    })
-                elif p.role == 'member':
-                    share_value = float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)
-                    percent = (share_value / total_capital * 100) if total_capital > 0 else 0
-                    if (percent == 0 or percent is None) and hasattr(p, 'share_percent') and p.share_percent:
-                        percent = float(p.share_percent)
-                    
-                    # Back-calculate value if missing
-                    if share_value == 0 and percent > 0 and total_capital > 0:
-                        share_value = total_capital * (percent / 100)
-
-                    # Correctly identify Foreign Entities
-                    entity_type = p.entity_type if hasattr(p, 'entity_type') else None
-                    has_profile = entity_type != 'FOREIGN_ENTITY'
-                    
-                    legal_regcode = None
-                    if p.legal_entity_regcode:
-                        try:
-                            legal_regcode = int(str(p.legal_entity_regcode))
-                        except:
-                            legal_regcode = None # Keep as None if not parseable
-
-                    members.append({
-                        "name": p.person_name,
-                        "number_of_shares": int(p.number_of_shares) if p.number_of_shares else None,
-                        "share_value": round(share_value, 2),
-                        "share_currency": p.share_currency or 'EUR',
-                        "percent": round(percent, 2),
-                        "person_hash": p.person_code,
-                        "person_code": p.person_code,
-                        "date_from": str(p.date_from) if p.date_from else None,
-                        "legal_entity_regcode": legal_regcode,
-                        "entity_type": entity_type,
-                        "has_profile": has_profile,
-                        "birth_date": birth_date
-                    })
-                elif p.role == 'officer':
-                    officers.append({
-                        "name": p.person_name,
-                        "position": p.position,
-                        "person_hash": p.person_code,
-                        "person_code": p.person_code,
-                        "registered_on": str(p.date_from) if p.date_from else None,
-                        "rights_of_representation": p.rights_of_representation,
-                        "representation_with_at_least": p.representation_with_at_least
-                    })
-            
-            # 5. Get risks using existing function
-            risks_by_type, total_risk_score = get_risks(regcode)
-            
-            # 6. Graph data (ASYNC OPTIMIZATION)
-            # Instead of calculating heavy graph here, we return basic structure.
-            # Frontend calls /companies/{regcode}/graph separately.
-            # This makes the initial page load FAST.
-            cached_graph = conn.execute(text("SELECT graph_data FROM company_graph_cache WHERE company_regcode = :r"), {"r": regcode}).fetchone()
-            if cached_graph and cached_graph.graph_data:
-                graph_data = cached_graph.graph_data
-            else:
-                # Return basic empty structure, let frontend fetch via dedicated endpoint
-                graph_data = {"status": "LOADING", "linked": [], "partners": [], "via_person": [], "needs_confirmation": []}
-
-            # 7. Get tax history with metrics
-            tax_rows = conn.execute(text("""
+            """), params),
+            # 5. Risks
+            fetch_all(RISKS_QUERY, params),
+            # 7. Tax history with metrics
+            fetch_all(text("""
                 SELECT tp.year, 
                        tp.labor_tax_iin, 
                        tp.social_tax_vsaoi, 
@@ -914,68 +1150,155 @@ async def get_company_full_data(regcode: str, response: Response, request: Reque
                 LEFT JOIN company_computed_metrics cm ON tp.company_regcode = cm.company_regcode AND tp.year = cm.year
                 WHERE tp.company_regcode = :r
                 ORDER BY tp.year DESC
-            """), {"r": regcode}).fetchall()
-            
-            # Process tax history (Calculate salary if missing)
-            processed_tax_history = []
-            latest_avg_salary = None
-            VSAOI_RATE = 0.3409
-            
-            for t in tax_rows:
-                avg_gross = safe_float(t.avg_gross_salary)
+            """), params),
+            # 8. Procurements (with subject and date)
+            fetch_all(text("""
+                SELECT authority_name, subject, amount, contract_date
+                FROM procurements WHERE winner_regcode = :r
+                ORDER BY contract_date DESC
+            """), params),
+            # 6. Graph data - cache only
+            run_sync(load_cached_graph, r),
+            run_in_threadpool(get_company_benchmark, r),
+            run_in_threadpool(get_top_competitors, regcode, 5),
+        )
+        
+        if not company_row:
+            raise HTTPException(status_code=404, detail="Company not found")
+        
+        # Derive latest_fin from history (guarantees consistency with charts)
+        latest_fin = fin_history_rows[0] if fin_history_rows else None
+        
+        # 4. Get persons (officers, members, ubos) from single 'persons' table
+        
+        # Process persons by role
+        officers, members, ubos = [], [], []
+        db_total_capital = float(company_row.total_capital) if hasattr(company_row, 'total_capital') and company_row.total_capital else 0
+        calc_total_capital = sum((float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)) 
+                          for p in persons_rows if p.role == 'member')
+        total_capital = max(calc_total_capital, db_total_capital)
+        
+        for p in persons_rows:
+            birth_date = str(p.birth_date) if hasattr(p, 'birth_date') and p.birth_date else None
+            if p.role == 'ubo':
+                ubos.append({
+                    "name": p.person_name,
+                    "person_hash": p.person_code,
+                    "person_code": p.person_code,
+                    "birth_date": birth_date
+                })
+            elif p.role == 'member':
+                share_value = float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)
+                percent = (share_value / total_capital * 100) if total_capital > 0 else 0
+                if (percent == 0 or percent is None) and hasattr(p, 'share_percent') and p.share_percent:
+                    percent = float(p.share_percent)
                 
-                # Calculate from VSAOI if missing
-                if avg_gross is None and t.social_tax_vsaoi and t.avg_employees and float(t.avg_employees) > 0:
+                # Back-calculate value if missing
+                if share_value == 0 and percent > 0 and total_capital > 0:
+                    share_value = total_capital * (percent / 100)
+
+                # Correctly identify Foreign Entities
+                entity_type = p.entity_type if hasattr(p, 'entity_type') else None
+                has_profile = entity_type != 'FOREIGN_ENTITY'
+                
+                legal_regcode = None
+                if p.legal_entity_regcode:
                     try:
-                        monthly_vsaoi = float(t.social_tax_vsaoi) / 12 / float(t.avg_employees)
-                        avg_gross = monthly_vsaoi / VSAOI_RATE
+                        legal_regcode = int(str(p.legal_entity_regcode))
                     except:
-                        pass
-                
-                if latest_avg_salary is None and avg_gross:
-                    latest_avg_salary = avg_gross
-
-                processed_tax_history.append({
-                    "year": t.year, 
-                    "total_tax_paid": safe_float(t.total_tax_paid),
-                    "social_tax_vsaoi": safe_float(t.social_tax_vsaoi),
-                    "labor_tax_iin": safe_float(t.labor_tax_iin),
-                    "avg_employees": t.avg_employees,
-                    "avg_gross_salary": round(avg_gross, 2) if avg_gross else None
+                        legal_regcode = None # Keep as None if not parseable
+
+                members.append({
+                    "name": p.person_name,
+                    "number_of_shares": int(p.number_of_shares) if p.number_of_shares else None,
+                    "share_value": round(share_value, 2),
+                    "share_currency": p.share_currency or 'EUR',
+                    "percent": round(percent, 2),
+                    "person_hash": p.person_code,
+                    "person_code": p.person_code,
+                    "date_from": str(p.date_from) if p.date_from else None,
+                    "legal_entity_regcode": legal_regcode,
+                    "entity_type": entity_type,
+                    "has_profile": has_profile,
+                    "birth_date": birth_date
                 })
+            elif p.role == 'officer':
+                officers.append({
+                    "name": p.person_name,
+                    "position": p.position,
+                    "person_hash": p.person_code,
+                    "person_code": p.person_code,
+                    "registered_on": str(p.date_from) if p.date_from else None,
+                    "rights_of_representation": p.rights_of_representation,
+                    "representation_with_at_least": p.representation_with_at_least
+                })
+        
+        # 5. Risks
+        risks_by_type, total_risk_score = risks_from_rows(risk_rows)
+        
+        # 6. Graph data (ASYNC OPTIMIZATION)
+        # Instead of calculating heavy graph here, we return basic structure.
+        # Frontend calls /companies/{regcode}/graph separately.
+        # This makes the initial page load FAST.
+        if cached_graph and not is_stale:
+            graph_data = cached_graph
+        else:
+            # Return basic empty structure, let frontend fetch via dedicated endpoint
+            graph_data = {"status": "LOADING", "linked": [], "partners": [], "via_person": [], "needs_confirmation": []}
+
+        # Process tax history (Calculate salary if missing)
+        processed_tax_history = []
+        latest_avg_salary = None
+        VSAOI_RATE = 0.3409
+        
+        for t in tax_rows:
+            avg_gross = safe_float(t.avg_gross_salary)
             
-            # 8. Get procurements (with subject and date)
-            proc_rows = conn.execute(text("""
-                SELECT authority_name, subject, amount, contract_date
-                FROM procurements WHERE winner_regcode = :r
-                ORDER BY contract_date DESC
-            """), {"r": regcode}).fetchall()
-
-            # Process procurements: Group by authority+date to sum amounts and show all parts
-            proc_map = {}
-            for p in proc_rows:
-                # Key based on date and authority (to group parts of same tender)
-                key = f"{p.contract_date}_{p.authority_name}"
-                if key not in proc_map:
-                    proc_map[key] = {
-                        "authority": p.authority_name,
-                        "subject": p.subject,  # Initial subject
-                        "amount": 0.0,
-                        "contract_date": str(p.contract_date) if p.contract_date else None,
-                        "count": 0
-                    }
-                else:
-                    existing_subject = proc_map[key]["subject"] or ""
-                    if p.subject and p.subject not in existing_subject:
-                        proc_map[key]["subject"] = f"{existing_subject}; {p.subject}" if existing_subject else p.subject
-                
-                proc_map[key]["amount"] += float(p.amount or 0)
-                proc_map[key]["count"] += 1
+            # Calculate from VSAOI if missing
+            if avg_gross is None and t.social_tax_vsaoi and t.avg_employees and float(t.avg_employees) > 0:
+                try:
+                    monthly_vsaoi = float(t.social_tax_vsaoi) / 12 / float(t.avg_employees)
+                    avg_gross = monthly_vsaoi / VSAOI_RATE
+                except:
+                    pass
+            
+            if latest_avg_salary is None and avg_gross:
+                latest_avg_salary = avg_gross
+
+            processed_tax_history.append({
+                "year": t.year, 
+                "total_tax_paid": safe_float(t.total_tax_paid),
+                "social_tax_vsaoi": safe_float(t.social_tax_vsaoi),
+                "labor_tax_iin": safe_float(t.labor_tax_iin),
+                "avg_employees": t.avg_employees,
+                "avg_gross_salary": round(avg_gross, 2) if avg_gross else None
+            })
+        
+        # Process procurements: Group by authority+date to sum amounts and show all parts
+        proc_map = {}
+        for p in proc_rows:
+            # Key based on date and authority (to group parts of same tender)
+            key = f"{p.contract_date}_{p.authority_name}"
+            if key not in proc_map:
+                proc_map[key] = {
+                    "authority": p.authority_name,
+                    "subject": p.subject,  # Initial subject
+                    "amount": 0.0,
+                    "contract_date": str(p.contract_date) if p.contract_date else None,
+                    "count": 0
+                }
+            else:
+                existing_subject = proc_map[key]["subject"] or ""
+                if p.subject and p.subject not in existing_subject:
+                    proc_map[key]["subject"] = f"{existing_subject}; {p.subject}" if existing_subject else p.subject
             
-            processed_procurements = list(proc_map.values())
-            # Sort by date
-            processed_procurements.sort(key=lambda x: x["contract_date"] or "", reverse=True)
+            proc_map[key]["amount"] += float(p.amount or 0)
+            proc_map[key]["count"] += 1
         
+        processed_procurements = list(proc_map.values())
+        # Sort by date
+        processed_procurements.sort(key=lambda x: x["contract_date"] or "", reverse=True)
+    
         # Build response
         return {
             "company": {
@@ -1056,8 +1379,8 @@ async def get_company_full_data(regcode: str, response: Response, request: Reque
             "tax_history": processed_tax_history,
             "procurements": processed_procurements,
             # 🚀 PARALLEL: Collect results from background threads
-            "benchmark": benchmark_future.result(),
-            "competitors": competitors_future.result()
+            "benchmark": benchmark,
+            "competitors": competitors
         }
         
     except HTTPException:
@@ -1065,8 +1388,6 @@ async def get_company_full_data(regcode: str, response: Response, request: Reque
     except Exception as e:
         logger.error(f"Error fetching full data for {regcode}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        executor.shutdown(wait=False)
 
 
 # ================================================================================
@@ -1074,6 +1395,7 @@ async def get_company_full_data(regcode: str, response: Response, request: Reque
 # ================================================================================
 
 @router.get("/companies/{regcode}/financial-history")
+@etag()
 async def get_financial_history_endpoint(regcode: str, response: Response):
     """
     Lazy-load endpoint for full financial history.
@@ -1081,248 +1403,258 @@ async def get_financial_history_endpoint(regcode: str, response: Response):
     """
     response.headers["Cache-Control"] = "public, max-age=3600"
     
-    with engine.connect() as conn:
-        fin_rows = conn.execute(text("""
-            SELECT year, turnover, profit, employees, cash_balance,
-                   current_ratio, quick_ratio, cash_ratio,
-                   net_profit_margin, roe, roa, debt_to_equity, equity_ratio, ebitda,
-                   -- Extended fields for advanced financial analysis
-                   total_assets, equity, current_liabilities, total_current_assets,
-                   accounts_receivable, by_nature_labour_expenses,
-                   cfo_im_net_operating_cash_flow, cfo_im_income_taxes_paid,
-                   cfi_acquisition_of_fixed_assets_intangible_assets, cff_net_financing_cash_flow,
-                   -- Fix: Select missing columns
-                   interest_expenses, depreciation_expenses, provision_for_income_taxes,
-                   inventories, non_current_liabilities
-            FROM financial_reports 
-            WHERE company_regcode = :r 
-            ORDER BY year DESC
-        """), {"r": regcode}).fetchall()
-        
-        history = []
-        prev_turnover = None
-        prev_profit = None
-        
-        fin_list = list(fin_rows)
-        fin_list.reverse()
+    r = parse_regcode(regcode)
+
+    fin_rows = await fetch_all(text("""
+        SELECT year, turnover, profit, employees, cash_balance,
+               current_ratio, quick_ratio, cash_ratio,
+               net_profit_margin, roe, roa, debt_to_equity, equity_ratio, ebitda,
+               -- Extended fields for advanced financial analysis
+               total_assets, equity, current_liabilities, total_current_assets,
+               accounts_receivable, by_nature_labour_expenses,
+               cfo_im_net_operating_cash_flow, cfo_im_income_taxes_paid,
+               cfi_acquisition_of_fixed_assets_intangible_assets, cff_net_financing_cash_flow,
+               -- Fix: Select missing columns
+               interest_expenses, depreciation_expenses, provision_for_income_taxes,
+               inventories, non_current_liabilities
+        FROM financial_reports 
+        WHERE company_regcode = :r 
+        ORDER BY year DESC
+    """), {"r": r})
+    
+    history = []
+    prev_turnover = None
+    prev_profit = None
+    
+    fin_list = list(fin_rows)
+    fin_list.reverse()
+    
+    for f in fin_list:
+        row = {
+            "year": f.year,
+            "turnover": safe_float(f.turnover),
+            "profit": safe_float(f.profit),
+            "employees": f.employees,
+            "cash_balance": safe_float(f.cash_balance),
+            "turnover_growth": None,
+            "profit_growth": None,
+            "current_ratio": safe_float(f.current_ratio),
+            "quick_ratio": safe_float(f.quick_ratio),
+            "cash_ratio": safe_float(f.cash_ratio),
+            "net_profit_margin": safe_float(f.net_profit_margin),
+            "roe": safe_float(f.roe),
+            "roa": safe_float(f.roa),
+            "debt_to_equity": safe_float(f.debt_to_equity),
+            "equity_ratio": safe_float(f.equity_ratio),
+            "ebitda": safe_float(f.ebitda),
+            # Extended fields - P&L
+            "labour_costs": safe_float(f.by_nature_labour_expenses),
+            "interest_payment": safe_float(f.interest_expenses),
+            "depreciation": safe_float(f.depreciation_expenses),
+            "corporate_income_tax": safe_float(f.provision_for_income_taxes),
+            # Extended fields - Balance Sheet
+            "total_assets": safe_float(f.total_assets),
+            "equity": safe_float(f.equity),
+            "current_liabilities": safe_float(f.current_liabilities),
+            "non_current_liabilities": safe_float(f.non_current_liabilities),
+            "total_current_assets": safe_float(f.total_current_assets),
+            "accounts_receivable": safe_float(f.accounts_receivable),
+            "inventories": safe_float(f.inventories),
+            # Extended fields - Cash Flow (mapped to short keys for frontend)
+            "cfo": safe_float(f.cfo_im_net_operating_cash_flow),
+            "taxes_paid_cf": safe_float(f.cfo_im_income_taxes_paid),
+            "cfi": safe_float(f.cfi_acquisition_of_fixed_assets_intangible_assets),
+            "cff": safe_float(f.cff_net_financing_cash_flow)
+        }
         
-        for f in fin_list:
-            row = {
-                "year": f.year,
-                "turnover": safe_float(f.turnover),
-                "profit": safe_float(f.profit),
-                "employees": f.employees,
-                "cash_balance": safe_float(f.cash_balance),
-                "turnover_growth": None,
-                "profit_growth": None,
-                "current_ratio": safe_float(f.current_ratio),
-                "quick_ratio": safe_float(f.quick_ratio),
-                "cash_ratio": safe_float(f.cash_ratio),
-                "net_profit_margin": safe_float(f.net_profit_margin),
-                "roe": safe_float(f.roe),
-                "roa": safe_float(f.roa),
-                "debt_to_equity": safe_float(f.debt_to_equity),
-                "equity_ratio": safe_float(f.equity_ratio),
-                "ebitda": safe_float(f.ebitda),
-                # Extended fields - P&L
-                "labour_costs": safe_float(f.by_nature_labour_expenses),
-                "interest_payment": safe_float(f.interest_expenses),
-                "depreciation": safe_float(f.depreciation_expenses),
-                "corporate_income_tax": safe_float(f.provision_for_income_taxes),
-                # Extended fields - Balance Sheet
-                "total_assets": safe_float(f.total_assets),
-                "equity": safe_float(f.equity),
-                "current_liabilities": safe_float(f.current_liabilities),
-                "non_current_liabilities": safe_float(f.non_current_liabilities),
-                "total_current_assets": safe_float(f.total_current_assets),
-                "accounts_receivable": safe_float(f.accounts_receivable),
-                "inventories": safe_float(f.inventories),
-                # Extended fields - Cash Flow (mapped to short keys for frontend)
-                "cfo": safe_float(f.cfo_im_net_operating_cash_flow),
-                "taxes_paid_cf": safe_float(f.cfo_im_income_taxes_paid),
-                "cfi": safe_float(f.cfi_acquisition_of_fixed_assets_intangible_assets),
-                "cff": safe_float(f.cff_net_financing_cash_flow)
-            }
-            
-            if prev_turnover and f.turnover and prev_turnover != 0:
-                row["turnover_growth"] = round(((float(f.turnover) - prev_turnover) / abs(prev_turnover)) * 100, 1)
-            if prev_profit and f.profit and prev_profit != 0:
-                row["profit_growth"] = round(((float(f.profit) - prev_profit) / abs(prev_profit)) * 100, 1)
-            
-            prev_turnover = safe_float(f.turnover)
-            prev_profit = safe_float(f.profit)
-            history.append(row)
+        if prev_turnover and f.turnover and prev_turnover != 0:
+            row["turnover_growth"] = round(((float(f.turnover) - prev_turnover) / abs(prev_turnover)) * 100, 1)
+        if prev_profit and f.profit and prev_profit != 0:
+            row["profit_growth"] = round(((float(f.profit) - prev_profit) / abs(prev_profit)) * 100, 1)
         
-        history.reverse()
-        return {"financial_history": history}
+        prev_turnover = safe_float(f.turnover)
+        prev_profit = safe_float(f.profit)
+        history.append(row)
+    
+    history.reverse()
+    return {"financial_history": history}
 
 
 @router.get("/companies/{regcode}/tax-history")
+@etag()
 async def get_tax_history_endpoint(regcode: str, response: Response):
     """Lazy-load endpoint for tax payment history."""
     response.headers["Cache-Control"] = "public, max-age=3600"
     
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT year, total_tax_paid, labor_tax_iin, social_tax_vsaoi, avg_employees, nace_code
-            FROM tax_payments 
-            WHERE company_regcode = :r 
-            ORDER BY year DESC
-        """), {"r": regcode}).fetchall()
-        
-        history = []
-        VSAOI_RATE = 0.3409
+    r = parse_regcode(regcode)
+
+    rows = await fetch_all(text("""
+        SELECT year, total_tax_paid, labor_tax_iin, social_tax_vsaoi, avg_employees, nace_code
+        FROM tax_payments 
+        WHERE company_regcode = :r 
+        ORDER BY year DESC
+    """), {"r": r})
+    
+    history = []
+    VSAOI_RATE = 0.3409
+    
+    for t in rows:
+        row = {
+            "year": t.year,
+            "total_tax_paid": safe_float(t.total_tax_paid),
+            "labor_tax_iin": safe_float(t.labor_tax_iin),
+            "social_tax_vsaoi": safe_float(t.social_tax_vsaoi),
+            "avg_employees": safe_float(t.avg_employees),
+            "nace_code": t.nace_code,
+            "avg_gross_salary": None,
+            "avg_net_salary": None
+        }
         
-        for t in rows:
-            row = {
-                "year": t.year,
-                "total_tax_paid": safe_float(t.total_tax_paid),
-                "labor_tax_iin": safe_float(t.labor_tax_iin),
-                "social_tax_vsaoi": safe_float(t.social_tax_vsaoi),
-                "avg_employees": safe_float(t.avg_employees),
-                "nace_code": t.nace_code,
-                "avg_gross_salary": None,
-                "avg_net_salary": None
-            }
+        if t.social_tax_vsaoi and t.avg_employees and float(t.avg_employees) > 0:
+            vsaoi = float(t.social_tax_vsaoi)
+            employees = float(t.avg_employees)
+            gross_yearly = vsaoi / VSAOI_RATE
+            gross_monthly = gross_yearly / employees / 12
+            row["avg_gross_salary"] = round(gross_monthly, 2)
             
-            if t.social_tax_vsaoi and t.avg_employees and float(t.avg_employees) > 0:
-                vsaoi = float(t.social_tax_vsaoi)
-                employees = float(t.avg_employees)
-                gross_yearly = vsaoi / VSAOI_RATE
-                gross_monthly = gross_yearly / employees / 12
-                row["avg_gross_salary"] = round(gross_monthly, 2)
-                
-                vsaoi_employee = gross_monthly * 0.105
-                iin = (gross_monthly - vsaoi_employee) * 0.20
-                net_monthly = gross_monthly - vsaoi_employee - iin
-                row["avg_net_salary"] = round(net_monthly, 2)
-                
-            history.append(row)
-        return {"tax_history": history}
+            vsaoi_employee = gross_monthly * 0.105
+            iin = (gross_monthly - vsaoi_employee) * 0.20
+            net_monthly = gross_monthly - vsaoi_employee - iin
+            row["avg_net_salary"] = round(net_monthly, 2)
+            
+        history.append(row)
+    return {"tax_history": history}
 
 
 @router.get("/companies/{regcode}/procurements")
+@etag()
 async def get_procurements_endpoint(regcode: str, response: Response, limit: int = 50):
     """Lazy-load endpoint for procurement history."""
     response.headers["Cache-Control"] = "public, max-age=3600"
     
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT authority_name, subject, amount, contract_date, contract_end_date, termination_date, procurement_id, part_number
-            FROM procurements WHERE winner_regcode = :r
-            ORDER BY contract_date DESC LIMIT :limit
-        """), {"r": regcode, "limit": limit}).fetchall()
-        
-        # Aggregation Logic
-        aggregated = {}
-        history = []
+    r = parse_regcode(regcode)
+
+    rows = await fetch_all(text("""
+        SELECT authority_name, subject, amount, contract_date, contract_end_date, termination_date, procurement_id, part_number
+        FROM procurements WHERE winner_regcode = :r
+        ORDER BY contract_date DESC LIMIT :limit
+    """), {"r": r, "limit": limit})
+    
+    # Aggregation Logic
+    aggregated = {}
+    history = []
+    
+    for p in rows:
+        # If procurement_id exists, use it for grouping, otherwise use subject+date as fallback key
+        key = p.procurement_id if p.procurement_id else f"{p.subject}_{p.contract_date}"
         
-        for p in rows:
-            # If procurement_id exists, use it for grouping, otherwise use subject+date as fallback key
-            key = p.procurement_id if p.procurement_id else f"{p.subject}_{p.contract_date}"
-            
-            if key in aggregated:
-                # Aggregate
-                existing = aggregated[key]
-                existing["amount"] += safe_float(p.amount)
-                if p.part_number and str(p.part_number).lower() != 'nan':
-                    existing["parts"].append(p.part_number)
-            else:
-                # New entry
-                entry = {
-                    "authority": p.authority_name, 
-                    "subject": p.subject,
-                    "amount": safe_float(p.amount), 
-                    "date": str(p.contract_date),
-                    "end_date": str(p.contract_end_date) if p.contract_end_date else None,
-                    "termination_date": str(p.termination_date) if p.termination_date else None,
-                    "parts": [p.part_number] if p.part_number and str(p.part_number).lower() != 'nan' else []
-                }
-                aggregated[key] = entry
-                history.append(entry) # Keep order
+        if key in aggregated:
+            # Aggregate
+            existing = aggregated[key]
+            existing["amount"] += safe_float(p.amount)
+            if p.part_number and str(p.part_number).lower() != 'nan':
+                existing["parts"].append(p.part_number)
+        else:
+            # New entry
+            entry = {
+                "authority": p.authority_name, 
+                "subject": p.subject,
+                "amount": safe_float(p.amount), 
+                "date": str(p.contract_date),
+                "end_date": str(p.contract_end_date) if p.contract_end_date else None,
+                "termination_date": str(p.termination_date) if p.termination_date else None,
+                "parts": [p.part_number] if p.part_number and str(p.part_number).lower() != 'nan' else []
+            }
+            aggregated[key] = entry
+            history.append(entry) # Keep order
 
-        # Format parts as string
-        for entry in history:
-            if len(entry["parts"]) > 0:
-                # Numeric sort if possible
-                try:
-                    sorted_parts = sorted(entry["parts"], key=lambda x: float(x) if x.replace('.','',1).isdigit() else x)
-                except:
-                    sorted_parts = sorted(entry["parts"])
-                entry["parts_text"] = ", ".join(sorted_parts)
-            else:
-                entry["parts_text"] = None
-            del entry["parts"]
+    # Format parts as string
+    for entry in history:
+        if len(entry["parts"]) > 0:
+            # Numeric sort if possible
+            try:
+                sorted_parts = sorted(entry["parts"], key=lambda x: float(x) if x.replace('.','',1).isdigit() else x)
+            except:
+                sorted_parts = sorted(entry["parts"])
+            entry["parts_text"] = ", ".join(sorted_parts)
+        else:
+            entry["parts_text"] = None
+        del entry["parts"]
 
-        return {"procurements": history}
+    return {"procurements": history}
 
 
 @router.get("/companies/{regcode}/persons")
+@etag()
 async def get_persons_endpoint(regcode: str, response: Response):
     """Lazy-load endpoint for UBOs, members, and officers."""
     response.headers["Cache-Control"] = "public, max-age=3600"
     
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
+    r = parse_regcode(regcode)
+
+    # Persons + total capital from company concurrently
+    rows, company_reg = await asyncio.gather(
+        fetch_all(text("""
             SELECT person_name, person_code, role, share_percent, date_from, birth_date,
                    position, rights_of_representation, representation_with_at_least,
                    number_of_shares, share_nominal_value, share_currency, legal_entity_regcode,
                    nationality, residence
             FROM persons WHERE company_regcode = :r
-        """), {"r": regcode}).fetchall()
-        
-        # Try to get total capital from company first if possible
-        company_reg = conn.execute(text("SELECT total_capital FROM companies WHERE regcode = :r"), {"r": regcode}).fetchone()
-        db_total_capital = float(company_reg.total_capital) if company_reg and company_reg.total_capital else 0
-
-        calc_total_capital = sum((float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)) for p in rows if p.role == 'member')
-        total_capital = max(calc_total_capital, db_total_capital)
-        
-        ubos, members, officers = [], [], []
-        
-        for p in rows:
-            birth_date = str(p.birth_date) if hasattr(p, 'birth_date') and p.birth_date else None
-            if p.role == 'ubo':
-                ubos.append({
-                    "name": p.person_name, "person_code": p.person_code, "nationality": p.nationality,
-                    "residence": p.residence, "registered_on": str(p.date_from) if p.date_from else None,
-                    "birth_date": birth_date
-                })
-            elif p.role == 'member':
-                share_value = float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)
-                percent = (share_value / total_capital * 100) if total_capital > 0 else 0
-                if (percent == 0 or percent is None) and hasattr(p, 'share_percent') and p.share_percent:
-                    percent = float(p.share_percent)
-
-                # Back-calculate value if missing
-                if share_value == 0 and percent > 0 and total_capital > 0:
-                    share_value = total_capital * (percent / 100)
-
-                members.append({
-                    "name": p.person_name, "person_code": p.person_code, "legal_entity_regcode": int(p.legal_entity_regcode) if p.legal_entity_regcode else None,
-                    "number_of_shares": int(p.number_of_shares) if p.number_of_shares else None,
-                    "share_value": round(share_value, 2), "share_currency": p.share_currency or "EUR",
-                    "percent": round(percent, 2), "date_from": str(p.date_from) if p.date_from else None,
-                    "birth_date": birth_date
-                })
-            elif p.role == 'officer':
-                officers.append({
-                    "name": p.person_name, "person_code": p.person_code, "position": p.position,
-                    "rights_of_representation": p.rights_of_representation,
-                    "representation_with_at_least": int(p.representation_with_at_least) if p.representation_with_at_least else None,
-                    "registered_on": str(p.date_from) if p.date_from else None,
-                    "birth_date": birth_date
-                })
-                
-        return {"ubos": ubos, "members": members, "officers": officers, "total_capital": total_capital}
+        """), {"r": r}),
+        fetch_one(text("SELECT total_capital FROM companies WHERE regcode = :r"), {"r": r}),
+    )
+    db_total_capital = float(company_reg.total_capital) if company_reg and company_reg.total_capital else 0
+
+    calc_total_capital = sum((float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)) for p in rows if p.role == 'member')
+    total_capital = max(calc_total_capital, db_total_capital)
+    
+    ubos, members, officers = [], [], []
+    
+    for p in rows:
+        birth_date = str(p.birth_date) if hasattr(p, 'birth_date') and p.birth_date else None
+        if p.role == 'ubo':
+            ubos.append({
+                "name": p.person_name, "person_code": p.person_code, "nationality": p.nationality,
+                "residence": p.residence, "registered_on": str(p.date_from) if p.date_from else None,
+                "birth_date": birth_date
+            })
+        elif p.role == 'member':
+            share_value = float(p.number_of_shares or 0) * float(p.share_nominal_value or 0)
+            percent = (share_value / total_capital * 100) if total_capital > 0 else 0
+            if (percent == 0 or percent is None) and hasattr(p, 'share_percent') and p.share_percent:
+                percent = float(p.share_percent)
+
+            # Back-calculate value if missing
+            if share_value == 0 and percent > 0 and total_capital > 0:
+                share_value = total_capital * (percent / 100)
+
+            members.append({
+                "name": p.person_name, "person_code": p.person_code, "legal_entity_regcode": int(p.legal_entity_regcode) if p.legal_entity_regcode else None,
+                "number_of_shares": int(p.number_of_shares) if p.number_of_shares else None,
+                "share_value": round(share_value, 2), "share_currency": p.share_currency or "EUR",
+                "percent": round(percent, 2), "date_from": str(p.date_from) if p.date_from else None,
+                "birth_date": birth_date
+            })
+        elif p.role == 'officer':
+            officers.append({
+                "name": p.person_name, "person_code": p.person_code, "position": p.position,
+                "rights_of_representation": p.rights_of_representation,
+                "representation_with_at_least": int(p.representation_with_at_least) if p.representation_with_at_least else None,
+                "registered_on": str(p.date_from) if p.date_from else None,
+                "birth_date": birth_date
+            })
+            
+    return {"ubos": ubos, "members": members, "officers": officers, "total_capital": total_capital}
 
 
 @router.get("/companies/{regcode}/risks")
+@etag()
 async def get_risks_endpoint(regcode: str, response: Response):
     """Lazy-load endpoint for risks."""
     response.headers["Cache-Control"] = "public, max-age=3600"
     
-    risks_by_type, total_risk_score = get_risks(regcode)
+    r = parse_regcode(regcode)
+    risks_by_type, total_risk_score = risks_from_rows(await fetch_all(RISKS_QUERY, {"r": r}))
     
     # Calculate level for consistency
     risk_level = "CRITICAL" if total_risk_score >= 100 else "HIGH" if total_risk_score >= 50 else "MEDIUM" if total_risk_score >= 30 else "LOW" if total_risk_score > 0 else "NONE"
@@ -1945,8 +2277,36 @@ def find_all_linked_entities(conn, regcode: int, year: int = 2024) -> dict:
 from app.services.graph_service import calculate_company_graph
 
 
+# An entry is stale when the company's persons changed after the graph was computed
+# (source_version = data state the entry reflects, written by ETL precompute_graphs)
+GRAPH_CACHE_QUERY = text("""
+    SELECT g.graph_data,
+           EXISTS (
+               SELECT 1 FROM company_changes c
+               WHERE c.regcode = g.company_regcode AND c.changed_at > g.source_version
+           ) AS is_stale
+    FROM company_graph_cache g
+    WHERE g.company_regcode = :r
+""")
+
+
+def load_cached_graph(conn, regcode: int):
+    """Returns (graph_data, is_stale); (None, False) if there is no cache entry"""
+    try:
+        row = conn.execute(GRAPH_CACHE_QUERY, {"r": regcode}).fetchone()
+    except ProgrammingError:
+        # source_version / company_changes not created yet (ETL has not run with versioning)
+        conn.rollback()
+        row = conn.execute(text(
+            "SELECT graph_data, FALSE AS is_stale FROM company_graph_cache WHERE company_regcode = :r"
+        ), {"r": regcode}).fetchone()
+    if not row or not row.graph_data:
+        return None, False
+    return row.graph_data, row.is_stale
+
+
 def save_cached_graph(conn, regcode: int, data: dict):
-    """Save computed graph to cache"""
+    """Save computed graph to cache (computed from live data, so source_version = now)"""
     try:
         import json
         # Ensure table exists
@@ -1957,14 +2317,26 @@ def save_cached_graph(conn, regcode: int, data: dict):
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """))
+        conn.commit()
         
         # Upsert
-        conn.execute(text("""
-            INSERT INTO company_graph_cache (company_regcode, graph_data, updated_at)
-            VALUES (:r, :d, NOW())
-            ON CONFLICT (company_regcode) 
-            DO UPDATE SET graph_data = :d, updated_at = NOW()
-        """), {"r": regcode, "d": json.dumps(data)})
+        params = {"r": regcode, "d": json.dumps(data)}
+        try:
+            conn.execute(text("""
+                INSERT INTO company_graph_cache (company_regcode, graph_data, updated_at, source_version)
+                VALUES (:r, :d, NOW(), NOW())
+                ON CONFLICT (company_regcode) 
+                DO UPDATE SET graph_data = :d, updated_at = NOW(), source_version = NOW()
+            """), params)
+        except ProgrammingError:
+            # source_version column not added yet (db/migrations/add_graph_cache_source_version.sql)
+            conn.rollback()
+            conn.execute(text("""
+                INSERT INTO company_graph_cache (company_regcode, graph_data, updated_at)
+                VALUES (:r, :d, NOW())
+                ON CONFLICT (company_regcode) 
+                DO UPDATE SET graph_data = :d, updated_at = NOW()
+            """), params)
         conn.commit()
         logger.info(f"[CACHE] Saved graph for company {regcode}")
     except Exception as e:
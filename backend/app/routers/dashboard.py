@@ -5,10 +5,12 @@ import json
 import os
 from dotenv import load_dotenv
 from app.routers.companies import engine # Reuse engine
+from app.core.cache import cached
 
 router = APIRouter()
 
 @router.get("/home/dashboard")
+@cached(ttl=300, maxsize=1)
 def get_home_dashboard():
     """
     Agregēts endpoints sākumlapai (BI Dashboard).
@@ -92,7 +94,57 @@ def get_home_dashboard():
     finally:
         conn.close()
 
+def sql_company_hints(conn, q: str, query_words: list) -> list:
+    """Company hints straight from Postgres - used until the in-process index is loaded"""
+    from app.services.company_search import TYPE_ABBREVIATIONS
+
+    name_words = [w for w in query_words if w.lower() not in TYPE_ABBREVIATIONS]
+    type_words = [w.lower() for w in query_words if w.lower() in TYPE_ABBREVIATIONS]
+
+    # Use name_words for ranking, but fall back to all words if searching only SIA etc.
+    primary_name = " ".join(name_words) if name_words else q.strip()
+
+    # Use unaccented lower comparison to hit our new GIN/Trigram indexes
+    conditions = []
+    params = {"q_raw": primary_name}
+
+    words_to_match = name_words if name_words else query_words
+    for i, word in enumerate(words_to_match):
+        conditions.append(f"immutable_unaccent(lower(name)) LIKE immutable_unaccent(lower(:word{i}))")
+        params[f"word{i}"] = f"%{word}%"
+
+    if type_words:
+        type_cond = " OR ".join([f"LOWER(\"type\") = :type{i}" for i in range(len(type_words))])
+        conditions.append(f"({type_cond})")
+        for i, tw in enumerate(type_words):
+            params[f"type{i}"] = tw
+
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+
+    # Ranking: Active -> Exact Match -> Prefix Match -> Turnover
+    company_sql = f"""
+        SELECT name, name_in_quotes, "type" as company_type, regcode, latest_turnover
+        FROM companies 
+        WHERE {where_clause}
+        ORDER BY 
+            CASE WHEN status = 'active' THEN 0 ELSE 1 END,
+            CASE 
+                WHEN immutable_unaccent(lower(name_in_quotes)) = immutable_unaccent(lower(:q_raw)) THEN 0
+                WHEN immutable_unaccent(lower(name)) = immutable_unaccent(lower(:q_raw)) THEN 0
+                WHEN immutable_unaccent(lower(name_in_quotes)) LIKE immutable_unaccent(lower(:q_raw)) || '%' THEN 1
+                ELSE 2 
+            END,
+            latest_turnover DESC NULLS LAST
+        LIMIT 7
+    """
+    return [
+        {"regcode": r.regcode, "name": r.name, "name_in_quotes": r.name_in_quotes, "type": r.company_type}
+        for r in conn.execute(text(company_sql), params).fetchall()
+    ]
+
+
 @router.get("/home/search-hint")
+@cached(ttl=300, maxsize=2048, shared=True)
 def search_hint(q: str):
     """
     Fast autocomplete/hint endpoint with flexible search.
@@ -100,94 +152,27 @@ def search_hint(q: str):
     - Accent insensitive (ā=a, ē=e, etc.)
     - Word order independent ("SIA Animas" finds "Animas, SIA")
     Returns companies and persons separately.
+    Companies come from the in-process name index (app/services/company_search.py).
     """
     if not q or len(q) < 2:
         return {"companies": [], "persons": []}
     
     # Normalize query: split into words for flexible matching
     query_words = q.strip().split()
+    if not query_words:
+        return {"companies": [], "persons": []}
     
     conn = engine.connect()
     try:
-        # Ensure unaccent extension exists (run once, cached by PostgreSQL)
-        try:
-            conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
-            conn.commit()
-        except:
-            pass  # Extension may already exist
-        
-        # 1. Search Companies - flexible matching
-        # Match ALL words in any order, accent-insensitive
-        # Also search in 'type' column for abbreviations (SIA, AS, etc.)
-        
-        # Common company type abbreviations to handle
-        TYPE_ABBREVIATIONS = {
-            'sia': ['sia', 'sabiedrība', 'ierobežotu', 'atbildību'],
-            'as': ['as', 'akciju', 'sabiedrība'],
-            'ik': ['ik', 'individuālais', 'komersants'],
-            'zs': ['zs', 'zemnieku', 'saimniecība'],
-            'ks': ['ks', 'kooperatīvā', 'sabiedrība'],
-            'ps': ['ps', 'pilnsabiedrība'],
-        }
-        
-        if not query_words:
-            companies = []
+        # 1. Search Companies - every word matches a name word (any order, accent-insensitive);
+        # SIA, AS, ... match the type column
+        # Imported here: the index module loads numpy, `import main` must not (fast boot)
+        from app.services.company_search import company_index
+        index = company_index()
+        if index is not None:
+            companies = index.search(q, limit=7)
         else:
-            # OPTIMIZED SEARCH: Match name words + Prioritized ranking
-            conditions = []
-            params = {"q_raw": q.strip()}
-            
-        # Filter out known abbreviations from search words (will match via type column)
-        name_words = []
-        type_words = []
-        for word in query_words:
-            word_lower = word.lower()
-            if word_lower in TYPE_ABBREVIATIONS:
-                type_words.append(word_lower)
-            else:
-                name_words.append(word)
-
-        if not name_words and not type_words:
-            return {"companies": [], "persons": []}
-            
-        # Use name_words for ranking, but fall back to all words if searching only SIA etc.
-        primary_name = " ".join(name_words) if name_words else q.strip()
-        
-        # Use unaccented lower comparison to hit our new GIN/Trigram indexes
-
-        conditions = []
-        params = {"q_raw": primary_name}
-        
-        words_to_match = name_words if name_words else query_words
-        for i, word in enumerate(words_to_match):
-            conditions.append(f"immutable_unaccent(lower(name)) LIKE immutable_unaccent(lower(:word{i}))")
-            params[f"word{i}"] = f"%{word}%"
-            
-        if type_words:
-            type_cond = " OR ".join([f"LOWER(\"type\") = :type{i}" for i in range(len(type_words))])
-            conditions.append(f"({type_cond})")
-            for i, tw in enumerate(type_words):
-                params[f"type{i}"] = tw.lower()
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        
-        # Ranking: Active -> Exact Match -> Prefix Match -> Turnover
-        company_sql = f"""
-            SELECT name, name_in_quotes, "type" as company_type, regcode, latest_turnover
-            FROM companies 
-            WHERE {where_clause}
-            ORDER BY 
-                CASE WHEN status = 'active' THEN 0 ELSE 1 END,
-                CASE 
-                    WHEN immutable_unaccent(lower(name_in_quotes)) = immutable_unaccent(lower(:q_raw)) THEN 0
-                    WHEN immutable_unaccent(lower(name)) = immutable_unaccent(lower(:q_raw)) THEN 0
-                    WHEN immutable_unaccent(lower(name_in_quotes)) LIKE immutable_unaccent(lower(:q_raw)) || '%' THEN 1
-                    ELSE 2 
-                END,
-                latest_turnover DESC NULLS LAST
-            LIMIT 7
-        """
-        companies = conn.execute(text(company_sql), params).fetchall()
+            companies = sql_company_hints(conn, q, query_words)
         
         # 2. Search Persons - same flexible matching
         # 2. Search Persons - Optimized with functional index
@@ -225,15 +210,15 @@ def search_hint(q: str):
         formatted_companies = []
         for r in companies:
             # Use name_in_quotes if available, otherwise full name
-            display_name = r.name_in_quotes if r.name_in_quotes else r.name
+            display_name = r["name_in_quotes"] if r["name_in_quotes"] else r["name"]
             # Add type suffix if available
-            if r.company_type:
-                display_name = f"{display_name}, {r.company_type}"
+            if r["type"]:
+                display_name = f"{display_name}, {r['type']}"
             
             formatted_companies.append({
                 "name": display_name,
-                "full_name": r.name,  # Keep original for reference
-                "regcode": r.regcode, 
+                "full_name": r["name"],  # Keep original for reference
+                "regcode": r["regcode"], 
                 "type": "company"
             })
 
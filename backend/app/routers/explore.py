@@ -1,6 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query, Response
 from sqlalchemy import text, or_
+from sqlalchemy.exc import ProgrammingError
 from app.routers.companies import engine, safe_float
+from app.services.territories import territory_index
+import base64
+import binascii
+import orjson
 import math
 import logging
 from typing import Optional, List
@@ -8,17 +13,153 @@ from typing import Optional, List
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Allowed sort fields
+# Allowed sort fields (columns of explorer_companies, db/explorer_companies.sql)
 SORT_FIELDS = {
-    "turnover": "s.turnover",
-    "profit": "s.profit",
-    "employees": "s.employees",
-    "reg_date": "c.registration_date",
-    "salary": "s.avg_salary",
-    "tax": "s.tax_paid",
-    "growth": "s.turnover_growth"
+    "turnover": "e.turnover",
+    "profit": "e.profit",
+    "employees": "e.employees",
+    "reg_date": "e.registration_date",
+    "salary": "e.avg_salary",
+    "tax": "e.tax_paid",
+    "growth": "e.turnover_growth"
 }
 
+# Sorts that keep companies without a value (NULLS LAST tail); the others are filtered to
+# exactly the rows of their partial (sort column, regcode) index
+NULLABLE_SORTS = {"employees", "reg_date"}
+
+# Deeper pages need a cursor - OFFSET reads and discards every row before the page
+MAX_OFFSET_PAGE = 20
+
+
+# Bucket bounds of explorer_filter_cube (db/explorer_filter_cube.sql) - min_employees /
+# min_turnover on one of these is answered from the cube, other values run the live query
+EMPLOYEE_BOUNDS = (1, 10, 50, 250)
+TURNOVER_BOUNDS = (10_000, 100_000, 1_000_000, 10_000_000, 50_000_000)
+# Sorts that drop companies without a value (cube sort_basis); the rest list everyone ('all')
+FILTERED_SORTS = ("turnover", "profit", "salary", "tax", "growth")
+
+
+def nace_filter(code: str, param: str, alias: str = "", levels: bool = True):
+    """
+    (clause, value) for one selected NACE code: a section letter matches nace_section,
+    anything else is a code prefix - on the nace2 / nace3 / nace4 columns (indexed
+    equality) when levels=True, as LIKE 'code%' otherwise.
+    """
+    if len(code) == 1 and code.isalpha():
+        return f"{alias}nace_section = :{param}", code.upper()
+    if levels and len(code) in (2, 3, 4):
+        return f"{alias}nace{len(code)} = :{param}", code
+    return f"{alias}nace_code LIKE :{param}", f"{code}%"
+
+
+def cube_stats_query(sort_by: str, status: str, nace: Optional[List[str]], region: Optional[str],
+                     min_turnover: Optional[int], max_turnover: Optional[int], min_employees: Optional[int],
+                     has_pvn: Optional[bool], has_sanctions: Optional[bool],
+                     territory_codes: Optional[List[str]] = None):
+    """
+    (sql, params) summing the explorer_filter_cube cells that match these filters,
+    or None if a filter does not line up with the cube's dimensions.
+    region is free text that did not resolve to territories (address search);
+    territory_codes are the ATVK codes of resolved territories and their children.
+    """
+    if region or max_turnover:
+        return None
+    if min_turnover and min_turnover not in TURNOVER_BOUNDS:
+        return None
+    # reg_date sort filters on companies.employee_count, the cube buckets the stats employees
+    if min_employees and (min_employees not in EMPLOYEE_BOUNDS or sort_by == "reg_date"):
+        return None
+    if nace and not all(nace):
+        return None
+
+    clauses = ["sort_basis = :basis"]
+    params = {"basis": sort_by if sort_by in FILTERED_SORTS else "all"}
+    if status in ("active", "liquidated"):
+        clauses.append("status = :status")
+        params["status"] = status
+    if nace:
+        nace_clauses = []
+        for i, code in enumerate(nace):
+            clause, params[f"nace_{i}"] = nace_filter(code, f"nace_{i}", levels=False)
+            nace_clauses.append(clause)
+        clauses.append(f"({' OR '.join(nace_clauses)})")
+    if territory_codes is not None:
+        clauses.append("atvk = ANY(:atvk_codes)")
+        params["atvk_codes"] = territory_codes
+    if min_turnover:
+        clauses.append("turnover_band >= :min_band")
+        params["min_band"] = TURNOVER_BOUNDS.index(min_turnover) + 1
+    if min_employees:
+        clauses.append("size_bucket >= :min_size")
+        params["min_size"] = EMPLOYEE_BOUNDS.index(min_employees) + 1
+    if has_pvn:
+        clauses.append("is_pvn_payer = TRUE")
+    if has_sanctions:
+        clauses.append("has_sanctions = TRUE")
+
+    return f"""
+        SELECT
+            COALESCE(SUM(company_count), 0) AS total_count,
+            SUM(total_turnover) AS total_turnover,
+            SUM(total_profit) AS total_profit,
+            SUM(total_employees) AS total_employees
+        FROM explorer_filter_cube
+        WHERE {" AND ".join(clauses)}
+    """, params
+
+
+def encode_cursor(sort_by: str, order: str, value, regcode: int, page: int, direction: str) -> str:
+    """Opaque position: (sort value, regcode) of the boundary row + page number for display"""
+    raw = orjson.dumps([sort_by, order, None if value is None else str(value), regcode, page, direction])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_sort, c_order, value, regcode, page, direction = orjson.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (c_sort, c_order) != (sort_by, order) or direction not in ("next", "prev"):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort_by / order")
+    return {"value": value, "regcode": int(regcode), "page": int(page), "direction": direction}
+
+
+def keyset_clause(sort_col: str, key_col: str, desc: bool, nullable: bool, after: bool, value) -> str:
+    """
+    Rows strictly after (after=True) or before the cursor row in
+    ORDER BY sort_col DESC|ASC NULLS LAST, key_col DESC|ASC.
+    The value is bound as text - Postgres resolves the untyped literal to the column type.
+    """
+    cmp = "<" if desc == after else ">"
+    if value is None:
+        # Cursor row is in the NULLS LAST tail
+        if after:
+            return f"({sort_col} IS NULL AND {key_col} {cmp} :cursor_r)"
+        return f"({sort_col} IS NOT NULL OR {key_col} {cmp} :cursor_r)"
+    clause = f"({sort_col}, {key_col}) {cmp} (:cursor_v, :cursor_r)"
+    if after and nullable:
+        return f"({clause} OR {sort_col} IS NULL)"
+    return clause
+
+
+def territory_filter(territory: Optional[List[str]], region: Optional[str]):
+    """
+    Territory ids (with all child territories) for ?territory= ids / ATVK codes, or for a
+    free-text ?region= that names a territory. None = no territory filter; an unresolved
+    region keeps the old address search.
+    """
+    if territory:
+        ids, unknown = territory_index().resolve(territory)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown territory: {', '.join(map(str, unknown))}")
+        return ids
+    if region:
+        return territory_index().match(region) or None
+    return None
+
+
 @router.get("/companies/list")
 def list_companies(
     response: Response,
@@ -27,22 +168,35 @@ def list_companies(
     sort_by: str = Query("turnover", pattern="^(turnover|profit|employees|reg_date|salary|tax|growth)$"),
     order: str = Query("desc", pattern="^(asc|desc)$"),
     nace: Optional[List[str]] = Query(None, description="List of NACE codes (partial match)"),
-    region: Optional[str] = Query(None, description="Region search term, e.g. Riga"),
+    region: Optional[str] = Query(None, description="Region name, e.g. Rīga or Vidzeme (see /regions/lookup)"),
+    territory: Optional[List[str]] = Query(None, description="Territory ids or ATVK codes, child territories included"),
     status: str = Query("all"), # Removed regex to handle frontend artifacts like 'active:1'
     min_turnover: Optional[int] = Query(None),
     max_turnover: Optional[int] = Query(None),
     min_employees: Optional[int] = Query(None),
     year: Optional[int] = Query(None, description="Financial year filter"),
     has_pvn: Optional[bool] = Query(None),
-    has_sanctions: Optional[bool] = Query(None)
+    has_sanctions: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None, description="meta.next_cursor / meta.prev_cursor of the previous response")
 ):
     """
     Universal Company Explorer Endpoint.
-    Uses 'company_stats_materialized' for high performance.
+    Uses 'explorer_companies' (companies + latest stats, denormalized) for high performance.
+
+    Pages up to MAX_OFFSET_PAGE work with ?page=N; every response carries
+    next_cursor / prev_cursor for keyset paging, which costs the same on any page.
     """
     # Cache for 5 mins
     response.headers["Cache-Control"] = "public, max-age=300"
     
+    position = decode_cursor(cursor, sort_by, order) if cursor else None
+    if position:
+        page = position["page"]
+    elif page > MAX_OFFSET_PAGE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pages beyond {MAX_OFFSET_PAGE} require a cursor (meta.next_cursor)"
+        )
     offset = (page - 1) * limit
     
     # Clean status param (handle 'active:1' legacy/frontend format)
@@ -56,103 +210,144 @@ def list_companies(
     where_clauses = ["1=1"]
     params = {"year": year}
     
-    if clean_status != "all":
-        if clean_status == "active":
-             where_clauses.append("(c.status = 'active' OR c.status = 'A' OR c.status ILIKE 'aktīvs' OR c.status IS NULL OR c.status = '')")
-        elif clean_status == "liquidated":
-             where_clauses.append("(c.status = 'liquidated' OR c.status = 'L' OR c.status ILIKE 'likvidēts' OR c.status ILIKE 'steigta likvidācija')")
+    # Status is normalized in the view (same 'active' / 'liquidated' conditions as before)
+    if clean_status in ("active", "liquidated"):
+        where_clauses.append("e.status_norm = :status_norm")
+        params["status_norm"] = clean_status
     
     if nace:
         nace_clauses = []
         for i, code in enumerate(nace):
             param_name = f"nace_{i}"
-            nace_clauses.append(f"c.nace_code LIKE :{param_name}")
-            params[param_name] = f"{code}%"
+            clause, params[param_name] = nace_filter(code, param_name, alias="e.")
+            nace_clauses.append(clause)
         
         if nace_clauses:
             where_clauses.append(f"({' OR '.join(nace_clauses)})")
         
-    if region:
-        where_clauses.append("c.address ILIKE :region")
+    # Territory ids resolve in memory; the view carries territories.id of every company's ATVK code
+    territory_ids = territory_filter(territory, region)
+    if territory_ids is not None:
+        where_clauses.append("e.territory_id = ANY(:territory_ids)")
+        params["territory_ids"] = sorted(territory_ids)
+        region = None
+    elif region:
+        where_clauses.append("e.address ILIKE :region")
         params["region"] = f"%{region}%"
         
     if min_turnover:
-        where_clauses.append("(s.turnover >= :min_t)")
+        where_clauses.append("(e.turnover >= :min_t)")
         params["min_t"] = min_turnover
     
     if max_turnover:
-        where_clauses.append("s.turnover <= :max_t")
+        where_clauses.append("e.turnover <= :max_t")
         params["max_t"] = max_turnover
         
     if min_employees:
         if sort_by == "reg_date": 
-             where_clauses.append("c.employee_count >= :min_e") 
+             where_clauses.append("e.employee_count >= :min_e") 
         else:
-             where_clauses.append("s.employees >= :min_e")
+             where_clauses.append("e.employees >= :min_e")
         params["min_e"] = min_employees
 
     if has_pvn:
-        where_clauses.append("c.is_pvn_payer = TRUE")
+        where_clauses.append("e.is_pvn_payer = TRUE")
         
     if has_sanctions:
-        where_clauses.append("""
-            EXISTS (SELECT 1 FROM risks r WHERE r.company_regcode = c.regcode AND r.active = TRUE AND r.risk_type = 'sanction')
-        """)
+        where_clauses.append("e.has_sanctions = TRUE")
 
     # Dynamic Order Clause
-    sort_col = SORT_FIELDS.get(sort_by, "s.turnover")
+    sort_col = SORT_FIELDS.get(sort_by, "e.turnover")
     
     # Exclude NULL and NaN values when sorting by financial columns
     # NaN is a special float value that IS NOT NULL but should be filtered
-    if sort_by in ["turnover", "profit", "salary", "tax", "growth"]:
+    # (these are the predicates of the partial sort indexes - keep them identical)
+    if sort_by in FILTERED_SORTS:
         where_clauses.append(f"{sort_col} IS NOT NULL")
         where_clauses.append(f"{sort_col}::text != 'NaN'")
         # For profit/growth, allow negative values; for turnover/salary/tax require > 0
         if sort_by in ["turnover", "salary", "tax"]:
             where_clauses.append(f"{sort_col} > 0")
     
-    # The NULLS LAST clause handles any remaining edge cases
-    order_clause = f"{sort_col} {order.upper()} NULLS LAST"
+    # The NULLS LAST clause handles any remaining edge cases; regcode makes the order total
+    key_col = "e.regcode"
+    desc = order == "desc"
+    list_clauses = list(where_clauses)
+    list_params = {**params, "limit": limit}
+    backwards = bool(position) and position["direction"] == "prev"
+    if position:
+        list_clauses.append(keyset_clause(sort_col, key_col, desc, sort_by in NULLABLE_SORTS,
+                                          not backwards, position["value"]))
+        list_params.update(cursor_v=position["value"], cursor_r=position["regcode"])
+        paging = "LIMIT :limit"
+    else:
+        list_params["offset"] = offset
+        paging = "LIMIT :limit OFFSET :offset"
+
+    direction = order.upper()
+    if backwards:
+        # Walk towards the start, rows reversed back afterwards
+        direction = "ASC" if desc else "DESC"
+        order_clause = f"{sort_col} {direction} NULLS FIRST, {key_col} {direction}"
+    else:
+        order_clause = f"{sort_col} {direction} NULLS LAST, {key_col} {direction}"
     
-    # Construct Query (Using Latest Stats View)
+    # Construct Query (one relation, read in sort-index order)
     main_query = f"""
         SELECT 
-            c.regcode, c.name, c.name_in_quotes, c."type" as company_type, c.type_text,
-            c.nace_text, c.registration_date, c.status,
-            s.turnover, s.profit, s.employees, s.year as fin_year,
-            s.avg_salary,
-            s.tax_paid as total_tax_paid,
-            s.profit_margin,
-            s.turnover_growth
-        FROM companies c
-        LEFT JOIN company_stats_materialized s ON s.regcode = c.regcode
-        WHERE {" AND ".join(where_clauses)}
+            {sort_col} AS sort_value,
+            e.regcode, e.name, e.name_in_quotes, e.company_type, e.type_text,
+            e.nace_text, e.registration_date, e.status,
+            e.turnover, e.profit, e.employees, e.fin_year,
+            e.avg_salary,
+            e.tax_paid as total_tax_paid,
+            e.profit_margin,
+            e.turnover_growth
+        FROM explorer_companies e
+        WHERE {" AND ".join(list_clauses)}
         ORDER BY {order_clause}
-        LIMIT :limit OFFSET :offset
+        {paging}
     """
     
     # KPI / Stats Query
     stats_query = f"""
         SELECT 
             COUNT(*) as total_count,
-            SUM(COALESCE(s.turnover, 0)) as total_turnover,
-            SUM(COALESCE(s.profit, 0)) as total_profit,
-            SUM(COALESCE(s.employees, 0)) as total_employees
-        FROM companies c
-        LEFT JOIN company_stats_materialized s ON s.regcode = c.regcode
+            SUM(COALESCE(e.turnover, 0)) as total_turnover,
+            SUM(COALESCE(e.profit, 0)) as total_profit,
+            SUM(COALESCE(e.employees, 0)) as total_employees
+        FROM explorer_companies e
         WHERE {" AND ".join(where_clauses)}
     """
     
     logger.info(f"Explorer Request (MatView) - Sort: '{sort_by}'")
     
     try:
+        # KPI totals from the ETL-built cube: a few cells instead of COUNT / SUM over the view
+        stats = None
+        cube = cube_stats_query(sort_by, clean_status, nace, region, min_turnover, max_turnover,
+                                min_employees, has_pvn, has_sanctions,
+                                territory_index().codes(territory_ids) if territory_ids is not None else None)
+        if cube:
+            try:
+                with engine.connect() as conn:
+                    stats = conn.execute(text(cube[0]), cube[1]).fetchone()
+            except ProgrammingError as e:
+                # Not built yet (first deploy before maintenance.py) - live totals below
+                logger.warning(f"Explorer cube unavailable: {e.orig}")
+
         with engine.connect() as conn:
             # OPTIMIZATION: For unfiltered or minimally filtered queries, use estimated count
             # This avoids expensive full table scans for COUNT(*) + SUM()
             
-            is_heavily_filtered = bool(nace or region or min_turnover or max_turnover or min_employees or has_pvn or has_sanctions)
+            is_heavily_filtered = bool(nace or region or territory_ids is not None or min_turnover or max_turnover or min_employees or has_pvn or has_sanctions)
             
-            if is_heavily_filtered:
+            if stats is not None:
+                total_count = stats.total_count
+                total_turnover = safe_float(stats.total_turnover)
+                total_profit = safe_float(stats.total_profit)
+                total_employees = stats.total_employees
+            elif is_heavily_filtered:
                 # Execute full Stats query for filtered results (usually smaller dataset)
                 stats = conn.execute(text(stats_query), params).fetchone()
                 total_count = stats.total_count
@@ -164,8 +359,7 @@ def list_companies(
                 # 1. Get count efficiently (PostgreSQL can use indexes better on simple COUNT)
                 count_query = f"""
                     SELECT COUNT(*) as cnt
-                    FROM companies c
-                    LEFT JOIN company_stats_materialized s ON s.regcode = c.regcode
+                    FROM explorer_companies e
                     WHERE {" AND ".join(where_clauses)}
                 """
                 count_result = conn.execute(text(count_query), params).fetchone()
@@ -178,7 +372,9 @@ def list_companies(
                 total_employees = None
             
             # Execute List query
-            result = conn.execute(text(main_query), {**params, "limit": limit, "offset": offset}).fetchall()
+            result = conn.execute(text(main_query), list_params).fetchall()
+            if backwards:
+                result = result[::-1]
             
             companies = []
             for r in result:
@@ -207,7 +403,11 @@ def list_companies(
                     "page": page,
                     "limit": limit,
                     "sort_by": sort_by,
-                    "financial_year": year
+                    "financial_year": year,
+                    "next_cursor": encode_cursor(sort_by, order, result[-1].sort_value, result[-1].regcode,
+                                                 page + 1, "next") if len(result) == limit else None,
+                    "prev_cursor": encode_cursor(sort_by, order, result[0].sort_value, result[0].regcode,
+                                                 page - 1, "prev") if result and page > 1 else None
                 },
                 "stats": {
                     "count": total_count,
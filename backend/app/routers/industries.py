@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Query, Response
 from sqlalchemy import text
 from app.core.database import engine
+from app.core.cache import cached
+from app.core.etag import etag
 from app.nace_names import NACE_DIVISIONS, get_nace_name
 import logging
 import math
@@ -87,6 +89,7 @@ def format_large_number(value):
 # ============================================================================
 
 @router.get("/industries/overview")
+@cached(ttl=3600, maxsize=1, shared=True)
 def get_industries_overview(response: Response):
     """
     Get macro-level industry analytics for the overview dashboard.
@@ -354,6 +357,7 @@ def _compute_overview_on_the_fly(conn):
 # ============================================================================
 
 @router.get("/industries/search")
+@cached(ttl=3600, maxsize=512, shared=True)
 def search_industries(q: str = Query(..., min_length=1), limit: int = Query(10, le=50)):
     """
     Search NACE codes and names for autocomplete.
@@ -395,6 +399,8 @@ def search_industries(q: str = Query(..., min_length=1), limit: int = Query(10,
 # ============================================================================
 
 @router.get("/industries/{nace_code}/detail")
+@etag()
+@cached(ttl=3600, maxsize=512, shared=True)
 def get_industry_detail(
     nace_code: str,
     year: int = Query(None, description="Year for data (default: latest)"),
@@ -957,6 +963,7 @@ def get_industry_detail(
 # ============================================================================
 
 @router.get("/industries/{nace_section}")
+@cached(ttl=3600, maxsize=256, shared=True)
 def get_industry_companies(
     nace_section: str,
     sort_by: str = Query("turnover", pattern="^(turnover|profit)$"),
@@ -1042,6 +1049,8 @@ def get_industry_companies(
         }
 
 @router.get("/top100")
+@etag()
+@cached(ttl=3600, maxsize=2, shared=True)
 def get_top_100(
     sort_by: str = Query("turnover", pattern="^(turnover|profit)$")
 ):
@@ -1055,6 +1064,9 @@ def get_top_100(
             # If not (e.g. before migration run), fall back might be needed, 
             # but we assume migration is run as per instructions.
             
+            # explorer_companies carries name / NACE / PVN next to the latest financials;
+            # the WHERE matches the partial sort index (db/explorer_companies.sql)
+            listed = "turnover > 0" if sort_by == "turnover" else "TRUE"
             sql = f"""
                 SELECT 
                     regcode,
@@ -1063,13 +1075,14 @@ def get_top_100(
                     turnover,
                     profit,
                     employees,
-                    data_year as year,
+                    fin_year as year,
                     company_size_badge as company_size,
                     pvn_number,
                     is_pvn_payer
-                FROM company_stats_materialized
-                WHERE {sort_by} IS NOT NULL 
-                ORDER BY {sort_by} DESC
+                FROM explorer_companies
+                WHERE status_norm = 'active'
+                  AND {sort_by} IS NOT NULL AND {sort_by}::text != 'NaN' AND {listed}
+                ORDER BY {sort_by} DESC NULLS LAST, regcode DESC
                 LIMIT 100
             """
             
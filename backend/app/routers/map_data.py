@@ -3,6 +3,7 @@ Map Data API - Serves GeoJSON and cities data for the regions map
 """
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse, FileResponse
+from app.core.etag import etag
 import os
 import json
 
@@ -13,7 +14,17 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 
 
+def file_version(filename: str):
+    """ETag version for a static file - changes on deploy, not on ETL (None if missing)"""
+    try:
+        stat = os.stat(os.path.join(STATIC_DIR, filename))
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
 @router.get("/geojson")
+@etag(version=lambda: file_version("lv-enriched.json"))
 async def get_geojson():
     """Return the Latvia regions GeoJSON data (Optimized: Stream file directly)"""
     filepath = os.path.join(STATIC_DIR, "lv-enriched.json")
@@ -29,6 +40,7 @@ async def get_geojson():
 
 
 @router.get("/cities")
+@etag(version=lambda: file_version("cities.json"))
 async def get_cities():
     """Return cities data for the map overlay (Optimized: Stream file directly)"""
     filepath = os.path.join(STATIC_DIR, "cities.json")
@@ -44,6 +56,7 @@ async def get_cities():
 
 
 @router.get("/logo")
+@etag(version=lambda: file_version("animas-logo.jpg"))
 async def get_logo():
     """Return the ANIMAS logo"""
     filepath = os.path.join(STATIC_DIR, "animas-logo.jpg")
@@ -3,11 +3,14 @@ People Analytics API Router
 Endpoints for "Latvijas Biznesa Elite" dashboard
 """
 
+import asyncio
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
 from sqlalchemy import text
-from app.core.database import engine
+from app.core.database import fetch_all, fetch_one
+from app.services.territories import territory_index
 
 router = APIRouter(prefix="/analytics/people", tags=["People Analytics"])
 
@@ -59,51 +62,54 @@ def get_nace_name(code: str) -> str:
 @router.get("/highlights", response_model=HighlightsResponse)
 async def get_highlights():
     """Get top 3 highlighted persons for Elite Grid cards"""
-    with engine.connect() as conn:
+    # Three independent queries - run concurrently on separate connections
+    wealth_row, active_row, manager_row = await asyncio.gather(
         # Top by wealth
-        result = conn.execute(text("""
+        fetch_one(text("""
             SELECT person_hash, full_name, net_worth, main_company_name, primary_nace
             FROM person_analytics_cache WHERE net_worth > 0
             ORDER BY net_worth DESC LIMIT 1
-        """))
-        row = result.fetchone()
-        top_wealth = PersonHighlight(
-            person_hash=row.person_hash, full_name=row.full_name,
-            value=float(row.net_worth or 0), label="Kapitāla vērtība #1",
-            subtitle="Aprēķinātā daļu vērtība", main_company=row.main_company_name,
-            primary_nace=get_nace_name(row.primary_nace)
-        ) if row else None
-
+        """)),
         # Top by activity
-        result = conn.execute(text("""
+        fetch_one(text("""
             SELECT person_hash, full_name, active_companies_count, main_company_name, primary_nace
             FROM person_analytics_cache ORDER BY active_companies_count DESC LIMIT 1
-        """))
-        row = result.fetchone()
-        top_active = PersonHighlight(
-            person_hash=row.person_hash, full_name=row.full_name,
-            value=float(row.active_companies_count or 0), label="Visvairāk uzņēmumu #1",
-            subtitle="Aktīvi uzņēmumi portfelī", main_company=row.main_company_name,
-            primary_nace=get_nace_name(row.primary_nace)
-        ) if row else None
-
+        """)),
         # Top by managed turnover
-        result = conn.execute(text("""
+        fetch_one(text("""
             SELECT person_hash, full_name, managed_turnover, main_company_name, primary_nace
             FROM person_analytics_cache 
             WHERE managed_turnover > 0 
               AND managed_turnover::text != 'NaN'
             ORDER BY managed_turnover DESC LIMIT 1
-        """))
-        row = result.fetchone()
-        top_manager = PersonHighlight(
-            person_hash=row.person_hash, full_name=row.full_name,
-            value=float(row.managed_turnover or 0), label="Vadītais apgrozījums #1",
-            subtitle="Kopējais valdes apgrozījums", main_company=row.main_company_name,
-            primary_nace=get_nace_name(row.primary_nace)
-        ) if row else None
+        """)),
+    )
+
+    row = wealth_row
+    top_wealth = PersonHighlight(
+        person_hash=row.person_hash, full_name=row.full_name,
+        value=float(row.net_worth or 0), label="Kapitāla vērtība #1",
+        subtitle="Aprēķinātā daļu vērtība", main_company=row.main_company_name,
+        primary_nace=get_nace_name(row.primary_nace)
+    ) if row else None
+
+    row = active_row
+    top_active = PersonHighlight(
+        person_hash=row.person_hash, full_name=row.full_name,
+        value=float(row.active_companies_count or 0), label="Visvairāk uzņēmumu #1",
+        subtitle="Aktīvi uzņēmumi portfelī", main_company=row.main_company_name,
+        primary_nace=get_nace_name(row.primary_nace)
+    ) if row else None
 
-        return HighlightsResponse(top_wealth=top_wealth, top_active=top_active, top_manager=top_manager)
+    row = manager_row
+    top_manager = PersonHighlight(
+        person_hash=row.person_hash, full_name=row.full_name,
+        value=float(row.managed_turnover or 0), label="Vadītais apgrozījums #1",
+        subtitle="Kopējais valdes apgrozījums", main_company=row.main_company_name,
+        primary_nace=get_nace_name(row.primary_nace)
+    ) if row else None
+
+    return HighlightsResponse(top_wealth=top_wealth, top_active=top_active, top_manager=top_manager)
 
 
 @router.get("/rankings", response_model=List[PersonRanking])
@@ -112,38 +118,36 @@ async def get_rankings(
     limit: int = Query(50, ge=1, le=100)
 ):
     """Get ranked list of persons by specified metric"""
-    with engine.connect() as conn:
-        col_map = {"wealth": "net_worth", "active": "active_companies_count", "turnover": "managed_turnover"}
-        order_col = col_map.get(type, "net_worth")
+    col_map = {"wealth": "net_worth", "active": "active_companies_count", "turnover": "managed_turnover"}
+    order_col = col_map.get(type, "net_worth")
 
-        result = conn.execute(text(f"""
-            SELECT ROW_NUMBER() OVER (ORDER BY {order_col} DESC) as rank,
-                person_hash, full_name, {order_col} as value,
-                main_company_name, primary_nace, active_companies_count
-            FROM person_analytics_cache 
-            WHERE {order_col} > 0 
-              AND {order_col}::text != 'NaN'
-            ORDER BY {order_col} DESC LIMIT :limit
-        """), {"limit": limit})
+    rows = await fetch_all(text(f"""
+        SELECT ROW_NUMBER() OVER (ORDER BY {order_col} DESC) as rank,
+            person_hash, full_name, {order_col} as value,
+            main_company_name, primary_nace, active_companies_count
+        FROM person_analytics_cache 
+        WHERE {order_col} > 0 
+          AND {order_col}::text != 'NaN'
+        ORDER BY {order_col} DESC LIMIT :limit
+    """), {"limit": limit})
 
-        return [PersonRanking(
-            rank=row.rank, person_hash=row.person_hash, full_name=row.full_name,
-            value=float(row.value or 0), main_company=row.main_company_name,
-            primary_nace=get_nace_name(row.primary_nace), active_companies=row.active_companies_count
-        ) for row in result]
+    return [PersonRanking(
+        rank=row.rank, person_hash=row.person_hash, full_name=row.full_name,
+        value=float(row.value or 0), main_company=row.main_company_name,
+        primary_nace=get_nace_name(row.primary_nace), active_companies=row.active_companies_count
+    ) for row in rows]
 
 
 @router.get("/regions", response_model=List[str])
 async def get_regions():
     """Get list of available regions (municipalities/cities)"""
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT DISTINCT main_region 
-            FROM person_analytics_cache 
-            WHERE main_region IS NOT NULL 
-            ORDER BY main_region
-        """))
-        return [row[0] for row in result]
+    rows = await fetch_all(text("""
+        SELECT DISTINCT main_region 
+        FROM person_analytics_cache 
+        WHERE main_region IS NOT NULL 
+        ORDER BY main_region
+    """))
+    return [row[0] for row in rows]
 
 
 @router.get("/search", response_model=dict)
@@ -151,6 +155,7 @@ async def search_people(
     q: Optional[str] = None,
     role: Optional[str] = Query(None, description="Filter by role: owner, officer, member"),
     region: Optional[List[str]] = Query(None, description="Filter by region names (multi-select)"),
+    territory: Optional[List[str]] = Query(None, description="Territory ids or ATVK codes, child territories included"),
     nace: Optional[str] = Query(None, description="Filter by NACE code or section"),
     min_wealth: Optional[float] = None,
     min_turnover: Optional[float] = None,
@@ -199,6 +204,16 @@ async def search_people(
         # Use IN clause for multiple regions
         conditions.append("main_region = ANY(:regions)")
         params["regions"] = region
+
+    if territory:
+        # Person's main municipality (indexed level-2 id) within the selected territories;
+        # a selected city / parish counts as its municipality
+        index = await run_in_threadpool(territory_index)
+        territory_ids, unknown = index.resolve(territory)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown territory: {', '.join(unknown)}")
+        conditions.append("main_municipality_id = ANY(:territory_ids)")
+        params["territory_ids"] = sorted(index.lift(territory_ids, 2))
         
     if nace:
         conditions.append("primary_nace LIKE :nace")
@@ -214,49 +229,51 @@ async def search_people(
 
     where_clause = " AND ".join(conditions)
     
-    with engine.connect() as conn:
-        # Get total count
-        count_sql = f"SELECT COUNT(*) FROM person_analytics_cache WHERE {where_clause}"
-        total = conn.execute(text(count_sql), params).scalar()
-        
-        # Get data
-        sql = f"""
-            SELECT 
-                person_hash, 
-                full_name, 
-                net_worth, 
-                managed_turnover, 
-                active_companies_count,
-                main_company_name, 
-                primary_nace,
-                main_region,
-                roles
-            FROM person_analytics_cache 
-            WHERE {where_clause}
-            ORDER BY {order_col} DESC NULLS LAST
-            LIMIT :limit OFFSET :offset
-        """
-        
-        result = conn.execute(text(sql), params)
+    count_sql = f"SELECT COUNT(*) FROM person_analytics_cache WHERE {where_clause}"
+    sql = f"""
+        SELECT 
+            person_hash, 
+            full_name, 
+            net_worth, 
+            managed_turnover, 
+            active_companies_count,
+            main_company_name, 
+            primary_nace,
+            main_region,
+            main_municipality_id,
+            roles
+        FROM person_analytics_cache 
+        WHERE {where_clause}
+        ORDER BY {order_col} DESC NULLS LAST
+        LIMIT :limit OFFSET :offset
+    """
+
+    # Total count and page data concurrently
+    count_row, rows = await asyncio.gather(
+        fetch_one(text(count_sql), params),
+        fetch_all(text(sql), params),
+    )
+    total = count_row[0]
+
+    items = []
+    for row in rows:
+        items.append({
+            "person_hash": row.person_hash,
+            "full_name": row.full_name,
+            "net_worth": float(row.net_worth or 0),
+            "managed_turnover": float(row.managed_turnover or 0),
+            "active_companies": row.active_companies_count,
+            "main_company": row.main_company_name,
+            "primary_nace": get_nace_name(row.primary_nace),
+            "nace_code": row.primary_nace,
+            "region": row.main_region,
+            "territory_id": row.main_municipality_id,
+            "roles": row.roles
+        })
         
-        items = []
-        for row in result:
-            items.append({
-                "person_hash": row.person_hash,
-                "full_name": row.full_name,
-                "net_worth": float(row.net_worth or 0),
-                "managed_turnover": float(row.managed_turnover or 0),
-                "active_companies": row.active_companies_count,
-                "main_company": row.main_company_name,
-                "primary_nace": get_nace_name(row.primary_nace),
-                "nace_code": row.primary_nace,
-                "region": row.main_region,
-                "roles": row.roles
-            })
-            
-        return {
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "items": items
-        }
+    return {
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "items": items
+    }
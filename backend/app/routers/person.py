@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Response, Request, Depends, Query
 from sqlalchemy import text
-from app.core.database import engine
+from app.core.database import engine, fetch_all, fetch_one, run_sync
+from app.services.person_ids import generate_person_url_id
+import asyncio
 import logging
 import hashlib
 from typing import Optional
@@ -39,40 +41,6 @@ def mask_person_code(person_code: str) -> str:
     return f"{person_code[:6]}-*****"
 
 
-def generate_person_url_id(person_code: str, person_name: str) -> str:
-    """
-    Generate URL-safe person identifier using hash.
-    Format: 8-character hex hash (e.g., "a3f2b9c1")
-    
-    Normalizes name by:
-    1. Lowercase
-    2. Split into parts
-    3. Sort parts alphabetically
-    4. Join back
-    
-    Uses ONLY first 6 chars of person_code (DDMMYY) to match frontend logic
-    and support masked data.
-    """
-    # Normalize name
-    normalized_name = " ".join(sorted(person_name.lower().split()))
-    
-    # Use only first 6 chars of person_code (DDMMYY)
-    code_fragment = person_code[:6] if person_code else ""
-    
-    # Create hash input
-    hash_input = f"{code_fragment}|{normalized_name}"
-    
-    # Simple hash function (matching frontend)
-    hash_val = 0
-    for char in hash_input:
-        hash_val = ((hash_val << 5) - hash_val) + ord(char)
-        hash_val = hash_val & 0xFFFFFFFF  # 32-bit integer
-    
-    # Convert to hex (8 characters)
-    hash_hex = format(abs(hash_val) & 0xFFFFFFFF, '08x')[:8]
-    return hash_hex
-
-
 def resolve_person_identifier(conn, identifier: str) -> Optional[tuple]:
     """
     Resolve person identifier to actual person_code and person_name.
@@ -219,38 +187,56 @@ async def get_person_profile(identifier: str, response: Response, request: Reque
     # Check Access
     has_full_access = await check_access(request)
     
-    with engine.connect() as conn:
-        # Resolve identifier to actual person_code and person_name
-        resolved = resolve_person_identifier(conn, identifier)
-        
-        if not resolved:
-            raise HTTPException(status_code=404, detail="Person not found")
-        
-        person_code, person_name = resolved
-        logger.info(f"[get_person_profile] Resolved {identifier} to person_code={person_code}, person_name={person_name}")
-        
-        # Get basic person info from first available record
-        # Handle cases where person_code might be None/Empty or Masked (e.g. 181285-*****)
-        
-        query_conditions = "person_name = :pn"
-        params = {"pn": person_name}
-        
-        if person_code:
-            if '*' in person_code:
-                # Handle search with masked code (e.g. from hash resolution)
-                # Use LIKE with DB wildcards
-                pc_pattern = person_code.replace('*', '%')
-                query_conditions += " AND person_code LIKE :pc"
-                params["pc"] = pc_pattern
-            else:
-                # Exact match
-                query_conditions += " AND person_code = :pc"
-                params["pc"] = person_code
+    # Resolve identifier to actual person_code and person_name (sync helper on an async connection)
+    resolved = await run_sync(resolve_person_identifier, identifier)
+    
+    if not resolved:
+        raise HTTPException(status_code=404, detail="Person not found")
+    
+    person_code, person_name = resolved
+    logger.info(f"[get_person_profile] Resolved {identifier} to person_code={person_code}, person_name={person_name}")
+    
+    # Get basic person info from first available record
+    # Handle cases where person_code might be None/Empty or Masked (e.g. 181285-*****)
+    
+    query_conditions = "person_name = :pn"
+    params = {"pn": person_name}
+    
+    if person_code:
+        if '*' in person_code:
+            # Handle search with masked code (e.g. from hash resolution)
+            # Use LIKE with DB wildcards
+            pc_pattern = person_code.replace('*', '%')
+            query_conditions += " AND person_code LIKE :pc"
+            params["pc"] = pc_pattern
         else:
-            # Foreign person with no code - ensure DB record also has no code (or empty)
-            query_conditions += " AND (person_code IS NULL OR person_code = '')"
-
-        person_info = conn.execute(text(f"""
+            # Exact match
+            query_conditions += " AND person_code = :pc"
+            params["pc"] = person_code
+    else:
+        # Foreign person with no code - ensure DB record also has no code (or empty)
+        query_conditions += " AND (person_code IS NULL OR person_code = '')"
+
+    # Build WHERE clause dynamically to handle NULL person_code (foreign persons)
+    if person_code:
+        person_filter = "p.person_code = :pc AND p.person_name = :pn"
+        person_params = {"pc": person_code, "pn": person_name}
+    else:
+        # For foreign persons with NULL person_code, match by name only with NULL code check
+        person_filter = "(p.person_code IS NULL OR p.person_code = '') AND p.person_name = :pn"
+        person_params = {"pn": person_name}
+    
+    # Build network filter for p1 (same logic as person_filter)
+    if person_code:
+        network_p1_filter = "p1.person_code = :pc AND p1.person_name = :pn"
+        network_params = {"pc": person_code, "pn": person_name}
+    else:
+        network_p1_filter = "(p1.person_code IS NULL OR p1.person_code = '') AND p1.person_name = :pn"
+        network_params = {"pn": person_name}
+    
+    # Independent queries - run concurrently, each on its own connection
+    person_info, companies, risk_data, network_raw = await asyncio.gather(
+        fetch_one(text(f"""
             SELECT DISTINCT
                 person_name,
                 person_code,
@@ -260,42 +246,9 @@ async def get_person_profile(identifier: str, response: Response, request: Reque
             FROM persons
             WHERE {query_conditions}
             LIMIT 1
-        """), params).fetchone()
-        
-        if not person_info:
-            logger.warning(f"[get_person_profile] Detail lookup failed for resolved person: {person_name}, code={person_code}")
-            # Fallback: Try looser name match if we failed with code
-            if person_code:
-                 person_info = conn.execute(text("""
-                    SELECT DISTINCT
-                        person_name,
-                        person_code,
-                        birth_date,
-                        nationality,
-                        residence
-                    FROM persons
-                    WHERE person_name = :pn
-                    ORDER BY person_code DESC -- Prefer entries with code?
-                    LIMIT 1
-                """), {"pn": person_name}).fetchone()
-            
-            if not person_info:
-                raise HTTPException(status_code=404, detail="Person not found")
-
-        # Get all related companies
-        # OPTIMIZATION: Use LATERAL JOIN with LIMIT 1 instead of correlated MAX(year) subquery
-        # This is faster because PostgreSQL can use indexes more effectively
-        
-        # Build WHERE clause dynamically to handle NULL person_code (foreign persons)
-        if person_code:
-            person_filter = "p.person_code = :pc AND p.person_name = :pn"
-            person_params = {"pc": person_code, "pn": person_name}
-        else:
-            # For foreign persons with NULL person_code, match by name only with NULL code check
-            person_filter = "(p.person_code IS NULL OR p.person_code = '') AND p.person_name = :pn"
-            person_params = {"pn": person_name}
-        
-        companies = conn.execute(text(f"""
+        """), params),
+        # All related companies - LATERAL JOIN with LIMIT 1 instead of correlated MAX(year) subquery
+        fetch_all(text(f"""
             SELECT 
                 p.company_regcode as regcode,
                 c.name,
@@ -329,97 +282,9 @@ async def get_person_profile(identifier: str, response: Response, request: Reque
             ORDER BY 
                 CASE WHEN p.date_to IS NULL THEN 0 ELSE 1 END,
                 fr.turnover DESC NULLS LAST
-        """), person_params).fetchall()
-        
-        # Calculate KPIs in Python to avoid double counting multiple roles
-        active_companies_count = 0
-        historical_companies_count = 0
-        total_turnover = 0.0
-        total_employees = 0
-        capital_value = 0.0
-        
-        # Track processed regcodes to avoid double counting financials
-        processed_financial_regcodes = set()
-        
-        for comp in companies:
-            # Status counts (Active/Historical)
-            # A company is "active for person" if company is active AND person's role is active (date_to is None)
-            is_active_relationship = comp.status == 'active' and comp.date_to is None
-            
-            if is_active_relationship:
-                active_companies_count += 1
-            elif comp.status != 'active' or comp.date_to is not None:
-                # If relationship ended OR company is not active, it's historical
-                # Note: This simple logic might count a company as both if they have multiple roles (one active, one historical)
-                # But typically we want distinct companies. 
-                # Let's refine: We'll count distinct companies later if strictly needed, 
-                # but for "Active Companies" vs "Historical Companies" usually we mean current state of affiliation.
-                # If I am active in Company A, it's an active company for me.
-                # If I was distinct board member in Company A (ended) but am now Member (active), it is Active.
-                pass
-
-        # Re-iterate or use sets for distinct counts to be precise
-        unique_active_regcodes = set()
-        unique_historical_regcodes = set()
-        
-        for comp in companies:
-            is_active_role = comp.date_to is None
-            is_active_company = comp.status == 'active'
-            
-            if is_active_role and is_active_company:
-                unique_active_regcodes.add(comp.regcode)
-            else:
-                # Only add to historical if NOT in active (e.g. if I have one active role and one old role, I am effectively Active)
-                pass
-                
-        # Fill historical: any company where I have a record but NO active role/company status
-        # This requires checking if regcode is in unique_active_regcodes
-        current_companies_set = set(c.regcode for c in companies)
-        for rc in current_companies_set:
-            if rc not in unique_active_regcodes:
-                unique_historical_regcodes.add(rc)
-                
-        active_companies_count = len(unique_active_regcodes)
-        historical_companies_count = len(unique_historical_regcodes)
-
-        # Financials (Turnover/Employees) - Only for Active Companies
-        # Count ONCE per company (avoid double counting if person has multiple roles in same company)
-        for comp in companies:
-            if comp.regcode in unique_active_regcodes and comp.regcode not in processed_financial_regcodes:
-                # Include turnover and employees for ALL active companies where person is involved
-                if comp.turnover:
-                    try:
-                        val = float(comp.turnover)
-                        if val != val: # Check for NaN (val != val is a common Python trick, or use math.isnan)
-                             val = 0
-                        total_turnover += val
-                        logger.info(f"  + Company {comp.regcode}: {val}")
-                    except (ValueError, TypeError):
-                        pass
-                if comp.employees:
-                    total_employees += comp.employees
-                
-                processed_financial_regcodes.add(comp.regcode)
-        
-        logger.info(f"Person {person_code}: Total Turnover (accumulated): {total_turnover}")
-        
-        # Capital Value - Sum of (shares * nominal) for all ACTIVE member roles
-        # Note: A person can be a member multiple times? Usually once per company.
-        # But if they have multiple member entries (rare), we sum them.
-        for comp in companies:
-            is_active_role = comp.date_to is None
-            if comp.role == 'member' and is_active_role:
-                 if comp.number_of_shares and comp.share_nominal_value:
-                     try:
-                         val = float(comp.number_of_shares) * float(comp.share_nominal_value)
-                         capital_value += val
-                     except:
-                         pass
-
-        
-        # Get risk indicators
-        # Use same person_filter from companies query to handle NULL person_code
-        risk_data = conn.execute(text(f"""
+        """), person_params),
+        # Risk indicators
+        fetch_one(text(f"""
             SELECT 
                 COUNT(DISTINCT CASE 
                     WHEN r.risk_type = 'sanction' THEN c.regcode 
@@ -431,99 +296,9 @@ async def get_person_profile(identifier: str, response: Response, request: Reque
             JOIN companies c ON c.regcode = p.company_regcode
             LEFT JOIN risks r ON r.company_regcode = c.regcode AND r.active = true
             WHERE {person_filter} AND p.date_to IS NULL
-        """), person_params).fetchone()
-        
-        
-        # Calculate share percentages and format company list
-        companies_list = []
-        # Group companies by regcode
-        companies_map = {}
-        
-        # OPTIMIZATION: Pre-calculate total capital for all companies where this person is a member
-        # This eliminates N+1 query problem (one query per company in the loop)
-        member_company_regcodes = [comp.regcode for comp in companies if comp.role == 'member']
-        
-        company_capital_map = {}
-        if member_company_regcodes:
-            # Build a single query to get total capital for all relevant companies
-            capital_results = conn.execute(text("""
-                SELECT 
-                    company_regcode,
-                    SUM(number_of_shares * share_nominal_value) as total_capital
-                FROM persons
-                WHERE company_regcode = ANY(:regcodes) AND role = 'member'
-                GROUP BY company_regcode
-            """), {"regcodes": member_company_regcodes}).fetchall()
-            
-            for row in capital_results:
-                company_capital_map[row.company_regcode] = float(row.total_capital) if row.total_capital else 0
-        
-        for comp in companies:
-            # Calculate ownership percentage for members
-            share_percent = None
-            if comp.role == 'member' and comp.number_of_shares and comp.share_nominal_value:
-                # Use pre-calculated total capital
-                total_capital = company_capital_map.get(comp.regcode, 0)
-                
-                if total_capital > 0:
-                    my_value = float(comp.number_of_shares) * float(comp.share_nominal_value)
-                    raw_percent = (my_value / total_capital) * 100
-                    share_percent = safe_float(raw_percent)
-                    if share_percent is not None:
-                        share_percent = round(share_percent, 2)
-            
-            # Determine if this specific role is active
-            role_is_active = comp.status == 'active' and comp.date_to is None
-
-            # Create new company entry if not exists
-            if comp.regcode not in companies_map:
-                companies_map[comp.regcode] = {
-                    "regcode": comp.regcode,
-                    "name": comp.name,
-                    "status": comp.status,
-                    "nace_text": comp.nace_text,
-                    "nace_section_text": comp.nace_section_text,
-                    "roles": [],
-                    "finances": {
-                        "turnover": safe_float(comp.turnover),
-                        "profit": safe_float(comp.profit),
-                        "employees": comp.employees,
-                        "year": comp.financial_year
-                    },
-                    "is_active": False # Will be set to true if ANY role is active
-                }
-            
-            # Add role to the list
-            companies_map[comp.regcode]["roles"].append({
-                "type": comp.role,
-                "position": comp.position,
-                "share_percent": share_percent,
-                "share_currency": comp.share_currency or "EUR",
-                "date_from": str(comp.date_from) if comp.date_from else None,
-                "date_to": str(comp.date_to) if comp.date_to else None,
-                "is_active": role_is_active,
-                "rights_of_representation": comp.rights_of_representation
-            })
-
-            # Update company overall active status
-            if role_is_active:
-                companies_map[comp.regcode]["is_active"] = True
-
-        companies_list = list(companies_map.values())
-        
-        # Get collaboration network (co-occurring persons)
-        # Added STRING_AGG for company names
-        # Get collaboration network (co-occurring persons)
-        # Fetch raw data and aggregate in Python to handle name normalization (e.g. "Janis Berzins" vs "Berzins Janis")
-        # Build network filter for p1 (same logic as person_filter)
-        if person_code:
-            network_p1_filter = "p1.person_code = :pc AND p1.person_name = :pn"
-            network_params = {"pc": person_code, "pn": person_name}
-        else:
-            network_p1_filter = "(p1.person_code IS NULL OR p1.person_code = '') AND p1.person_name = :pn"
-            network_params = {"pn": person_name}
-        
-        network_raw = conn.execute(text(f"""
+        """), person_params),
+        # Collaboration network (co-occurring persons), aggregated in Python below
+        fetch_all(text(f"""
             SELECT DISTINCT
                 p2.person_name,
                 p2.person_code,
@@ -535,80 +310,266 @@ async def get_person_profile(identifier: str, response: Response, request: Reque
                 AND p2.person_code IS NOT NULL
             JOIN companies c ON c.regcode = p2.company_regcode
             WHERE {network_p1_filter}
-        """), network_params).fetchall()
-        
-        # Aggregate in Python with normalization
-        network_map = {}
+        """), network_params),
+    )
+    
+    if not person_info:
+        logger.warning(f"[get_person_profile] Detail lookup failed for resolved person: {person_name}, code={person_code}")
+        # Fallback: Try looser name match if we failed with code
+        if person_code:
+             person_info = await fetch_one(text("""
+                SELECT DISTINCT
+                    person_name,
+                    person_code,
+                    birth_date,
+                    nationality,
+                    residence
+                FROM persons
+                WHERE person_name = :pn
+                ORDER BY person_code DESC -- Prefer entries with code?
+                LIMIT 1
+            """), {"pn": person_name})
         
-        # Normalize target person name to exclude self even if name is reversed
-        target_name_parts = person_name.lower().split()
-        target_name_parts.sort()
-        target_norm_key = "-".join(target_name_parts)
+        if not person_info:
+            raise HTTPException(status_code=404, detail="Person not found")
 
-        for row in network_raw:
-            # Normalize name for grouping: lowercase, split, sort parts
-            # This merges "Oļegs Smirnovs" and "Smirnovs Oļegs"
-            name_parts = row.person_name.lower().split()
-            name_parts.sort()
-            
-            norm_key = "-".join(name_parts)
-            
-            # EXCLUDE SELF: Check if this person matches the target person
-            if norm_key == target_norm_key:
-                continue
-
-            if norm_key not in network_map:
-                network_map[norm_key] = {
-                    "name": row.person_name, # Keep one display name (first encountered)
-                    "person_code": row.person_code,
-                    "companies": set(),
-                    "company_names": set()
-                }
+    # Calculate KPIs in Python to avoid double counting multiple roles
+    active_companies_count = 0
+    historical_companies_count = 0
+    total_turnover = 0.0
+    total_employees = 0
+    capital_value = 0.0
+    
+    # Track processed regcodes to avoid double counting financials
+    processed_financial_regcodes = set()
+    
+    for comp in companies:
+        # Status counts (Active/Historical)
+        # A company is "active for person" if company is active AND person's role is active (date_to is None)
+        is_active_relationship = comp.status == 'active' and comp.date_to is None
+        
+        if is_active_relationship:
+            active_companies_count += 1
+        elif comp.status != 'active' or comp.date_to is not None:
+            # If relationship ended OR company is not active, it's historical
+            # Note: This simple logic might count a company as both if they have multiple roles (one active, one historical)
+            # But typically we want distinct companies. 
+            # Let's refine: We'll count distinct companies later if strictly needed, 
+            # but for "Active Companies" vs "Historical Companies" usually we mean current state of affiliation.
+            # If I am active in Company A, it's an active company for me.
+            # If I was distinct board member in Company A (ended) but am now Member (active), it is Active.
+            pass
+
+    # Re-iterate or use sets for distinct counts to be precise
+    unique_active_regcodes = set()
+    unique_historical_regcodes = set()
+    
+    for comp in companies:
+        is_active_role = comp.date_to is None
+        is_active_company = comp.status == 'active'
+        
+        if is_active_role and is_active_company:
+            unique_active_regcodes.add(comp.regcode)
+        else:
+            # Only add to historical if NOT in active (e.g. if I have one active role and one old role, I am effectively Active)
+            pass
             
-            network_map[norm_key]["companies"].add(row.company_regcode)
-            network_map[norm_key]["company_names"].add(row.company_name)
+    # Fill historical: any company where I have a record but NO active role/company status
+    # This requires checking if regcode is in unique_active_regcodes
+    current_companies_set = set(c.regcode for c in companies)
+    for rc in current_companies_set:
+        if rc not in unique_active_regcodes:
+            unique_historical_regcodes.add(rc)
             
-        # Convert to list and sort
-        collaboration_network = []
-        for key, data in network_map.items():
-            count = len(data["companies"])
-            company_names_str = ", ".join(sorted(list(data["company_names"])))
+    active_companies_count = len(unique_active_regcodes)
+    historical_companies_count = len(unique_historical_regcodes)
+
+    # Financials (Turnover/Employees) - Only for Active Companies
+    # Count ONCE per company (avoid double counting if person has multiple roles in same company)
+    for comp in companies:
+        if comp.regcode in unique_active_regcodes and comp.regcode not in processed_financial_regcodes:
+            # Include turnover and employees for ALL active companies where person is involved
+            if comp.turnover:
+                try:
+                    val = float(comp.turnover)
+                    if val != val: # Check for NaN (val != val is a common Python trick, or use math.isnan)
+                         val = 0
+                    total_turnover += val
+                    logger.info(f"  + Company {comp.regcode}: {val}")
+                except (ValueError, TypeError):
+                    pass
+            if comp.employees:
+                total_employees += comp.employees
             
-            collaboration_network.append({
-                "name": data["name"],
-                "person_id": generate_person_url_id(data["person_code"], data["name"]),
-                "companies_together": count,
-                "company_names": company_names_str
-            })
+            processed_financial_regcodes.add(comp.regcode)
+    
+    logger.info(f"Person {person_code}: Total Turnover (accumulated): {total_turnover}")
+    
+    # Capital Value - Sum of (shares * nominal) for all ACTIVE member roles
+    # Note: A person can be a member multiple times? Usually once per company.
+    # But if they have multiple member entries (rare), we sum them.
+    for comp in companies:
+        is_active_role = comp.date_to is None
+        if comp.role == 'member' and is_active_role:
+             if comp.number_of_shares and comp.share_nominal_value:
+                 try:
+                     val = float(comp.number_of_shares) * float(comp.share_nominal_value)
+                     capital_value += val
+                 except:
+                     pass
+
+    
+    # Get risk indicators
+    # Use same person_filter from companies query to handle NULL person_code
+    # Calculate share percentages and format company list
+    companies_list = []
+    # Group companies by regcode
+    companies_map = {}
+    
+    # OPTIMIZATION: Pre-calculate total capital for all companies where this person is a member
+    # This eliminates N+1 query problem (one query per company in the loop)
+    member_company_regcodes = [comp.regcode for comp in companies if comp.role == 'member']
+    
+    company_capital_map = {}
+    if member_company_regcodes:
+        # Build a single query to get total capital for all relevant companies
+        capital_results = await fetch_all(text("""
+            SELECT 
+                company_regcode,
+                SUM(number_of_shares * share_nominal_value) as total_capital
+            FROM persons
+            WHERE company_regcode = ANY(:regcodes) AND role = 'member'
+            GROUP BY company_regcode
+        """), {"regcodes": member_company_regcodes})
+        
+        for row in capital_results:
+            company_capital_map[row.company_regcode] = float(row.total_capital) if row.total_capital else 0
+    
+    for comp in companies:
+        # Calculate ownership percentage for members
+        share_percent = None
+        if comp.role == 'member' and comp.number_of_shares and comp.share_nominal_value:
+            # Use pre-calculated total capital
+            total_capital = company_capital_map.get(comp.regcode, 0)
             
-        # Sort by count desc
-        collaboration_network.sort(key=lambda x: x["companies_together"], reverse=True)
-        collaboration_network = collaboration_network[:15]
+            if total_capital > 0:
+                my_value = float(comp.number_of_shares) * float(comp.share_nominal_value)
+                raw_percent = (my_value / total_capital) * 100
+                share_percent = safe_float(raw_percent)
+                if share_percent is not None:
+                    share_percent = round(share_percent, 2)
+        
+        # Determine if this specific role is active
+        role_is_active = comp.status == 'active' and comp.date_to is None
+
+        # Create new company entry if not exists
+        if comp.regcode not in companies_map:
+            companies_map[comp.regcode] = {
+                "regcode": comp.regcode,
+                "name": comp.name,
+                "status": comp.status,
+                "nace_text": comp.nace_text,
+                "nace_section_text": comp.nace_section_text,
+                "roles": [],
+                "finances": {
+                    "turnover": safe_float(comp.turnover),
+                    "profit": safe_float(comp.profit),
+                    "employees": comp.employees,
+                    "year": comp.financial_year
+                },
+                "is_active": False # Will be set to true if ANY role is active
+            }
         
-        # Build response
-        return {
-            "person_code_masked": mask_person_code(person_code),
-            "person_code_hash": hash_person_code(person_code),
-            "full_name": person_info.person_name,
-            "birth_date": str(person_info.birth_date) if person_info.birth_date else None,
-            "nationality": person_info.nationality or "LV",
-            "residence": person_info.residence,
-            "risk_badges": {
-                "tax_debt": False,
-                "insolvency": bool(risk_data.has_insolvency) if risk_data else False,
-                "sanctions": bool(risk_data.has_sanctions) if risk_data else False
-            },
-            "kpi": {
-                "active_companies_count": active_companies_count,
-                "historical_companies_count": historical_companies_count,
-                "total_turnover_managed": safe_float(total_turnover),
-                "total_employees_managed": total_employees,
-                "capital_share_value": safe_float(capital_value)
-            },
-            "companies": companies_list,
-            "collaboration_network": collaboration_network,
-            "has_full_access": has_full_access
-        }
+        # Add role to the list
+        companies_map[comp.regcode]["roles"].append({
+            "type": comp.role,
+            "position": comp.position,
+            "share_percent": share_percent,
+            "share_currency": comp.share_currency or "EUR",
+            "date_from": str(comp.date_from) if comp.date_from else None,
+            "date_to": str(comp.date_to) if comp.date_to else None,
+            "is_active": role_is_active,
+            "rights_of_representation": comp.rights_of_representation
+        })
+
+        # Update company overall active status
+        if role_is_active:
+            companies_map[comp.regcode]["is_active"] = True
+
+    companies_list = list(companies_map.values())
+    
+    # Collaboration network: aggregate in Python to handle name normalization (e.g. "Janis Berzins" vs "Berzins Janis")
+    network_map = {}
+    
+    # Normalize target person name to exclude self even if name is reversed
+    target_name_parts = person_name.lower().split()
+    target_name_parts.sort()
+    target_norm_key = "-".join(target_name_parts)
+
+    for row in network_raw:
+        # Normalize name for grouping: lowercase, split, sort parts
+        # This merges "Oļegs Smirnovs" and "Smirnovs Oļegs"
+        name_parts = row.person_name.lower().split()
+        name_parts.sort()
+        
+        norm_key = "-".join(name_parts)
+        
+        # EXCLUDE SELF: Check if this person matches the target person
+        if norm_key == target_norm_key:
+            continue
+
+        if norm_key not in network_map:
+            network_map[norm_key] = {
+                "name": row.person_name, # Keep one display name (first encountered)
+                "person_code": row.person_code,
+                "companies": set(),
+                "company_names": set()
+            }
+        
+        network_map[norm_key]["companies"].add(row.company_regcode)
+        network_map[norm_key]["company_names"].add(row.company_name)
+        
+    # Convert to list and sort
+    collaboration_network = []
+    for key, data in network_map.items():
+        count = len(data["companies"])
+        company_names_str = ", ".join(sorted(list(data["company_names"])))
+        
+        collaboration_network.append({
+            "name": data["name"],
+            "person_id": generate_person_url_id(data["person_code"], data["name"]),
+            "companies_together": count,
+            "company_names": company_names_str
+        })
+        
+    # Sort by count desc
+    collaboration_network.sort(key=lambda x: x["companies_together"], reverse=True)
+    collaboration_network = collaboration_network[:15]
+    
+    # Build response
+    return {
+        "person_code_masked": mask_person_code(person_code),
+        "person_code_hash": hash_person_code(person_code),
+        "full_name": person_info.person_name,
+        "birth_date": str(person_info.birth_date) if person_info.birth_date else None,
+        "nationality": person_info.nationality or "LV",
+        "residence": person_info.residence,
+        "risk_badges": {
+            "tax_debt": False,
+            "insolvency": bool(risk_data.has_insolvency) if risk_data else False,
+            "sanctions": bool(risk_data.has_sanctions) if risk_data else False
+        },
+        "kpi": {
+            "active_companies_count": active_companies_count,
+            "historical_companies_count": historical_companies_count,
+            "total_turnover_managed": safe_float(total_turnover),
+            "total_employees_managed": total_employees,
+            "capital_share_value": safe_float(capital_value)
+        },
+        "companies": companies_list,
+        "collaboration_network": collaboration_network,
+        "has_full_access": has_full_access
+    }
 
 
 @router.get("/person/{identifier}/companies")
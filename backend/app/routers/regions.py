@@ -7,6 +7,7 @@ Endpoints:
 - GET /api/regions/{id}/industries - Get industry breakdown for territory
 - GET /api/regions/{id}/top-companies - Get top companies in territory
 - POST /api/regions/compare - Compare multiple territories
+- GET /api/regions/lookup - Free text -> territory ids (any level) for region filters
 """
 
 from fastapi import APIRouter, Depends, Query, HTTPException, Response
@@ -14,6 +15,9 @@ from sqlalchemy import text
 from typing import List, Optional
 from pydantic import BaseModel
 from app.core.database import engine
+from app.core.cache import cached
+from app.core.etag import etag
+from app.services.territories import territory_index
 
 router = APIRouter(prefix="/regions", tags=["regions"])
 
@@ -102,6 +106,8 @@ def safe_float(val):
         return None
 
 @router.get("/overview", response_model=List[TerritoryOverview])
+@etag()
+@cached(ttl=3600, maxsize=64)
 def get_regions_overview(
     year: Optional[int] = Query(None, description="Year for data (default: latest)"),
     metric: str = Query("revenue", description="Sort by metric: revenue, employees, salary, growth"),
@@ -178,6 +184,7 @@ def get_regions_overview(
 
 
 @router.get("/years")
+@cached(ttl=3600, maxsize=1)
 def get_available_years():
     """Get list of years with data available"""
     with engine.connect() as conn:
@@ -190,6 +197,7 @@ def get_available_years():
 
 
 @router.get("/{territory_id}/details", response_model=TerritoryDetails)
+@cached(ttl=3600, maxsize=512)
 def get_territory_details(
     territory_id: int,
     year: Optional[int] = Query(None, description="Year for data"),
@@ -273,6 +281,7 @@ def get_territory_details(
 
 
 @router.get("/{territory_id}/industries", response_model=List[IndustryBreakdown])
+@cached(ttl=3600, maxsize=512)
 def get_territory_industries(
     territory_id: int,
     year: Optional[int] = Query(None),
@@ -321,6 +330,7 @@ def get_territory_industries(
 
 
 @router.get("/{territory_id}/top-companies", response_model=List[TopCompany])
+@cached(ttl=3600, maxsize=512)
 def get_territory_top_companies(
     territory_id: int,
     year: Optional[int] = Query(None),
@@ -389,6 +399,7 @@ def get_territory_top_companies(
 
 
 @router.post("/compare")
+@cached(ttl=3600, maxsize=256)
 def compare_territories(
     request: CompareRequest,
 ):
@@ -459,6 +470,7 @@ def compare_territories(
 
 
 @router.get("/search")
+@cached(ttl=3600, maxsize=512)
 def search_territories(
     q: str = Query(..., min_length=2),
     limit: int = Query(10, ge=1, le=50),
@@ -485,3 +497,20 @@ def search_territories(
             }
             for row in result.fetchall()
         ]
+
+
+@router.get("/lookup")
+@etag()
+def lookup_territories(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    level: Optional[int] = Query(None, ge=1, le=3, description="1=region, 2=municipality, 3=city/parish"),
+    response: Response = None,
+):
+    """
+    Map free text to territory ids for ?territory= filters (/companies/list,
+    /analytics/people/search). Accent-insensitive, served from the in-memory territory index.
+    """
+    if response:
+        response.headers["Cache-Control"] = "public, max-age=3600"
+    return territory_index().lookup(q, limit=limit, level=level)
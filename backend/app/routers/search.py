@@ -1,27 +1,23 @@
 
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from typing import Optional
 from app.core.database import engine
+from app.core.cache import cached
 import logging
-import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# In-memory cache for stats (5 minute TTL)
-_stats_cache = {"data": None, "expires": 0}
 STATS_CACHE_TTL = 300  # 5 minutes
 
 @router.get("/stats")
+@cached(ttl=STATS_CACHE_TTL, maxsize=1)
 def get_stats():
     """Get statistics for the homepage (cached for 5 minutes)"""
     from datetime import datetime
     
-    # Return cached data if still valid
-    if _stats_cache["data"] and time.time() < _stats_cache["expires"]:
-        logger.debug("Returning cached stats")
-        return _stats_cache["data"]
-    
     stats = {
         "daily_stats": {"new_today": 0, "change": 0},
         "top_earner": {"name": "N/A", "detail": ""},
@@ -82,88 +78,118 @@ def get_stats():
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
     
-    # Update cache with new data
-    _stats_cache["data"] = stats
-    _stats_cache["expires"] = time.time() + STATS_CACHE_TTL
-    
     return stats
 
-@router.get("/search")
-def search_companies(q: str = "", nace: str = None):
+# Common company type abbreviations
+TYPE_ABBREVIATIONS = ['sia', 'as', 'ik', 'zs', 'ks', 'ps', 'biedrība', 'nodibinājums']
+
+# Full-text search is two-phase: the GIN index finds the matches and ts_rank_cd keeps the
+# best SEARCH_CANDIDATES; only those are re-scored with trigram similarity and turnover
+SEARCH_CANDIDATES = 200
+SEARCH_LIMIT = 50
+
+RESULT_COLUMNS = """
+    c.regcode, c.name, c.name_in_quotes, c."type" as company_type, c.type_text,
+    c.address, c.status, c.registration_date,
+    c.nace_section, c.nace_section_text,
+    c.latest_turnover as turnover
+"""
+
+
+def fts_search_query(q: str, nace: Optional[str]):
     """
-    Search companies by name/regcode with optional industry filter.
-    Uses pg_trgm for fast, ranked similarity search.
-    
-    Args:
-        q: Search query (name or registration code)
-        nace: NACE section code filter (e.g., "C", "62", "J")
+    (sql, params) for /search on companies.search_vector (db/migrations/add_company_search_vector.sql).
+    q uses websearch syntax ("phrase", OR, -word), every word matches as a prefix.
+    Order: active first, exact name / regcode match, then
+    0.5 * similarity + 0.3 * turnover (log scale, 1e9 = 1) + 0.2 * text rank.
     """
-    if (not q or len(q) < 2) and not nace:
-        return []
-    
-    # Split query into words for flexible matching
-    raw_query = q.strip()
-    query_words = raw_query.split() if raw_query else []
-    
-    # Build WHERE clause
+    name_words = [w for w in q.split() if w.lower() not in TYPE_ABBREVIATIONS]
+    params = {
+        "q": q,
+        "phrase": " ".join(name_words) or q,
+        "candidates": SEARCH_CANDIDATES,
+        "limit": SEARCH_LIMIT,
+    }
+    nace_clause = ""
+    if nace:
+        nace_clause = "AND c.nace_section = :nace"
+        params["nace"] = nace
+
+    display_name = "immutable_unaccent(lower(COALESCE(c.name_in_quotes, c.name)))"
+    sql = f"""
+    WITH candidates AS (
+        SELECT c.regcode, ts_rank_cd(c.search_vector, query, 32) AS text_rank
+        FROM companies c, company_search_query(:q) AS query
+        WHERE c.search_vector @@ query
+          {nace_clause}
+        ORDER BY text_rank DESC
+        LIMIT :candidates
+    )
+    SELECT {RESULT_COLUMNS}
+    FROM candidates k
+    JOIN companies c ON c.regcode = k.regcode
+    ORDER BY
+        CASE WHEN c.status = 'active' THEN 0 ELSE 1 END,
+        CASE
+            WHEN {display_name} = immutable_unaccent(lower(:phrase)) THEN 0
+            WHEN c.regcode::text = :phrase THEN 0
+            ELSE 1
+        END,
+        0.5 * SIMILARITY({display_name}, immutable_unaccent(lower(:phrase)))
+          + 0.3 * CASE WHEN c.latest_turnover > 0 AND c.latest_turnover != 'NaN'
+                       THEN LEAST(LOG(c.latest_turnover::numeric) / 9, 1) ELSE 0 END
+          + 0.2 * k.text_rank DESC,
+        c.regcode
+    LIMIT :limit
+    """
+    return sql, params
+
+
+def like_search_query(q: str, nace: Optional[str]):
+    """
+    (sql, params) for /search without the search_vector column (before
+    maintenance.py has applied the migration): LIKE per word + SIMILARITY per row.
+    """
+    query_words = q.split()
     where_conditions = []
     params = {}
-    
-    # Ensure extensions (idempotent, fast if already exists)
-    with engine.connect() as conn:
-        try:
-            conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent;"))
-            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
-            conn.commit()
-        except:
-            pass
-    
-    # Common company type abbreviations
-    TYPE_ABBREVIATIONS = ['sia', 'as', 'ik', 'zs', 'ks', 'ps', 'biedrība', 'nodibinājums']
-    
+
     # Separate type words from name words
     name_words = [w for w in query_words if w.lower() not in TYPE_ABBREVIATIONS]
     type_words = [w for w in query_words if w.lower() in TYPE_ABBREVIATIONS]
-    
-    # Determine search mode and ORDER BY
+
     if query_words and query_words[0].isdigit():
         # REGCODE SEARCH
         where_conditions.append("CAST(regcode AS TEXT) LIKE :q_pattern")
         params["q_pattern"] = f"{query_words[0]}%"
-        order_by = "regcode ASC"
     else:
-        # TEXT SEARCH with SIMILARITY RANKING
-        
         # A) Name word conditions (AND logic - all words must be present)
         for i, word in enumerate(name_words):
             where_conditions.append(f"immutable_unaccent(lower(name)) LIKE immutable_unaccent(lower(:word{i}))")
             params[f"word{i}"] = f"%{word}%"
-        
+
         # B) Type conditions (if any type abbreviations in query)
         if type_words:
             type_cond = " OR ".join([f"LOWER(\"type\") = :type{i}" for i in range(len(type_words))])
             where_conditions.append(f"({type_cond})")
             for i, tw in enumerate(type_words):
                 params[f"type{i}"] = tw.lower()
-        
+
         # C) Industry filter
         if nace:
             where_conditions.append("nace_section = :nace")
             params["nace"] = nace
-        
-    # SIMILARITY RANKING & FINANCIAL WEIGHT
-    # Full query string for similarity calculation
-    clean_query_str = " ".join(name_words)
-    params["full_query"] = clean_query_str
-    
-    # ORDER BY logic:
-    # 1. Exact match in quotes (e.g. searching "Tet" matches "Tet" exactly)
-    # 2. Starts with query (Prefix match on name_in_quotes)
-    # 3. Active status
-    # 4. Financial Relevance (Turnover) - Big companies first
-    # 5. Text Similarity
-    
-    order_by = """
+
+    params["full_query"] = " ".join(name_words)
+    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+
+    # 1. Active status 2. Exact match 3. Prefix match on name_in_quotes
+    # 4. Financial Relevance (Turnover) 5. Text Similarity
+    sql = f"""
+    SELECT {RESULT_COLUMNS}
+    FROM companies c
+    WHERE {where_clause}
+    ORDER BY
         CASE WHEN c.status = 'active' THEN 0 ELSE 1 END,
         CASE 
             WHEN immutable_unaccent(lower(c.name_in_quotes)) = immutable_unaccent(lower(:full_query)) THEN 0 
@@ -176,25 +202,53 @@ def search_companies(q: str = "", nace: str = None):
         END,
         c.latest_turnover DESC NULLS LAST,
         SIMILARITY(immutable_unaccent(lower(c.name)), immutable_unaccent(lower(:full_query))) DESC
+    LIMIT {SEARCH_LIMIT}
     """
-    
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-    
-    # Optimized SQL - No Joins needed!
+    return sql, params
+
+
+def nace_search_query(nace: str):
+    """(sql, params) for /search?nace= without a query: the section's largest active companies"""
     sql = f"""
-    SELECT c.regcode, c.name, c.name_in_quotes, c."type" as company_type, c.type_text,
-           c.address, c.status, c.registration_date, 
-           c.nace_section, c.nace_section_text,
-           c.latest_turnover as turnover
+    SELECT {RESULT_COLUMNS}
     FROM companies c
-    WHERE {where_clause}
-    ORDER BY {order_by}
-    LIMIT 50;
+    WHERE c.nace_section = :nace
+    ORDER BY CASE WHEN c.status = 'active' THEN 0 ELSE 1 END, c.latest_turnover DESC NULLS LAST
+    LIMIT {SEARCH_LIMIT}
+    """
+    return sql, {"nace": nace}
+
+
+@router.get("/search")
+def search_companies(q: str = "", nace: str = None):
+    """
+    Search companies by name/regcode with optional industry filter.
+    Full-text search on companies.search_vector (GIN), top candidates re-ranked
+    with pg_trgm similarity and turnover.
+    
+    Args:
+        q: Search query (name or registration code; "phrase", OR and -word work)
+        nace: NACE section code filter (e.g., "C", "62", "J")
     """
+    if (not q or len(q) < 2) and not nace:
+        return []
     
+    raw_query = q.strip() if q else ""
+    if raw_query:
+        sql, params = fts_search_query(raw_query, nace)
+    else:
+        sql, params = nace_search_query(nace)
+
     result_data = []
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), params)
+        try:
+            rows = conn.execute(text(sql), params).fetchall()
+        except ProgrammingError as e:
+            # search_vector / company_search_query() not created yet - python maintenance.py
+            logger.warning(f"Full-text search unavailable, using LIKE search: {e.orig}")
+            conn.rollback()
+            sql, params = like_search_query(raw_query, nace)
+            rows = conn.execute(text(sql), params).fetchall()
         for row in rows:
             result_data.append({
                 "regcode": row.regcode,
@@ -0,0 +1,319 @@
+"""
+In-process company name index for autocomplete (/home/search-hint).
+
+Built from `companies` (regcode, name, name_in_quotes, type, status, latest_turnover):
+
+- documents are numbered in static rank order - active first, then latest_turnover
+  DESC NULLS LAST - so a sorted list of document numbers is already ranked by two of
+  the hint's signals
+- tokens:  sorted vocabulary of unaccented, lowercased name words; the postings of
+  every token are one slice of a single int32 array (CSR), and the tokens that
+  start with a typed prefix are a contiguous vocabulary range - so a prefix is
+  one bisect + one array slice
+- phrases: unaccented display names (name_in_quotes or name) sorted, with their
+  document numbers - exact and prefix phrase matches are a bisect range
+- strings are packed into UTF-8 blobs + uint32 offsets instead of Python objects
+
+Matching: every query word is a prefix of some name word (order-independent,
+accent-insensitive); SIA / AS / IK ... filter the company type. Ranking:
+active -> exact name_in_quotes match -> prefix match -> latest_turnover.
+
+Budget for 500k companies (scripts/benchmark_company_search.py, synthetic names):
+~53 MB per worker once built (names 21, phrases 11, postings + forward index 12,
+vocabulary 2), ~360 MB transient and ~10 s of one core while building; lookups
+p50 0.26 ms / p95 0.7 ms. COMPANY_SEARCH_INDEX=false turns it off (search_hint
+then queries Postgres).
+
+The index is loaded in a background thread at startup and rebuilt the same way
+when data_version changes; the new index replaces the old one in a single
+assignment, requests in flight keep the one they started with.
+"""
+import os
+import re
+import bisect
+import logging
+import threading
+import time
+import unicodedata
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.cache import data_version
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("COMPANY_SEARCH_INDEX", "true").lower() == "true"
+
+# Company type abbreviations - a query word equal to one filters on companies."type"
+TYPE_ABBREVIATIONS = ("sia", "as", "ik", "zs", "ks", "ps")
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Unaccented lowercase words: 'SIA "Ādažu Maiznīca"' -> ['sia', 'adazu', 'maiznica']"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    folded = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+    return _WORD.findall(folded)
+
+
+class PackedStrings:
+    """Read-only sequence of strings stored as one UTF-8 blob; supports bisect"""
+
+    def __init__(self, strings: List[str]):
+        encoded = [s.encode("utf-8") for s in strings]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in encoded], dtype=np.uint32, out=self.offsets[1:])
+        self.blob = b"".join(encoded)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.blob) + self.offsets.nbytes
+
+
+class CompanySearchIndex:
+    """Immutable name index built from company rows; search() per keystroke"""
+
+    def __init__(self, rows):
+        """rows: (regcode, name, name_in_quotes, type, status, latest_turnover)"""
+        rows = list(rows)
+
+        def rank(row):
+            turnover = row[5]
+            known = turnover is not None and turnover == turnover  # NaN != NaN
+            return (row[4] != "active", not known, -float(turnover) if known else 0.0, row[0])
+
+        rows.sort(key=rank)
+        self.size = len(rows)
+        self.active_count = sum(1 for row in rows if row[4] == "active")
+        self.regcodes = np.array([row[0] for row in rows], dtype=np.int64)
+        self.names = PackedStrings([row[1] or "" for row in rows])
+        self.quoted = PackedStrings([row[2] or "" for row in rows])
+
+        type_names = sorted({(row[3] or "") for row in rows})
+        self.type_names = type_names
+        self.type_ids = {name.lower(): i for i, name in enumerate(type_names)}
+        self.types = np.array([self.type_ids[(row[3] or "").lower()] for row in rows], dtype=np.uint16)
+
+        # Token postings: (token id, document) pairs appended in document order, so a
+        # stable sort by token keeps every posting list sorted; in document order the
+        # same pairs are the forward index (document -> its tokens)
+        vocabulary = {}
+        pair_tokens, pair_docs = [], []
+        phrases = []
+        for doc, row in enumerate(rows):
+            for token in set(tokenize(row[1])):
+                pair_tokens.append(vocabulary.setdefault(token, len(vocabulary)))
+                pair_docs.append(doc)
+            phrases.append(" ".join(tokenize(row[2] or row[1])))
+
+        tokens = sorted(vocabulary)
+        remap = np.empty(len(tokens), dtype=np.int32)
+        remap[[vocabulary[t] for t in tokens]] = np.arange(len(tokens), dtype=np.int32)
+        pair_tokens = remap[np.array(pair_tokens, dtype=np.int32)] if pair_tokens else np.array([], dtype=np.int32)
+        pair_docs = np.array(pair_docs, dtype=np.int32)
+        self.tokens = PackedStrings(tokens)
+        self.postings = pair_docs[np.argsort(pair_tokens, kind="stable")]
+        self.posting_offsets = np.zeros(len(tokens) + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(pair_tokens, minlength=len(tokens)), dtype=np.uint32, out=self.posting_offsets[1:])
+        self.doc_tokens = pair_tokens
+        self.doc_offsets = np.zeros(self.size + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(pair_docs, minlength=self.size), dtype=np.uint32, out=self.doc_offsets[1:])
+
+        phrase_order = sorted(range(self.size), key=phrases.__getitem__)
+        self.phrases = PackedStrings([phrases[i] for i in phrase_order])
+        self.phrase_docs = np.array(phrase_order, dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.regcodes, self.types, self.postings, self.posting_offsets, self.doc_tokens,
+                  self.doc_offsets, self.phrase_docs)
+        packed = (self.names, self.quoted, self.tokens, self.phrases)
+        return sum(a.nbytes for a in arrays) + sum(p.nbytes for p in packed)
+
+    def token_range(self, prefix: str):
+        """Token ids [lo, hi) of the name words starting with prefix"""
+        lo = bisect.bisect_left(self.tokens, prefix)
+        return lo, bisect.bisect_left(self.tokens, prefix + "\U0010ffff", lo)
+
+    def postings_of(self, token_range) -> np.ndarray:
+        """Documents of a token range - sorted and distinct only for a single token"""
+        lo, hi = token_range
+        return self.postings[self.posting_offsets[lo]:self.posting_offsets[hi]]
+
+    def has_token(self, docs: np.ndarray, token_range) -> np.ndarray:
+        """Per document: does it have a token in the range (forward index, for few documents)"""
+        starts = self.doc_offsets[docs].astype(np.int64)
+        lengths = self.doc_offsets[docs + 1].astype(np.int64) - starts
+        owner = np.repeat(np.arange(len(docs)), lengths)
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        tokens = self.doc_tokens[positions]
+        found = np.zeros(len(docs), dtype=bool)
+        found[owner[(tokens >= token_range[0]) & (tokens < token_range[1])]] = True
+        return found
+
+    def matching(self, words: List[str], allowed_types: Optional[np.ndarray]):
+        """
+        (docs, None): sorted documents where every word prefixes a name word and the type
+        is allowed - when the most selective word is selective; else (None, bitmap) of the
+        word matches, types not applied - broad prefixes ('ja', 's') are never sorted or
+        enumerated in full.
+        """
+        ranges = sorted((self.token_range(w) for w in words), key=lambda r: len(self.postings_of(r)))
+        docs = self.postings_of(ranges[0])
+        if len(docs) <= self.size // 64:
+            if ranges[0][1] - ranges[0][0] > 1:
+                docs = np.unique(docs)
+            if allowed_types is not None:
+                docs = docs[allowed_types[self.types[docs]]]
+            for other in ranges[1:]:
+                if not len(docs):
+                    break
+                other_docs = self.postings_of(other)
+                if len(other_docs) > 8 * len(docs):
+                    docs = docs[self.has_token(docs, other)]
+                else:
+                    mask = np.zeros(self.size, dtype=bool)
+                    mask[other_docs] = True
+                    docs = docs[mask[docs]]
+            return docs, None
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[docs] = True
+        for other in ranges[1:]:
+            other_mask = np.zeros(self.size, dtype=bool)
+            other_mask[self.postings_of(other)] = True
+            mask &= other_mask
+        return None, mask
+
+    def first_set(self, mask: np.ndarray, allowed_types: Optional[np.ndarray], start: int, stop: int,
+                  k: int) -> np.ndarray:
+        """First k matching documents in [start, stop), scanning the bitmap in growing chunks"""
+        found, count, chunk = [], 0, 4096
+        while start < stop and count < k:
+            end = min(stop, start + chunk)
+            hits = mask[start:end]
+            if allowed_types is not None:
+                hits = hits & allowed_types[self.types[start:end]]
+            found.append(np.flatnonzero(hits) + start)
+            count += len(found[-1])
+            start, chunk = end, chunk * 4
+        return np.concatenate(found)[:k] if found else np.array([], dtype=np.int64)
+
+    def search(self, q: str, limit: int = 7) -> List[dict]:
+        words = tokenize(q)
+        if not words:
+            return []
+        name_words = [w for w in words if w not in TYPE_ABBREVIATIONS]
+        type_words = [w for w in words if w in TYPE_ABBREVIATIONS]
+        allowed_types = None
+        if type_words:
+            allowed_types = np.zeros(len(self.type_names), dtype=bool)
+            allowed_types[[self.type_ids[t] for t in type_words if t in self.type_ids]] = True
+
+        docs, mask = self.matching(name_words or words, allowed_types)
+        if docs is not None:
+            if not len(docs):
+                return []
+            # A non-phrase result is among the first `limit` matches of its activity group
+            # (documents are in rank order)
+            cut = np.searchsorted(docs, self.active_count)
+            heads = [docs[:limit], docs[cut:cut + limit]]
+            mask = np.zeros(self.size, dtype=bool)
+            mask[docs] = True
+            allowed_types = None
+        else:
+            heads = [self.first_set(mask, allowed_types, 0, self.active_count, limit),
+                     self.first_set(mask, allowed_types, self.active_count, self.size, limit)]
+
+        # Phrase matches on the display name: exact (class 0), then prefix (class 1)
+        phrase = " ".join(name_words or words)
+        lo = bisect.bisect_left(self.phrases, phrase)
+        exact_hi = bisect.bisect_right(self.phrases, phrase, lo)
+        hi = bisect.bisect_left(self.phrases, phrase + "\U0010ffff", exact_hi)
+        keep = mask[self.phrase_docs[lo:hi]]
+        if allowed_types is not None:
+            keep &= allowed_types[self.types[self.phrase_docs[lo:hi]]]
+        phrase_docs = self.phrase_docs[lo:hi][keep].astype(np.int64)
+        phrase_class = (np.arange(lo, hi) >= exact_hi)[keep].astype(np.int64)
+
+        # Rank key (inactive, class, document) as one integer; a document is in the pool at
+        # most twice (phrase match + group head), so the 2 * limit smallest keys suffice
+        pool = np.concatenate([phrase_docs] + [h.astype(np.int64) for h in heads])
+        classes = np.concatenate([phrase_class, np.full(len(pool) - len(phrase_docs), 2, dtype=np.int64)])
+        keys = ((pool >= self.active_count) * 3 + classes) * self.size + pool
+        if len(keys) > 2 * limit:
+            keys = np.partition(keys, 2 * limit)[:2 * limit]
+        ranked = []
+        for doc in (np.sort(keys) % self.size).tolist():
+            if doc not in ranked:
+                ranked.append(doc)
+        return [self.document(doc) for doc in ranked[:limit]]
+
+    def document(self, doc: int) -> dict:
+        return {
+            "regcode": int(self.regcodes[doc]),
+            "name": self.names[doc],
+            "name_in_quotes": self.quoted[doc] or None,
+            "type": self.type_names[self.types[doc]] or None,
+        }
+
+
+_UNLOADED = object()
+_state = {"index": None, "version": _UNLOADED, "loading": False}
+_state_lock = threading.Lock()
+
+
+def load_index() -> CompanySearchIndex:
+    started = time.monotonic()
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=20_000).execute(text("""
+            SELECT regcode, name, name_in_quotes, "type", status, latest_turnover
+            FROM companies
+            WHERE name IS NOT NULL
+        """))
+        index = CompanySearchIndex(tuple(row) for row in result)
+    logger.info(f"🔎 Company search index: {index.size} companies, {index.nbytes / 1e6:.0f} MB, "
+                f"{time.monotonic() - started:.1f}s")
+    return index
+
+
+def _reload():
+    try:
+        _state["version"] = data_version()
+        index = load_index()
+        _state["index"] = index
+    except Exception as e:
+        logger.error(f"⚠️ Company search index load failed: {e}")
+    finally:
+        _state["loading"] = False
+
+
+def start_reload():
+    """Build a new index in a background thread (no-op while one is being built)"""
+    if not ENABLED:
+        return
+    with _state_lock:
+        if _state["loading"]:
+            return
+        _state["loading"] = True
+    threading.Thread(target=_reload, daemon=True, name="company-search-index").start()
+
+
+def company_index() -> Optional[CompanySearchIndex]:
+    """The current index, None while the first load runs; a new data_version starts a rebuild"""
+    if not ENABLED:
+        return None
+    # The version is stored before loading, so a failed load is retried on the next version, not every request
+    if not _state["loading"] and data_version() != _state["version"]:
+        start_reload()
+    return _state["index"]
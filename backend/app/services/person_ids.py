@@ -0,0 +1,40 @@
+"""
+Public person identifiers (the /person/{id} URL id and persons.person_hash).
+
+Shared by the API and the persons ETL stage, so both compute the same id;
+kept free of web and database imports.
+"""
+
+
+def generate_person_url_id(person_code: str, person_name: str) -> str:
+    """
+    Generate URL-safe person identifier using hash.
+    Format: 8-character hex hash (e.g., "a3f2b9c1")
+    
+    Normalizes name by:
+    1. Lowercase
+    2. Split into parts
+    3. Sort parts alphabetically
+    4. Join back
+    
+    Uses ONLY first 6 chars of person_code (DDMMYY) to match frontend logic
+    and support masked data.
+    """
+    # Normalize name
+    normalized_name = " ".join(sorted(person_name.lower().split()))
+    
+    # Use only first 6 chars of person_code (DDMMYY)
+    code_fragment = person_code[:6] if person_code else ""
+    
+    # Create hash input
+    hash_input = f"{code_fragment}|{normalized_name}"
+    
+    # Simple hash function (matching frontend)
+    hash_val = 0
+    for char in hash_input:
+        hash_val = ((hash_val << 5) - hash_val) + ord(char)
+        hash_val = hash_val & 0xFFFFFFFF  # 32-bit integer
+    
+    # Convert to hex (8 characters)
+    hash_hex = format(abs(hash_val) & 0xFFFFFFFF, '08x')[:8]
+    return hash_hex
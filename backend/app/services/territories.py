@@ -0,0 +1,154 @@
+"""
+ATVK territory hierarchy held in memory (the `territories` table is a few hundred rows).
+
+- resolve(): territory ids / 7-character ATVK codes -> ids of those territories and every
+  child territory (region -> municipalities -> cities / parishes)
+- match():   free-text region name -> ids of the best matching territories
+- lookup():  ranked, accent-insensitive name search (GET /regions/lookup)
+
+territory_index() loads it once per worker and reloads it with data_version, so a region
+filter costs a dict lookup here and an integer ANY() on an indexed column in SQL.
+"""
+import logging
+import unicodedata
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+
+from app.core.cache import cached
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+def fold(value: str) -> str:
+    """Lowercase without diacritics: 'Rīgas' -> 'rigas'"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().strip()
+
+
+class TerritoryIndex:
+    """Territories by id / code with their children; built from (id, code, name, type, level, parent_code, current) rows"""
+
+    def __init__(self, rows: Iterable):
+        self.by_id = {}
+        self.by_code = {}
+        self.children = {}
+        for row in rows:
+            t = {"id": row[0], "code": row[1], "name": row[2], "type": row[3], "level": row[4],
+                 "parent_code": row[5], "current": bool(row[6]), "folded": fold(row[2])}
+            self.by_id[t["id"]] = t
+            self.by_code[t["code"]] = t
+        for t in self.by_id.values():
+            parent = self.by_code.get(t["parent_code"])
+            if parent and parent["id"] != t["id"]:
+                self.children.setdefault(parent["id"], []).append(t["id"])
+
+    def get(self, value) -> Optional[dict]:
+        """Territory by id or by 7-character ATVK code"""
+        value = str(value).strip()
+        if len(value) == 7 and value in self.by_code:
+            return self.by_code[value]
+        return self.by_id.get(int(value)) if value.isdigit() else None
+
+    def expand(self, ids: Iterable[int]) -> set:
+        """The territories and all their descendants"""
+        result = set()
+        stack = [i for i in ids if i in self.by_id]
+        while stack:
+            current = stack.pop()
+            if current not in result:
+                result.add(current)
+                stack.extend(self.children.get(current, ()))
+        return result
+
+    def resolve(self, values: Iterable):
+        """(expanded ids, values that are neither a known id nor a code)"""
+        found, unknown = [], []
+        for value in values:
+            t = self.get(value)
+            if t:
+                found.append(t["id"])
+            else:
+                unknown.append(value)
+        return self.expand(found), unknown
+
+    def lift(self, ids: Iterable[int], level: int) -> set:
+        """Ids below `level` replaced by their ancestor at `level` (a parish -> its municipality)"""
+        result = set()
+        for i in ids:
+            t = self.by_id.get(i)
+            while t and t["level"] > level:
+                t = self.by_code.get(t["parent_code"])
+            if t and t["level"] == level:
+                result.add(t["id"])
+        return result
+
+    def codes(self, ids: Iterable[int]) -> List[str]:
+        return sorted(self.by_id[i]["code"] for i in ids if i in self.by_id)
+
+    def match(self, name: str) -> set:
+        """
+        Ids (expanded) for a free-text region name: territories named exactly that, else
+        the broadest level whose names start with it ('Vidzeme' -> Vidzemes reģions).
+        Empty set if nothing matches.
+        """
+        term = fold(name)
+        if not term:
+            return set()
+        exact = [t for t in self.by_id.values() if t["folded"] == term]
+        if exact:
+            return self.expand(t["id"] for t in exact)
+        prefixed = [t for t in self.by_id.values() if t["folded"].startswith(term)]
+        if not prefixed:
+            return set()
+        broadest = min(t["level"] for t in prefixed)
+        return self.expand(t["id"] for t in prefixed if t["level"] == broadest)
+
+    def lookup(self, q: str, limit: int = 10, level: Optional[int] = None) -> List[dict]:
+        """Name search ranked exact > prefix > word prefix > substring, current territories and higher levels first"""
+        term = fold(q)
+        if not term:
+            return []
+        ranked = []
+        for t in self.by_id.values():
+            if level and t["level"] != level:
+                continue
+            name = t["folded"]
+            if name == term:
+                rank = 0
+            elif name.startswith(term):
+                rank = 1
+            elif any(word.startswith(term) for word in name.replace("-", " ").split()):
+                rank = 2
+            elif term in name:
+                rank = 3
+            else:
+                continue
+            ranked.append(((not t["current"], rank, t["level"], name), t))
+        ranked.sort(key=lambda item: item[0])
+        return [self.describe(t) for _, t in ranked[:limit]]
+
+    def describe(self, t: dict) -> dict:
+        parent = self.by_code.get(t["parent_code"])
+        return {
+            "id": t["id"],
+            "code": t["code"],
+            "name": t["name"],
+            "type": t["type"],
+            "level": t["level"],
+            "parent_id": parent["id"] if parent else None,
+            "parent_name": parent["name"] if parent else None,
+        }
+
+
+@cached(ttl=3600, maxsize=1, name="territories.index")
+def territory_index() -> TerritoryIndex:
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT id, code, name, type, level, parent_code,
+                   (valid_to IS NULL OR valid_to > NOW()) AS current
+            FROM territories
+        """)).fetchall()
+    logger.info(f"🗺️ Territory index loaded: {len(rows)} territories")
+    return TerritoryIndex(rows)
@@ -0,0 +1,49 @@
+"""
+pytest: app state shared at module level is isolated per test, so test modules that
+patch it (test_response_cache, test_etag, test_single_flight, ...) run in one session.
+
+- the attributes of the patched app modules are restored after every test
+- response caches, the cached data_version, the shared cache backend and in-flight
+  single-flight runs are reset before and after every test
+
+Modules are only touched if a test already imported them - ETL tests do not pull in FastAPI.
+"""
+import sys
+
+import pytest
+
+PATCHED_MODULES = (
+    "app.core.cache",
+    "app.core.shared_cache",
+    "app.core.single_flight",
+    "app.routers.companies",
+    "app.utils.access_control",
+)
+
+
+def _reset_app_state():
+    cache = sys.modules.get("app.core.cache")
+    if cache is not None:
+        cache.clear_caches()
+        cache._version.update(value=None, checked_at=0.0)
+    shared_cache = sys.modules.get("app.core.shared_cache")
+    if shared_cache is not None:
+        shared_cache.set_backend(None)
+    companies = sys.modules.get("app.routers.companies")
+    if companies is not None:
+        for flight in (companies.profile_flight, companies.graph_flight):
+            with flight._lock:
+                flight._inflight.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_app_state():
+    saved = {name: dict(vars(sys.modules[name])) for name in PATCHED_MODULES if name in sys.modules}
+    _reset_app_state()
+    yield
+    for name, attributes in saved.items():
+        module_vars = vars(sys.modules[name])
+        for attr in set(module_vars) - set(attributes):
+            del module_vars[attr]
+        module_vars.update(attributes)
+    _reset_app_state()
@@ -2,6 +2,8 @@
 Script to refresh the Dashboard Cache.
 This should be run periodically (e.g., every night at 04:00).
 It calculates heavy statistics (TOPs, Gazeles) and stores them in 'dashboard_cache'.
+The ETL view refresh engine (etl/refresh_materialized_views.py) also runs it
+after the base tables change.
 """
 
 import os
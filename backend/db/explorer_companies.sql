@@ -0,0 +1,121 @@
+-- Wide listing view for the Explore page, /top100 and other company lists
+-- Every column the lists show or filter on, so /companies/list reads one relation
+-- in sort-index order - no join back to companies, no EXISTS on risks.
+--
+-- status_norm:  'active' / 'liquidated' / 'other' (the explorer's status filter)
+-- nace_section: NACE section letter derived from the division (same ranges as
+--               industry_stats_materialized); nace2 / nace3 / nace4 = code prefixes
+-- territory_id / municipality_id / region_id: territories.id of the company's ATVK
+--               code and its level 2 / level 1 parents (see company_territories)
+-- has_sanctions: active 'sanction' risk
+-- Rebuilt after company_stats_materialized (etl/refresh_materialized_views.py).
+
+DROP MATERIALIZED VIEW IF EXISTS explorer_companies CASCADE;
+
+CREATE MATERIALIZED VIEW explorer_companies AS
+WITH sanctioned AS (
+    SELECT DISTINCT r.company_regcode
+    FROM risks r
+    WHERE r.active = TRUE AND r.risk_type = 'sanction'
+)
+SELECT
+    c.regcode,
+    c.name,
+    c.name_in_quotes,
+    c."type" AS company_type,
+    c.type_text,
+    c.registration_date,
+    c.status,
+    CASE
+        WHEN c.status = 'active' OR c.status = 'A' OR c.status ILIKE 'aktīvs' OR c.status IS NULL OR c.status = ''
+            THEN 'active'
+        WHEN c.status = 'liquidated' OR c.status = 'L' OR c.status ILIKE 'likvidēts' OR c.status ILIKE 'steigta likvidācija'
+            THEN 'liquidated'
+        ELSE 'other'
+    END AS status_norm,
+    c.nace_code,
+    c.nace_text,
+    CASE
+        WHEN LEFT(c.nace_code, 2) BETWEEN '01' AND '03' THEN 'A'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '05' AND '09' THEN 'B'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '10' AND '33' THEN 'C'
+        WHEN LEFT(c.nace_code, 2) = '35' THEN 'D'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '36' AND '39' THEN 'E'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '41' AND '43' THEN 'F'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '45' AND '47' THEN 'G'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '49' AND '53' THEN 'H'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '55' AND '56' THEN 'I'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '58' AND '63' THEN 'J'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '64' AND '66' THEN 'K'
+        WHEN LEFT(c.nace_code, 2) = '68' THEN 'L'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '69' AND '75' THEN 'M'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '77' AND '82' THEN 'N'
+        WHEN LEFT(c.nace_code, 2) = '84' THEN 'O'
+        WHEN LEFT(c.nace_code, 2) = '85' THEN 'P'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '86' AND '88' THEN 'Q'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '90' AND '93' THEN 'R'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '94' AND '96' THEN 'S'
+        WHEN LEFT(c.nace_code, 2) BETWEEN '97' AND '98' THEN 'T'
+        WHEN LEFT(c.nace_code, 2) = '99' THEN 'U'
+    END AS nace_section,
+    c.nace_section_text,
+    LEFT(c.nace_code, 2) AS nace2,
+    LEFT(c.nace_code, 3) AS nace3,
+    LEFT(c.nace_code, 4) AS nace4,
+    c.address,
+    c.atvk,
+    t.id AS territory_id,
+    t_muni.id AS municipality_id,
+    t_region.id AS region_id,
+    COALESCE(c.is_pvn_payer, FALSE) AS is_pvn_payer,
+    c.pvn_number,
+    (x.company_regcode IS NOT NULL) AS has_sanctions,
+    c.company_size_badge,
+    c.employee_count,
+    s.year AS fin_year,
+    s.turnover,
+    s.profit,
+    s.employees,
+    s.avg_salary,
+    s.tax_paid,
+    s.profit_margin,
+    s.turnover_growth
+FROM companies c
+LEFT JOIN company_stats_materialized s ON s.regcode = c.regcode
+LEFT JOIN sanctioned x ON x.company_regcode = c.regcode
+LEFT JOIN territories t ON t.code = c.atvk
+LEFT JOIN territories t_muni ON (t.level = 2 AND t_muni.id = t.id)
+                             OR (t.level = 3 AND t_muni.code = t.parent_code AND t_muni.level = 2)
+LEFT JOIN territories t_region ON t_region.code = COALESCE(t_muni.parent_code, t.parent_code)
+                              AND t_region.level = 1
+WITH DATA;
+
+CREATE UNIQUE INDEX idx_explorer_companies_pk ON explorer_companies (regcode);
+
+-- One partial index per financial sort: exactly the rows the explorer lists for that sort
+-- (NULL / NaN dropped, and <= 0 for turnover / salary / tax), in keyset order
+CREATE INDEX idx_explorer_turnover ON explorer_companies (turnover DESC NULLS LAST, regcode DESC)
+    WHERE turnover IS NOT NULL AND turnover::text != 'NaN' AND turnover > 0;
+CREATE INDEX idx_explorer_profit ON explorer_companies (profit DESC NULLS LAST, regcode DESC)
+    WHERE profit IS NOT NULL AND profit::text != 'NaN';
+CREATE INDEX idx_explorer_salary ON explorer_companies (avg_salary DESC NULLS LAST, regcode DESC)
+    WHERE avg_salary IS NOT NULL AND avg_salary::text != 'NaN' AND avg_salary > 0;
+CREATE INDEX idx_explorer_tax ON explorer_companies (tax_paid DESC NULLS LAST, regcode DESC)
+    WHERE tax_paid IS NOT NULL AND tax_paid::text != 'NaN' AND tax_paid > 0;
+CREATE INDEX idx_explorer_growth ON explorer_companies (turnover_growth DESC NULLS LAST, regcode DESC)
+    WHERE turnover_growth IS NOT NULL AND turnover_growth::text != 'NaN';
+CREATE INDEX idx_explorer_employees ON explorer_companies (employees DESC NULLS LAST, regcode DESC);
+CREATE INDEX idx_explorer_reg_date ON explorer_companies (registration_date DESC NULLS LAST, regcode DESC);
+
+-- Covering index for the default page (active companies by turnover) - what crawlers and
+-- most visitors request: an index-only scan, the view's heap is not read at all
+CREATE INDEX idx_explorer_active_turnover_covering ON explorer_companies (turnover DESC NULLS LAST, regcode DESC)
+    INCLUDE (name, name_in_quotes, company_type, type_text, nace_text, registration_date, status,
+             profit, employees, fin_year, avg_salary, tax_paid, profit_margin, turnover_growth)
+    WHERE status_norm = 'active' AND turnover IS NOT NULL AND turnover::text != 'NaN' AND turnover > 0;
+
+-- Filter columns (equality on NACE levels / territory ids instead of LIKE / ILIKE)
+CREATE INDEX idx_explorer_nace2 ON explorer_companies (nace2);
+CREATE INDEX idx_explorer_nace_section ON explorer_companies (nace_section);
+CREATE INDEX idx_explorer_municipality ON explorer_companies (municipality_id);
+CREATE INDEX idx_explorer_territory ON explorer_companies (territory_id);
@@ -0,0 +1,76 @@
+-- Pre-aggregated filter cube for the Explore page KPI block (/companies/list "stats")
+-- One row per combination of the explorer's filter dimensions; the API sums the
+-- matching cells instead of COUNT / SUM over explorer_companies.
+--
+-- sort_basis: the explorer drops companies without a usable value in the sort column
+--   (NULL / NaN, and <= 0 for turnover / salary / tax), so a company is counted once
+--   per sort it is listed under. 'all' = employees / reg_date sorts (no such filter).
+-- size_bucket:   employees  -1 unknown, 0 = 0, 1 = 1-9, 2 = 10-49, 3 = 50-249, 4 = 250+
+-- turnover_band: turnover   -1 unknown, 0 < 10k, 1 = 10k-100k, 2 = 100k-1M, 3 = 1M-10M,
+--                           4 = 10M-50M, 5 = 50M+
+-- Bounds must match EMPLOYEE_BOUNDS / TURNOVER_BOUNDS in app/routers/explore.py.
+-- NaN sorts above every number in Postgres, so it lands in the top bucket exactly
+-- like the explorer's ">= :min" filters treat it.
+-- nace_section is a function of nace_code - it adds no cells, only lets section
+-- letters filter like they do on the list (explorer_companies.nace_section).
+-- Rebuilt after explorer_companies (etl/refresh_materialized_views.py).
+
+DROP MATERIALIZED VIEW IF EXISTS explorer_filter_cube CASCADE;
+
+CREATE MATERIALIZED VIEW explorer_filter_cube AS
+WITH base AS (
+    SELECT
+        COALESCE(e.nace_code, '') AS nace_code,
+        COALESCE(e.nace_section, '') AS nace_section,
+        COALESCE(e.atvk, '') AS atvk,
+        e.status_norm AS status,
+        e.is_pvn_payer,
+        e.has_sanctions,
+        CASE
+            WHEN e.employees IS NULL THEN -1
+            WHEN e.employees >= 250 THEN 4
+            WHEN e.employees >= 50 THEN 3
+            WHEN e.employees >= 10 THEN 2
+            WHEN e.employees >= 1 THEN 1
+            ELSE 0
+        END AS size_bucket,
+        CASE
+            WHEN e.turnover IS NULL THEN -1
+            WHEN e.turnover >= 50000000 THEN 5
+            WHEN e.turnover >= 10000000 THEN 4
+            WHEN e.turnover >= 1000000 THEN 3
+            WHEN e.turnover >= 100000 THEN 2
+            WHEN e.turnover >= 10000 THEN 1
+            ELSE 0
+        END AS turnover_band,
+        e.turnover, e.profit, e.employees, e.avg_salary, e.tax_paid, e.turnover_growth
+    FROM explorer_companies e
+),
+listed AS (
+    SELECT b.*, k.sort_basis
+    FROM base b
+    CROSS JOIN LATERAL (VALUES
+        ('all', TRUE),
+        ('turnover', b.turnover IS NOT NULL AND b.turnover::text != 'NaN' AND b.turnover > 0),
+        ('profit', b.profit IS NOT NULL AND b.profit::text != 'NaN'),
+        ('salary', b.avg_salary IS NOT NULL AND b.avg_salary::text != 'NaN' AND b.avg_salary > 0),
+        ('tax', b.tax_paid IS NOT NULL AND b.tax_paid::text != 'NaN' AND b.tax_paid > 0),
+        ('growth', b.turnover_growth IS NOT NULL AND b.turnover_growth::text != 'NaN')
+    ) AS k(sort_basis, is_listed)
+    WHERE k.is_listed
+)
+SELECT
+    sort_basis, status, nace_code, nace_section, atvk, is_pvn_payer, has_sanctions, size_bucket, turnover_band,
+    COUNT(*)::bigint AS company_count,
+    SUM(COALESCE(turnover, 0)) AS total_turnover,
+    SUM(COALESCE(profit, 0)) AS total_profit,
+    SUM(COALESCE(employees, 0)) AS total_employees
+FROM listed
+GROUP BY sort_basis, status, nace_code, nace_section, atvk, is_pvn_payer, has_sanctions, size_bucket, turnover_band
+WITH DATA;
+
+-- Unique cell key (no NULLs): REFRESH ... CONCURRENTLY, and the leading
+-- (sort_basis, status) pair narrows every KPI lookup
+CREATE UNIQUE INDEX idx_explorer_cube_cell ON explorer_filter_cube
+    (sort_basis, status, nace_code, nace_section, atvk, is_pvn_payer, has_sanctions, size_bucket, turnover_band);
+CREATE INDEX idx_explorer_cube_nace ON explorer_filter_cube (sort_basis, nace_code text_pattern_ops);
@@ -1,6 +1,7 @@
 -- Optimised Cache Generation
 -- Uses CTEs and JSONB aggregation to build the entire profile object in DB
 -- Target speed: ~10k rows / second
+-- Needs db/migrations/add_profile_cache_payloads.sql (python maintenance.py --skip-views)
 
 WITH 
 active_companies AS (
@@ -316,4 +317,6 @@ LEFT JOIN proc_agg proc ON c.regcode = proc.company_regcode
 LEFT JOIN rating_agg rat ON c.regcode = rat.company_regcode
 
 ON CONFLICT (company_regcode) 
-DO UPDATE SET profile_data = EXCLUDED.profile_data, updated_at = NOW();
+DO UPDATE SET profile_data = EXCLUDED.profile_data, updated_at = NOW(),
+    -- stale ready-to-send payloads; the API rebuilds them from profile_data
+    payload = NULL, payload_gzip = NULL, payload_br = NULL;
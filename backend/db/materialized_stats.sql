@@ -71,8 +71,13 @@ WITH DATA;
 
 -- Indexes for fast sorting and filtering
 CREATE UNIQUE INDEX idx_stats_pk ON company_stats_materialized(regcode);
-CREATE INDEX idx_stats_turnover ON company_stats_materialized(turnover DESC NULLS LAST);
-CREATE INDEX idx_stats_profit ON company_stats_materialized(profit DESC NULLS LAST);
-CREATE INDEX idx_stats_growth ON company_stats_materialized(turnover_growth DESC NULLS LAST);
-CREATE INDEX idx_stats_salary ON company_stats_materialized(avg_salary DESC NULLS LAST);
 CREATE INDEX idx_stats_year ON company_stats_materialized(year);
+
+-- (sort column, regcode): plain sorts use the prefix, keyset reads start at a position.
+-- The explorer lists read explorer_companies (db/explorer_companies.sql), built from this view.
+CREATE INDEX idx_stats_turnover_regcode ON company_stats_materialized(turnover DESC NULLS LAST, regcode DESC);
+CREATE INDEX idx_stats_profit_regcode ON company_stats_materialized(profit DESC NULLS LAST, regcode DESC);
+CREATE INDEX idx_stats_employees_regcode ON company_stats_materialized(employees DESC NULLS LAST, regcode DESC);
+CREATE INDEX idx_stats_salary_regcode ON company_stats_materialized(avg_salary DESC NULLS LAST, regcode DESC);
+CREATE INDEX idx_stats_tax_regcode ON company_stats_materialized(tax_paid DESC NULLS LAST, regcode DESC);
+CREATE INDEX idx_stats_growth_regcode ON company_stats_materialized(turnover_growth DESC NULLS LAST, regcode DESC);
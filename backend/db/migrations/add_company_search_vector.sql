@@ -0,0 +1,45 @@
+-- Full-text search for /search: companies.search_vector + GIN index.
+--
+-- lv_unaccent: 'simple' parser/dictionary (no stemming, no stop words - company names,
+-- and "AS" / "IK" must stay searchable) behind the unaccent filter dictionary, so
+-- "Rīgas Ūdens" and "rigas udens" produce the same lexemes. Postgres has no Latvian
+-- stemmer; company_search_query() turns every query word into a prefix instead, which
+-- covers the inflected forms that matter for names ("rīga" finds "Rīgas").
+--
+-- Weights: A = name_in_quotes, B = full name, C = type (SIA, AS, ...), D = regcode.
+-- A generated column stays current on every INSERT / UPDATE / COPY; the swap loader
+-- copies the generation expression into its shadow table (INCLUDING GENERATED).
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'lv_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION public.lv_unaccent (COPY = pg_catalog.simple);
+        ALTER TEXT SEARCH CONFIGURATION public.lv_unaccent
+            ALTER MAPPING FOR asciiword, asciihword, hword_asciipart, word, hword, hword_part
+            WITH unaccent, simple;
+    END IF;
+END
+$$;
+
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('public.lv_unaccent'::regconfig, COALESCE(name_in_quotes, '')), 'A') ||
+        setweight(to_tsvector('public.lv_unaccent'::regconfig, COALESCE(name, '')), 'B') ||
+        setweight(to_tsvector('public.lv_unaccent'::regconfig, COALESCE("type", '')), 'C') ||
+        setweight(to_tsvector('pg_catalog.simple'::regconfig, COALESCE(regcode::text, '')), 'D')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_companies_search_vector ON companies USING gin (search_vector);
+
+-- websearch syntax ("quoted phrase", OR, -exclude) with every word as a prefix:
+-- 'sia "rīgas ūdens" -x' -> 'sia':* & 'rigas':* <-> 'udens':* & !'x':*
+CREATE OR REPLACE FUNCTION public.company_search_query(q text)
+RETURNS tsquery AS
+$func$
+SELECT to_tsquery('public.lv_unaccent'::regconfig,
+                  regexp_replace(websearch_to_tsquery('public.lv_unaccent'::regconfig, q)::text,
+                                 '''([^'']+)''', '''\1'':*', 'g'))
+$func$ LANGUAGE sql IMMUTABLE STRICT;
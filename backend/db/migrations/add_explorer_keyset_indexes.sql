@@ -0,0 +1,6 @@
+-- Keyset pagination for /companies/list sorted by registration date.
+-- The (sort column, regcode) indexes on company_stats_materialized live in
+-- db/materialized_stats.sql and are created when the view is rebuilt.
+
+CREATE INDEX IF NOT EXISTS idx_companies_registration_date_regcode
+    ON companies (registration_date DESC NULLS LAST, regcode DESC);
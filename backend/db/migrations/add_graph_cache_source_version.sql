@@ -0,0 +1,26 @@
+-- Versioned company_graph_cache entries for incremental graph recompute
+-- source_version = data state the cached graph reflects (ETL precompute_graphs build start,
+-- or NOW() for graphs computed on demand by the API).
+-- An entry is stale when company_changes has a newer change for the same company.
+
+CREATE TABLE IF NOT EXISTS company_graph_cache (
+    company_regcode BIGINT PRIMARY KEY,
+    graph_data JSONB,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE company_graph_cache
+ADD COLUMN IF NOT EXISTS source_version TIMESTAMP WITH TIME ZONE;
+
+-- Changed-companies log (written by ETL delta stages, e.g. process_persons)
+CREATE TABLE IF NOT EXISTS company_changes (
+    regcode BIGINT NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (source, regcode)
+);
+
+CREATE INDEX IF NOT EXISTS idx_company_changes_changed_at ON company_changes(changed_at);
+
+-- Stale check per company (the API looks up by regcode)
+CREATE INDEX IF NOT EXISTS idx_company_changes_regcode ON company_changes(regcode);
@@ -0,0 +1,16 @@
+-- Ready-to-send company profile cache payloads
+-- payload      = orjson bytes of the profile without has_full_access / is_locked
+-- payload_gzip = [locked, full access] gzip bodies, payload_br = same with brotli
+-- profile_data (JSONB) is only kept for rows written by db/generate_cache.sql;
+-- the API converts such rows to payload columns on first read.
+
+CREATE TABLE IF NOT EXISTS company_profile_cache (
+    company_regcode BIGINT PRIMARY KEY,
+    profile_data JSONB,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE company_profile_cache
+    ADD COLUMN IF NOT EXISTS payload BYTEA,
+    ADD COLUMN IF NOT EXISTS payload_gzip BYTEA[],
+    ADD COLUMN IF NOT EXISTS payload_br BYTEA[];
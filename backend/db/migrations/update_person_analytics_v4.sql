@@ -1,5 +1,7 @@
 -- Migration: Update Person Analytics V4 (Direct Address Names)
 -- Uses COALESCE(municipality_name, city_name) as the region name.
+-- main_municipality_id: territories.id (level 2) of the companies' ATVK codes, most frequent -
+-- the indexed integer that /analytics/people/search?territory= filters on.
 
 DROP MATERIALIZED VIEW IF EXISTS person_analytics_cache CASCADE;
 
@@ -44,6 +46,7 @@ person_companies AS (
         
         -- Region Name from Address Dimension (Direct Name)
         COALESCE(ad.municipality_name, ad.city_name) as region_name,
+        t_muni.id as municipality_id,
         
         f.equity,
         f.turnover,
@@ -52,6 +55,9 @@ person_companies AS (
     JOIN companies c ON p.company_regcode = c.regcode
     LEFT JOIN latest_financials f ON c.regcode = f.company_regcode
     LEFT JOIN address_dimension ad ON c.addressid = ad.address_id
+    LEFT JOIN territories t ON t.code = c.atvk
+    LEFT JOIN territories t_muni ON t_muni.level = 2
+                                AND t_muni.code = CASE WHEN t.level = 3 THEN t.parent_code ELSE t.code END
     LEFT JOIN company_share_totals cst ON c.regcode = cst.company_regcode
     WHERE p.person_hash IS NOT NULL
       AND p.person_hash NOT IN (SELECT person_hash FROM hidden_persons)
@@ -86,6 +92,7 @@ SELECT
 
     -- Main Region (Most frequent city/municipality)
     MODE() WITHIN GROUP (ORDER BY region_name) as main_region,
+    MODE() WITHIN GROUP (ORDER BY municipality_id) as main_municipality_id,
 
     ARRAY_AGG(DISTINCT role) as roles
 
@@ -97,6 +104,8 @@ HAVING COUNT(DISTINCT CASE WHEN status = 'active' THEN regcode END) > 0;
 CREATE INDEX idx_pac_net_worth ON person_analytics_cache(net_worth DESC NULLS LAST);
 CREATE INDEX idx_pac_managed_turnover ON person_analytics_cache(managed_turnover DESC NULLS LAST);
 CREATE INDEX idx_pac_active_count ON person_analytics_cache(active_companies_count DESC);
-CREATE INDEX idx_pac_person_hash ON person_analytics_cache(person_hash);
+-- Unique (GROUP BY person_hash): allows REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX idx_pac_person_hash ON person_analytics_cache(person_hash);
 CREATE INDEX idx_pac_region ON person_analytics_cache(main_region);
+CREATE INDEX idx_pac_municipality ON person_analytics_cache(main_municipality_id);
 CREATE INDEX idx_pac_roles ON person_analytics_cache USING GIN(roles);
@@ -1,5 +1,5 @@
-from .config import DATA_URLS
-from .download import download_all_data
+from .config import DATA_URLS, SOURCE_URLS
+from .download import download_all_data, download_sources
 from .process_companies import process_companies
 from .process_persons import process_persons
 from .process_risks import process_risks
@@ -8,6 +8,8 @@ from .process_procurements import process_procurements_etl
 from .process_taxes import process_vid_data
 from .process_nace import process_nace
 from .precompute_graphs import precompute_graphs
+from .refresh_materialized_views import refresh_materialized_views
+from .orchestrator import run_stages, bump_data_version
 from .loader import engine
 from sqlalchemy import text
 import logging
@@ -58,51 +60,34 @@ def init_database():
             conn.rollback()
             return False
 
-def run_all_etl():
+def run_all_etl(force: bool = False, resume: bool = False):
+    """
+    Full ETL: download every source (conditionally), then run the stage DAG
+    (independent stages in parallel, see etl.orchestrator).
+    Stages whose inputs are byte-identical to their last successful run are
+    skipped, together with dependants that have nothing new to consume.
+    force=True runs every stage regardless; resume=True continues the last
+    failed run without repeating the stages that already succeeded in it.
+    """
     logger.info("Starting Full ETL Job...")
     
     # 0. Initialize database tables first
     init_database()
     
-    # 1. Download
-    files = download_all_data()
+    # 1. Download (ETag/Last-Modified + content hash per source)
+    sources = download_sources(SOURCE_URLS)
+    files = {key: r['path'] for key, r in sources.items()}
+    source_hashes = {key: r.get('sha256') for key, r in sources.items()}
     
-    # 2. Process Companies
-    if 'register' in files:
-         process_companies(files['register'], files.get('equity'))
-    
-    # 3. Process NACE Classification (must run after companies are loaded)
-    nace_path = os.path.join(os.path.dirname(__file__), '..', '..', 'NACE.csv')
-    if os.path.exists(nace_path):
-        # VID tax data is downloaded by process_vid_data, but we can also use it here
-        # For now, we'll integrate NACE with VID processing
-        logger.info("NACE dictionary found, will process with VID data")
-    else:
-        logger.warning("NACE.csv not found in project root")
-         
-    # 4. Process Persons
-    if 'officers' in files:
-         process_persons(files['officers'], files.get('members'), files.get('ubo'))
-         
-    # 5. Process Risks
-    if 'sanctions' in files:
-         process_risks(files['sanctions'], files.get('liquidations'), files.get('prohibitions'), files.get('securing_measures'))
-         
-    # 6. Process Finance
-    if 'financial_statements' in files:
-         process_finance(files['financial_statements'], files.get('balance_sheets'), files.get('income_statements'))
-         
-    # 7. Process Procurements (Multi-year - downloads data internally)
-    process_procurements_etl()
-    
-    # 8. Process VID Tax Data + NACE (downloads data internally)
-    process_vid_data()
+    # NACE Classification is processed together with VID data (process_vid_data)
+    # 2. Companies -> Persons/Risks/Finance/Procurements/VID/PVN -> Sizes/Graphs/Materialized Views
+    summary = run_stages(files, source_hashes, force=force, resume=resume)
 
-    # 9. Precompute Company Graphs (must run after all data is loaded)
-    precompute_graphs()
-    
-    # 10. Refresh Materialized Views (for fast analytics)
-    refresh_materialized_views()
+    # Caches/ETags are keyed on data_version: a failed run (run_stages raised) or a run
+    # that skipped every stage leaves them valid
+    if summary['ran']:
+        bump_data_version()
+    else:
+        logger.info("No stage loaded data - data_version unchanged")
          
     logger.info("ETL Job Completed.")
-
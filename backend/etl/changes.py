@@ -0,0 +1,62 @@
+"""
+Changed-companies log for targeted downstream recomputation.
+
+Stages that apply deltas (e.g. process_persons) record which companies they
+touched; consumers (graph cache, profile cache, analytics) ask for companies
+changed since their own last successful run instead of rebuilding everything.
+"""
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import text
+
+from .loader import engine, copy_rows
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_changes_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS company_changes (
+            regcode BIGINT NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (source, regcode)
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_company_changes_changed_at ON company_changes(changed_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_company_changes_regcode ON company_changes(regcode)"))
+    conn.commit()
+
+
+def record_company_changes(source: str, regcodes) -> int:
+    """Marks regcodes as changed by source now (one row per source+company, changed_at refreshed)."""
+    regcodes = sorted({int(r) for r in regcodes})
+    with engine.connect() as conn:
+        _ensure_changes_table(conn)
+    if not regcodes:
+        return 0
+    now = datetime.now(timezone.utc)
+    copy_rows(((regcode, source, now) for regcode in regcodes), 'company_changes',
+              ['regcode', 'source', 'changed_at'], unique_columns=['source', 'regcode'])
+    logger.info(f"📝 {source}: {len(regcodes)} companies marked as changed")
+    return len(regcodes)
+
+
+def changed_companies(since=None, sources=None) -> set:
+    """
+    Regcodes changed after `since` (datetime; None = all recorded), optionally
+    limited to the given sources.
+    """
+    conditions = []
+    params = {}
+    if since is not None:
+        conditions.append("changed_at > :since")
+        params['since'] = since
+    if sources:
+        conditions.append("source = ANY(:sources)")
+        params['sources'] = list(sources)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with engine.connect() as conn:
+        _ensure_changes_table(conn)
+        rows = conn.execute(text(f"SELECT DISTINCT regcode FROM company_changes {where}"), params)
+        return {row[0] for row in rows}
@@ -63,4 +63,16 @@ EIS_OPENINGS_URLS = {
 VID_URLS = {
     "tax_payments": "https://data.gov.lv/dati/dataset/5ed74664-b49d-4b28-aacb-040931646e9b/resource/a42d6e8c-1768-4939-ba9b-7700d4f1dd3a/download/pdb_nm_komersantu_samaksato_nodoklu_kopsumas_odata.csv",
     "company_ratings": "https://data.gov.lv/dati/dataset/41481e3e-630f-4b73-b02e-a415d27896db/resource/acd4c6f9-5123-46a5-80f6-1f44b4517f58/download/reitings_uznemumi.csv"
-}
\ No newline at end of file
+}
+
+# PVN maksātāju reģistrs
+PVN_URL = "https://data.gov.lv/dati/dataset/9a5eae1c-2438-48cf-854b-6a2c170f918f/resource/610910e9-e086-4c5b-a7ea-0a896a697672/download/pdb_pvnmaksataji_odata.csv"
+
+# Visi ETL avoti vienā vārdnīcā (lejupielādei + izmaiņu noteikšanai pēc satura hash)
+SOURCE_URLS = {
+    **DATA_URLS,
+    **{f"eis_results_{year}": url for year, url in EIS_RESULTS_URLS.items()},
+    **{f"eis_openings_{year}": url for year, url in EIS_OPENINGS_URLS.items()},
+    **{f"vid_{key}": url for key, url in VID_URLS.items()},
+    "pvn": PVN_URL,
+}
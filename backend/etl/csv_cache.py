@@ -1,29 +1,196 @@
 """
 CSV Cache Manager: Download and cache CSV files locally
+
+Downloads are conditional (ETag / Last-Modified), resumable (HTTP Range)
+and every resource's validators + sha256 are kept in a JSON manifest,
+so callers can tell whether a source actually changed since the last run.
 """
 import os
+import json
+import hashlib
+import threading
 import requests
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+REQUEST_TIMEOUT = (15, 300)  # (connect, read) seconds
+MANIFEST_FILE = "manifest.json"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResourceManifest:
+    """Thread-safe JSON manifest: resource key -> {url, etag, last_modified, sha256, size, checked_at}"""
+
+    def __init__(self, directory):
+        self.path = Path(directory) / MANIFEST_FILE
+        self._lock = threading.Lock()
+        self._entries = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding='utf-8'))
+            except (ValueError, OSError) as e:
+                logger.warning(f"⚠️  Ignoring unreadable manifest {self.path}: {e}")
+
+    def get(self, key: str) -> dict:
+        with self._lock:
+            return dict(self._entries.get(key) or {})
+
+    def update(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self._entries, indent=2, sort_keys=True), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+
+
+def fetch_resource(url: str, local_path: str, previous: dict = None) -> dict:
+    """
+    Conditional + resumable download of one resource.
+
+    - If local_path exists and previous has validators, sends If-None-Match / If-Modified-Since;
+      304 means the file is reused untouched.
+    - If a <local_path>.part is left from an interrupted run, resumes it with Range + If-Range.
+      416 means there was nothing left to fetch: a part the server reports as complete
+      (Content-Range: bytes */<part size>) is finalized, any other is discarded and refetched.
+    - 'changed' is False when the server answered 304 or the new content hash equals the previous one.
+
+    Returns:
+        Manifest entry: {url, etag, last_modified, sha256, size, checked_at, changed}
+    """
+    previous = previous or {}
+    part_path = f"{local_path}.part"
+    part_meta_path = f"{local_path}.part.json"
+    now = datetime.now(timezone.utc).isoformat()
+
+    # File from before the manifest existed - hash it so 'changed' is still meaningful
+    if os.path.exists(local_path) and not previous.get('sha256'):
+        previous = {**previous, 'sha256': file_sha256(local_path)}
+
+    headers = {}
+    have_file = os.path.exists(local_path) and previous.get('url') == url and previous.get('sha256')
+    if have_file:
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    # Resume only if we know which version of the resource the partial file belongs to
+    resume_from = 0
+    part_meta = {}
+    if os.path.exists(part_path) and os.path.exists(part_meta_path):
+        try:
+            with open(part_meta_path, 'r', encoding='utf-8') as f:
+                part_meta = json.load(f)
+            validator = part_meta.get('etag') or part_meta.get('last_modified')
+            if part_meta.get('url') == url and validator:
+                resume_from = os.path.getsize(part_path)
+                if resume_from:
+                    headers['Range'] = f"bytes={resume_from}-"
+                    headers['If-Range'] = validator
+        except (ValueError, OSError):
+            resume_from = 0
+            part_meta = {}
+
+    with requests.get(url, stream=True, headers=headers, timeout=REQUEST_TIMEOUT) as r:
+        if r.status_code == 304:
+            logger.info(f"✅ Not modified: {os.path.basename(local_path)}")
+            for stale in (part_path, part_meta_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            return {**previous, 'checked_at': now, 'changed': False}
+
+        if r.status_code == 416 and resume_from:
+            if r.headers.get('Content-Range') != f"bytes */{resume_from}":
+                # Partial file does not match the resource any more - start over
+                for stale in (part_path, part_meta_path):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+                return fetch_resource(url, local_path, previous)
+            # The interrupted run had already received every byte
+            logger.info(f"✅ Partial download already complete: {os.path.basename(local_path)}")
+        else:
+            r.raise_for_status()
+
+        if r.status_code == 206 and not r.headers.get('Content-Range', '').startswith(f"bytes {resume_from}-"):
+            # Unexpected range - drop the partial file and start over
+            for stale in (part_path, part_meta_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            return fetch_resource(url, local_path, previous)
+
+        digest = hashlib.sha256()
+        if r.status_code in (206, 416):
+            if r.status_code == 206:
+                logger.info(f"⏯️  Resuming {os.path.basename(local_path)} at {resume_from / (1024 * 1024):.1f} MB")
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(block)
+            mode = 'ab'
+        else:
+            mode = 'wb'
+
+        if r.status_code == 416:
+            etag = part_meta.get('etag')
+            last_modified = part_meta.get('last_modified')
+        else:
+            etag = r.headers.get('ETag')
+            last_modified = r.headers.get('Last-Modified')
+            with open(part_meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'etag': etag, 'last_modified': last_modified}, f)
+
+            with open(part_path, mode) as f:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+
+    os.replace(part_path, local_path)
+    os.remove(part_meta_path)
+
+    sha256 = digest.hexdigest()
+    size = os.path.getsize(local_path)
+    changed = sha256 != previous.get('sha256')
+    logger.info(f"{'📥 Downloaded' if changed else '✅ Unchanged content'}: "
+                f"{os.path.basename(local_path)} ({size / (1024 * 1024):.1f} MB)")
+
+    return {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'sha256': sha256,
+        'size': size,
+        'checked_at': now,
+        'changed': changed,
+    }
+
+
 class CSVCache:
     """Manages local caching of CSV files to avoid repeated downloads"""
-    
+
     def __init__(self, cache_dir='backend/data/cache'):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
+        self.manifest = ResourceManifest(self.cache_dir)
+
     def get_cached_path(self, url: str, max_age_hours: int = 24) -> str:
         """
         Get path to cached CSV file, downloading if necessary
-        
+
         Args:
             url: URL of CSV file
-            max_age_hours: Maximum age of cached file before re-downloading
-            
+            max_age_hours: Cached file is used without any request for this long;
+                           after that it is revalidated with a conditional request
+
         Returns:
             Path to local cached file
         """
@@ -31,33 +198,31 @@ class CSVCache:
         filename = url.split('/')[-1].split('?')[0]
         if not filename.endswith('.csv'):
             filename = f"{filename}.csv"
-            
+
         cache_path = self.cache_dir / filename
-        
+        previous = self.manifest.get(filename)
+
         # Check if cache exists and is fresh
         if cache_path.exists():
-            age = datetime.now() - datetime.fromtimestamp(cache_path.stat().st_mtime)
+            checked_at = previous.get('checked_at')
+            if checked_at:
+                last_check = datetime.fromisoformat(checked_at)
+            else:
+                last_check = datetime.fromtimestamp(cache_path.stat().st_mtime, tz=timezone.utc)
+            age = datetime.now(timezone.utc) - last_check
             if age < timedelta(hours=max_age_hours):
                 logger.info(f"✅ Using cached file: {cache_path} (age: {age.seconds//3600}h)")
                 return str(cache_path)
             else:
-                logger.info(f"♻️  Cache expired (age: {age.seconds//3600}h), re-downloading...")
-        
-        # Download file
-        logger.info(f"📥 Downloading {filename}...")
+                logger.info(f"♻️  Cache expired (age: {age.seconds//3600}h), revalidating...")
+
+        # Download file (conditional / resumable)
+        logger.info(f"📥 Fetching {filename}...")
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            # Write to cache
-            with open(cache_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    
-            file_size = cache_path.stat().st_size / (1024 * 1024)  # MB
-            logger.info(f"✅ Downloaded {filename} ({file_size:.1f} MB)")
+            entry = fetch_resource(url, str(cache_path), previous)
+            self.manifest.update(filename, entry)
             return str(cache_path)
-            
+
         except Exception as e:
             logger.error(f"❌ Failed to download {url}: {e}")
             # If download fails but cache exists, use stale cache
@@ -65,9 +230,19 @@ class CSVCache:
                 logger.warning(f"⚠️  Using stale cache as fallback")
                 return str(cache_path)
             raise
-    
+
+    def is_unchanged(self, url: str) -> bool:
+        """True if the last fetch of this URL found identical content"""
+        filename = url.split('/')[-1].split('?')[0]
+        if not filename.endswith('.csv'):
+            filename = f"{filename}.csv"
+        return self.manifest.get(filename).get('changed') is False
+
     def clear_cache(self):
         """Remove all cached files"""
         for file in self.cache_dir.glob('*.csv'):
             file.unlink()
+        if self.manifest.path.exists():
+            self.manifest.path.unlink()
+        self.manifest = ResourceManifest(self.cache_dir)
         logger.info(f"🗑️  Cleared cache directory: {self.cache_dir}")
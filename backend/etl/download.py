@@ -1,37 +1,73 @@
 import os
-import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .config import DATA_URLS
+from .csv_cache import ResourceManifest, fetch_resource
 
 logger = logging.getLogger(__name__)
 
 DOWNLOAD_DIR = "/tmp/etl_data"
 
-def download_file(url: str, filename: str) -> str:
-    """Downloads a file from a URL to the local temporary directory."""
+# Paralēlo lejupielāžu skaits (data.gov.lv nepatīk pārāk daudz vienlaicīgu savienojumu)
+MAX_DOWNLOAD_WORKERS = int(os.getenv("ETL_DOWNLOAD_WORKERS", "4"))
+
+
+def download_file(url: str, filename: str, manifest: ResourceManifest = None) -> dict:
+    """
+    Downloads a file from a URL to the local temporary directory.
+    Conditional (ETag/Last-Modified) and resumable; returns the manifest entry + local path.
+    """
     if not os.path.exists(DOWNLOAD_DIR):
         os.makedirs(DOWNLOAD_DIR)
-    
+    manifest = manifest or ResourceManifest(DOWNLOAD_DIR)
+
     local_path = os.path.join(DOWNLOAD_DIR, filename)
     logger.info(f"Downloading {url} to {local_path}...")
-    
+
     try:
-        with requests.get(url, stream=True) as r:
-            r.raise_for_status()
-            with open(local_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        logger.info(f"Downloaded {filename}")
-        return local_path
+        entry = fetch_resource(url, local_path, manifest.get(filename))
+        manifest.update(filename, entry)
+        return {**entry, 'path': local_path}
     except Exception as e:
         logger.error(f"Failed to download {url}: {e}")
         raise
 
+
+def download_sources(urls: dict = None, max_workers: int = MAX_DOWNLOAD_WORKERS) -> dict:
+    """
+    Downloads all sources concurrently with a bounded thread pool.
+
+    A source that fails to download is logged and left out of the result,
+    so callers decide whether it was required.
+
+    Returns:
+        {key: {path, sha256, etag, last_modified, size, checked_at, changed}}
+    """
+    urls = urls or DATA_URLS
+    if not os.path.exists(DOWNLOAD_DIR):
+        os.makedirs(DOWNLOAD_DIR)
+    manifest = ResourceManifest(DOWNLOAD_DIR)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(download_file, url, f"{key}.csv", manifest): key
+            for key, url in urls.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.error(f"❌ Source {key} unavailable: {e}")
+
+    unchanged = sorted(k for k, r in results.items() if not r['changed'])
+    changed = sorted(k for k, r in results.items() if r['changed'])
+    logger.info(f"Sources changed: {changed or 'none'}")
+    logger.info(f"Sources unchanged: {unchanged or 'none'}")
+    return results
+
+
 def download_all_data():
     """Downloads all configured data files."""
-    downloaded_files = {}
-    for key, url in DATA_URLS.items():
-        filename = f"{key}.csv"
-        path = download_file(url, filename)
-        downloaded_files[key] = path
-    return downloaded_files
+    return {key: r['path'] for key, r in download_sources().items()}
@@ -1,7 +1,12 @@
 import os
+import io
+import csv
+import re
+import time
+import threading
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine, text
-from psycopg2.extras import execute_values
 import logging
 from dotenv import load_dotenv
 
@@ -16,109 +21,657 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432
 # Pievienojam pool_pre_ping=True, lai automātiski atjaunotu pārtrūkušus savienojumus
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
-def load_to_db(df: pd.DataFrame, table_name: str, unique_columns: list = None, truncate: bool = True):
+# Rindas vienā CSV gabalā, ko straumējam uz COPY (ierobežo atmiņu, ne transakcijas)
+COPY_BATCH_ROWS = 50000
+
+# NULL marķieris COPY CSV formātā (tukšas virknes paliek kā '')
+COPY_NULL = r'\N'
+
+# Tabulas, kuras APPEND režīmā tiek apvienotas ar ON CONFLICT DO UPDATE
+UPSERT_KEYS = {
+    'financial_reports': ['company_regcode', 'year'],
+}
+
+INTEGER_TYPES = {'smallint', 'integer', 'bigint'}
+
+# Shadow-table swap režīms: <tabula>__next tiek ielādēta un pārdēvēta pāri dzīvajai
+SWAP_NEXT_SUFFIX = '__next'
+SWAP_OLD_SUFFIX = '__old'
+SWAP_LOCK_TIMEOUT = '30s'
+
+# Procesa kopējais ielādēto rindu skaits (orchestrator to nolasa katras stadijas procesā)
+_rows_loaded = 0
+_rows_lock = threading.Lock()
+
+
+def _count_rows(rows: int) -> int:
+    global _rows_loaded
+    with _rows_lock:
+        _rows_loaded += rows
+    return rows
+
+
+def rows_loaded() -> int:
+    """Rows loaded through load_to_db/copy_rows by this process so far"""
+    return _rows_loaded
+
+
+class _CopyStream:
+    """
+    File-like objekts priekš psycopg2 copy_expert.
+    Lasa CSV teksta gabalus no ģeneratora, lai viss fails nekad neatrastos atmiņā.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._current = io.StringIO()
+        self.rows = 0
+
+    def read(self, size=-1):
+        data = self._current.read(size)
+        while not data:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return ''
+            csv_text, row_count = chunk
+            self.rows += row_count
+            self._current = io.StringIO(csv_text)
+            data = self._current.read(size)
+        return data
+
+
+def _dataframe_chunks(df: pd.DataFrame, batch_rows: int = COPY_BATCH_ROWS):
+    """Ģenerē (csv_teksts, rindu_skaits) no DataFrame pa batch_rows rindām."""
+    for start in range(0, len(df), batch_rows):
+        batch = df.iloc[start:start + batch_rows]
+        yield batch.to_csv(index=False, header=False, na_rep=COPY_NULL), len(batch)
+
+
+def _row_chunks(rows, batch_rows: int = COPY_BATCH_ROWS):
+    """Ģenerē (csv_teksts, rindu_skaits) no jebkura tuple iterable."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    count = 0
+    for row in rows:
+        writer.writerow([
+            COPY_NULL if v is None or (isinstance(v, float) and v != v) else v
+            for v in row
+        ])
+        count += 1
+        if count == batch_rows:
+            yield buf.getvalue(), count
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator='\n')
+            count = 0
+    if count:
+        yield buf.getvalue(), count
+
+
+def _get_column_types(cursor, table_name: str) -> dict:
+    """Atgriež {kolonna: data_type} mērķa tabulai."""
+    cursor.execute(
+        """
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_name = %s AND table_schema = current_schema()
+        """,
+        (table_name,)
+    )
+    return dict(cursor.fetchall())
+
+
+def _prepare_frame(df: pd.DataFrame, column_types: dict) -> pd.DataFrame:
+    """
+    Sagatavo DataFrame teksta COPY formātam.
+    to_sql to darīja ar parametru piesaisti; COPY gadījumā vērtības jāizdrukā tā,
+    lai Postgres tās pieņemtu (piem. 40003000000.0 nav derīgs BIGINT).
+    """
+    df = df.copy()
+    for col in df.columns:
+        target_type = column_types.get(col)
+        if target_type in INTEGER_TYPES and not pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].replace([np.inf, -np.inf], np.nan)
+    return df
+
+
+def _copy_into(cursor, table_name: str, columns: list, stream: _CopyStream):
+    col_str = ', '.join(columns)
+    cursor.copy_expert(
+        f"COPY {table_name} ({col_str}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        stream,
+        size=1024 * 1024
+    )
+
+
+def _copy_upsert(cursor, table_name: str, columns: list, stream: _CopyStream, conflict_columns: list):
+    """COPY uz pagaidu tabulu, tad viens INSERT ... ON CONFLICT uz mērķa tabulu."""
+    col_str = ', '.join(columns)
+    staging_table = f"_copy_{table_name}"
+
+    cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+    cursor.execute(f"""
+        CREATE TEMP TABLE {staging_table} ON COMMIT DROP AS
+        SELECT {col_str} FROM {table_name} WITH NO DATA
+    """)
+    _copy_into(cursor, staging_table, columns, stream)
+
+    update_cols = [c for c in columns if c not in conflict_columns]
+    if update_cols:
+        update_set = ', '.join(f"{col} = EXCLUDED.{col}" for col in update_cols)
+        on_conflict = f"DO UPDATE SET {update_set}"
+    else:
+        on_conflict = "DO NOTHING"
+
+    cursor.execute(f"""
+        INSERT INTO {table_name} ({col_str})
+        SELECT {col_str} FROM {staging_table}
+        ON CONFLICT ({', '.join(conflict_columns)})
+        {on_conflict}
+    """)
+
+
+def _copy_load(table_name: str, columns: list, make_stream,
+               conflict_columns: list = None, truncate: bool = False) -> int:
+    """
+    Kopīgā COPY ielāde: TRUNCATE (ja vajag), COPY vai COPY + UPSERT, rows/sec statistika.
+    make_stream(cursor) atgriež _CopyStream tajā pašā savienojumā, kur notiks COPY.
+    """
+    start_time = time.perf_counter()
+
+    with engine.connect() as conn:
+        # TRUNCATE ārpus transakcijas (ātrāk)
+        if truncate:
+            logger.info(f"Truncating table {table_name}...")
+            conn.execute(text(f"TRUNCATE TABLE {table_name} CASCADE;"))
+            conn.commit()
+
+        raw_conn = conn.connection
+        cursor = raw_conn.cursor()
+        try:
+            stream = make_stream(cursor)
+            if conflict_columns:
+                logger.info(f"  Using COPY + ON CONFLICT DO UPDATE for {table_name}...")
+                _copy_upsert(cursor, table_name, columns, stream, conflict_columns)
+            else:
+                _copy_into(cursor, table_name, columns, stream)
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    elapsed = time.perf_counter() - start_time
+    rate = stream.rows / elapsed if elapsed > 0 else 0
+    logger.info(f"✅ {table_name}: {stream.rows} rows loaded in {elapsed:.1f}s ({rate:,.0f} rows/sec).")
+    return _count_rows(stream.rows)
+
+
+
+# --- Shadow-table swap ---
+
+def _suffixed(name: str, suffix: str) -> str:
+    """Pievieno sufiksu, ievērojot Postgres 63 simbolu identifikatora limitu."""
+    return name[:63 - len(suffix)] + suffix
+
+
+def _relation_indexes(cursor, relation: str) -> list:
+    """Indeksi (nosaukums, CREATE INDEX ...), kas NAV constraint indeksi."""
+    cursor.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(x.indexrelid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+          )
+        """,
+        (relation,)
+    )
+    return cursor.fetchall()
+
+
+def _relation_constraints(cursor, relation: str) -> list:
+    """PK/UNIQUE/EXCLUDE/CHECK/FK ierobežojumi (nosaukums, tips, definīcija)."""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'c', 'f')
+        ORDER BY contype = 'f', conname
+        """,
+        (relation,)
+    )
+    return cursor.fetchall()
+
+
+def _inbound_foreign_keys(cursor, relation: str) -> list:
+    """Citu tabulu FK, kas norāda uz šo tabulu (tabula, nosaukums, definīcija)."""
+    cursor.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE confrelid = %s::regclass AND conrelid <> confrelid AND contype = 'f'
+        """,
+        (relation,)
+    )
+    return cursor.fetchall()
+
+
+def _dependent_views(cursor, relation: str) -> list:
+    """
+    Skati un materializētie skati, kas tieši atsaucas uz relāciju.
+    Definīcijas jānolasa PIRMS pārdēvēšanas, lai tās atsauktos uz oriģinālo nosaukumu.
+    """
+    cursor.execute(
+        """
+        SELECT DISTINCT v.relname, v.relkind, pg_get_viewdef(v.oid)
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.classid = 'pg_rewrite'::regclass
+          AND d.refclassid = 'pg_class'::regclass
+          AND d.refobjid = %s::regclass
+          AND v.oid <> d.refobjid
+        """,
+        (relation,)
+    )
+    return [(name, kind, definition.strip().rstrip(';')) for name, kind, definition in cursor.fetchall()]
+
+
+def _owned_sequences(cursor, relation: str) -> list:
+    """SERIAL sekvences (sekvence, kolonna), kuras pieder relācijas kolonnām."""
+    cursor.execute(
+        """
+        SELECT s.oid::regclass::text, a.attname
+        FROM pg_depend d
+        JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+        JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+        WHERE d.refobjid = %s::regclass AND d.deptype = 'a'
+        """,
+        (relation,)
+    )
+    return cursor.fetchall()
+
+
+def _create_shadow_indexes(cursor, indexes: list, shadow: str):
+    for index_name, index_def in indexes:
+        index_def = re.sub(r'INDEX \S+ ON (ONLY )?\S+ ',
+                           f'INDEX {_suffixed(index_name, SWAP_NEXT_SUFFIX)} ON {shadow} ',
+                           index_def, count=1)
+        cursor.execute(index_def)
+
+
+def _swap_relation(cursor, name: str, keyword: str, constraint_names: list, index_names: list,
+                   views: list, inbound_fks: list = (), sequences: list = ()):
+    """
+    Pārdēvē <name>__next pāri <name> vienā (izsaucēja) transakcijā.
+    Vecā relācija paliek kā <name>__old, lai materializētie skati to varētu lasīt līdz refresh stadijai.
+    """
+    old = _suffixed(name, SWAP_OLD_SUFFIX)
+    shadow = _suffixed(name, SWAP_NEXT_SUFFIX)
+
+    cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+    cursor.execute(f"ALTER {keyword} {name} RENAME TO {old}")
+    for conname in constraint_names:
+        cursor.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {conname} TO {_suffixed(conname, SWAP_OLD_SUFFIX)}")
+    for index_name in index_names:
+        cursor.execute(f"ALTER INDEX {index_name} RENAME TO {_suffixed(index_name, SWAP_OLD_SUFFIX)}")
+
+    cursor.execute(f"ALTER {keyword} {shadow} RENAME TO {name}")
+    for conname in constraint_names:
+        cursor.execute(f"ALTER TABLE {name} RENAME CONSTRAINT {_suffixed(conname, SWAP_NEXT_SUFFIX)} TO {conname}")
+    for index_name in index_names:
+        cursor.execute(f"ALTER INDEX {_suffixed(index_name, SWAP_NEXT_SUFFIX)} RENAME TO {index_name}")
+
+    # SERIAL sekvencēm jāpāriet jaunajai tabulai, citādi DROP __old tās izdzēstu
+    for sequence, column in sequences:
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {name}.{column}")
+
+    # Parastie skati atsaucas uz OID - pārsaistām uz jauno relāciju
+    for view_name, definition in views:
+        cursor.execute(f"CREATE OR REPLACE VIEW {view_name} AS {definition}")
+
+    # Ienākošās FK: NOT VALID, lai swap transakcija neskenētu bērnu tabulas
+    for child, conname, definition in inbound_fks:
+        cursor.execute(f"ALTER TABLE {child} DROP CONSTRAINT {conname}")
+        cursor.execute(f"ALTER TABLE {child} ADD CONSTRAINT {conname} {definition} NOT VALID")
+
+
+def _unswapped(definition: str, renames: dict) -> str:
+    """Skata definīcija ar <tabula>__old atsaucēm atpakaļ uz <tabula> (sufikss ir rezervēts swap režīmam)."""
+    for old, name in renames.items():
+        definition = re.sub(rf'\b{re.escape(old)}\b', name, definition)
+    return definition
+
+
+def _swapped_out_tables(cursor) -> dict:
+    """{<tabula>__old: <tabula>} visām swap atstātajām tabulām, kuru dzīvā tabula eksistē."""
+    cursor.execute(
+        """
+        SELECT o.relname, t.relname
+        FROM pg_class o
+        JOIN pg_class t ON t.relname || %s = o.relname AND t.relnamespace = o.relnamespace AND t.relkind = 'r'
+        WHERE o.relkind = 'r' AND pg_table_is_visible(o.oid)
+        """,
+        (SWAP_OLD_SUFFIX,)
+    )
+    return dict(cursor.fetchall())
+
+
+def _rebuild_matview(raw_conn, name: str, definition: str, renames: dict) -> list:
+    """
+    Pārbūvē materializēto skatu kā <name>__next (definīcijā <tabula>__old -> <tabula>) un pārdēvē
+    to pāri vecajam; tāpat arī no tā atkarīgos materializētos skatus. Lasītāji visu laiku redz
+    pilnu skatu. Atgriež pārbūvēto skatu nosaukumus.
+    """
+    cursor = raw_conn.cursor()
+    shadow = _suffixed(name, SWAP_NEXT_SUFFIX)
+    old = _suffixed(name, SWAP_OLD_SUFFIX)
+    rebuilt = [name]
+    try:
+        start_time = time.perf_counter()
+        indexes = _relation_indexes(cursor, name)
+        # Definīcijas jānolasa pirms pārdēvēšanas (tad tās atsaucas uz <name>, ne <name>__old)
+        dependents = _dependent_views(cursor, name)
+
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {old}")
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {shadow}")
+        cursor.execute(f"CREATE MATERIALIZED VIEW {shadow} AS {_unswapped(definition, renames)} WITH DATA")
+        _create_shadow_indexes(cursor, indexes, shadow)
+        cursor.execute(f"ANALYZE {shadow}")
+        raw_conn.commit()
+
+        _swap_relation(cursor, name, 'MATERIALIZED VIEW', [], [i[0] for i in indexes],
+                       [(v, _unswapped(d, renames)) for v, kind, d in dependents if kind == 'v'])
+        raw_conn.commit()
+
+        for view_name, kind, view_def in dependents:
+            if kind == 'm':
+                rebuilt += _rebuild_matview(raw_conn, view_name, view_def, renames)
+
+        cursor.execute(f"DROP MATERIALIZED VIEW {old}")
+        raw_conn.commit()
+        logger.info(f"  ♻️  Rebuilt materialized view {name} in {time.perf_counter() - start_time:.1f}s")
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return rebuilt
+
+
+def repoint_matview(raw_conn, name: str) -> list:
+    """
+    Materializētais skats, kas pēc swap joprojām lasa <tabula>__old, tiek pārbūvēts pret
+    <tabula> bez pārtraukuma lasītājiem (ēnas skats + pārdēvēšana, kā tabulām).
+    Atgriež pārbūvēto skatu nosaukumus (ieskaitot atkarīgos materializētos skatus).
+    """
+    cursor = raw_conn.cursor()
+    try:
+        renames = _swapped_out_tables(cursor)
+        cursor.execute("SELECT pg_get_viewdef(%s::regclass)", (name,))
+        definition = cursor.fetchone()[0].strip().rstrip(';')
+        raw_conn.commit()
+    finally:
+        cursor.close()
+    return _rebuild_matview(raw_conn, name, definition, renames)
+
+
+def _drop_stale_old(raw_conn, cursor, table_name: str):
+    """
+    Izmet <tabula>__old, kas palikusi no iepriekšējas ielādes (refresh stadija neizdevās vai nenotika),
+    citādi pārdēvēšana uz __old neizdotos nekad vairs. Materializētos skatus, kas to vēl lasa,
+    vispirms pārbūvē pret <tabula> (repoint_matview) - tie netiek izmesti. Ja tas neizdodas,
+    ielāde tiek pārtraukta ar kļūdu.
     """
-    Ielādē DataFrame PostgreSQL datubāzē.
+    old = _suffixed(table_name, SWAP_OLD_SUFFIX)
+    cursor.execute("SELECT to_regclass(%s)", (old,))
+    if cursor.fetchone()[0] is None:
+        return
+    readers = [name for name, kind, _ in _dependent_views(cursor, old) if kind == 'm']
+    raw_conn.commit()
+    rebuilt = []
+    for reader in readers:
+        if reader not in rebuilt:
+            logger.warning(f"⚠️  {reader} still reads stale {old} - rebuilding it against {table_name}")
+            rebuilt += repoint_matview(raw_conn, reader)
+    try:
+        cursor.execute(f"DROP TABLE {old}")
+        raw_conn.commit()
+    except Exception as e:
+        raw_conn.rollback()
+        raise RuntimeError(f"{old} from an earlier swap could not be dropped ({e}); "
+                           f"{table_name} is not swapped until it is removed") from e
+
+
+def _swap_load(table_name: str, columns: list, make_stream) -> int:
+    """
+    Zero-downtime ielāde: COPY uz UNLOGGED <tabula>__next bez indeksiem,
+    tad SET LOGGED, indeksi, ierobežojumi, ANALYZE un atomiska pārdēvēšana.
+    Lasītāji visu laiku redz pilnu veco vai pilnu jauno datu kopu.
+
+    Materializētie skati pēc pārdēvēšanas lasa <tabula>__old (pilni, ar vecajiem datiem);
+    refresh_materialized_views stadija tos pārbūvē pret jauno tabulu (repoint_matview)
+    un izmet __old, tāpēc šeit tie netiek pārbūvēti.
+    """
+    start_time = time.perf_counter()
+    shadow = _suffixed(table_name, SWAP_NEXT_SUFFIX)
+    old = _suffixed(table_name, SWAP_OLD_SUFFIX)
+
+    raw_conn = engine.raw_connection()
+    cursor = raw_conn.cursor()
+    try:
+        _drop_stale_old(raw_conn, cursor, table_name)
+
+        # Metadati no dzīvās tabulas (pirms jebkādas pārdēvēšanas)
+        constraints = _relation_constraints(cursor, table_name)
+        indexes = _relation_indexes(cursor, table_name)
+        inbound_fks = _inbound_foreign_keys(cursor, table_name)
+        dependents = _dependent_views(cursor, table_name)
+        sequences = _owned_sequences(cursor, table_name)
+
+        # 1. Ielāde ēnas tabulā bez indeksiem un WAL
+        logger.info(f"Loading into shadow table {shadow}...")
+        cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+        # INCLUDING GENERATED: ģenerētās kolonnas (companies.search_vector) tiek aprēķinātas COPY laikā
+        cursor.execute(f"CREATE UNLOGGED TABLE {shadow} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING GENERATED)")
+        stream = make_stream(cursor)
+        _copy_into(cursor, shadow, columns, stream)
+        load_elapsed = time.perf_counter() - start_time
+
+        # 2. Ilgtspēja, indeksi un ierobežojumi - tikai pēc datu ielādes
+        cursor.execute(f"ALTER TABLE {shadow} SET LOGGED")
+        for conname, contype, definition in constraints:
+            cursor.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {_suffixed(conname, SWAP_NEXT_SUFFIX)} {definition}")
+        _create_shadow_indexes(cursor, indexes, shadow)
+        cursor.execute(f"ANALYZE {shadow}")
+        raw_conn.commit()
+        logger.info(f"  Shadow table ready: {stream.rows} rows, indexes built "
+                    f"({time.perf_counter() - start_time:.1f}s)")
+
+        # 3. Īsā swap transakcija
+        _swap_relation(cursor, table_name, 'TABLE', [c[0] for c in constraints], [i[0] for i in indexes],
+                       [(v, d) for v, kind, d in dependents if kind == 'v'], inbound_fks, sequences)
+        raw_conn.commit()
+        logger.info(f"  🔁 Swapped {shadow} -> {table_name}")
+    except Exception:
+        raw_conn.rollback()
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+        cursor.close()
+        raw_conn.close()
+        raise
+
+    try:
+        # 4. Ienākošo FK validācija neliedz lasīt/rakstīt bērnu tabulas
+        for child, conname, _ in inbound_fks:
+            try:
+                cursor.execute(f"ALTER TABLE {child} VALIDATE CONSTRAINT {conname}")
+                raw_conn.commit()
+            except Exception as e:
+                raw_conn.rollback()
+                logger.warning(f"⚠️  {child}.{conname} left NOT VALID: {e}")
+
+        # 5. Materializētie skati joprojām lasa <tabula>__old - refresh stadija tos izveido pret
+        #    jauno tabulu un izmet __old; bez tādiem skatiem __old izmetam uzreiz
+        readers = [v for v, kind, _ in dependents if kind == 'm']
+        if readers:
+            logger.info(f"  {old} kept for {', '.join(readers)} until the view refresh stage")
+        else:
+            try:
+                cursor.execute(f"DROP TABLE {old}")
+                raw_conn.commit()
+            except Exception as e:
+                raw_conn.rollback()
+                logger.warning(f"⚠️  Could not drop {old} (dropped before the next swap): {e}")
+    finally:
+        cursor.close()
+        raw_conn.close()
+
+    elapsed = time.perf_counter() - start_time
+    rate = stream.rows / load_elapsed if load_elapsed > 0 else 0
+    logger.info(f"✅ {table_name}: {stream.rows} rows swapped in {elapsed:.1f}s ({rate:,.0f} rows/sec COPY).")
+    return _count_rows(stream.rows)
+
+def load_to_db(df: pd.DataFrame, table_name: str, unique_columns: list = None, truncate: bool = True,
+               swap: bool = False) -> int:
+    """
+    Ielādē DataFrame PostgreSQL datubāzē ar COPY FROM STDIN.
     
     Args:
         df: Dati ko ielādēt
         table_name: Tabulas nosaukums
-        unique_columns: Kolonas kas veido unique constraint (izmanto ON CONFLICT)
+        unique_columns: Kolonas kas veido unique constraint (izmanto ON CONFLICT).
+                        Ja nav norādītas, APPEND režīmā tiek ņemtas no UPSERT_KEYS.
         truncate: Ja True - izdzēš esošos datus pirms ielādes. 
                   Ja False - tikai pievieno datus (APPEND režīms).
+        swap: Ja True - ielādē <tabula>__next un atomiski pārdēvē pāri dzīvajai tabulai
+              (aizstāj TRUNCATE; API nekad neredz tukšu vai pusielādētu tabulu).
+
+    Returns:
+        Ielādēto rindu skaits
     """
     if df.empty:
         logger.warning(f"DataFrame for {table_name} is empty. Skipping load.")
-        return
+        return 0
+
+    conflict_columns = None if truncate else (unique_columns or UPSERT_KEYS.get(table_name))
+    logger.info(f"Loading {len(df)} rows into {table_name}...")
+
+    def make_stream(cursor):
+        frame = _prepare_frame(df, _get_column_types(cursor, table_name))
+        return _CopyStream(_dataframe_chunks(frame))
 
     try:
-        with engine.connect() as conn:
-            # TRUNCATE ārpus transakcijas (ātrāk)
-            if truncate:
-                logger.info(f"Truncating table {table_name}...")
-                conn.execute(text(f"TRUNCATE TABLE {table_name} CASCADE;"))
-                conn.commit()
-            
-            logger.info(f"Loading {len(df)} rows into {table_name}...")
-            
-            # Use ON CONFLICT for financial_reports with bulk insert (fast!)
-            use_conflict_resolution = table_name == 'financial_reports' and not truncate
-            
-            if use_conflict_resolution:
-                # Fast bulk insert with ON CONFLICT using execute_values
-                logger.info(f"  Using ON CONFLICT DO UPDATE for {table_name}...")
-                
-                # Get raw connection for psycopg2
-                raw_conn = conn.connection
-                cursor = raw_conn.cursor()
-                
-                try:
-                    # Prepare column names
-                    cols = list(df.columns)
-                    col_str = ', '.join(cols)
-                    
-                    # Prepare UPDATE clause (update all columns except the unique key)
-                    update_cols = [c for c in cols if c not in ['company_regcode', 'year']]
-                    update_set = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_cols])
-                    
-                    # Convert dataframe to list of tuples
-                    data = [tuple(row) for row in df.itertuples(index=False, name=None)]
-                    
-                    # Build SQL with ON CONFLICT
-                    sql = f"""
-                        INSERT INTO {table_name} ({col_str})
-                        VALUES %s
-                        ON CONFLICT (company_regcode, year)
-                        DO UPDATE SET {update_set}
-                    """
-                    
-                    # Execute in batches for stability
-                    batch_size = 10000
-                    for i in range(0, len(data), batch_size):
-                        batch = data[i:i+batch_size]
-                        execute_values(cursor, sql, batch, page_size=1000)
-                        raw_conn.commit()
-                        
-                        if (i + batch_size) % 10000 == 0 or (i + batch_size) >= len(data):
-                            logger.info(f"  Loaded {min(i + batch_size, len(data))}/{len(data)} rows...")
-                    
-                    logger.info(f"✅ {table_name}: All {len(data)} rows loaded successfully.")
-                    
-                finally:
-                    cursor.close()
-            else:
-                # Standard pandas bulk insert for other tables
-                # Optimized for Railway Hobby (8GB RAM)
-                # Larger batches = fewer transactions = better performance
-                batch_size = 10000
-                total_rows = len(df)
-                
-                for i in range(0, total_rows, batch_size):
-                    batch_df = df.iloc[i:i+batch_size]
-                    
-                    # Katram batch - jauna transakcija
-                    trans = conn.begin()
-                    try:
-                        # Fast bulk insert - deduplication happens before calling this function
-                        batch_df.to_sql(
-                            table_name, 
-                            conn, 
-                            if_exists='append', 
-                            index=False, 
-                            method='multi'
-                        )
-                        trans.commit()
-                        
-                        if (i + batch_size) % 10000 == 0 or (i + batch_size) >= total_rows:
-                            logger.info(f"  Loaded {min(i + batch_size, total_rows)}/{total_rows} rows...")
-                            
-                    except Exception as e:
-                        trans.rollback()
-                        logger.error(f"Batch {i}-{i+batch_size} failed: {e}")
-                        raise e
-                
-                logger.info(f"✅ {table_name}: All {total_rows} rows loaded successfully.")
-            
+        if swap:
+            return _swap_load(table_name, list(df.columns), make_stream)
+        return _copy_load(table_name, list(df.columns), make_stream, conflict_columns, truncate)
+    except Exception as e:
+        logger.error(f"Failed to load {table_name}: {e}")
+        raise
+
+
+def copy_rows(rows, table_name: str, columns: list, unique_columns: list = None, truncate: bool = False) -> int:
+    """
+    Ielādē jebkuru tuple iterable (piem. ģeneratoru) ar COPY FROM STDIN.
+    Vērtībām jau jābūt mērķa kolonnu formātā; None un NaN kļūst par NULL.
+    Ja norādītas unique_columns - COPY uz pagaidu tabulu + ON CONFLICT DO UPDATE.
+    """
+    try:
+        return _copy_load(table_name, list(columns), lambda cursor: _CopyStream(_row_chunks(rows)),
+                          unique_columns, truncate)
     except Exception as e:
         logger.error(f"Failed to load {table_name}: {e}")
         raise
+
+
+def read_query(query: str) -> pd.DataFrame:
+    """
+    SELECT rezultāts kā DataFrame caur COPY TO STDOUT (daudz ātrāk par rindu fetch).
+    Visas vērtības ir teksts Postgres formātā (datumi YYYY-MM-DD); tikai NULL kļūst par NaN,
+    tukša virkne paliek ''.
+    """
+    buf = io.StringIO()
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '{COPY_NULL}')", buf)
+    finally:
+        raw_conn.close()
+    buf.seek(0)
+    return pd.read_csv(buf, dtype=str, keep_default_na=False, na_values=[COPY_NULL])
+
+
+def apply_delta(table_name: str, inserts: pd.DataFrame, updates: pd.DataFrame, delete_ids,
+                id_column: str = 'id') -> dict:
+    """
+    Pielieto izmaiņu kopu vienā transakcijā (pārējās rindas un to kolonnas paliek neskartas):
+      - delete_ids: DELETE pēc id_column
+      - updates:    UPDATE pēc id_column (updates satur id_column + atjaunināmās kolonnas)
+      - inserts:    COPY tieši mērķa tabulā
+    Katrs solis iet caur COPY uz pagaidu tabulu, nevis rindu pa rindai.
+
+    Returns:
+        {'inserted': n, 'updated': n, 'deleted': n}
+    """
+    start_time = time.perf_counter()
+    delete_ids = list(delete_ids)
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+
+    raw_conn = engine.raw_connection()
+    cursor = raw_conn.cursor()
+    try:
+        column_types = _get_column_types(cursor, table_name)
+
+        if delete_ids:
+            cursor.execute(f"CREATE TEMP TABLE _delete_{table_name} ({id_column} BIGINT) ON COMMIT DROP")
+            _copy_into(cursor, f"_delete_{table_name}", [id_column],
+                       _CopyStream(_row_chunks((i,) for i in delete_ids)))
+            cursor.execute(f"""
+                DELETE FROM {table_name} t USING _delete_{table_name} d
+                WHERE t.{id_column} = d.{id_column}
+            """)
+            counts['deleted'] = cursor.rowcount
+
+        if updates is not None and not updates.empty:
+            columns = list(updates.columns)
+            set_cols = [c for c in columns if c != id_column]
+            cursor.execute(f"""
+                CREATE TEMP TABLE _update_{table_name} ON COMMIT DROP AS
+                SELECT {', '.join(columns)} FROM {table_name} WITH NO DATA
+            """)
+            _copy_into(cursor, f"_update_{table_name}", columns,
+                       _CopyStream(_dataframe_chunks(_prepare_frame(updates, column_types))))
+            cursor.execute(f"""
+                UPDATE {table_name} t SET {', '.join(f'{c} = u.{c}' for c in set_cols)}
+                FROM _update_{table_name} u
+                WHERE t.{id_column} = u.{id_column}
+            """)
+            counts['updated'] = cursor.rowcount
+
+        if inserts is not None and not inserts.empty:
+            stream = _CopyStream(_dataframe_chunks(_prepare_frame(inserts, column_types)))
+            _copy_into(cursor, table_name, list(inserts.columns), stream)
+            counts['inserted'] = stream.rows
+
+        raw_conn.commit()
+    except Exception as e:
+        raw_conn.rollback()
+        logger.error(f"Failed to apply delta to {table_name}: {e}")
+        raise
+    finally:
+        cursor.close()
+        raw_conn.close()
+
+    _count_rows(sum(counts.values()))
+    logger.info(f"✅ {table_name}: +{counts['inserted']} ~{counts['updated']} -{counts['deleted']} rows "
+                f"in {time.perf_counter() - start_time:.1f}s")
+    return counts
@@ -0,0 +1,460 @@
+"""
+ETL stage orchestrator: dependency DAG, parallel execution, change-aware skipping.
+
+Each stage declares:
+  - sources:        download keys (config.SOURCE_URLS) and local files it reads
+  - depends_on:     stages whose OUTPUT it reads (their fingerprint becomes part of ours)
+  - after:          stages that only need to run first (ordering, e.g. FK validation
+                    against companies) without invalidating this stage
+  - writes:         tables it writes; two stages writing the same table never overlap
+  - db_connections: connections it holds at once (None = the whole budget)
+
+Ready stages run concurrently, each in its own forked process (own GIL, own
+connection pool, peak RSS measurable per stage), bounded by ETL_MAX_WORKERS
+processes and ETL_DB_CONNECTIONS connections.
+
+A stage fingerprint is sha256 over its source content hashes plus the fingerprints
+of depends_on stages. If it equals the fingerprint stored in etl_state for the last
+successful run, the stage is skipped - and so is everything downstream whose inputs
+did not change either.
+
+A failed stage blocks its downstream stages, unless it is critical=False: then the
+downstream stages still run (on whatever that stage left in its tables) with an
+unknown fingerprint, so the next run does not skip them.
+
+Wall time, rows and peak memory of every stage land in etl_state. With resume=True
+a run that failed is continued under the same run_id: stages that already succeeded
+in it are not repeated.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import logging
+import resource
+import traceback
+import multiprocessing
+from multiprocessing.connection import wait
+from sqlalchemy import text
+
+from .config import EIS_RESULTS_URLS, EIS_OPENINGS_URLS
+from .csv_cache import file_sha256
+from .loader import engine
+
+logger = logging.getLogger(__name__)
+
+NACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NACE.csv'))
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+STATE_PREFIX = 'stage:'
+# API kešu (app.core.cache) versija: last_success_at mainās pēc katras ielādes
+DATA_VERSION_JOB = 'data_version'
+# Tas pats kanāls kā app.core.shared_cache.INVALIDATION_CHANNEL (Redis pub/sub, ja REDIS_URL ir iestatīts)
+INVALIDATION_CHANNEL = 'ur:cache:invalidate'
+
+# Paralēli procesi un DB savienojumu budžets visām vienlaicīgajām stadijām kopā
+MAX_STAGE_WORKERS = int(os.getenv("ETL_MAX_WORKERS", "3"))
+DB_CONNECTION_BUDGET = int(os.getenv("ETL_DB_CONNECTIONS", "40"))
+
+
+class Stage:
+    """One ETL step: run(files, connections) plus its declared inputs and resources."""
+
+    def __init__(self, name: str, run, sources=(), local_files=(), depends_on=(), after=(),
+                 writes=(), db_connections=1, critical=True):
+        self.name = name
+        self.run = run
+        self.sources = list(sources)
+        self.local_files = list(local_files)
+        self.depends_on = list(depends_on)
+        self.after = list(after)
+        self.writes = set(writes)
+        self.db_connections = db_connections
+        self.critical = critical
+
+    @property
+    def upstream(self) -> list:
+        return self.depends_on + [s for s in self.after if s not in self.depends_on]
+
+
+def _run_company_sizes():
+    # update_company_sizes.py atrodas backend/ saknē un prasa DATABASE_URL importa brīdī
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from update_company_sizes import process_company_sizes
+    return process_company_sizes()
+
+
+def _build_stages() -> list:
+    # Importi šeit, lai orchestrator importēšana nevilktu visus apstrādes moduļus
+    from .process_companies import process_companies
+    from .process_persons import process_persons
+    from .process_risks import process_risks
+    from .process_finance import process_finance
+    from .process_procurements import process_procurements_etl
+    from .process_taxes import process_vid_data
+    from .process_pvn import process_pvn_registry
+    from .precompute_graphs import precompute_graphs
+    from .refresh_materialized_views import refresh_materialized_views, VIEWS, MAX_VIEW_WORKERS
+
+    eis_results = [f"eis_results_{year}" for year in EIS_RESULTS_URLS]
+    eis_openings = [f"eis_openings_{year}" for year in EIS_OPENINGS_URLS]
+
+    # Stadijas, kas raksta companies kolonnās (NACE, PVN, izmērs), ir atkarīgas no
+    # process_companies izvades: pēc companies pārlādes tās kolonnas ir tukšas.
+    return [
+        Stage('process_companies',
+              lambda f, c: process_companies(f['register'], f.get('equity')),
+              sources=['register', 'equity'], writes=['companies']),
+        Stage('process_persons',
+              lambda f, c: process_persons(f['officers'], f.get('members'), f.get('ubo')),
+              sources=['officers', 'members', 'ubo'], after=['process_companies'], writes=['persons']),
+        Stage('process_risks',
+              lambda f, c: process_risks(f['sanctions'], f.get('liquidations'), f.get('prohibitions'),
+                                         f.get('securing_measures')),
+              sources=['sanctions', 'liquidations', 'prohibitions', 'securing_measures'],
+              after=['process_companies'], writes=['risks']),
+        Stage('process_finance',
+              lambda f, c: process_finance(f['financial_statements'], f.get('balance_sheets'),
+                                           f.get('income_statements')),
+              sources=['financial_statements', 'balance_sheets', 'income_statements'],
+              after=['process_companies'], writes=['financial_reports']),
+        Stage('process_procurements_etl',
+              lambda f, c: process_procurements_etl(
+                  {year: f[f"eis_results_{year}"] for year in EIS_RESULTS_URLS if f"eis_results_{year}" in f},
+                  {year: f[f"eis_openings_{year}"] for year in EIS_OPENINGS_URLS if f"eis_openings_{year}" in f}),
+              sources=eis_results + eis_openings, after=['process_companies'],
+              writes=['procurements', 'procurement_participants']),
+        Stage('process_vid_data',
+              lambda f, c: process_vid_data(f.get('vid_tax_payments'), f.get('vid_company_ratings')),
+              sources=['vid_tax_payments', 'vid_company_ratings'], local_files=[NACE_PATH],
+              depends_on=['process_companies'], writes=['tax_payments', 'company_ratings', 'companies']),
+        Stage('process_pvn_registry',
+              lambda f, c: process_pvn_registry(f.get('pvn')),
+              sources=['pvn'], depends_on=['process_companies'], writes=['companies'], critical=False),
+        Stage('process_company_sizes',
+              lambda f, c: _run_company_sizes(),
+              depends_on=['process_companies', 'process_finance', 'process_vid_data'],
+              writes=['company_size_history', 'companies'], critical=False),
+        Stage('precompute_graphs',
+              lambda f, c: precompute_graphs(incremental=True),
+              depends_on=['process_companies', 'process_persons', 'process_finance'],
+              writes=['company_graph_cache']),
+        # Skati lasa arī risks, PVN un izmēra kolonnas (explorer_companies, explorer_filter_cube)
+        Stage('refresh_materialized_views',
+              lambda f, c: refresh_materialized_views(max_workers=c),
+              depends_on=['process_companies', 'process_persons', 'process_risks', 'process_finance',
+                          'process_vid_data', 'process_pvn_registry', 'process_company_sizes'],
+              writes=[view.name for view in VIEWS], db_connections=MAX_VIEW_WORKERS),
+    ]
+
+
+def _ensure_state_table():
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS etl_state (
+                id SERIAL PRIMARY KEY,
+                job_name VARCHAR(100) UNIQUE NOT NULL,
+                last_run_at TIMESTAMP WITH TIME ZONE,
+                last_success_at TIMESTAMP WITH TIME ZONE,
+                records_processed INTEGER DEFAULT 0,
+                status VARCHAR(50) DEFAULT 'IDLE',
+                error_message TEXT,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        """))
+        conn.execute(text("""
+            ALTER TABLE etl_state
+                ADD COLUMN IF NOT EXISTS input_fingerprint TEXT,
+                ADD COLUMN IF NOT EXISTS run_id TEXT,
+                ADD COLUMN IF NOT EXISTS duration_seconds DOUBLE PRECISION,
+                ADD COLUMN IF NOT EXISTS peak_memory_mb DOUBLE PRECISION
+        """))
+        conn.commit()
+
+
+def _stored_fingerprints(prefix: str = STATE_PREFIX) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT job_name, input_fingerprint FROM etl_state
+            WHERE job_name LIKE :prefix AND status IN ('SUCCESS', 'SKIPPED')
+        """), {"prefix": f"{prefix}%"}).fetchall()
+    return {row.job_name[len(prefix):]: row.input_fingerprint for row in rows}
+
+
+def _resumable_run():
+    """(run_id, stages finished in it) of the latest run if it did not complete, else (None, set())"""
+    with engine.connect() as conn:
+        run_id = conn.execute(text("""
+            SELECT run_id FROM etl_state
+            WHERE job_name LIKE :prefix AND run_id IS NOT NULL
+            ORDER BY last_run_at DESC LIMIT 1
+        """), {"prefix": f"{STATE_PREFIX}%"}).scalar()
+        rows = conn.execute(text("""
+            SELECT job_name, status FROM etl_state
+            WHERE job_name LIKE :prefix AND run_id = :run_id
+        """), {"prefix": f"{STATE_PREFIX}%", "run_id": run_id}).fetchall()
+    statuses = {row.job_name[len(STATE_PREFIX):]: row.status for row in rows}
+    if not statuses or all(s in ('SUCCESS', 'SKIPPED') for s in statuses.values()):
+        return None, set()
+    return run_id, {name for name, s in statuses.items() if s in ('SUCCESS', 'SKIPPED')}
+
+
+def _record_stage(name: str, status: str, fingerprint: str = None, error: str = None, run_id: str = None,
+                  duration: float = None, rows: int = None, peak_memory_mb: float = None,
+                  prefix: str = STATE_PREFIX):
+    with engine.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO etl_state (job_name, status, last_run_at, last_success_at, input_fingerprint,
+                                   error_message, run_id, duration_seconds, records_processed,
+                                   peak_memory_mb, updated_at)
+            VALUES (:job, :status, NOW(), CASE WHEN :status = 'SUCCESS' THEN NOW() END, :fingerprint,
+                    :error, :run_id, :duration, COALESCE(:rows, 0), :peak, NOW())
+            ON CONFLICT (job_name) DO UPDATE SET
+                status = EXCLUDED.status,
+                last_run_at = NOW(),
+                last_success_at = COALESCE(EXCLUDED.last_success_at, etl_state.last_success_at),
+                input_fingerprint = CASE WHEN EXCLUDED.status = 'SUCCESS'
+                                         THEN EXCLUDED.input_fingerprint
+                                         ELSE etl_state.input_fingerprint END,
+                error_message = EXCLUDED.error_message,
+                run_id = EXCLUDED.run_id,
+                duration_seconds = COALESCE(:duration, etl_state.duration_seconds),
+                records_processed = COALESCE(:rows, etl_state.records_processed),
+                peak_memory_mb = COALESCE(:peak, etl_state.peak_memory_mb),
+                updated_at = NOW()
+        """), {
+            "job": f"{prefix}{name}",
+            "status": status,
+            "fingerprint": fingerprint,
+            "error": error[:500] if error else None,
+            "run_id": run_id,
+            "duration": duration,
+            "rows": rows,
+            "peak": peak_memory_mb,
+        })
+        conn.commit()
+
+
+def bump_data_version():
+    """Jauns data_version - API darbinieki (app.core.cache) izmet kešotās analītikas atbildes"""
+    _ensure_state_table()
+    _record_stage(DATA_VERSION_JOB, 'SUCCESS', prefix='')
+    logger.info("🔖 data_version bumped, API caches will be invalidated")
+    _publish_invalidation()
+
+
+def _publish_invalidation():
+    """Paziņo API darbiniekiem uzreiz (bez REDIS_URL tie paši pamanīs data_version pēc ≤30s)"""
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return
+    try:
+        import redis
+        redis.Redis.from_url(url, socket_timeout=2).publish(INVALIDATION_CHANNEL, time.strftime('%Y-%m-%dT%H:%M:%S'))
+    except Exception as e:
+        logger.warning(f"⚠️ Cache invalidation not published: {e}")
+
+
+def stage_fingerprint(stage: Stage, source_hashes: dict, fingerprints: dict):
+    """sha256 over source content + upstream fingerprints; None if any input is unknown."""
+    inputs = {
+        'sources': {key: source_hashes.get(key) for key in stage.sources},
+        'files': {path: file_sha256(path) if os.path.exists(path) else None for path in stage.local_files},
+        'upstream': {name: fingerprints.get(name) for name in stage.depends_on},
+    }
+    if any(v is None for group in inputs.values() for v in group.values()):
+        return None
+    payload = json.dumps({'stage': stage.name, **inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _validate(stages: list):
+    names = [s.name for s in stages]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate stage names: {names}")
+    for stage in stages:
+        unknown = set(stage.upstream) - set(names)
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {sorted(unknown)}")
+
+
+def _stage_process(stage: Stage, files: dict, connections: int, result_conn):
+    """Forked child: runs one stage and reports rows + peak RSS through the pipe."""
+    from . import loader
+    # Vecāka procesa pool savienojumi nedrīkst tikt lietoti bērnā
+    loader.engine.dispose(close=False)
+
+    result = {'ok': True}
+    try:
+        returned = stage.run(files, connections)
+        result['rows'] = returned if isinstance(returned, int) and not isinstance(returned, bool) \
+            else loader.rows_loaded()
+    except BaseException as e:
+        result = {'ok': False, 'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()}
+    result['peak_memory_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB
+    result_conn.send(result)
+    result_conn.close()
+
+
+def run_stages(files: dict, source_hashes: dict, force: bool = False, resume: bool = False,
+               stages: list = None, max_workers: int = MAX_STAGE_WORKERS,
+               db_connections: int = DB_CONNECTION_BUDGET) -> dict:
+    """
+    Runs the stage DAG: every stage whose upstream stages are done is started as soon as
+    a worker, enough DB connections and the tables it writes are free.
+
+    force:  run every stage even if its inputs are unchanged
+    resume: continue the latest unfinished run, skipping stages that succeeded in it
+
+    Raises RuntimeError if a critical stage failed or could not run; the summary of
+    a failed run is recorded in etl_state either way.
+    """
+    stages = stages or _build_stages()
+    _validate(stages)
+    by_name = {s.name: s for s in stages}
+    _ensure_state_table()
+    stored = _stored_fingerprints()
+
+    run_id, resumed = (None, set())
+    if resume:
+        run_id, resumed = _resumable_run()
+        if run_id:
+            logger.info(f"⏯️  Resuming run {run_id}: {sorted(resumed) or 'no stages'} already done")
+        else:
+            logger.info("Nothing to resume - last run completed")
+    run_id = run_id or uuid.uuid4().hex[:12]
+
+    ctx = multiprocessing.get_context('fork')
+    fingerprints = {}
+    state = {}          # name -> 'done' | 'failed' | 'blocked'
+    stats = {}
+    summary = {'run_id': run_id, 'ran': [], 'skipped': [], 'failed': [], 'blocked': [], 'stats': stats}
+    pending = list(stages)
+    running = {}        # sentinel -> (stage, process, result_conn, connections, start_time)
+
+    def connections_in_use():
+        return sum(job[3] for job in running.values())
+
+    def can_start(stage):
+        if len(running) >= max_workers:
+            return False
+        if any(stage.writes & job[0].writes for job in running.values()):
+            return False
+        need = stage.db_connections or db_connections
+        return not running or connections_in_use() + need <= db_connections
+
+    def finish(stage, status):
+        if stage in pending:
+            pending.remove(stage)
+        state[stage.name] = status
+
+    while pending or running:
+        progressed = True
+        while progressed:
+            progressed = False
+            for stage in list(pending):
+                # Nekritiskas stadijas kļūda neaptur lejupējās stadijas
+                upstream_states = ['done' if state.get(name) == 'failed' and not by_name[name].critical
+                                   else state.get(name) for name in stage.upstream]
+                if any(s in ('failed', 'blocked') for s in upstream_states):
+                    logger.warning(f"⛔ {stage.name}: upstream stage failed - not running")
+                    _record_stage(stage.name, 'BLOCKED', run_id=run_id)
+                    summary['blocked'].append(stage.name)
+                    finish(stage, 'blocked')
+                    progressed = True
+                    continue
+                if not all(s == 'done' for s in upstream_states):
+                    continue
+
+                if stage.name not in fingerprints:
+                    fingerprints[stage.name] = stage_fingerprint(stage, source_hashes, fingerprints)
+                fingerprint = fingerprints[stage.name]
+
+                if stage.name in resumed:
+                    logger.info(f"⏭️  {stage.name}: already done in run {run_id}")
+                    fingerprints[stage.name] = stored.get(stage.name)
+                    summary['skipped'].append(stage.name)
+                    finish(stage, 'done')
+                    progressed = True
+                    continue
+                if not force and fingerprint is not None and stored.get(stage.name) == fingerprint:
+                    logger.info(f"⏭️  {stage.name}: inputs unchanged since last successful run - skipping")
+                    _record_stage(stage.name, 'SKIPPED', fingerprint, run_id=run_id)
+                    summary['skipped'].append(stage.name)
+                    finish(stage, 'done')
+                    progressed = True
+                    continue
+
+                if not can_start(stage):
+                    continue
+
+                connections = min(stage.db_connections or db_connections, db_connections)
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_stage_process, args=(stage, files, connections, child_conn),
+                                      name=f"etl-{stage.name}")
+                _record_stage(stage.name, 'RUNNING', run_id=run_id)
+                process.start()
+                child_conn.close()
+                pending.remove(stage)
+                running[process.sentinel] = (stage, process, parent_conn, connections, time.perf_counter())
+                logger.info(f"▶️  {stage.name}: started ({len(running)} running, "
+                            f"{connections_in_use()}/{db_connections} DB connections)")
+                progressed = True
+
+        if not running:
+            break
+
+        for sentinel in wait(list(running)):
+            stage, process, parent_conn, connections, start_time = running.pop(sentinel)
+            try:
+                result = parent_conn.recv() if parent_conn.poll() else None
+            except EOFError:
+                result = None
+            process.join()
+            parent_conn.close()
+            duration = time.perf_counter() - start_time
+            if result is None:
+                result = {'ok': False, 'error': f"stage process exited with code {process.exitcode}"}
+
+            stats[stage.name] = {
+                'seconds': round(duration, 1),
+                'rows': result.get('rows'),
+                'peak_memory_mb': round(result['peak_memory_mb']) if result.get('peak_memory_mb') else None,
+            }
+            if result['ok']:
+                _record_stage(stage.name, 'SUCCESS', fingerprints[stage.name], run_id=run_id,
+                              duration=duration, rows=result['rows'], peak_memory_mb=result['peak_memory_mb'])
+                summary['ran'].append(stage.name)
+                finish(stage, 'done')
+                logger.info(f"✅ {stage.name}: done in {duration:.1f}s, {result['rows'] or 0:,} rows, "
+                            f"peak {stats[stage.name]['peak_memory_mb']} MB")
+            else:
+                _record_stage(stage.name, 'FAILED', error=result['error'], run_id=run_id,
+                              duration=duration, peak_memory_mb=result.get('peak_memory_mb'))
+                summary['failed'].append(stage.name)
+                finish(stage, 'failed')
+                # Lejupējo stadiju nospiedums kļūst nezināms - nākamajā palaidienā tās netiks izlaistas
+                fingerprints[stage.name] = None
+                log = logger.error if stage.critical else logger.warning
+                log(f"❌ {stage.name}: failed after {duration:.1f}s: {result['error']}")
+                if result.get('traceback'):
+                    logger.debug(result['traceback'])
+
+    if pending:
+        raise RuntimeError(f"Stage dependency cycle: {[s.name for s in pending]}")
+
+    logger.info(f"Run {run_id} stage stats:")
+    for name, s in stats.items():
+        logger.info(f"  {name:<28} {s['seconds']:>8.1f}s {s['rows'] or 0:>12,} rows "
+                    f"{s['peak_memory_mb'] or 0:>7,} MB peak")
+    logger.info(f"Stages run: {summary['ran'] or 'none'}")
+    logger.info(f"Stages skipped: {summary['skipped'] or 'none'}")
+
+    fatal = [name for name in summary['failed'] + summary['blocked'] if by_name[name].critical]
+    if summary['failed']:
+        logger.warning(f"Stages failed: {summary['failed']} (resume with --resume)")
+    if fatal:
+        raise RuntimeError(f"ETL stages did not complete: {fatal}")
+    return summary
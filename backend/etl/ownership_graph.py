@@ -0,0 +1,282 @@
+"""
+Whole-registry ownership graph for company_graph_cache.
+
+persons (member / officer / ubo), companies and one year of financial_reports
+are read once via COPY. Companies get dense indices (sorted regcodes); person
+rows and member edges are kept as CSR arrays over those indices, so every
+company's owners, subsidiaries and their share of capital are array slices
+instead of per-batch queries.
+
+The JSON per company is the same as
+app.services.graph_service.calculate_company_graphs_batch produces, with one
+difference: the subsidiary fallback by member name (no legal_entity_regcode)
+is only used when the name belongs to exactly one company. The batch version
+resolved duplicate names to whichever company happened to be in the same batch.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.services.graph_service import safe_float
+from .loader import read_query, copy_rows
+
+logger = logging.getLogger(__name__)
+
+GRAPH_YEAR = 2024
+PERSON_COLUMNS = ['company_regcode', 'person_name', 'number_of_shares', 'share_nominal_value',
+                  'legal_entity_regcode', 'person_code', 'role', 'position', 'rights_of_representation',
+                  'representation_with_at_least', 'date_from', 'birth_date', 'nationality', 'residence',
+                  'share_currency']
+CACHE_COLUMNS = ['company_regcode', 'graph_data', 'updated_at', 'source_version']
+
+
+def _text_list(series: pd.Series) -> list:
+    """Kolonna kā Python saraksts; NaN -> None."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _int_list(series: pd.Series, zero_is_none: bool = False) -> list:
+    values = pd.to_numeric(series, errors='coerce')
+    return [None if v != v or (zero_is_none and not v) else int(v) for v in values.tolist()]
+
+
+def _percent(value: np.ndarray, capital: np.ndarray) -> np.ndarray:
+    """value / capital * 100 (tāda pati operāciju secība kā graph_service); NaN, ja kapitāls 0."""
+    percent = np.full(len(value), np.nan)
+    np.divide(value, capital, out=percent, where=capital > 0)
+    return percent * 100
+
+
+class OwnershipGraph:
+    """
+    Array-backed ownership graph. Build with load_ownership_graph() or directly
+    from text DataFrames as read_query returns them.
+    """
+
+    def __init__(self, companies: pd.DataFrame, persons: pd.DataFrame, financials: pd.DataFrame,
+                 year: int = GRAPH_YEAR):
+        self.year = year
+
+        regcodes = pd.to_numeric(companies['regcode'], errors='coerce')
+        order = np.argsort(regcodes.to_numpy(dtype='float64'), kind='stable')
+        companies = companies.iloc[order][regcodes.iloc[order].notna().to_numpy()]
+        self.regcodes = pd.to_numeric(companies['regcode']).to_numpy(dtype='int64')
+        self.names = _text_list(companies['name'])
+        n = len(self.regcodes)
+
+        # Persons, sakārtoti pēc uzņēmuma indeksa (stabili - DB secība uzņēmuma ietvaros saglabājas)
+        company_idx = self.index_of(persons['company_regcode'])
+        order = np.argsort(company_idx, kind='stable')
+        order = order[company_idx[order] >= 0]
+        persons = persons.iloc[order].reset_index(drop=True)
+        self.company_idx = company_idx[order]
+        self.person_ptr = np.searchsorted(self.company_idx, np.arange(n + 1))
+
+        self.role = persons['role'].to_numpy(dtype=object)
+        self.person_name = _text_list(persons['person_name'])
+        self.person_code = _text_list(persons['person_code'])
+        self.position = _text_list(persons['position'])
+        self.rights = _text_list(persons['rights_of_representation'])
+        self.rep_at_least = _int_list(persons['representation_with_at_least'], zero_is_none=True)
+        self.date_from = _text_list(persons['date_from'])
+        self.birth_date = _text_list(persons['birth_date'])
+        self.nationality = _text_list(persons['nationality'])
+        self.residence = _text_list(persons['residence'])
+        self.currency = _text_list(persons['share_currency'])
+        self.legal_regcode = _int_list(persons['legal_entity_regcode'])
+        self.shares = _int_list(persons['number_of_shares'], zero_is_none=True)
+
+        shares = pd.to_numeric(persons['number_of_shares'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+        nominal = pd.to_numeric(persons['share_nominal_value'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+        self.value = shares * nominal
+
+        # Pamatkapitāls = dalībnieku daļu summa (bincount summē rindu secībā, kā graph_service)
+        is_member = self.role == 'member'
+        self.capital = np.bincount(self.company_idx[is_member], weights=self.value[is_member], minlength=n)
+        self.member_count = np.bincount(self.company_idx[is_member], minlength=n)
+        self.owner_percent = np.where(is_member, _percent(self.value, self.capital[self.company_idx]), np.nan)
+
+        # Dalībnieka šķautnes uz augšu: dalībnieks-uzņēmums (legal_entity_regcode) -> meitas uzņēmums
+        self.legal_idx = self.index_of(persons['legal_entity_regcode'])
+        parent = np.where(is_member, self.legal_idx, -1)
+        # Rezerves variants: dalībnieks bez reģ. nr., kura vārds ir viena uzņēmuma nosaukums
+        names = pd.Series(self.names, dtype=object)
+        unique_names = pd.Series(np.arange(n), index=names).loc[~names.duplicated(keep=False).to_numpy()]
+        by_name = is_member & persons['legal_entity_regcode'].isna().to_numpy()
+        name_idx = persons['person_name'].map(unique_names).fillna(-1).to_numpy(dtype='int64')
+        parent = np.where(by_name, name_idx, parent)
+        self.parent = np.where(parent != self.company_idx, parent, -1)
+
+        edges = np.flatnonzero(self.parent >= 0)
+        # Vecāks, tad reģ. nr. šķautnes pirms nosaukuma šķautnēm, tad DB secība
+        edges = edges[np.lexsort((edges, by_name[edges], parent[edges]))]
+        first = ~pd.DataFrame({'p': parent[edges], 's': self.company_idx[edges]}).duplicated().to_numpy()
+        self.sub_rows = edges[first]
+        self.sub_ptr = np.searchsorted(parent[self.sub_rows], np.arange(n + 1))
+        self.sub_percent = _percent(self.value[self.sub_rows], self.capital[self.company_idx[self.sub_rows]])
+
+        self.financials = {}
+        fin_regcodes = _int_list(financials['company_regcode'])
+        for regcode, employees, turnover, total_assets in zip(
+                fin_regcodes, _int_list(financials['employees']),
+                _text_list(financials['turnover']), _text_list(financials['total_assets'])):
+            if regcode is None:
+                continue
+            self.financials[regcode] = {"employees": employees, "turnover": safe_float(turnover),
+                                        "balance": safe_float(total_assets)}
+
+    def index_of(self, regcodes) -> np.ndarray:
+        """Blīvie indeksi reģ. nr. kolonnai; -1, ja uzņēmuma nav (vai NULL)."""
+        codes = pd.to_numeric(pd.Series(regcodes), errors='coerce').fillna(-1).to_numpy(dtype='int64')
+        if not len(self.regcodes):
+            return np.full(len(codes), -1, dtype='int64')
+        pos = np.minimum(np.searchsorted(self.regcodes, codes), len(self.regcodes) - 1)
+        return np.where(self.regcodes[pos] == codes, pos, -1)
+
+    def targets(self) -> np.ndarray:
+        """Uzņēmumi ar vismaz vienu personu sasaisti (kā precompute_graphs mērķu vaicājums)."""
+        linked = np.zeros(len(self.regcodes), dtype=bool)
+        linked[self.company_idx] = True
+        linked[self.legal_idx[self.legal_idx >= 0]] = True
+        return self.regcodes[linked]
+
+    def affected(self, regcodes) -> np.ndarray:
+        """
+        Uzņēmumi, kuru grafs jāpārrēķina, ja mainījušies regcodes: paši, to dalībnieki-uzņēmumi
+        (arī nosaukuma rezerves variants) un meitas uzņēmumi - katrs no tiem rāda mainītā
+        uzņēmuma daļas / kapitālu savā grafā.
+        Šķautnes, kuru vairs nav, grafs neredz: regcodes jāietver arī to bijušie galapunkti
+        (persons delta tos pievieno no stāvokļa pirms izmaiņām, ieskaitot nosaukuma variantu).
+        """
+        idx = self.index_of(regcodes)
+        changed = np.zeros(len(self.regcodes), dtype=bool)
+        changed[idx[idx >= 0]] = True
+        has_parent = self.parent >= 0
+        result = changed.copy()
+        result[self.parent[has_parent & changed[self.company_idx]]] = True
+        result[self.company_idx[has_parent & changed[np.maximum(self.parent, 0)]]] = True
+        return self.regcodes[result]
+
+    def _fin(self, regcode) -> dict:
+        return self.financials.get(regcode, {"employees": None, "turnover": None, "balance": None})
+
+    def graph(self, regcode: int) -> dict:
+        """Viena uzņēmuma grafs (calculate_company_graphs_batch formātā)."""
+        return self._graph_at(int(self.index_of([regcode])[0]))
+
+    def _graph_at(self, i: int) -> dict:
+        if i < 0:
+            return {"status": "NOT_FOUND", "partners": [], "linked": [], "total_capital": 0, "year": self.year}
+
+        result = {"status": "AUTONOMOUS", "partners": [], "linked": [], "total_capital": 0, "year": self.year}
+        officers, ubos, members = [], [], []
+
+        for r in range(self.person_ptr[i], self.person_ptr[i + 1]):
+            role = self.role[r]
+            if role == 'officer':
+                officers.append({
+                    "name": self.person_name[r], "person_code": self.person_code[r], "position": self.position[r],
+                    "rights_of_representation": self.rights[r],
+                    "representation_with_at_least": self.rep_at_least[r],
+                    "registered_on": self.date_from[r], "birth_date": self.birth_date[r]
+                })
+            elif role == 'ubo':
+                ubos.append({
+                    "name": self.person_name[r], "person_code": self.person_code[r],
+                    "nationality": self.nationality[r], "residence": self.residence[r],
+                    "registered_on": self.date_from[r], "birth_date": self.birth_date[r]
+                })
+            elif role == 'member' and self.owner_percent[r] >= 25:
+                percent = round(float(self.owner_percent[r]), 2)
+                legal_regcode = self.legal_regcode[r]
+                val = float(self.value[r])
+                entry = {
+                    "name": self.person_name[r],
+                    "regcode": legal_regcode,
+                    "relation": "owner",
+                    "entity_type": "legal_entity" if legal_regcode is not None else "physical_person",
+                    "ownership_percent": percent,
+                    "share_value": val,
+                    **self._fin(legal_regcode)
+                }
+                members.append({
+                    "name": self.person_name[r],
+                    "person_code": self.person_code[r],
+                    "legal_entity_regcode": legal_regcode,
+                    "number_of_shares": self.shares[r],
+                    "share_value": val,
+                    "share_currency": self.currency[r] or "EUR",
+                    "percent": percent,
+                    "date_from": self.date_from[r],
+                    "birth_date": self.birth_date[r]
+                })
+                result["linked" if self.owner_percent[r] > 50 else "partners"].append(entry)
+
+        result['officers'] = officers
+        result['ubos'] = ubos
+        if self.member_count[i]:
+            result['total_capital'] = float(self.capital[i])
+        result['members'] = members
+
+        for k in range(self.sub_ptr[i], self.sub_ptr[i + 1]):
+            if not self.sub_percent[k] >= 25:
+                continue
+            r = self.sub_rows[k]
+            sub = self.company_idx[r]
+            sub_regcode = int(self.regcodes[sub])
+            result["linked" if self.sub_percent[k] > 50 else "partners"].append({
+                "name": self.names[sub],
+                "regcode": sub_regcode,
+                "relation": "subsidiary",
+                "entity_type": "legal_entity",
+                "ownership_percent": round(float(self.sub_percent[k]), 2),
+                "share_value": float(self.value[r]),
+                **self._fin(sub_regcode)
+            })
+
+        if result["linked"]:
+            result["status"] = "LINKED"
+        elif result["partners"]:
+            result["status"] = "PARTNER"
+        return result
+
+    def cache_rows(self, regcodes=None, source_version=None):
+        """
+        (company_regcode, graph_data JSON, updated_at, source_version) rindas COPY ielādei;
+        regcodes=None - visi mērķi. Reģ. nr., kuru nav companies, tiek izlaisti.
+        """
+        regcodes = self.targets() if regcodes is None else np.asarray(list(regcodes), dtype='int64')
+        now = datetime.now()
+        for regcode, i in zip(regcodes.tolist(), self.index_of(regcodes).tolist()):
+            if i >= 0:
+                yield regcode, json.dumps(self._graph_at(i)), now, source_version
+
+
+def load_ownership_graph(year: int = GRAPH_YEAR) -> OwnershipGraph:
+    """Nolasa persons / companies / financial_reports vienreiz un uzbūvē grafu."""
+    start = time.perf_counter()
+    companies = read_query("SELECT regcode, name FROM companies")
+    persons = read_query(f"SELECT {', '.join(PERSON_COLUMNS)} FROM persons "
+                         f"WHERE role IN ('member', 'officer', 'ubo')")
+    financials = read_query(f"SELECT company_regcode, turnover, employees, total_assets "
+                            f"FROM financial_reports WHERE year = {int(year)}")
+    logger.info(f"📥 Graph inputs: {len(companies):,} companies, {len(persons):,} persons, "
+                f"{len(financials):,} financial reports ({time.perf_counter() - start:.1f}s)")
+
+    graph = OwnershipGraph(companies, persons, financials, year)
+    logger.info(f"🕸️  Ownership graph: {len(graph.sub_rows):,} member edges between companies "
+                f"({time.perf_counter() - start:.1f}s)")
+    return graph
+
+
+def write_graph_cache(graph: OwnershipGraph, regcodes=None, source_version=None) -> int:
+    """
+    Straumē grafus uz company_graph_cache caur COPY + ON CONFLICT. Atgriež rindu skaitu.
+    source_version: datu stāvoklis (laiks), ko ieraksts atspoguļo - skat. precompute_graphs.
+    """
+    return copy_rows(graph.cache_rows(regcodes, source_version), 'company_graph_cache', CACHE_COLUMNS,
+                     unique_columns=['company_regcode'])
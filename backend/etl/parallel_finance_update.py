@@ -8,6 +8,7 @@ from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
 from csv_cache import CSVCache
+from staging import read_staged, iter_staged
 from multiprocessing import Pool, cpu_count
 from functools import partial
 from io import StringIO
@@ -163,16 +164,14 @@ class ParallelFinanceETL:
             logger.info(f"📥 Loading statement mappings...")
             stmt_map = {}
             
-            for stmt_chunk in pd.read_csv(statements_path, sep=';', dtype=str, chunksize=100000):
-                stmt_chunk['regcode'] = pd.to_numeric(stmt_chunk['legal_entity_registration_number'], errors='coerce')
-                stmt_chunk['year_int'] = pd.to_numeric(stmt_chunk['year'], errors='coerce')
-                
-                relevant = stmt_chunk[stmt_chunk['regcode'].isin(regcodes_to_update)].copy()
-                
-                if len(relevant) > 0:
-                    new_mappings = relevant.set_index('id')[['regcode', 'year_int']].to_dict('index')
-                    for stmt_id, data in new_mappings.items():
-                        stmt_map[stmt_id] = {'regcode': int(data['regcode']), 'year': int(data['year_int'])}
+            # Typed Parquet copy (etl/staging.py): 3 columns, no CSV parsing on reruns
+            df_stmt = read_staged(statements_path, columns=['id', 'legal_entity_registration_number', 'year'])
+            df_stmt['regcode'] = pd.to_numeric(df_stmt['legal_entity_registration_number'], errors='coerce')
+            df_stmt['year_int'] = pd.to_numeric(df_stmt['year'], errors='coerce')
+            relevant = df_stmt[df_stmt['regcode'].isin(regcodes_to_update)].dropna(subset=['year_int'])
+            stmt_ids = pd.to_numeric(relevant['id'], errors='coerce')
+            for stmt_id, regcode, year in zip(stmt_ids, relevant['regcode'], relevant['year_int']):
+                stmt_map[stmt_id] = {'regcode': int(regcode), 'year': int(year)}
             
             logger.info(f"✅ Loaded {len(stmt_map)} statement mappings")
             
@@ -190,7 +189,9 @@ class ParallelFinanceETL:
             logger.info(f"📊 Reading balance sheets for parallel processing...")
             
             chunks_to_process = []
-            for bal_chunk in pd.read_csv(balance_path, sep=';', dtype=str, chunksize=50000):
+            bal_columns = ['statement_id', 'accounts_receivable', 'debtori', 'receivables']
+            for bal_chunk in iter_staged(balance_path, columns=bal_columns, batch_size=50000):
+                bal_chunk['statement_id'] = pd.to_numeric(bal_chunk['statement_id'], errors='coerce')
                 chunks_to_process.append((bal_chunk, stmt_lookup_df))
             
             logger.info(f"✅ Prepared {len(chunks_to_process)} chunks for {NUM_WORKERS} workers")
@@ -2,11 +2,14 @@
 import logging
 from sqlalchemy import text
 from app.services.graph_service import calculate_company_graphs_batch
+from etl.ownership_graph import load_ownership_graph, write_graph_cache
+from etl.changes import changed_companies
 from sqlalchemy import create_engine
 import os
 import json
 from psycopg2.extras import execute_values
 import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -19,23 +22,109 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432/ur_db")
 engine = create_engine(DATABASE_URL, pool_size=50, max_overflow=10, pool_pre_ping=True)
 
-def precompute_graphs():
+# etl_state ieraksts: last_success_at = pēdējās pārbūves source_version
+GRAPH_JOB = 'company_graph_cache'
+# Pēc šo stadiju pārlādes var mainīties jebkura uzņēmuma nosaukums / finanses - tikai pilna pārbūve
+FULL_REBUILD_JOBS = ['stage:process_companies', 'stage:process_finance']
+
+def _ensure_cache_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS company_graph_cache (
+            company_regcode BIGINT PRIMARY KEY,
+            graph_data JSONB,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.execute(text("ALTER TABLE company_graph_cache ADD COLUMN IF NOT EXISTS source_version TIMESTAMP WITH TIME ZONE"))
+    conn.commit()
+
+def _incremental_since(conn):
+    """source_version of the last build if an incremental update is enough, else None (full rebuild)."""
+    row = conn.execute(text("SELECT last_success_at FROM etl_state WHERE job_name = :job"),
+                       {"job": GRAPH_JOB}).fetchone()
+    if not row or row.last_success_at is None:
+        logger.info("No previous graph build recorded - full rebuild")
+        return None
+    reloaded = conn.execute(text("""
+        SELECT job_name FROM etl_state WHERE job_name = ANY(:jobs) AND last_success_at > :since
+    """), {"jobs": FULL_REBUILD_JOBS, "since": row.last_success_at}).fetchall()
+    if reloaded:
+        logger.info(f"{', '.join(r.job_name for r in reloaded)} reloaded since last graph build - full rebuild")
+        return None
+    return row.last_success_at
+
+def _record_build(source_version, rows: int):
+    with engine.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO etl_state (job_name, status, last_run_at, last_success_at, records_processed, updated_at)
+            VALUES (:job, 'SUCCESS', NOW(), :version, :rows, NOW())
+            ON CONFLICT (job_name) DO UPDATE SET
+                status = 'SUCCESS',
+                last_run_at = NOW(),
+                last_success_at = EXCLUDED.last_success_at,
+                records_processed = EXCLUDED.records_processed,
+                updated_at = NOW()
+        """), {"job": GRAPH_JOB, "version": source_version, "rows": rows})
+        conn.commit()
+
+def precompute_graphs(changed=None, incremental: bool = False):
+    """
+    Builds the whole-registry ownership graph in memory (one scan of persons,
+    companies and financial_reports) and streams graphs into company_graph_cache
+    via COPY. Uses a single DB connection.
+
+    changed: regcodes whose persons changed - only they and their 1-hop neighbourhood
+      (owners, name-fallback parents, subsidiaries) are rewritten.
+    incremental: take `changed` from company_changes since the last build; full rebuild
+      if there was no build yet or companies / financial_reports were reloaded since.
+
+    Every written entry gets source_version = the time this build started; the API
+    treats an entry as stale if company_changes has a newer change for that company.
+    Returns the number of graphs written.
     """
-    Iterates over all companies (optimized: active only first),
-    calculates their relationship graph, and batch upserts into company_graph_cache.
+    from etl.orchestrator import _ensure_state_table
+    logger.info("Starting company graph pre-computation (in-memory graph)...")
+    start_time = time.time()
+    source_version = datetime.now(timezone.utc)
+    record_build = changed is None
+
+    _ensure_state_table()
+    with engine.connect() as conn:
+        _ensure_cache_table(conn)
+        if incremental and changed is None:
+            since = _incremental_since(conn)
+            if since is not None:
+                changed = changed_companies(since=since)
+                if not changed:
+                    logger.info(f"✅ No company changes since {since} - graph cache is up to date.")
+                    _record_build(source_version, 0)
+                    return 0
+
+    graph = load_ownership_graph()
+    if changed is None:
+        total_processed = write_graph_cache(graph, source_version=source_version)
+    else:
+        targets = graph.affected(changed)
+        logger.info(f"🎯 {len(changed)} changed companies -> {len(targets)} graphs to recompute")
+        total_processed = write_graph_cache(graph, targets, source_version)
+
+    if record_build:
+        _record_build(source_version, total_processed)
+    logger.info(f"✅ Graph pre-computation completed: {total_processed} graphs in {time.time() - start_time:.1f}s.")
+    return total_processed
+
+def precompute_graphs_threaded(max_workers: int = 50):
+    """
+    Previous implementation, kept for benchmarking / fallback:
+    calculate_company_graphs_batch over batches of 100 companies in parallel threads,
+    batch upserts into company_graph_cache.
+    max_workers: parallel threads (each holds one pooled connection).
+    Returns the number of graphs written.
     """
     logger.info("Starting company graph pre-computation...")
     
     with engine.connect() as conn:
-        # Ensure table exists
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS company_graph_cache (
-                company_regcode BIGINT PRIMARY KEY,
-                graph_data JSONB,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
+        _ensure_cache_table(conn)
 
         # Get all companies to process
         # Prioritize companies with many members (likely to be slow)
@@ -54,7 +143,6 @@ def precompute_graphs():
         logger.info(f"Found {total_count} companies with connections to process.")
         
         # Parallel processing setup
-        max_workers = 50
         logger.info(f"Starting parallel processing with {max_workers} workers...")
         
         # Chunk regcodes into larger batches for the workers
@@ -104,8 +192,10 @@ def precompute_graphs():
         # Flush remaining
         if batch_accumulated:
             _upsert_batch(conn, batch_accumulated)
+            total_processed += len(batch_accumulated)
             
     logger.info("✅ Graph pre-computation completed.")
+    return total_processed
 
 def _upsert_batch(conn, data):
     """Upsert batch using execute_values for speed"""
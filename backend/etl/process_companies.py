@@ -61,4 +61,4 @@ def process_companies(register_path: str, equity_path: str):
     # unless we want to calculate company_size_badge based on capital.
     # For now, we load basic company info.
     
-    load_to_db(df_final, 'companies')
+    load_to_db(df_final, 'companies', swap=True)
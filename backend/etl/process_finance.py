@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import logging
 from .loader import load_to_db, engine
+from .staging import read_staged, iter_staged, staged_columns
 from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
@@ -84,6 +85,99 @@ def calculate_financial_ratios(df):
     return df
 
 
+# Ienākumu pārskata kolonnas (CSV -> DB). Ja vienai DB kolonnai ir vairākas CSV
+# alternatīvas, uzvar pēdējā atrastā (kā iepriekšējā rindu apstrādē).
+INCOME_MAPPING = {
+    'net_turnover': 'turnover',
+    'neto_apgrozijums': 'turnover',
+    'net_income': 'profit',
+    'net_profit': 'profit',
+    'neto_pelna': 'profit',
+    'interest_expenses': 'interest_expenses',
+    'procenti': 'interest_expenses',
+    'by_nature_depreciation_expenses': 'depreciation_expenses',
+    'amortizacija': 'depreciation_expenses',
+    'provision_for_income_taxes': 'provision_for_income_taxes',
+    'nodokli': 'provision_for_income_taxes'
+}
+
+INCOME_COLS = ['turnover', 'profit', 'interest_expenses', 'depreciation_expenses', 'provision_for_income_taxes']
+
+BALANCE_MAPPING = {
+    'total_assets': 'total_assets',
+    'total_current_assets': 'total_current_assets',
+    'cash': 'cash_balance',
+    'inventories': 'inventories',
+    'current_liabilities': 'current_liabilities',
+    'non_current_liabilities': 'non_current_liabilities',
+    'equity': 'equity'
+}
+
+BALANCE_COLS = list(BALANCE_MAPPING.values())
+
+# Kolonnas, kuras reizina ar 1000, ja rounded_to_nearest == 'THOUSANDS'
+SCALED_COLS = INCOME_COLS + BALANCE_COLS
+
+
+def _empty_income_frame() -> pd.DataFrame:
+    return pd.DataFrame(columns=INCOME_COLS, dtype='float64',
+                        index=pd.Index([], dtype='Int64', name='statement_id'))
+
+
+def _statement_key(ids: pd.Series) -> pd.Series:
+    """statement_id kā Int64 visos trīs failos (staging tipus nosaka katram failam atsevišķi)"""
+    return pd.to_numeric(ids, errors='coerce').astype('Int64')
+
+
+def load_income_statements(income_path: str, chunk_size: int = 50000) -> pd.DataFrame:
+    """
+    Nolasa ienākumu pārskatus kolonnveidā: tikai vajadzīgās kolonnas,
+    skaitļi kā float64, rezultāts indeksēts pēc statement_id.
+    """
+    header = staged_columns(income_path)
+    source_for = {}
+    for csv_col, our_col in INCOME_MAPPING.items():
+        if csv_col in header:
+            source_for[our_col] = csv_col
+
+    if 'statement_id' not in header:
+        logger.warning("Income statements have no statement_id column")
+        return _empty_income_frame()
+
+    usecols = ['statement_id'] + sorted(set(source_for.values()))
+    frames = []
+    for chunk_num, inc_chunk in enumerate(
+            iter_staged(income_path, columns=usecols, batch_size=chunk_size), start=1):
+        part = pd.DataFrame({'statement_id': _statement_key(inc_chunk['statement_id'])})
+        for our_col in INCOME_COLS:
+            if our_col in source_for:
+                part[our_col] = pd.to_numeric(inc_chunk[source_for[our_col]], errors='coerce')
+            else:
+                part[our_col] = np.nan
+        frames.append(part)
+
+        if chunk_num % 10 == 0:
+            logger.info(f"  Processed income chunk {chunk_num}")
+
+    if not frames:
+        return _empty_income_frame()
+
+    df_income = pd.concat(frames, ignore_index=True)
+    # Vēlākais ieraksts pārraksta agrāko (kā iepriekš dict gadījumā)
+    df_income = df_income.drop_duplicates(subset=['statement_id'], keep='last')
+    return df_income.set_index('statement_id')
+
+
+def apply_thousands_scaling(df: pd.DataFrame) -> pd.DataFrame:
+    """Reizina visas finanšu kolonnas ar 1000 rindām ar rounded_to_nearest == 'THOUSANDS'."""
+    if 'rounded_to_nearest' not in df.columns:
+        return df
+    cols = [c for c in SCALED_COLS if c in df.columns]
+    factor = np.where(df['rounded_to_nearest'] == 'THOUSANDS', 1000.0, 1.0)
+    df[cols] = df[cols].astype('float64').mul(factor, axis=0)
+    return df
+
+
 def process_finance(statements_path: str, balance_path: str, income_path: str):
     """
     Process financial data with CHUNKED LOADING to prevent memory issues.
@@ -97,7 +191,8 @@ def process_finance(statements_path: str, balance_path: str, income_path: str):
         
         # --- 1. Load Financial Statements (Headers) - Small file, load fully ---
         logger.info("Loading financial statements headers...")
-        df_stm = pd.read_csv(statements_path, sep=';', dtype=str)
+        stm_cols = {'id', 'legal_entity_registration_number', 'year', 'employees', 'rounded_to_nearest', 'type'}
+        df_stm = read_staged(statements_path, columns=sorted(stm_cols))
         logger.info(f"Loaded {len(df_stm)} financial statements")
         
         df_stm = df_stm.rename(columns={
@@ -112,13 +207,10 @@ def process_finance(statements_path: str, balance_path: str, income_path: str):
         # --- NEW SMART FILTERING LOGIC ---
         # 1. Define priority: UGP (2) > NULL (1) > UKGP (0)
         # This ensures we pick individual reports over consolidated ones if both exist.
-        def get_priority(st):
-            st_str = str(st).upper() if pd.notnull(st) else ""
-            if st_str == 'UGP': return 2
-            if st_str == 'UKGP': return 0
-            return 1 # Default for NULL or others
-            
-        df_stm['sort_priority'] = df_stm['source_type'].apply(get_priority)
+        source_upper = df_stm['source_type'].str.upper()
+        df_stm['sort_priority'] = np.select(
+            [source_upper == 'UGP', source_upper == 'UKGP'], [2, 0], default=1  # Default for NULL or others
+        )
         
         # 2. Sort so that the best record is LAST for each (company, year)
         df_stm = df_stm.sort_values(['company_regcode', 'year', 'sort_priority'])
@@ -143,56 +235,21 @@ def process_finance(statements_path: str, balance_path: str, income_path: str):
                 df_stm[c] = None
                 
         df_stm = df_stm[base_cols].copy()
+        df_stm['statement_id'] = _statement_key(df_stm['statement_id'])
         
         # Convert to numeric
         for col in ['year', 'company_regcode', 'employees']:
             if col in df_stm.columns:
                 df_stm[col] = pd.to_numeric(df_stm[col], errors='coerce')
 
-        # --- 2. Build Income Data Dictionary (Chunked) ---
+        # --- 2. Build Income Frame (Columnar, indexed by statement_id) ---
         logger.info(f"Loading income statements in chunks of {CHUNK_SIZE}...")
-        income_data = {}  # statement_id -> {turnover, profit, ...}
-        
         try:
-            chunk_num = 0
-            for inc_chunk in pd.read_csv(income_path, sep=';', dtype=str, chunksize=CHUNK_SIZE):
-                chunk_num += 1
-                
-                # Column mapping for income statement
-                income_mapping = {
-                    'net_turnover': 'turnover',
-                    'neto_apgrozijums': 'turnover',
-                    'net_income': 'profit',
-                    'net_profit': 'profit',
-                    'neto_pelna': 'profit',
-                    'interest_expenses': 'interest_expenses',
-                    'procenti': 'interest_expenses',
-                    'by_nature_depreciation_expenses': 'depreciation_expenses',
-                    'amortizacija': 'depreciation_expenses',
-                    'provision_for_income_taxes': 'provision_for_income_taxes',
-                    'nodokli': 'provision_for_income_taxes'
-                }
-                
-                # Extract relevant columns
-                for idx, row in inc_chunk.iterrows():
-                    if 'statement_id' not in row:
-                        continue
-                    
-                    stmt_id = row['statement_id']
-                    income_data[stmt_id] = {}
-                    
-                    for csv_col, our_col in income_mapping.items():
-                        if csv_col in row:
-                            income_data[stmt_id][our_col] = pd.to_numeric(row[csv_col], errors='coerce')
-                
-                if chunk_num % 10 == 0:
-                    logger.info(f"  Processed income chunk {chunk_num} ({len(income_data)} statements so far)")
-            
-            logger.info(f"✅ Loaded income data for {len(income_data)} statements")
-                    
+            df_income = load_income_statements(income_path, CHUNK_SIZE)
+            logger.info(f"✅ Loaded income data for {len(df_income)} statements")
         except Exception as e:
             logger.warning(f"Could not process Income Statement: {e}")
-            income_data = {}
+            df_income = _empty_income_frame()
 
         # --- 3. Process Balance Sheets in Chunks and Merge/Load Incrementally ---
         logger.info(f"Processing balance sheets in chunks of {CHUNK_SIZE}...")
@@ -209,66 +266,31 @@ def process_finance(statements_path: str, balance_path: str, income_path: str):
         total_loaded = 0
         
         try:
-            for bal_chunk in pd.read_csv(balance_path, sep=';', dtype=str, chunksize=CHUNK_SIZE):
+            bal_header = staged_columns(balance_path)
+            bal_source = {csv_col: our_col for csv_col, our_col in BALANCE_MAPPING.items() if csv_col in bal_header}
+            bal_usecols = ['statement_id'] + list(bal_source)
+
+            for bal_chunk in iter_staged(balance_path, columns=bal_usecols, batch_size=CHUNK_SIZE):
                 chunk_num += 1
                 logger.info(f"📊 Processing balance sheet chunk {chunk_num} ({len(bal_chunk)} rows)...")
                 
-                # Column mapping for balance sheet
-                balance_mapping = {
-                    'total_assets': 'total_assets',
-                    'total_current_assets': 'total_current_assets',
-                    'cash': 'cash_balance',
-                    'inventories': 'inventories',
-                    'current_liabilities': 'current_liabilities',
-                    'non_current_liabilities': 'non_current_liabilities',
-                    'equity': 'equity'
-                }
-                
-                bal_cols = ['statement_id']
-                rename_map = {}
-                
-                for csv_col, our_col in balance_mapping.items():
-                    if csv_col in bal_chunk.columns:
-                        bal_cols.append(csv_col)
-                        rename_map[csv_col] = our_col
-                
-                if len(bal_cols) > 1:
-                    df_bal_subset = bal_chunk[bal_cols].copy()
-                    df_bal_subset = df_bal_subset.rename(columns=rename_map)
-                    
-                    # Convert to numeric
-                    for col in ['total_assets', 'total_current_assets', 'cash_balance', 'inventories',
-                               'current_liabilities', 'non_current_liabilities', 'equity']:
-                        if col in df_bal_subset.columns:
-                            df_bal_subset[col] = pd.to_numeric(df_bal_subset[col], errors='coerce')
-                else:
-                    df_bal_subset = bal_chunk[['statement_id']].copy()
-                    for col in ['total_assets', 'total_current_assets', 'cash_balance', 'inventories',
-                               'current_liabilities', 'non_current_liabilities', 'equity']:
-                        df_bal_subset[col] = None
+                df_bal_subset = bal_chunk.rename(columns=bal_source)
+                df_bal_subset['statement_id'] = _statement_key(df_bal_subset['statement_id'])
+                for col in BALANCE_COLS:
+                    if col in df_bal_subset.columns:
+                        df_bal_subset[col] = pd.to_numeric(df_bal_subset[col], errors='coerce')
+                    else:
+                        df_bal_subset[col] = np.nan
                 
                 # Merge with statements
                 df_merged = pd.merge(df_stm, df_bal_subset, on='statement_id', how='inner')
                 
-                # Add income data
-                for col in ['turnover', 'profit', 'interest_expenses', 'depreciation_expenses', 'provision_for_income_taxes']:
-                    df_merged[col] = df_merged['statement_id'].map(
-                        lambda x: income_data.get(x, {}).get(col)
-                    )
+                # Add income data (vectorized left join on statement_id)
+                df_merged = df_merged.join(df_income, on='statement_id')
                 
                 # Apply scaling regarding rounded_to_nearest
                 # If rounded_to_nearest == 'THOUSANDS', multiply financial columns by 1000
-                if 'rounded_to_nearest' in df_merged.columns:
-                    mask_thousands = df_merged['rounded_to_nearest'] == 'THOUSANDS'
-                    if mask_thousands.any():
-                        fin_cols = [
-                            'turnover', 'profit', 'interest_expenses', 'depreciation_expenses', 'provision_for_income_taxes',
-                            'total_assets', 'total_current_assets', 'cash_balance', 'inventories', 
-                            'current_liabilities', 'non_current_liabilities', 'equity'
-                        ]
-                        for col in fin_cols:
-                            if col in df_merged.columns:
-                                df_merged.loc[mask_thousands, col] = df_merged.loc[mask_thousands, col] * 1000
+                df_merged = apply_thousands_scaling(df_merged)
 
                 # Calculate financial ratios
                 df_merged = calculate_financial_ratios(df_merged)
@@ -1,15 +1,148 @@
 import pandas as pd
 import logging
-from .loader import load_to_db
+from sqlalchemy import text
+from app.services.person_ids import generate_person_url_id
+from .loader import load_to_db, apply_delta, read_query, engine, COPY_NULL
+from .changes import record_company_changes
 
 logger = logging.getLogger(__name__)
 
-def process_persons(officers_path: str, members_path: str, ubo_path: str):
+# Rindas atslēga: viena persona vienā lomā vienā uzņēmumā (= persons UNIQUE)
+PERSON_KEY_COLS = ['company_regcode', 'person_name', 'role', 'person_code']
+PERSON_NUMERIC_COLS = {'company_regcode', 'representation_with_at_least', 'number_of_shares',
+                       'share_nominal_value', 'legal_entity_regcode'}
+PERSON_DATE_COLS = {'date_from', 'date_to', 'birth_date'}
+
+# Ja mainās vairāk par šo daļu rindu, pilna pārlāde (swap) ir lētāka par delta
+DELTA_MAX_RATIO = 0.5
+
+
+def _canonical(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Vienots teksta attēlojums salīdzināšanai (DB CSV eksports vs jaunais DataFrame)."""
+    out = {}
+    for col in columns:
+        values = df[col]
+        if col in PERSON_NUMERIC_COLS:
+            values = pd.to_numeric(values, errors='coerce').astype('Float64').round(2)
+        elif col in PERSON_DATE_COLS:
+            values = pd.to_datetime(values, errors='coerce').dt.strftime('%Y-%m-%d')
+        # NULL marķieris kā COPY; '\x00' hash_pandas_object nošķeļ un tas sakristu ar ''
+        out[col] = values.astype('string').fillna(COPY_NULL)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _row_hash(df: pd.DataFrame, columns: list):
+    return pd.util.hash_pandas_object(_canonical(df, columns), index=False).to_numpy()
+
+
+def _name_fallback_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Dalībnieki bez reģ. nr. - grafā tie ir uzņēmums ar tādu pašu (unikālu) nosaukumu."""
+    return df[(df['role'] == 'member') & df['legal_entity_regcode'].isna() & df['person_name'].notna()]
+
+
+def _person_regcodes(df: pd.DataFrame, company_by_name: dict = None) -> set:
+    """
+    Uzņēmumi, kurus skar rindas: pats uzņēmums un dalībnieks-uzņēmums
+    (company_by_name: arī dalībnieks, kas uzņēmumam piesaistīts pēc nosaukuma).
+    """
+    regcodes = pd.concat([
+        pd.to_numeric(df['company_regcode'], errors='coerce'),
+        pd.to_numeric(df['legal_entity_regcode'], errors='coerce'),
+    ]).dropna()
+    changed = set(regcodes.astype('int64').tolist())
+    if company_by_name:
+        names = _name_fallback_rows(df)['person_name']
+        changed |= {company_by_name[name] for name in names if name in company_by_name}
+    return changed
+
+
+def _companies_by_name(names) -> dict:
+    """{nosaukums: regcode} nosaukumiem, kas pieder tieši vienam uzņēmumam (kā OwnershipGraph)."""
+    names = sorted(set(names))
+    if not names:
+        return {}
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT name, MIN(regcode) AS regcode FROM companies
+            WHERE name = ANY(:names)
+            GROUP BY name HAVING COUNT(*) = 1
+        """), {"names": names})
+        return {row.name: int(row.regcode) for row in rows}
+
+
+def diff_persons(new: pd.DataFrame, current: pd.DataFrame, value_cols: list, company_by_name: dict = None):
+    """
+    Vektorizēts salīdzinājums pēc rindas atslēgas un satura hash.
+    current satur 'id' + PERSON_KEY_COLS + value_cols (DB stāvoklis).
+    company_by_name: dalībnieku bez reģ. nr. uzņēmumi pēc nosaukuma - dzēstai / mainītai
+    šādai šķautnei skarts arī bijušais vecāks, ko pēc delta grafs vairs neredz.
+
+    Returns:
+        (inserts, updates ar 'id', delete_ids, changed_regcodes)
+    """
+    new_key = pd.Series(_row_hash(new, PERSON_KEY_COLS), index=new.index)
+    new_content = pd.Series(_row_hash(new, value_cols), index=new.index)
+    cur_key = pd.Series(_row_hash(current, PERSON_KEY_COLS), index=current.index)
+    cur_content = pd.Series(_row_hash(current, value_cols), index=current.index)
+
+    # NULL person_code UNIQUE neaptur - lieki dublikāti DB tiek dzēsti
+    cur_dup = cur_key.duplicated(keep='first')
+    cur_by_key = pd.DataFrame({'id': current['id'].to_numpy(), 'content': cur_content.to_numpy(),
+                               'row': current.index}, index=cur_key.to_numpy())[~cur_dup.to_numpy()]
+
+    is_insert = ~new_key.isin(cur_by_key.index)
+    deleted = current[cur_dup | ~cur_key.isin(new_key)]
+
+    matched = new[~is_insert]
+    matched_cur = cur_by_key.loc[new_key[~is_insert].to_numpy()]
+    is_update = new_content[~is_insert].to_numpy() != matched_cur['content'].to_numpy()
+    updates = matched[is_update].copy()
+    updates.insert(0, 'id', matched_cur['id'].to_numpy()[is_update])
+    updated_before = current.loc[matched_cur['row'].to_numpy()[is_update]]
+
+    inserts = new[is_insert]
+    changed = (_person_regcodes(inserts) | _person_regcodes(updates)
+               | _person_regcodes(updated_before, company_by_name) | _person_regcodes(deleted, company_by_name))
+    return inserts, updates, deleted['id'].to_numpy(), changed
+
+
+def _persons_columns() -> set:
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'persons' AND table_schema = current_schema()
+        """))
+        return {row[0] for row in rows}
+
+
+def _read_current_persons(columns: list) -> pd.DataFrame:
+    """Pašreizējā persons tabula (read_query: NULL -> NaN, '' paliek '', kā jaunajā DataFrame)."""
+    return read_query(f"SELECT id, {', '.join(columns)} FROM persons")
+
+
+def _add_person_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """person_hash kā API (generate_person_url_id), rēķināts vienreiz katrai (kods, vārds) kombinācijai."""
+    pairs = df[['person_code', 'person_name']].drop_duplicates()
+    hashes = {
+        (code, name): generate_person_url_id(code if isinstance(code, str) else None, name)
+        for code, name in zip(pairs['person_code'], pairs['person_name'])
+    }
+    df = df.copy()
+    df['person_hash'] = [hashes[pair] for pair in zip(df['person_code'], df['person_name'])]
+    return df
+
+
+def process_persons(officers_path: str, members_path: str, ubo_path: str, delta: bool = True):
     """
     Apstrādā personas datus no 3 CSV failiem ar paplašinātiem laukiem:
     - Officers: position, rights_of_representation, representation_with_at_least
     - Members: number_of_shares, share_nominal_value, share_currency, legal_entity_regcode
     - UBOs: nationality, residence
+
+    delta=True: salīdzina ar esošo persons tabulu un pielieto tikai INSERT/UPDATE/DELETE
+    (neskartās rindas saglabā id un person_hash). Skartie uzņēmumi tiek ierakstīti
+    company_changes (source='persons') un atgriezti.
+    delta=False: pilna pārlāde (swap), kā agrāk.
     """
     logger.info("Processing Persons with Extended Fields...")
     
@@ -191,6 +324,35 @@ def process_persons(officers_path: str, members_path: str, ubo_path: str):
     if initial_count != deduped_count:
         logger.info(f"Removed {initial_count - deduped_count} duplicate entries.")
 
-    logger.info(f"Loading {len(df_final)} persons to database...")
-    load_to_db(df_final, 'persons')
-    logger.info("Persons processing complete.")
\ No newline at end of file
+    if not delta:
+        logger.info(f"Loading {len(df_final)} persons to database...")
+        load_to_db(df_final, 'persons', swap=True)
+        changed = _person_regcodes(df_final)
+        record_company_changes('persons', changed)
+        logger.info("Persons processing complete.")
+        return changed
+
+    table_cols = _persons_columns()
+    has_hash = 'person_hash' in table_cols
+    value_cols = [c for c in target_cols if c not in PERSON_KEY_COLS]
+    current = _read_current_persons(target_cols)
+    logger.info(f"Current persons table: {len(current)} rows")
+
+    company_by_name = _companies_by_name(_name_fallback_rows(current)['person_name'])
+    inserts, updates, delete_ids, changed = diff_persons(df_final, current, value_cols, company_by_name)
+    n_changes = len(inserts) + len(updates) + len(delete_ids)
+    logger.info(f"Persons delta: +{len(inserts)} ~{len(updates)} -{len(delete_ids)} "
+                f"({len(changed)} companies affected)")
+
+    if current.empty or n_changes > DELTA_MAX_RATIO * len(current):
+        logger.info(f"Delta covers {n_changes}/{len(current)} rows - full reload instead")
+        load_to_db(_add_person_hashes(df_final) if has_hash else df_final, 'persons', swap=True)
+    elif n_changes:
+        apply_delta('persons', _add_person_hashes(inserts) if has_hash else inserts,
+                    updates[['id'] + value_cols], delete_ids)
+    else:
+        logger.info("Persons unchanged - nothing to apply")
+
+    record_company_changes('persons', changed)
+    logger.info("Persons processing complete.")
+    return changed
\ No newline at end of file
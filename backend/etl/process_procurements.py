@@ -21,8 +21,16 @@ def fetch_and_clean_csv(url: str, sep=';') -> pd.DataFrame:
         logger.error(f"Failed to download/parse CSV from {url}: {e}")
         return pd.DataFrame()
 
-def process_procurements_etl():
-    """Galvenā funkcija, kas tiek izsaukta no main.py"""
+def process_procurements_etl(results_sources: dict = None, openings_sources: dict = None):
+    """
+    Galvenā funkcija, kas tiek izsaukta no main.py
+
+    Args:
+        results_sources / openings_sources: {gads: URL vai lokāls ceļš}.
+            Ja nav norādīti - lasa tieši no EIS_RESULTS_URLS / EIS_OPENINGS_URLS.
+    """
+    results_sources = results_sources or EIS_RESULTS_URLS
+    openings_sources = openings_sources or EIS_OPENINGS_URLS
     
     # 1. Iegūstam eksistējošos uzņēmumus validācijai (lai neimportētu datus par nezināmiem uzņēmumiem)
     logger.info("Fetching existing company list for validation...")
@@ -41,13 +49,13 @@ def process_procurements_etl():
 
     # 3. Apstrādājam REZULTĀTUS (Uzvarētāji) - Visus gadus
     logger.info("--- Processing Procurement RESULTS (Winners) ---")
-    for year, url in EIS_RESULTS_URLS.items():
+    for year, url in results_sources.items():
         logger.info(f"Processing Results Year: {year}")
         process_single_result_file(url, year, existing_regcodes)
 
     # 4. Apstrādājam ATVĒRŠANAS (Pretendenti) - Visus gadus
     logger.info("--- Processing Procurement BIDS (Openings) ---")
-    for year, url in EIS_OPENINGS_URLS.items():
+    for year, url in openings_sources.items():
         logger.info(f"Processing Openings Year: {year}")
         process_single_opening_file(url, year, existing_regcodes)
 
@@ -19,12 +19,13 @@ import pandas as pd
 import logging
 from sqlalchemy import text
 from etl.loader import engine
+from etl.config import PVN_URL
 import requests
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-PVN_CSV_URL = "https://data.gov.lv/dati/dataset/9a5eae1c-2438-48cf-854b-6a2c170f918f/resource/610910e9-e086-4c5b-a7ea-0a896a697672/download/pdb_pvnmaksataji_odata.csv"
+PVN_CSV_URL = PVN_URL
 
 def migrate_pvn_columns():
     """Auto-create PVN columns and indexes if they don't exist"""
@@ -74,14 +75,19 @@ def download_pvn_data():
         logger.error(f"Failed to download PVN data: {e}")
         return None
 
-def process_pvn_registry():
-    """Process PVN registry and update companies table"""
+def process_pvn_registry(csv_path: str = None):
+    """
+    Process PVN registry and update companies table.
+    csv_path: already downloaded registry (orchestrator); if None it is downloaded here.
+    """
     
     # Auto-migrate database schema
     migrate_pvn_columns()
     
     # Download data
-    csv_path = download_pvn_data()
+    downloaded = csv_path is None
+    if downloaded:
+        csv_path = download_pvn_data()
     if not csv_path:
         logger.error("Cannot proceed without PVN data")
         return
@@ -190,7 +196,7 @@ def process_pvn_registry():
         logger.info(f"  Non-PVN: {stats.non_payers:,} ({stats.non_payers/stats.total*100:.1f}%)")
     
     # Cleanup
-    if os.path.exists(csv_path):
+    if downloaded and os.path.exists(csv_path):
         os.remove(csv_path)
         logger.info("Cleaned up temporary files")
 
@@ -195,6 +195,6 @@ def process_risks(sanctions_path: str, liquidations_path: str, prohibitions_path
         logger.info(f"  - Suspensions: {len(df_all[df_all['risk_type']=='suspension'])}")
         logger.info(f"  - Securing Measures: {len(df_all[df_all['risk_type']=='securing_measure'])}")
         
-        load_to_db(df_all, 'risks')
+        load_to_db(df_all, 'risks', swap=True)
     else:
         logger.warning("No risk data to load")
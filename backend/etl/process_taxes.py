@@ -12,15 +12,18 @@ from sqlalchemy import text
 logger = logging.getLogger(__name__)
 
 
-def process_tax_payments():
+def process_tax_payments(source: str = None):
     """
     Apstrādā VID samaksāto nodokļu datus.
     SVARĪGI: Summas ir tūkstošos EUR - jāreizina ar 1000!
+
+    Args:
+        source: URL vai lokāls ceļš (noklusējums - VID_URLS["tax_payments"])
     """
     logger.info("Processing VID Tax Payments...")
     
     try:
-        url = VID_URLS["tax_payments"]
+        url = source or VID_URLS["tax_payments"]
         logger.info(f"Downloading tax data from {url[:50]}...")
         
         # VID faili izmanto KOMATU kā atdalītāju
@@ -102,22 +105,25 @@ def process_tax_payments():
         df = df.drop_duplicates(subset=['company_regcode', 'year'], keep='last')
         
         logger.info(f"Loading {len(df)} tax payment records...")
-        load_to_db(df[final_cols], 'tax_payments')
+        load_to_db(df[final_cols], 'tax_payments', swap=True)
         
     except Exception as e:
         logger.error(f"Error processing tax payments: {e}")
         raise
 
 
-def process_company_ratings():
+def process_company_ratings(source: str = None):
     """
     Apstrādā VID nodokļu maksātāja reitingu.
     Šī tabula glabā tikai aktuālo reitingu (UPSERT).
+
+    Args:
+        source: URL vai lokāls ceļš (noklusējums - VID_URLS["company_ratings"])
     """
     logger.info("Processing VID Company Ratings...")
     
     try:
-        url = VID_URLS["company_ratings"]
+        url = source or VID_URLS["company_ratings"]
         logger.info(f"Downloading ratings from {url[:50]}...")
         
         # VID faili izmanto KOMATU kā atdalītāju
@@ -175,18 +181,21 @@ def process_company_ratings():
         df = df.drop_duplicates(subset=['company_regcode'], keep='last')
         
         logger.info(f"Loading {len(df)} company ratings...")
-        load_to_db(df[final_cols], 'company_ratings')
+        load_to_db(df[final_cols], 'company_ratings', swap=True)
         
     except Exception as e:
         logger.error(f"Error processing company ratings: {e}")
         raise
 
 
-def process_vid_data():
-    """Galvenā funkcija, kas apstrādā visus VID datus + NACE klasifikāciju."""
+def process_vid_data(tax_source: str = None, ratings_source: str = None):
+    """
+    Galvenā funkcija, kas apstrādā visus VID datus + NACE klasifikāciju.
+    tax_source / ratings_source: URL vai jau lejupielādēts lokāls fails.
+    """
     logger.info("=== Starting VID Data Processing ===")
-    process_tax_payments()
-    process_company_ratings()
+    process_tax_payments(tax_source)
+    process_company_ratings(ratings_source)
     
     # Process NACE Classification using VID tax data
     try:
@@ -221,8 +230,8 @@ def process_vid_data():
             from .config import VID_URLS
             import pandas as pd
             
-            logger.info("Re-downloading VID tax data for NACE processing...")
-            url = VID_URLS["tax_payments"]
+            logger.info("Re-reading VID tax data for NACE processing...")
+            url = tax_source or VID_URLS["tax_payments"]
             
             # Download to temp location
             try:
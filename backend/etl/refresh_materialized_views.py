@@ -1,44 +1,335 @@
-import logging
+"""
+Refresh engine for materialized views and derived cache tables.
+
+Every derived relation is declared once in VIEWS:
+  - tables:     base tables it reads
+  - depends_on: other VIEWS it reads (refreshed first; their refresh invalidates it)
+  - create_sql: script that builds it from scratch (DROP + CREATE ... + indexes)
+  - rebuild:    relation is a plain table filled by create_sql - refresh = rerun the script
+  - refresh:    callable for caches computed in Python (dashboard_cache)
+
+refresh_materialized_views():
+  - creates missing relations and reruns create_sql when the script changed since
+    the last refresh (definition hash is part of the stored fingerprint) or the
+    relation has never been built by this engine
+  - skips relations whose base tables did not change since their last refresh;
+    a table's signature is its relfilenode + insert/update/delete counters from
+    pg_stat_user_tables, so TRUNCATE, shadow swaps and any DML change it
+  - repoints views that still read a table a shadow swap (loader.load_to_db swap=True)
+    renamed to <table>__old - REFRESH would reread the old data: loader.repoint_matview
+    builds them (and the materialized views on top of them) again as <view>__next from
+    their own definition and renames them over the old ones, so readers never see a gap;
+    __old tables nothing reads any more are dropped once the views are done
+  - runs independent refreshes in parallel threads, each on its own connection,
+    REFRESH ... CONCURRENTLY where the view has a unique index (readers are not blocked)
+  - records duration and row count per relation in etl_state (job_name 'view:<name>')
+"""
 import os
+import sys
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from sqlalchemy import text
-from .loader import engine
+
+from .loader import engine, repoint_matview, SWAP_OLD_SUFFIX
+from .orchestrator import BACKEND_DIR, _ensure_state_table, _stored_fingerprints, _record_stage
 
 logger = logging.getLogger(__name__)
 
-def refresh_materialized_views():
+VIEW_STATE_PREFIX = 'view:'
+MAX_VIEW_WORKERS = int(os.getenv("ETL_VIEW_WORKERS", "3"))
+
+# Views rebuilt by a repoint in this refresh run (the repointed view and its dependents)
+_repointed = set()
+
+
+class View:
+    """One derived relation: what it reads and how it is (re)built."""
+
+    def __init__(self, name: str, tables=(), depends_on=(), create_sql: str = None, rebuild: bool = False,
+                 refresh=None, vacuum: bool = False):
+        self.name = name
+        self.tables = list(tables)
+        self.depends_on = list(depends_on)
+        self.create_sql = os.path.join(BACKEND_DIR, create_sql) if create_sql else None
+        self.rebuild = rebuild
+        self.refresh = refresh
+        # VACUUM ANALYZE pēc atjaunošanas: visibility map index-only scan vajadzībām + planotāja statistika
+        self.vacuum = vacuum
+
+    def script(self) -> str:
+        with open(self.create_sql, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def definition_hash(self) -> str:
+        if not self.create_sql or not os.path.exists(self.create_sql):
+            return 'none'
+        return hashlib.sha256(self.script().encode('utf-8')).hexdigest()[:16]
+
+
+def _refresh_dashboard():
+    # cron/refresh_dashboard.py nav pakotnē un prasa DATABASE_URL importa brīdī
+    cron_dir = os.path.join(BACKEND_DIR, 'cron')
+    if cron_dir not in sys.path:
+        sys.path.insert(0, cron_dir)
+    from refresh_dashboard import calculate_dashboard_stats
+    calculate_dashboard_stats()
+
+
+VIEWS = [
+    View('company_stats_materialized',
+         tables=['companies', 'financial_reports', 'tax_payments'],
+         create_sql='db/materialized_stats.sql'),
+    View('explorer_companies',
+         tables=['companies', 'risks', 'territories'], depends_on=['company_stats_materialized'],
+         create_sql='db/explorer_companies.sql', vacuum=True),
+    View('explorer_filter_cube',
+         depends_on=['explorer_companies'],
+         create_sql='db/explorer_filter_cube.sql'),
+    View('location_statistics',
+         tables=['companies', 'address_dimension', 'financial_reports', 'tax_payments'],
+         create_sql='db/location_stats.sql'),
+    View('person_analytics_cache',
+         tables=['persons', 'companies', 'financial_reports', 'address_dimension', 'hidden_persons', 'territories'],
+         create_sql='db/migrations/update_person_analytics_v4.sql'),
+    View('industry_stats_materialized',
+         tables=['companies', 'financial_reports', 'tax_payments'],
+         create_sql='migrations/update_industry_materialized_view_multiyear.sql', rebuild=True),
+    View('dashboard_cache',
+         tables=['companies', 'financial_reports', 'tax_payments'],
+         create_sql='db/dashboard_migration.sql', refresh=_refresh_dashboard),
+]
+
+
+def _catalog_state(tables: list, relations: list):
+    """({table: signature or None}, set of relations that exist) in the current schema."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT c.relname, c.relkind, c.relfilenode,
+                   s.n_tup_ins, s.n_tup_upd, s.n_tup_del
+            FROM pg_class c
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE c.relname = ANY(:names) AND c.relkind IN ('r', 'm', 'p')
+              AND pg_table_is_visible(c.oid)
+        """), {"names": sorted(set(tables) | set(relations))}).fetchall()
+    signatures = {row.relname: [row.relfilenode, row.n_tup_ins, row.n_tup_upd, row.n_tup_del]
+                  for row in rows if row.relname in tables}
+    return signatures, {row.relname for row in rows}
+
+
+def _swapped_out_readers(relations: list) -> set:
+    """Relations (of `relations`) that read a table renamed to <table>__old by a shadow swap."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT DISTINCT v.relname
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            JOIN pg_class v ON v.oid = r.ev_class
+            JOIN pg_class t ON t.oid = d.refobjid
+            WHERE d.classid = 'pg_rewrite'::regclass
+              AND d.refclassid = 'pg_class'::regclass
+              AND t.relkind = 'r' AND right(t.relname, :suffix_len) = :suffix
+              AND v.relkind = 'm' AND v.relname = ANY(:names)
+              AND pg_table_is_visible(v.oid)
+        """), {"suffix": SWAP_OLD_SUFFIX, "suffix_len": len(SWAP_OLD_SUFFIX),
+               "names": relations}).fetchall()
+    return {row.relname for row in rows}
+
+
+def _drop_swapped_out():
+    """Drops <table>__old tables left by shadow swaps that no view reads any more."""
+    with engine.connect() as conn:
+        names = conn.execute(text("""
+            SELECT c.relname FROM pg_class c
+            WHERE c.relkind = 'r' AND right(c.relname, :suffix_len) = :suffix
+              AND pg_table_is_visible(c.oid)
+        """), {"suffix": SWAP_OLD_SUFFIX, "suffix_len": len(SWAP_OLD_SUFFIX)}).scalars().all()
+        for name in names:
+            try:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+                conn.commit()
+                logger.info(f"🗑️  Dropped {name}")
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"⚠️  Could not drop {name} (still read by a view?): {e}")
+
+
+def view_fingerprint(view: View, signatures: dict, fingerprints: dict) -> str:
+    """'<definition hash>:<sha256 of base table signatures + upstream view fingerprints>'"""
+    inputs = {
+        'tables': {t: signatures.get(t) for t in view.tables},
+        'upstream': {name: fingerprints.get(name) for name in view.depends_on},
+    }
+    payload = json.dumps({'view': view.name, **inputs}, sort_keys=True, default=str)
+    return f"{view.definition_hash()}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _refresh_view(view: View, mode: str) -> int:
     """
-    Creates and Refreshes Materialized Views for high-performance analytics.
+    mode 'create' runs create_sql, 'refresh' refreshes, 'repoint' rebuilds a view that reads a
+    swapped-out <table>__old. Returns the relation's row count.
     """
-    logger.info("Refreshing Materialized Views...")
-    
-    # Path to SQL definition
-    sql_path = os.path.join(os.path.dirname(__file__), '..', 'db', 'materialized_stats.sql')
-    
-    if not os.path.exists(sql_path):
-        logger.error("materialized_stats.sql not found!")
-        return
-
-    with open(sql_path, 'r', encoding='utf-8') as f:
-        sql_content = f.read()
+    raw_conn = engine.raw_connection()
+    try:
+        if mode == 'repoint':
+            _repointed.update(repoint_matview(raw_conn, view.name))
+        cursor = raw_conn.cursor()
+        if mode == 'create' or view.rebuild:
+            # Viss skripts vienā execute: psycopg2 izpilda vairākus priekšrakstus, arī $$ funkcijas
+            cursor.execute(view.script())
+            raw_conn.commit()
+        if mode == 'repoint':
+            pass
+        elif view.refresh is not None:
+            view.refresh()
+        elif mode == 'refresh' and not view.rebuild:
+            cursor.execute("""
+                SELECT m.ispopulated AND EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = to_regclass(m.matviewname) AND i.indisunique
+                      AND i.indpred IS NULL AND i.indexprs IS NULL
+                )
+                FROM pg_matviews m WHERE m.matviewname = %s
+            """, (view.name,))
+            concurrently = bool(cursor.fetchone()[0])
+            if not concurrently:
+                logger.info(f"  {view.name}: no unique index - plain REFRESH (blocks readers)")
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{view.name}")
+            raw_conn.commit()
+        if view.vacuum:
+            # VACUUM nedrīkst izpildīt transakcijas blokā
+            raw_conn.autocommit = True
+            try:
+                cursor.execute(f"VACUUM (ANALYZE) {view.name}")
+            finally:
+                raw_conn.autocommit = False
+        cursor.execute(f"SELECT COUNT(*) FROM {view.name}")
+        rows = cursor.fetchone()[0]
+        raw_conn.commit()
+        return rows
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
 
-    with engine.connect() as conn:
-        # 1. Check if view exists
-        view_exists = conn.execute(text("SELECT EXISTS (SELECT FROM pg_matviews WHERE matviewname = 'company_stats_materialized')")).scalar()
-        
-        if not view_exists:
-            logger.info("Creating Materialized View for the first time...")
-            # Execute the full SQL script (CREATE MATERIALIZED VIEW ...)
-            # We need to split if there are multiple statements? The file has CREATE and indexes.
-            # Using transaction to run it all.
-             # Split by semicolon? Or just run block?
-             # Simple split by ; might fail on complex bodies but this is simple SQL.
-            statements = [s.strip() for s in sql_content.split(';') if s.strip()]
-            for stmt in statements:
-                conn.execute(text(stmt))
-            logger.info("Materialized View Created.")
-        else:
-            logger.info("Refreshing Materialized View...")
-            conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY company_stats_materialized"))
-            logger.info("Refresh complete.")
-            
-        conn.commit()
+
+def refresh_materialized_views(names: list = None, force: bool = False, recreate: bool = False,
+                               max_workers: int = MAX_VIEW_WORKERS) -> dict:
+    """
+    Refreshes VIEWS (or only `names`) in dependency order, independent ones in parallel.
+
+    force:    refresh even if base tables are unchanged
+    recreate: rerun create_sql (DROP + CREATE) instead of refreshing
+
+    Returns {'refreshed', 'created', 'skipped', 'failed', 'blocked', 'stats'};
+    raises RuntimeError if any view failed (after the others finished).
+    """
+    views = [v for v in VIEWS if names is None or v.name in names]
+    if names is not None and len(views) != len(set(names)):
+        raise ValueError(f"Unknown views: {sorted(set(names) - {v.name for v in VIEWS})}")
+    selected = {v.name for v in views}
+
+    _ensure_state_table()
+    stored = _stored_fingerprints(VIEW_STATE_PREFIX)
+    signatures, existing = _catalog_state(sorted({t for v in views for t in v.tables}), sorted(selected))
+    reading_old = _swapped_out_readers(sorted(selected))
+    _repointed.clear()
+
+    fingerprints = {}
+    state = {}          # name -> 'done' | 'failed' | 'blocked'
+    stats = {}
+    summary = {'refreshed': [], 'created': [], 'skipped': [], 'failed': [], 'blocked': [], 'stats': stats}
+    pending = list(views)
+    running = {}        # future -> (view, mode, fingerprint, start_time)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh') as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for view in list(pending):
+                    upstream = [state.get(name) for name in view.depends_on if name in selected]
+                    if any(s in ('failed', 'blocked') for s in upstream):
+                        logger.warning(f"⛔ {view.name}: upstream view failed - not refreshing")
+                        _record_stage(view.name, 'BLOCKED', prefix=VIEW_STATE_PREFIX)
+                        summary['blocked'].append(view.name)
+                        state[view.name] = 'blocked'
+                        pending.remove(view)
+                        progressed = True
+                        continue
+                    if not all(s == 'done' for s in upstream):
+                        continue
+                    pending.remove(view)
+                    progressed = True
+
+                    fingerprint = fingerprints[view.name] = view_fingerprint(view, signatures, fingerprints)
+                    previous = stored.get(view.name)
+                    # Bez saglabātas definīcijas nezinām, vai esošais skats atbilst skriptam
+                    definition_changed = previous is None or previous.split(':')[0] != fingerprint.split(':')[0]
+                    # Augšupējā skata DROP ... CASCADE izmeta arī šo skatu - jāveido no jauna
+                    upstream_created = any(name in summary['created'] for name in view.depends_on)
+                    if view.create_sql and (recreate or view.name not in existing or definition_changed
+                                            or upstream_created):
+                        mode = 'create'
+                    elif view.name in _repointed:
+                        # Rebuilt together with the upstream view it reads - already current
+                        logger.info(f"✅ {view.name}: rebuilt with its repointed upstream view")
+                        _record_stage(view.name, 'SUCCESS', fingerprint, prefix=VIEW_STATE_PREFIX)
+                        summary['refreshed'].append(view.name)
+                        state[view.name] = 'done'
+                        continue
+                    elif view.name in reading_old:
+                        mode = 'repoint'
+                    elif not force and previous == fingerprint:
+                        logger.info(f"⏭️  {view.name}: base tables unchanged since last refresh - skipping")
+                        _record_stage(view.name, 'SKIPPED', fingerprint, prefix=VIEW_STATE_PREFIX)
+                        summary['skipped'].append(view.name)
+                        state[view.name] = 'done'
+                        continue
+                    else:
+                        mode = 'refresh'
+
+                    logger.info(f"▶️  {view.name}: {mode}...")
+                    future = pool.submit(_refresh_view, view, mode)
+                    running[future] = (view, mode, fingerprint, time.perf_counter())
+
+            if not running:
+                break
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                view, mode, fingerprint, start_time = running.pop(future)
+                duration = time.perf_counter() - start_time
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    _record_stage(view.name, 'FAILED', error=f"{type(e).__name__}: {e}", duration=duration,
+                                  prefix=VIEW_STATE_PREFIX)
+                    summary['failed'].append(view.name)
+                    state[view.name] = 'failed'
+                    logger.error(f"❌ {view.name}: failed after {duration:.1f}s: {e}")
+                    continue
+                _record_stage(view.name, 'SUCCESS', fingerprint, duration=duration, rows=rows,
+                              prefix=VIEW_STATE_PREFIX)
+                summary['created' if mode == 'create' else 'refreshed'].append(view.name)
+                stats[view.name] = {'seconds': round(duration, 1), 'rows': rows, 'mode': mode}
+                state[view.name] = 'done'
+                logger.info(f"✅ {view.name}: {mode} done in {duration:.1f}s, {rows:,} rows")
+
+    if pending:
+        raise RuntimeError(f"View dependency cycle: {[v.name for v in pending]}")
+
+    if stats:
+        logger.info("View refresh stats (slowest first):")
+        for name, s in sorted(stats.items(), key=lambda item: -item[1]['seconds']):
+            logger.info(f"  {name:<30} {s['seconds']:>8.1f}s {s['rows']:>12,} rows ({s['mode']})")
+    logger.info(f"Views skipped: {summary['skipped'] or 'none'}")
+
+    _drop_swapped_out()
+
+    if summary['failed'] or summary['blocked']:
+        raise RuntimeError(f"View refresh failed: {summary['failed'] + summary['blocked']}")
+    return summary
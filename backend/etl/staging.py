@@ -0,0 +1,201 @@
+"""
+Parquet staging cache for downloaded source CSVs.
+
+Each CSV is parsed once into a typed, zstd-compressed Parquet file named after
+its content hash (<name>.<sha256[:16]>.parquet). Later reads of the same
+content - next chunk pass, rerun - skip CSV parsing entirely and only touch
+the columns they ask for (memory-mapped, column-pruned).
+
+Used by the finance loaders (process_finance, parallel_finance_update), which
+read the largest sources several times per run. process_companies / persons /
+risks still read their CSVs once with dtype=str: their cleaning works on text
+values, so staging them means reworking that code against typed columns.
+
+The content hash comes from the download manifest (csv_cache.ResourceManifest)
+when its entry matches the file, otherwise the file is hashed once per process.
+
+Typing is conservative so no value changes meaning:
+  - integers only without leading zeros (ATVK / NACE / postal codes stay text)
+  - floats only for plain decimal notation
+  - YYYY-MM-DD -> date, YYYY-MM-DD[T ]HH:MM[:SS[.f]] -> timestamp
+  - anything else stays string; empty fields are null
+
+Conversion streams the CSV twice, one block at a time (infer column types, then
+cast and write row groups), so memory stays bounded by BLOCK_SIZE, not file size.
+"""
+import os
+import glob
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+try:
+    from .csv_cache import file_sha256, ResourceManifest
+except ImportError:  # etl/ skripti, kas importē blakus moduļus bez pakotnes
+    from csv_cache import file_sha256, ResourceManifest
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = os.getenv("ETL_STAGING_DIR", "/tmp/etl_data/staging")
+ROW_GROUP_SIZE = 128 * 1024
+# CSV baiti vienā straumētā blokā (konvertēšanas atmiņa ~ bloks, ne fails)
+BLOCK_SIZE = 1024 * 1024
+COMPRESSION = 'zstd'
+
+INT_PATTERN = r'^-?(0|[1-9][0-9]{0,17})$'
+FLOAT_PATTERN = r'^-?(0|[1-9][0-9]*)?(\.[0-9]+)?$'
+DATE_PATTERN = r'^[0-9]{4}-[0-9]{2}-[0-9]{2}$'
+TIMESTAMP_PATTERN = r'^[0-9]{4}-[0-9]{2}-[0-9]{2}[T ][0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]{1,6})?)?$'
+
+
+# Kandidāttipi šaurākais -> platākais; kolonna saņem pirmo, kam atbilst VISAS vērtības
+CANDIDATE_TYPES = [
+    (pa.int64(), (INT_PATTERN,)),
+    (pa.float64(), (FLOAT_PATTERN, r'[0-9]')),
+    (pa.date32(), (DATE_PATTERN,)),
+    (pa.timestamp('us'), (TIMESTAMP_PATTERN,)),
+]
+
+
+def _all_match(values: pa.Array, pattern: str) -> bool:
+    return pc.all(pc.match_substring_regex(values, pattern), skip_nulls=True).as_py() is not False
+
+
+def _viable_types(values: pa.Array, candidates: list) -> list:
+    """Candidate types (of `candidates`) every non-null value of this chunk matches and casts to."""
+    viable = []
+    for arrow_type, patterns in CANDIDATE_TYPES:
+        if arrow_type not in candidates or not all(_all_match(values, p) for p in patterns):
+            continue
+        try:
+            values.cast(arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+        viable.append(arrow_type)
+    return viable
+
+
+def _open_csv(csv_path: str, sep: str, header: list):
+    """Streaming reader: every column as string, one record batch per BLOCK_SIZE of input."""
+    return pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=BLOCK_SIZE),
+        parse_options=pv.ParseOptions(delimiter=sep, newlines_in_values=True),
+        convert_options=pv.ConvertOptions(column_types={c: pa.string() for c in header},
+                                          strings_can_be_null=True),
+    )
+
+
+def _infer_schema(csv_path: str, sep: str, header: list) -> pa.Schema:
+    """
+    Narrowest lossless type per column, decided over the whole file one batch at a time.
+    Columns with no values at all stay string.
+    """
+    candidates = {col: [t for t, _ in CANDIDATE_TYPES] for col in header}
+    has_values = set()
+    for batch in _open_csv(csv_path, sep, header):
+        for col in header:
+            values = batch.column(col)
+            if values.null_count == len(values) or not candidates[col]:
+                continue
+            has_values.add(col)
+            candidates[col] = _viable_types(values, candidates[col])
+    return pa.schema([(col, candidates[col][0] if col in has_values and candidates[col] else pa.string())
+                      for col in header])
+
+
+# (ceļš, izmērs, mtime) -> sha256: viens faila nolasījums procesā, lai cik reižu to stadē
+_sha256_memo = {}
+
+
+def source_sha256(csv_path: str) -> str:
+    """sha256 of csv_path: the download manifest entry if it matches the file, else hashed (memoized)."""
+    stat = os.stat(csv_path)
+    entry = ResourceManifest(os.path.dirname(csv_path) or '.').get(os.path.basename(csv_path))
+    if entry.get('sha256') and entry.get('size') == stat.st_size:
+        return entry['sha256']
+    key = (os.path.realpath(csv_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _sha256_memo:
+        _sha256_memo[key] = file_sha256(csv_path)
+    return _sha256_memo[key]
+
+
+def _csv_header(csv_path: str, sep: str) -> list:
+    return pd.read_csv(csv_path, sep=sep, nrows=0).columns.tolist()
+
+
+def staged_path(csv_path: str, sha256: str = None, sep: str = ';') -> str:
+    """
+    Returns the Parquet file for csv_path, converting it first if this content
+    has not been staged yet. Without sha256 it is taken from source_sha256().
+    """
+    sha256 = sha256 or source_sha256(csv_path)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    parquet_path = os.path.join(STAGING_DIR, f"{name}.{sha256[:16]}.parquet")
+    if os.path.exists(parquet_path):
+        return parquet_path
+
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    logger.info(f"🗂️  Staging {os.path.basename(csv_path)} -> {os.path.basename(parquet_path)}...")
+
+    # Divas straumētas kārtas (tipi, tad rakstīšana): atmiņā vienlaikus ir tikai viens bloks
+    header = _csv_header(csv_path, sep)
+    schema = _infer_schema(csv_path, sep, header)
+    rows = 0
+    tmp_path = f"{parquet_path}.tmp"
+    with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION) as writer:
+        # Bloki ir mazi - krājam līdz ROW_GROUP_SIZE rindām, lai row group nebūtu sīki
+        pending, pending_rows = [], 0
+        for batch in _open_csv(csv_path, sep, header):
+            pending.append(pa.Table.from_batches([batch]).cast(schema))
+            pending_rows += batch.num_rows
+            if pending_rows >= ROW_GROUP_SIZE:
+                writer.write_table(pa.concat_tables(pending), row_group_size=ROW_GROUP_SIZE)
+                rows += pending_rows
+                pending, pending_rows = [], 0
+        if pending:
+            writer.write_table(pa.concat_tables(pending), row_group_size=ROW_GROUP_SIZE)
+            rows += pending_rows
+    os.replace(tmp_path, parquet_path)
+
+    # Vecākas tā paša avota versijas vairs nav vajadzīgas
+    for stale in glob.glob(os.path.join(STAGING_DIR, f"{glob.escape(name)}.*.parquet")):
+        if stale != parquet_path:
+            os.remove(stale)
+
+    logger.info(f"✅ Staged {rows:,} rows: "
+                + ", ".join(f"{f.name}:{f.type}" for f in schema if f.type != pa.string()))
+    return parquet_path
+
+
+def staged_columns(csv_path: str, sha256: str = None, sep: str = ';') -> list:
+    """Column names of a staged source (reads only the Parquet footer)."""
+    return pq.read_schema(staged_path(csv_path, sha256, sep)).names
+
+
+def read_staged(csv_path: str, columns: list = None, sha256: str = None, sep: str = ';') -> pd.DataFrame:
+    """
+    Typed DataFrame with only the requested columns (missing ones are left out,
+    like read_csv(usecols=callable)). The Parquet file is memory-mapped.
+    """
+    path = staged_path(csv_path, sha256, sep)
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas(date_as_object=False)
+
+
+def iter_staged(csv_path: str, columns: list = None, batch_size: int = 50000,
+                sha256: str = None, sep: str = ';'):
+    """Chunked variant of read_staged: yields DataFrames of at most batch_size rows."""
+    path = staged_path(csv_path, sha256, sep)
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    if columns is not None:
+        available = set(parquet_file.schema_arrow.names)
+        columns = [c for c in columns if c in available]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas(date_as_object=False)
@@ -22,11 +22,19 @@ def main() -> int:
     To run ETL you must explicitly enable it:
       - ENV: RUN_ETL=true
       - or CLI: --run
+    Stages whose inputs did not change are skipped; to rerun everything:
+      - ENV: ETL_FORCE=true
+      - or CLI: --force
+    To continue a failed run from the failed stage:
+      - ENV: ETL_RESUME=true
+      - or CLI: --resume
     """
 
     # Explicit enablement
     run_flag = "--run" in sys.argv
     run_env = _env_truthy(os.getenv("RUN_ETL"))
+    force = "--force" in sys.argv or _env_truthy(os.getenv("ETL_FORCE"))
+    resume = "--resume" in sys.argv or _env_truthy(os.getenv("ETL_RESUME"))
 
     # Optional safety: require a "reason" (useful for logs)
     reason = os.getenv("ETL_REASON", "").strip()
@@ -37,6 +45,8 @@ def main() -> int:
     logger.info(f"Timestamp: {datetime.now(timezone.utc).isoformat()}")
     logger.info(f"RUN_ETL env: {os.getenv('RUN_ETL')}")
     logger.info(f"CLI --run flag: {run_flag}")
+    logger.info(f"Force all stages: {force}")
+    logger.info(f"Resume failed run: {resume}")
     if reason:
         logger.info(f"ETL_REASON: {reason}")
 
@@ -52,34 +62,8 @@ def main() -> int:
     logger.info("=" * 60)
     
     try:
-        # Step 1: Run main ETL (companies, financial reports, etc.)
-        run_all_etl()
-        logger.info("")
-        logger.info("=" * 60)
-        logger.info("✅ Main ETL finished successfully")
-        
-        # Step 2: Process PVN data (VAT taxpayer registry)
-        logger.info("")
-        logger.info("📌 Processing PVN (VAT) data...")
-        try:
-            from etl.process_pvn import process_pvn_registry
-            process_pvn_registry()
-            logger.info("✅ PVN processing complete")
-        except Exception as e:
-            logger.warning(f"⚠️ PVN processing failed (non-critical): {e}")
-        
-        # Step 3: Calculate company sizes
-        logger.info("")
-        logger.info("📊 Calculating company sizes...")
-        try:
-            # Import and run from update_company_sizes
-            # Note: sys is already imported at module level
-            sys.path.insert(0, os.path.dirname(__file__))
-            from update_company_sizes import process_company_sizes
-            process_company_sizes()
-            logger.info("✅ Company size calculation complete")
-        except Exception as e:
-            logger.warning(f"⚠️ Company size calculation failed (non-critical): {e}")
+        # All stages (incl. PVN and company sizes) run as one DAG - see etl/orchestrator.py
+        run_all_etl(force=force, resume=resume)
         
         logger.info("")
         logger.info("=" * 60)
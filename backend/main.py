@@ -1,12 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
 from contextlib import asynccontextmanager
 from asgi_correlation_id import CorrelationIdMiddleware
 import logging
 import os
-from etl import run_all_etl
 from app.routers import search, companies, benchmarking, industries, dashboard, explore, benchmark, regions, person, locations, people_analytics, auth, map_data, waitlist, favorites, history
 
 # Configure logging
@@ -16,55 +14,57 @@ logger = logging.getLogger(__name__)
 # Check if ETL scheduler should be enabled (default: false for API-only mode)
 ENABLE_ETL_SCHEDULER = os.getenv("ENABLE_ETL_SCHEDULER", "false").lower() == "true"
 
-# Scheduler setup
-scheduler = BackgroundScheduler()
+# Schema migrations / view refreshes normally run as a one-shot command (python maintenance.py);
+# set to true to also run them in a background thread after boot
+RUN_DB_MAINTENANCE_ON_BOOT = os.getenv("RUN_DB_MAINTENANCE_ON_BOOT", "false").lower() == "true"
+
+# Scheduler setup (created in lifespan - apscheduler and etl/pandas are only imported when enabled)
+scheduler = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global scheduler
     # Startup
     logger.info("Starting up Company Registry Backend...")
     
     # Only start ETL scheduler if explicitly enabled
     if ENABLE_ETL_SCHEDULER:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from etl import run_all_etl
         logger.info("⚙️  ETL Scheduler ENABLED - Starting daily ETL job at 03:00")
+        scheduler = BackgroundScheduler()
         scheduler.add_job(run_all_etl, 'cron', hour=3, minute=0, id='daily_etl')
         scheduler.start()
     else:
         logger.info("🚀 ETL Scheduler DISABLED - Running in API-only mode")
 
-    # AUTOMATIC DB SCHEMA FIX (Run in background to avoid blocking startup/health checks)
-    import threading
-    import time
-    
-    def background_db_update():
-        time.sleep(5) # Allow server to start up fully
-        try:
-            from update_db_schema import update_materialized_view
-            logger.error("🔥 [CRITICAL_DEPLOY_V6] FORCE REFRESHING VIEWS...")
-            update_materialized_view()
-            logger.error("✅ [CRITICAL_DEPLOY_V6] BACKGROUND TASK STARTED.")
-
-            # Run critical migrations
-            try: 
-                from apply_waitlist_schema import run_migration as run_waitlist_migration
-                logger.info("📜 Applying waitlist schema migration...")
-                run_waitlist_migration()
-            except ImportError:
-                logger.warning("Could not import waitlist migration script")
+    if RUN_DB_MAINTENANCE_ON_BOOT:
+        import threading
+        from maintenance import run_maintenance
+
+        def background_db_update():
+            try:
+                run_maintenance()
             except Exception as e:
-                logger.error(f"Failed to apply waitlist migration: {e}")
+                logger.error(f"⚠️ Failed to update DB schema: {e}")
 
-        except Exception as e:
-            logger.error(f"⚠️ Failed to update DB schema: {e}")
+        # Background thread so startup/health checks are not blocked
+        threading.Thread(target=background_db_update, daemon=True).start()
 
-    threading.Thread(target=background_db_update, daemon=True).start()
+    # ETL finished -> drop this worker's in-process response caches (shared cache pub/sub)
+    from app.core.cache import start_invalidation_listener
+    start_invalidation_listener()
+
+    # Company name index for /home/search-hint (background thread; hints use Postgres until it is built)
+    from app.services.company_search import start_reload
+    start_reload()
     
 
     yield
     
     # Shutdown
     logger.info("Shutting down...")
-    if ENABLE_ETL_SCHEDULER and scheduler.running:
+    if scheduler is not None and scheduler.running:
         scheduler.shutdown()
 
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
@@ -133,6 +133,12 @@ async def health_check():
         "mode": "etl-enabled" if ENABLE_ETL_SCHEDULER else "api-only"
     }
 
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters of the in-process response caches (this worker only)"""
+    from app.core.cache import cache_stats
+    return cache_stats()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Company Registry API"}
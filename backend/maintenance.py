@@ -0,0 +1,86 @@
+"""
+One-shot DB maintenance: idempotent schema migrations + materialized view refresh.
+
+Used to run in a background thread on every API boot; now run it explicitly
+after a deploy / schema change (or set RUN_DB_MAINTENANCE_ON_BOOT=true).
+
+Usage:
+    cd backend
+    python maintenance.py                            # migrations + views that changed
+    python maintenance.py --skip-views               # migrations only
+    python maintenance.py --views location_statistics --force
+    python maintenance.py --recreate                 # DROP + CREATE every view
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Only idempotent scripts (CREATE ... IF NOT EXISTS / ADD COLUMN IF NOT EXISTS)
+MIGRATIONS = [
+    'db/waitlist.sql',
+    'db/migrations/add_graph_cache_source_version.sql',
+    'db/migrations/add_profile_cache_payloads.sql',
+    'db/migrations/add_explorer_keyset_indexes.sql',
+    'db/migrations/add_company_search_vector.sql',
+]
+
+
+def apply_migrations(migrations=MIGRATIONS):
+    from etl.loader import engine
+    for migration in migrations:
+        path = os.path.join(BACKEND_DIR, migration)
+        with open(path, 'r', encoding='utf-8') as f:
+            sql = f.read()
+        start = time.perf_counter()
+        raw_conn = engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            cursor.execute(sql)
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+        logger.info(f"📜 {migration} applied in {time.perf_counter() - start:.1f}s")
+
+
+def run_maintenance(views: list = None, force: bool = False, recreate: bool = False, skip_views: bool = False):
+    """Migrations first (views may read the new columns), then refresh_materialized_views."""
+    apply_migrations()
+    if skip_views:
+        return None
+    from etl.refresh_materialized_views import refresh_materialized_views
+    logger.info("🔄 Checking materialized views...")
+    summary = refresh_materialized_views(views, force=force, recreate=recreate)
+    logger.info("✅ Materialized views up to date.")
+    # Cached API analytics read these views
+    from etl.orchestrator import bump_data_version
+    bump_data_version()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema migrations + materialized view refresh")
+    parser.add_argument("--views", nargs="+", metavar="VIEW", help="only these views (default: all)")
+    parser.add_argument("--force", action="store_true", help="refresh even if base tables are unchanged")
+    parser.add_argument("--recreate", action="store_true", help="DROP + CREATE instead of refresh")
+    parser.add_argument("--skip-views", action="store_true", help="apply migrations only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        run_maintenance(args.views, force=args.force, recreate=args.recreate, skip_views=args.skip_views)
+    except Exception as e:
+        logger.error(f"❌ Maintenance failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,14 @@
 import sys
 import os
 import time
-import json
 import logging
 from sqlalchemy import text
 
 # Add current directory to path to allow imports from app
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.routers.companies import engine, build_full_profile
+from app.routers.companies import engine, build_full_profile, PROFILE_CACHE_SAVE_QUERY
+from app.core.payload import encode_payload
 
 # Setup logging
 logging.basicConfig(
@@ -27,6 +27,9 @@ def prewarm():
             CREATE TABLE IF NOT EXISTS company_profile_cache (
                 company_regcode BIGINT PRIMARY KEY,
                 profile_data JSONB,
+                payload BYTEA,
+                payload_gzip BYTEA[],
+                payload_br BYTEA[],
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """))
@@ -110,14 +113,9 @@ def prewarm():
             # This is the heavy calculation
             full_profile = build_full_profile(regcode, company)
             
-            # Save to DB
+            # Save to DB - ready-to-send bytes, same columns the API writes
             with engine.connect() as conn:
-                conn.execute(text("""
-                    INSERT INTO company_profile_cache (company_regcode, profile_data, updated_at) 
-                    VALUES (:r, :d, NOW()) 
-                    ON CONFLICT (company_regcode) 
-                    DO UPDATE SET profile_data = :d, updated_at = NOW()
-                """), {"r": regcode, "d": json.dumps(full_profile, default=str)})
+                conn.execute(PROFILE_CACHE_SAVE_QUERY, {"r": regcode, **encode_payload(full_profile)})
                 conn.commit()
             
             elapsed = time.time() - start
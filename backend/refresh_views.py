@@ -1,29 +1,17 @@
-from sqlalchemy import text
-from etl.loader import engine
-import time
+"""
+Refreshes every materialized view / derived cache now, even if base tables are unchanged.
+Views are declared in etl/refresh_materialized_views.py (VIEWS).
 
-print("=== Refreshing Materialized Views ===")
+Usage:
+    python refresh_views.py [view_name ...]
+"""
+import sys
+import logging
 
-views_to_refresh = [
-    "location_statistics",
-    "company_stats_materialized",
-    "person_analytics_cache",
-    "industry_stats_materialized"
-]
+from etl.refresh_materialized_views import refresh_materialized_views
 
-for view in views_to_refresh:
-    print(f"Refreshing {view}...", end=" ", flush=True)
-    start = time.time()
-    
-    # Use fresh connection for each view to avoid transaction issues
-    with engine.connect() as conn:
-        try:
-            conn.execute(text(f"REFRESH MATERIALIZED VIEW {view}"))
-            conn.commit()
-            elapsed = time.time() - start
-            print(f"OK ({elapsed:.1f}s)")
-        except Exception as e:
-            conn.rollback()
-            print(f"ERROR: {str(e)[:80]}")
+logging.basicConfig(level=logging.INFO)
 
+print("=== Refreshing Materialized Views ===")
+refresh_materialized_views(sys.argv[1:] or None, force=True)
 print("\n=== Done ===")
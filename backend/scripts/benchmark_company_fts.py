@@ -0,0 +1,85 @@
+"""
+Benchmark: /search on Postgres - LIKE + per-row SIMILARITY (like_search_query)
+against full-text search on companies.search_vector (fts_search_query).
+
+Common queries match tens of thousands of companies (short prefixes, "sia",
+frequent words), rare ones a handful (names sampled from the table, regcode
+prefixes). Each query runs --repeat times per variant; median and p95 in ms.
+Needs the add_company_search_vector.sql migration (python maintenance.py).
+
+Usage:
+    cd backend
+    DATABASE_URL=postgresql://... python scripts/benchmark_company_fts.py
+    DATABASE_URL=postgresql://... python scripts/benchmark_company_fts.py --explain
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.database import engine  # noqa: E402
+from app.routers.search import fts_search_query, like_search_query  # noqa: E402
+
+COMMON = ["sia", "auto", "rīga", "serviss", "būv", "sia grupa", "ba", "latvija"]
+
+
+def rare_queries(conn, n: int):
+    rows = conn.execute(text("""
+        SELECT name_in_quotes, regcode FROM companies TABLESAMPLE SYSTEM (1)
+        WHERE name_in_quotes IS NOT NULL AND length(name_in_quotes) > 6
+        LIMIT :n
+    """), {"n": n}).fetchall()
+    return [row.name_in_quotes for row in rows] + [str(row.regcode)[:8] for row in rows[:3]]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(conn, builder, q, repeat):
+    sql, params = builder(q, None)
+    timings, count = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        count = len(conn.execute(text(sql), params).fetchall())
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rare", type=int, default=10, help="Sampled company names")
+    parser.add_argument("--explain", action="store_true", help="Print EXPLAIN ANALYZE of the FTS query")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        groups = {"common": COMMON, "rare": rare_queries(conn, args.rare)}
+        for group, queries in groups.items():
+            totals = {"like": [], "fts": []}
+            print(f"\n{group} queries")
+            print(f"{'query':<32} {'like p50':>9} {'fts p50':>9} {'rows':>5}")
+            for q in queries:
+                like, _ = run(conn, like_search_query, q, args.repeat)
+                fts, count = run(conn, fts_search_query, q, args.repeat)
+                totals["like"] += like
+                totals["fts"] += fts
+                print(f"{q[:32]:<32} {statistics.median(like):9.1f} {statistics.median(fts):9.1f} {count:5}")
+            for name, timings in totals.items():
+                print(f"  {name}: p50 {statistics.median(timings):.1f} ms  p95 {percentile(timings, 95):.1f} ms")
+
+        if args.explain:
+            sql, params = fts_search_query(COMMON[1], None)
+            for row in conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql), params):
+                print(row[0])
+
+
+if __name__ == "__main__":
+    main()
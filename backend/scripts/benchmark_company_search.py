@@ -0,0 +1,98 @@
+"""
+Benchmark: in-process company search index (app/services/company_search.py) -
+build time, memory and per-query latency of autocomplete lookups.
+
+By default the index is built from --companies synthetic Latvian-looking names
+(no database needed); --from-db loads the real `companies` table instead. Query
+latency is measured over every prefix of a sample of names, i.e. one lookup per
+keystroke as /home/search-hint sees them.
+
+Usage:
+    cd backend
+    python scripts/benchmark_company_search.py --companies 500000
+    DATABASE_URL=postgresql://... python scripts/benchmark_company_search.py --from-db
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.company_search import CompanySearchIndex, load_index  # noqa: E402
+
+SYLLABLES = ["ri", "ga", "lat", "vi", "jas", "bal", "ti", "ka", "me", "ža", "ko", "pa", "ni",
+             "ja", "ser", "vis", "tir", "dzniec", "bū", "ve", "au", "to", "nams", "ī", "ā", "ē"]
+WORDS = ["Būvniecība", "Serviss", "Grupa", "Holding", "Nami", "Transports", "Mežs", "IT",
+         "Konsultācijas", "Tirdzniecība", "Auto", "Projekti", "Baltic", "Latvija", "Rīga"]
+TYPES = ["SIA"] * 70 + ["IK"] * 10 + ["AS"] * 3 + ["ZS"] * 8 + ["BDR"] * 6 + ["KS"] * 3
+
+
+def synthetic_rows(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    for regcode in range(40000000000, 40000000000 + n):
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()]
+        words += rng.sample(WORDS, rng.choice([0, 0, 1, 1, 2]))
+        quoted = " ".join(words)
+        company_type = rng.choice(TYPES)
+        status = "active" if rng.random() < 0.6 else "liquidated"
+        turnover = None if rng.random() < 0.4 else rng.lognormvariate(11, 2.5)
+        yield regcode, f'{company_type} "{quoted}"', quoted, company_type, status, turnover
+
+
+def keystrokes(index: CompanySearchIndex, samples: int, seed: int = 2):
+    rng = random.Random(seed)
+    queries = []
+    for doc in rng.sample(range(index.size), min(samples, index.size)):
+        name = index.quoted[doc] or index.names[doc]
+        queries += [name[:i] for i in range(2, len(name) + 1)]
+    queries += ["sia auto", "būvniecība", "grupa sia", "ri", "baltic tr", "xq"]
+    return queries
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=500_000)
+    parser.add_argument("--from-db", action="store_true", help="Load the companies table instead")
+    parser.add_argument("--samples", type=int, default=300, help="Names whose prefixes are queried")
+    parser.add_argument("--peak-memory", action="store_true",
+                        help="Trace peak memory of the build (tracemalloc, makes the build ~4x slower)")
+    args = parser.parse_args()
+
+    if args.peak_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    index = load_index() if args.from_db else CompanySearchIndex(synthetic_rows(args.companies))
+    build_seconds = time.perf_counter() - started
+
+    print(f"companies:    {index.size:,}")
+    print(f"build:        {build_seconds:.1f}s")
+    if args.peak_memory:
+        print(f"build peak:   {tracemalloc.get_traced_memory()[1] / 1e6:.0f} MB")
+        tracemalloc.stop()
+    print(f"index memory: {index.nbytes / 1e6:.1f} MB "
+          f"(tokens {index.tokens.nbytes / 1e6:.1f}, postings {index.postings.nbytes / 1e6:.1f}, "
+          f"phrases {index.phrases.nbytes / 1e6 + index.phrase_docs.nbytes / 1e6:.1f}, "
+          f"names {index.names.nbytes / 1e6 + index.quoted.nbytes / 1e6:.1f})")
+
+    timings = []
+    for q in keystrokes(index, args.samples):
+        t0 = time.perf_counter()
+        index.search(q)
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(f"queries:      {len(timings):,}")
+    print(f"latency ms:   p50 {statistics.median(timings):.3f}  p95 {percentile(timings, 95):.3f}  "
+          f"p99 {percentile(timings, 99):.3f}  max {max(timings):.3f}")
+
+
+if __name__ == "__main__":
+    main()
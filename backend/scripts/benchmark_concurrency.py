@@ -0,0 +1,164 @@
+"""
+Benchmark: API throughput under concurrent clients, before vs. after a change.
+
+  before - the API from a git ref (checked out into a temporary git worktree)
+  after  - the API from this working tree
+
+Both servers run as one uvicorn worker against the same DATABASE_URL and get
+the same request mix: --clients concurrent clients sending --requests requests
+spread over --paths. {regcode} and {person} in a path are replaced with
+companies / person_analytics_cache rows sampled from the database.
+
+Usage:
+    cd backend
+    DATABASE_URL=postgresql://... python scripts/benchmark_concurrency.py --before-ref HEAD~1 --clients 50
+    python scripts/benchmark_concurrency.py --paths /api/health --requests 2000   # harness only, no database
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import itertools
+import statistics
+import subprocess
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+DEFAULT_PATHS = [
+    "/companies/{regcode}/quick",
+    "/companies/{regcode}/full",
+    "/companies/{regcode}/persons",
+    "/person/{person}",
+    "/analytics/people/highlights",
+]
+
+
+def sample_ids(paths: list, n: int) -> dict:
+    ids = {"regcode": [], "person": []}
+    if not any("{" in p for p in paths):
+        return ids
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import text
+    from app.core.database import engine
+    with engine.connect() as conn:
+        ids["regcode"] = [r[0] for r in conn.execute(text(
+            "SELECT regcode FROM companies WHERE status = 'active' ORDER BY random() LIMIT :n"), {"n": n})]
+        ids["person"] = [r[0] for r in conn.execute(text(
+            "SELECT person_hash FROM person_analytics_cache ORDER BY random() LIMIT :n"), {"n": n})]
+    return ids
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(backend_dir: str):
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=backend_dir)
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                             "--workers", "1", "--log-level", "warning"],
+                            cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn in {backend_dir} exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("server did not become healthy")
+
+
+async def run_load(base_url: str, urls: list, clients: int) -> dict:
+    latencies, errors = [], 0
+    queue = iter(urls)
+
+    async def client(http):
+        nonlocal errors
+        for url in queue:
+            start = time.perf_counter()
+            try:
+                response = await http.get(url)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def build_urls(paths: list, ids: dict, total: int) -> list:
+    counters = {key: itertools.cycle(values) for key, values in ids.items() if values}
+    urls = []
+    for path in itertools.islice(itertools.cycle(paths), total):
+        urls.append(path.format(**{key: next(cycle) for key, cycle in counters.items()}))
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--before-ref", help="git ref to compare against (e.g. HEAD~1); omit to test only this tree")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--sample", type=int, default=200, help="regcodes / persons sampled from the database")
+    args = parser.parse_args()
+
+    urls = build_urls(args.paths, sample_ids(args.paths, args.sample), args.requests)
+
+    targets = []
+    worktree = None
+    if args.before_ref:
+        worktree = tempfile.mkdtemp(prefix="bench-before-")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, args.before_ref],
+                       cwd=REPO_DIR, check=True, capture_output=True)
+        targets.append((f"before ({args.before_ref})", os.path.join(worktree, "backend")))
+    targets.append(("after (working tree)", BACKEND_DIR))
+
+    print(f"{args.requests} requests, {args.clients} concurrent clients, paths: {', '.join(args.paths)}")
+    print(f"{'server':<28} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    try:
+        for label, backend_dir in targets:
+            proc, base_url = start_server(backend_dir)
+            try:
+                asyncio.run(run_load(base_url, urls[:args.clients], args.clients))  # warm-up: pools, caches
+                r = asyncio.run(run_load(base_url, urls, args.clients))
+            finally:
+                proc.terminate()
+                proc.wait()
+            print(f"{label:<28} {r['rps']:>8.1f} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['errors']:>7}")
+    finally:
+        if worktree:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=REPO_DIR, capture_output=True)
+            shutil.rmtree(worktree, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark: income-statement merge in process_finance (before/after).
+
+  old - iterrows() into a dict-of-dicts + per-column .map(lambda ...) + per-column .loc scaling
+  new - load_income_statements() (usecols, columnar frame indexed by statement_id),
+        DataFrame.join and apply_thousands_scaling() (one masked multiply);
+        sources are read from the Parquet staging cache (etl.staging)
+
+The CSV -> Parquet conversion runs once beforehand in its own process and is reported
+as a separate 'stage' row, so 'new' reads a warm cache. '<approach>_read' reads the same
+inputs the same way without merging; the merge columns are the difference.
+
+Every approach runs in its own fresh interpreter, and so does generating the input.
+ru_maxrss survives fork/exec (the child reports at least the parent's RSS at fork
+time), so the launching process stays small: it never imports pandas or builds data.
+
+Usage:
+    cd backend
+    python scripts/benchmark_finance_merge.py --rows 1800000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK_SIZE = 50000
+# 'stage' must run before the Parquet readers
+APPROACHES = ['old_read', 'old', 'stage', 'new_read', 'new']
+FIN_COLS = [
+    'turnover', 'profit', 'interest_expenses', 'depreciation_expenses', 'provision_for_income_taxes',
+    'total_assets', 'total_current_assets', 'cash_balance', 'inventories',
+    'current_liabilities', 'non_current_liabilities', 'equity'
+]
+
+
+def generate(data_dir: str, rows: int):
+    """Synthetic statements/balance/income CSVs with the registry column names."""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(7)
+    ids = np.arange(1, rows + 1)
+
+    pd.DataFrame({
+        'statement_id': ids,
+        'rounded_to_nearest': rng.choice(['ONES', 'THOUSANDS'], rows, p=[0.9, 0.1]),
+    }).to_csv(os.path.join(data_dir, 'statements.csv'), sep=';', index=False)
+
+    income = {'statement_id': ids, 'file_id': ids * 3, 'created_at': '2024-01-01T00:00:00'}
+    for col in ['net_turnover', 'net_income', 'interest_expenses',
+                'by_nature_depreciation_expenses', 'provision_for_income_taxes',
+                'by_nature_labour_expenses', 'other_operating_income', 'other_operating_expenses']:
+        income[col] = rng.normal(1e5, 3e4, rows).round(0)
+    pd.DataFrame(income).to_csv(os.path.join(data_dir, 'income.csv'), sep=';', index=False)
+
+    balance = {'statement_id': ids, 'file_id': ids * 3}
+    for col in ['total_assets', 'total_current_assets', 'cash', 'inventories',
+                'current_liabilities', 'non_current_liabilities', 'equity', 'receivables', 'provisions']:
+        balance[col] = rng.normal(5e5, 1e5, rows).round(0)
+    pd.DataFrame(balance).to_csv(os.path.join(data_dir, 'balance.csv'), sep=';', index=False)
+
+
+def run_old(data_dir: str, merge: bool = True) -> int:
+    import pandas as pd
+    income_mapping = {
+        'net_turnover': 'turnover', 'net_income': 'profit', 'interest_expenses': 'interest_expenses',
+        'by_nature_depreciation_expenses': 'depreciation_expenses',
+        'provision_for_income_taxes': 'provision_for_income_taxes',
+    }
+    balance_mapping = {
+        'total_assets': 'total_assets', 'total_current_assets': 'total_current_assets', 'cash': 'cash_balance',
+        'inventories': 'inventories', 'current_liabilities': 'current_liabilities',
+        'non_current_liabilities': 'non_current_liabilities', 'equity': 'equity',
+    }
+    df_stm = pd.read_csv(os.path.join(data_dir, 'statements.csv'), sep=';', dtype=str)
+
+    income_data = {}
+    for inc_chunk in pd.read_csv(os.path.join(data_dir, 'income.csv'), sep=';', dtype=str, chunksize=CHUNK_SIZE):
+        if not merge:
+            continue
+        for idx, row in inc_chunk.iterrows():
+            stmt_id = row['statement_id']
+            income_data[stmt_id] = {}
+            for csv_col, our_col in income_mapping.items():
+                if csv_col in row:
+                    income_data[stmt_id][our_col] = pd.to_numeric(row[csv_col], errors='coerce')
+
+    total = 0
+    for bal_chunk in pd.read_csv(os.path.join(data_dir, 'balance.csv'), sep=';', dtype=str, chunksize=CHUNK_SIZE):
+        if not merge:
+            total += len(bal_chunk)
+            continue
+        df_bal = bal_chunk[['statement_id'] + list(balance_mapping)].rename(columns=balance_mapping)
+        for col in balance_mapping.values():
+            df_bal[col] = pd.to_numeric(df_bal[col], errors='coerce')
+        df_merged = pd.merge(df_stm, df_bal, on='statement_id', how='inner')
+        for col in income_mapping.values():
+            df_merged[col] = df_merged['statement_id'].map(lambda x: income_data.get(x, {}).get(col))
+        mask = df_merged['rounded_to_nearest'] == 'THOUSANDS'
+        for col in FIN_COLS:
+            df_merged.loc[mask, col] = df_merged.loc[mask, col] * 1000
+        total += len(df_merged)
+    return total
+
+
+def run_new(data_dir: str, merge: bool = True) -> int:
+    import pandas as pd
+    from etl.process_finance import (
+        load_income_statements, apply_thousands_scaling, BALANCE_MAPPING, BALANCE_COLS, INCOME_MAPPING,
+        _statement_key
+    )
+    from etl.staging import read_staged, iter_staged, staged_columns
+    df_stm = read_staged(os.path.join(data_dir, 'statements.csv'))
+    income_path = os.path.join(data_dir, 'income.csv')
+    if merge:
+        df_stm['statement_id'] = _statement_key(df_stm['statement_id'])
+        df_income = load_income_statements(income_path, CHUNK_SIZE)
+    else:
+        usecols = ['statement_id'] + sorted(c for c in INCOME_MAPPING if c in staged_columns(income_path))
+        for _ in iter_staged(income_path, columns=usecols, batch_size=CHUNK_SIZE):
+            pass
+
+    balance_path = os.path.join(data_dir, 'balance.csv')
+    header = staged_columns(balance_path)
+    bal_source = {c: o for c, o in BALANCE_MAPPING.items() if c in header}
+
+    total = 0
+    for bal_chunk in iter_staged(balance_path, columns=['statement_id'] + list(bal_source), batch_size=CHUNK_SIZE):
+        if not merge:
+            total += len(bal_chunk)
+            continue
+        df_bal = bal_chunk.rename(columns=bal_source)
+        df_bal['statement_id'] = _statement_key(df_bal['statement_id'])
+        for col in BALANCE_COLS:
+            df_bal[col] = pd.to_numeric(df_bal[col], errors='coerce')
+        df_merged = pd.merge(df_stm, df_bal, on='statement_id', how='inner')
+        df_merged = df_merged.join(df_income, on='statement_id')
+        df_merged = apply_thousands_scaling(df_merged)
+        total += len(df_merged)
+    return total
+
+
+def stage(data_dir: str) -> int:
+    from etl.staging import staged_path
+    for name in ('statements.csv', 'income.csv', 'balance.csv'):
+        staged_path(os.path.join(data_dir, name))
+    return 0
+
+
+def measure(approach: str, data_dir: str):
+    import pandas  # noqa: F401 - importu atmiņa ietilpst bāzē, ne mērījumā
+    import etl.process_finance  # noqa: F401
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    if approach == 'stage':
+        rows = stage(data_dir)
+    else:
+        run = run_old if approach.startswith('old') else run_new
+        rows = run(data_dir, merge=not approach.endswith('_read'))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB
+    print(json.dumps({'approach': approach, 'rows': rows, 'seconds': elapsed, 'peak_rss_mb': peak_mb,
+                      'delta_mb': peak_mb - baseline_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_800_000)
+    parser.add_argument("--approach", choices=APPROACHES)
+    parser.add_argument("--dir")
+    parser.add_argument("--generate", action="store_true", help="only write --rows statements to --dir")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.dir, args.rows)
+        return
+    if args.approach:
+        measure(args.approach, args.dir)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"Generating {args.rows:,} synthetic statements...")
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--generate', '--rows', str(args.rows),
+                        '--dir', data_dir], check=True)
+        env = {**os.environ, 'ETL_STAGING_DIR': os.path.join(data_dir, 'staging')}
+
+        results = {}
+        for approach in APPROACHES:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--approach', approach, '--dir', data_dir],
+                capture_output=True, text=True, check=True, env=env
+            ).stdout.strip().splitlines()[-1]
+            results[approach] = json.loads(out)
+
+        print(f"{'approach':<12} {'rows':>10} {'seconds':>9} {'peak RSS MB':>12} {'above imports':>14}")
+        for r in results.values():
+            print(f"{r['approach']:<12} {r['rows']:>10,} {r['seconds']:>9.1f} {r['peak_rss_mb']:>12,.0f} "
+                  f"{r['delta_mb']:>14,.0f}")
+        print("Merge step alone (approach minus its _read run):")
+        for approach in ('old', 'new'):
+            full, read = results[approach], results[f"{approach}_read"]
+            print(f"  {approach:<10} {full['seconds'] - read['seconds']:>9.1f}s "
+                  f"{full['delta_mb'] - read['delta_mb']:>+9,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: company_graph_cache rebuild, thread pool vs. in-memory ownership graph.
+
+  threaded - precompute_graphs_threaded: calculate_company_graphs_batch per 100
+             companies over N threads / N pooled connections, execute_values upserts
+  memory   - precompute_graphs: one COPY scan of persons / companies / financial_reports,
+             CSR graph in memory, results streamed back with COPY (1 connection)
+
+Both write the same rows to company_graph_cache of the DATABASE_URL database.
+Each approach runs in its own subprocess so peak RSS (ru_maxrss) is not shared.
+
+Without a database, --synthetic N measures only the in-memory part (graph build
++ JSON for every target) on a generated registry of N companies.
+
+Usage:
+    cd backend
+    DATABASE_URL=postgresql://... python scripts/benchmark_graphs.py --workers 50
+    python scripts/benchmark_graphs.py --synthetic 400000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_frames(n_companies: int):
+    """Registry-shaped text frames (as read_query returns them): ~3 officers/members per company."""
+    from etl.ownership_graph import PERSON_COLUMNS
+    rng = np.random.default_rng(11)
+    regcodes = 40003000000 + np.arange(n_companies) * 7
+    companies = pd.DataFrame({'regcode': regcodes.astype(str),
+                              'name': [f'SIA "Uzņēmums {i}"' for i in range(n_companies)]})
+
+    n_persons = n_companies * 3
+    persons = pd.DataFrame(index=range(n_persons), columns=PERSON_COLUMNS, dtype=object)
+    persons['company_regcode'] = rng.choice(regcodes, n_persons).astype(str)
+    persons['role'] = rng.choice(['officer', 'member', 'member', 'ubo'], n_persons)
+    persons['person_name'] = [f'Persona {i}' for i in range(n_persons)]
+    persons['person_code'] = '010180-*****'
+    persons['date_from'] = '2020-01-01'
+    is_member = persons['role'] == 'member'
+    persons.loc[is_member, 'number_of_shares'] = rng.integers(1, 1000, n_persons)[is_member].astype(str)
+    persons.loc[is_member, 'share_nominal_value'] = '1.00'
+    legal = is_member & (rng.random(n_persons) < 0.2)
+    persons.loc[legal, 'legal_entity_regcode'] = rng.choice(regcodes, int(legal.sum())).astype(str)
+    persons.loc[persons['role'] == 'officer', 'position'] = 'BOARD_MEMBER'
+
+    financials = pd.DataFrame({'company_regcode': regcodes.astype(str), 'turnover': '100000.00',
+                               'employees': '5', 'total_assets': '50000.00'})
+    return companies, persons, financials
+
+
+def run(approach: str, workers: int, synthetic: int) -> int:
+    if approach == 'synthetic':
+        from etl.ownership_graph import OwnershipGraph
+        graph = OwnershipGraph(*synthetic_frames(synthetic))
+        return sum(1 for _ in graph.cache_rows())
+    from etl.precompute_graphs import precompute_graphs, precompute_graphs_threaded
+    if approach == 'threaded':
+        return precompute_graphs_threaded(max_workers=workers)
+    return precompute_graphs()
+
+
+def measure(approach: str, workers: int, synthetic: int):
+    from etl import ownership_graph  # noqa: F401 - importu atmiņa ietilpst bāzē, ne mērījumā
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    graphs = run(approach, workers, synthetic)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB
+    print(json.dumps({'approach': approach, 'graphs': graphs, 'seconds': elapsed, 'peak_rss_mb': peak_mb,
+                      'delta_mb': peak_mb - baseline_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=50, help="threads / connections for 'threaded'")
+    parser.add_argument("--synthetic", type=int, default=0, help="companies; no database needed")
+    parser.add_argument("--approach", choices=['threaded', 'memory', 'synthetic'])
+    args = parser.parse_args()
+
+    if args.approach:
+        measure(args.approach, args.workers, args.synthetic)
+        return
+
+    approaches = ['synthetic'] if args.synthetic else ['threaded', 'memory']
+    print(f"{'approach':<10} {'graphs':>10} {'seconds':>9} {'graphs/sec':>11} {'peak RSS MB':>12} {'above imports':>14}")
+    for approach in approaches:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--approach', approach,
+             '--workers', str(args.workers), '--synthetic', str(args.synthetic)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(out)
+        rate = r['graphs'] / r['seconds'] if r['seconds'] else 0
+        print(f"{r['approach']:<10} {r['graphs']:>10,} {r['seconds']:>9.2f} {rate:>11,.0f} "
+              f"{r['peak_rss_mb']:>12,.0f} {r['delta_mb']:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
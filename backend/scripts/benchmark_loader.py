@@ -0,0 +1,149 @@
+"""
+Loader benchmark: DataFrame.to_sql(method='multi') vs execute_values vs COPY FROM STDIN.
+
+Creates a scratch table, loads the same synthetic frame with each strategy
+(plain append and ON CONFLICT upsert) and prints rows/sec.
+
+Usage:
+    cd backend
+    python scripts/benchmark_loader.py --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl.loader import engine, load_to_db
+
+logging.basicConfig(level=logging.WARNING)
+
+BENCH_TABLE = "bench_loader_reports"
+BATCH_SIZE = 10000
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Synthetic frame shaped like financial_reports (regcode/year key + numeric columns)."""
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'company_regcode': 40000000000 + np.arange(rows) // 8,
+        'year': 2017 + np.arange(rows) % 8,
+        'employees': rng.integers(0, 500, rows).astype(float),
+        'rounded_to_nearest': rng.choice(['ONES', 'THOUSANDS'], rows),
+        'turnover': rng.normal(1e6, 3e5, rows).round(2),
+        'profit': rng.normal(5e4, 2e4, rows).round(2),
+        'total_assets': rng.normal(2e6, 5e5, rows).round(2),
+        'equity': rng.normal(8e5, 1e5, rows).round(2),
+        'current_ratio': rng.random(rows).round(4),
+    })
+    # Sprinkle NULLs like real registry data
+    df.loc[df.sample(frac=0.1, random_state=1).index, 'profit'] = np.nan
+    return df
+
+
+def reset_table():
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.execute(text(f"""
+            CREATE TABLE {BENCH_TABLE} (
+                id SERIAL PRIMARY KEY,
+                company_regcode BIGINT,
+                year INT NOT NULL,
+                employees INT,
+                rounded_to_nearest TEXT,
+                turnover DECIMAL(15,2),
+                profit DECIMAL(15,2),
+                total_assets DECIMAL(15,2),
+                equity DECIMAL(15,2),
+                current_ratio DECIMAL(15,4),
+                UNIQUE(company_regcode, year)
+            )
+        """))
+        conn.commit()
+
+
+def load_to_sql(df: pd.DataFrame, upsert: bool):
+    """Previous load_to_db default path (no upsert support - append only)."""
+    if upsert:
+        return None
+    with engine.connect() as conn:
+        for i in range(0, len(df), BATCH_SIZE):
+            trans = conn.begin()
+            df.iloc[i:i + BATCH_SIZE].to_sql(BENCH_TABLE, conn, if_exists='append', index=False, method='multi')
+            trans.commit()
+    return len(df)
+
+
+def load_execute_values(df: pd.DataFrame, upsert: bool):
+    """Previous financial_reports path: execute_values with ON CONFLICT."""
+    cols = list(df.columns)
+    update_set = ', '.join(f"{c} = EXCLUDED.{c}" for c in cols if c not in ('company_regcode', 'year'))
+    sql = f"INSERT INTO {BENCH_TABLE} ({', '.join(cols)}) VALUES %s"
+    if upsert:
+        sql += f" ON CONFLICT (company_regcode, year) DO UPDATE SET {update_set}"
+    data = [
+        tuple(None if isinstance(v, float) and v != v else v for v in row)
+        for row in df.itertuples(index=False, name=None)
+    ]
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        for i in range(0, len(data), BATCH_SIZE):
+            execute_values(cursor, sql, data[i:i + BATCH_SIZE], page_size=1000)
+            raw_conn.commit()
+        cursor.close()
+    finally:
+        raw_conn.close()
+    return len(data)
+
+
+def load_copy(df: pd.DataFrame, upsert: bool):
+    """New path: COPY FROM STDIN (+ temp table merge for upsert)."""
+    if upsert:
+        return load_to_db(df, BENCH_TABLE, unique_columns=['company_regcode', 'year'], truncate=False)
+    return load_to_db(df, BENCH_TABLE, truncate=False)
+
+
+STRATEGIES = {
+    'to_sql(multi)': load_to_sql,
+    'execute_values': load_execute_values,
+    'copy': load_copy,
+}
+
+
+def run(rows: int):
+    df = make_frame(rows)
+    print(f"Synthetic frame: {len(df):,} rows x {len(df.columns)} columns")
+    print(f"{'strategy':<16} {'mode':<8} {'seconds':>9} {'rows/sec':>12}")
+
+    for mode, upsert in (('append', False), ('upsert', True)):
+        for name, loader in STRATEGIES.items():
+            reset_table()
+            if upsert:
+                # Pre-fill half of the keys so the upsert does real conflict work
+                load_copy(df.iloc[: len(df) // 2], upsert=False)
+            start = time.perf_counter()
+            loaded = loader(df, upsert)
+            elapsed = time.perf_counter() - start
+            if loaded is None:
+                print(f"{name:<16} {mode:<8} {'n/a':>9} {'n/a':>12}")
+                continue
+            print(f"{name:<16} {mode:<8} {elapsed:>9.1f} {loaded / elapsed:>12,.0f}")
+
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.rows)
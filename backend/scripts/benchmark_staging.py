@@ -0,0 +1,123 @@
+"""
+Benchmark: read_csv(dtype=str) + manual conversion vs. the Parquet staging cache.
+
+  csv          - pd.read_csv(sep=';', dtype=str) + pd.to_numeric / pd.to_datetime (current stages)
+  stage        - first run: CSV -> typed Parquet conversion (etl.staging.staged_path)
+  parquet_all  - warm read of every column (read_staged)
+  parquet_cols - warm read of 3 columns, as a stage would (read_staged(columns=...))
+
+Each approach runs in its own fresh interpreter, and so does generating the input.
+ru_maxrss survives fork/exec (the child reports at least the parent's RSS at fork
+time), so the launching process stays small: it never imports pandas or builds data.
+
+Usage:
+    cd backend
+    python scripts/benchmark_staging.py --rows 1800000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NUMERIC_COLS = ['total_assets', 'total_current_assets', 'cash', 'inventories', 'current_liabilities',
+                'non_current_liabilities', 'equity', 'receivables', 'provisions', 'employees']
+COLUMNS = ['statement_id', 'total_assets', 'equity']
+
+
+def generate(path: str, rows: int):
+    """Synthetic balance-sheet-like CSV: ids, amounts, codes with leading zeros, dates, text."""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(7)
+    data = {
+        'statement_id': np.arange(1, rows + 1),
+        'legal_entity_registration_number': rng.integers(40000000000, 50000000000, rows),
+        'atvk': [f"{v:07d}" for v in rng.integers(0, 1000000, rows)],
+        'created_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 86400 * 365, rows), unit='s'),
+        'type': rng.choice(['UGP', 'UKGP', ''], rows),
+        'name': rng.choice(['SIA "Alfa"', 'AS Beta', 'Gamma, SIA'], rows),
+    }
+    for col in NUMERIC_COLS:
+        values = rng.normal(5e5, 1e5, rows).round(0)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[col] = values
+    frame = pd.DataFrame(data)
+    frame['created_at'] = frame['created_at'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    frame.to_csv(path, sep=';', index=False)
+
+
+def run(approach: str, csv_path: str) -> int:
+    import pandas as pd
+    from etl import staging
+    if approach == 'csv':
+        df = pd.read_csv(csv_path, sep=';', dtype=str)
+        for col in NUMERIC_COLS + ['statement_id', 'legal_entity_registration_number']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
+        return len(df)
+    if approach == 'stage':
+        staging.staged_path(csv_path)
+        return 0
+    if approach == 'parquet_all':
+        return len(staging.read_staged(csv_path))
+    return len(staging.read_staged(csv_path, columns=COLUMNS))
+
+
+def measure(approach: str, csv_path: str):
+    import pandas  # noqa: F401 - importu atmiņa ietilpst bāzē, ne mērījumā
+    from etl import staging  # noqa: F401
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    rows = run(approach, csv_path)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB
+    print(json.dumps({'approach': approach, 'rows': rows, 'seconds': elapsed, 'peak_rss_mb': peak_mb,
+                      'delta_mb': peak_mb - baseline_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_800_000)
+    parser.add_argument("--approach", choices=['csv', 'stage', 'parquet_all', 'parquet_cols'])
+    parser.add_argument("--csv")
+    parser.add_argument("--generate", action="store_true", help="only write --rows rows to --csv")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.csv, args.rows)
+        return
+    if args.approach:
+        measure(args.approach, args.csv)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        csv_path = os.path.join(data_dir, 'balance_sheets.csv')
+        print(f"Generating {args.rows:,} synthetic rows...")
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--generate', '--rows', str(args.rows),
+                        '--csv', csv_path], check=True)
+        env = {**os.environ, 'ETL_STAGING_DIR': os.path.join(data_dir, 'staging')}
+
+        print(f"{'approach':<14} {'rows':>10} {'seconds':>9} {'peak RSS MB':>12} {'above imports':>14}")
+        for approach in ('csv', 'stage', 'parquet_all', 'parquet_cols'):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--approach', approach, '--csv', csv_path],
+                capture_output=True, text=True, check=True, env=env
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"{r['approach']:<14} {r['rows']:>10,} {r['seconds']:>9.2f} {r['peak_rss_mb']:>12,.0f} "
+                  f"{r['delta_mb']:>14,.0f}")
+
+        staged = os.listdir(env['ETL_STAGING_DIR'])[0]
+        csv_mb = os.path.getsize(csv_path) / (1024 * 1024)
+        parquet_mb = os.path.getsize(os.path.join(env['ETL_STAGING_DIR'], staged)) / (1024 * 1024)
+        print(f"CSV {csv_mb:,.0f} MB -> Parquet {parquet_mb:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
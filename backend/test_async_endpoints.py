@@ -0,0 +1,130 @@
+"""
+Async endpoints: independent queries are awaited concurrently (no database needed).
+
+fetch_one / fetch_all are replaced by coroutines that sleep like a query would;
+an endpoint that awaits its queries one by one takes the sum of the sleeps,
+a concurrent one takes the longest.
+
+Run:
+    cd backend
+    python test_async_endpoints.py
+"""
+import time
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import Response
+from starlette.requests import Request
+
+from app.routers import people_analytics, companies
+from app.services.territories import TerritoryIndex
+
+QUERY_SECONDS = 0.2
+
+
+def fake_request():
+    return Request({"type": "http", "headers": [], "method": "GET", "path": "/"})
+
+
+def patch(module, rows_for):
+    """rows_for(sql, params) -> rows; every call sleeps QUERY_SECONDS"""
+    calls = []
+
+    async def fetch_all(query, params=None):
+        calls.append((str(query), params))
+        await asyncio.sleep(QUERY_SECONDS)
+        return rows_for(str(query), params or {})
+
+    async def fetch_one(query, params=None):
+        rows = await fetch_all(query, params)
+        return rows[0] if rows else None
+
+    module.fetch_all, module.fetch_one = fetch_all, fetch_one
+    return calls
+
+
+def timed(coro):
+    start = time.perf_counter()
+    result = asyncio.run(coro)
+    return result, time.perf_counter() - start
+
+
+def test_highlights_concurrent():
+    person = SimpleNamespace(person_hash='a1b2c3d4', full_name='Jānis Bērziņš', net_worth=10.0,
+                             active_companies_count=3, managed_turnover=5.0, main_company_name='SIA A',
+                             primary_nace='62')
+    calls = patch(people_analytics, lambda sql, params: [person])
+    result, elapsed = timed(people_analytics.get_highlights())
+    assert len(calls) == 3
+    assert elapsed < 2 * QUERY_SECONDS, elapsed
+    assert result.top_wealth.value == 10.0 and result.top_active.value == 3.0 and result.top_manager.value == 5.0
+
+
+def test_search_count_and_page_concurrent():
+    row = SimpleNamespace(person_hash='a1b2c3d4', full_name='Jānis', net_worth=None, managed_turnover=1,
+                          active_companies_count=1, main_company_name=None, primary_nace=None,
+                          main_region='Rīga', main_municipality_id=10, roles=['member'])
+    patch(people_analytics, lambda sql, params: [(7,)] if 'COUNT(*)' in sql else [row])
+    result, elapsed = timed(people_analytics.search_people(
+        q='jānis', role=None, region=['Rīga'], territory=None, nace=None, min_wealth=None, min_turnover=None,
+        sort_by='wealth', page=1, limit=20))
+    assert elapsed < 2 * QUERY_SECONDS, elapsed
+    assert result['total'] == 7 and result['items'][0]['region'] == 'Rīga'
+    assert result['items'][0]['territory_id'] == 10
+
+
+def test_search_territory_filter():
+    # id, code, name, type, level, parent_code, current
+    index = TerritoryIndex([
+        (1, "0100000", "Rīgas reģions", "REĢIONS", 1, None, True),
+        (11, "0130000", "Ādažu novads", "NOVADS", 2, "0100000", True),
+        (20, "0130010", "Ādaži", "PILSĒTA", 3, "0130000", True),
+    ])
+    people_analytics.territory_index = lambda: index
+    calls = patch(people_analytics, lambda sql, params: [(0,)] if 'COUNT(*)' in sql else [])
+    filters = dict(q=None, role=None, region=None, nace=None, min_wealth=None, min_turnover=None,
+                   sort_by='wealth', page=1, limit=20)
+
+    # a city selection filters on its municipality (main_municipality_id is level 2)
+    result = asyncio.run(people_analytics.search_people(territory=['0130010'], **filters))
+    assert result['total'] == 0
+    assert all(params['territory_ids'] == [11] for _, params in calls)
+
+    try:
+        asyncio.run(people_analytics.search_people(territory=['nope'], **filters))
+    except people_analytics.HTTPException as e:
+        assert e.status_code == 400
+    else:
+        raise AssertionError("expected 400")
+
+
+def test_company_quick_concurrent_and_int_regcode():
+    company = SimpleNamespace(regcode=40003000007, name='SIA A', address='Rīga', registration_date='2020-01-01',
+                              status='active', nace_code='6201', nace_text='IT', company_size_badge=None,
+                              fin_year=2024, turnover=100.0, profit=1.0, fin_employees=2,
+                              rating_grade=None, rating_explanation=None, industry_avg_salary=None)
+    risks = SimpleNamespace(count=1, total_score=50, max_severity=3)
+    calls = patch(companies, lambda sql, params: [risks] if 'FROM risks' in sql else [company])
+    result, elapsed = timed(companies.get_company_quick('40003000007', Response(), fake_request()))
+    assert elapsed < 2 * QUERY_SECONDS, elapsed
+    # asyncpg sends typed parameters: regcode must be an int for BIGINT columns
+    assert all(params['r'] == 40003000007 for _, params in calls)
+    assert result['risk_summary'] == {'count': 1, 'total_score': 50, 'level': 'HIGH'}
+
+
+def test_invalid_regcode_is_404():
+    patch(companies, lambda sql, params: [])
+    try:
+        asyncio.run(companies.get_company_quick('abc', Response(), fake_request()))
+    except companies.HTTPException as e:
+        assert e.status_code == 404
+    else:
+        raise AssertionError("expected 404")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
@@ -0,0 +1,55 @@
+"""
+/search query builders: full-text search on companies.search_vector with the
+two-phase rank, the LIKE fallback and the industry-only listing.
+
+Only the generated SQL and parameters are checked - no database needed.
+
+Run:
+    cd backend
+    python test_company_fts.py
+"""
+from app.routers.search import (fts_search_query, like_search_query, nace_search_query,
+                                SEARCH_CANDIDATES, SEARCH_LIMIT)
+
+
+def test_fts_two_phase():
+    sql, params = fts_search_query('sia "rīgas ūdens"', None)
+    assert "company_search_query(:q)" in sql and "search_vector @@ query" in sql
+    # Phase 1 is bounded by the candidate limit, phase 2 re-ranks only those
+    assert sql.index("LIMIT :candidates") < sql.index("SIMILARITY")
+    assert ":nace" not in sql
+    assert params == {"q": 'sia "rīgas ūdens"', "phrase": '"rīgas ūdens"',
+                      "candidates": SEARCH_CANDIDATES, "limit": SEARCH_LIMIT}
+
+
+def test_fts_nace_filter_in_candidates():
+    sql, params = fts_search_query("auto", "G")
+    assert params["nace"] == "G"
+    assert sql.index("c.nace_section = :nace") < sql.index("LIMIT :candidates")
+
+
+def test_fts_type_only_query():
+    _, params = fts_search_query("SIA", None)
+    assert params["phrase"] == "SIA"
+
+
+def test_like_fallback():
+    sql, params = like_search_query("SIA Auto Serviss", "G")
+    assert params == {"word0": "%Auto%", "word1": "%Serviss%", "type0": "sia", "nace": "G",
+                      "full_query": "Auto Serviss"}
+    assert "search_vector" not in sql
+    sql, params = like_search_query("40003", None)
+    assert params["q_pattern"] == "40003%"
+
+
+def test_nace_only():
+    sql, params = nace_search_query("J")
+    assert params == {"nace": "J"} and "search_vector" not in sql
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
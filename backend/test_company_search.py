@@ -0,0 +1,118 @@
+"""
+In-process company name index behind /home/search-hint: matches and ranking
+against a brute-force reference, and the background reload on a new data_version.
+
+Synthetic companies, no database needed.
+
+Run:
+    cd backend
+    python test_company_search.py
+"""
+import random
+import time
+
+from app.services import company_search
+from app.services.company_search import CompanySearchIndex, tokenize, TYPE_ABBREVIATIONS
+
+NAMES = ["Ādažu Maiznīca", "Maiznīca", "Maiznīca Plus", "Rīgas Ūdens", "Rīgas Siltums", "Balta",
+         "Baltic Auto", "Auto Serviss", "Serviss", "Animas", "Tet", "Tēta Nami", "Jāņa Auto"]
+
+
+def companies(n=3000, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for regcode in range(n):
+        quoted = " ".join(rng.sample(NAMES, rng.choice([1, 1, 2])))
+        if regcode % 97 == 0:
+            # Rare word: selective queries take the sorted-array path, common ones the bitmap
+            quoted += " Retais"
+        company_type = rng.choice(["SIA", "SIA", "AS", "IK", "BDR"])
+        rows.append((regcode, f'{company_type} "{quoted}"', rng.choice([quoted, None]), company_type,
+                     rng.choice(["active", "active", "liquidated", "L"]),
+                     rng.choice([None, float("nan"), 0, 10, 5_000, 1e6]) if regcode % 7 else 1e6))
+    return rows
+
+
+def reference(rows, q, limit=7):
+    """The hint's SQL ranking, row by row: active -> exact -> prefix -> turnover"""
+    words = tokenize(q)
+    name_words = [w for w in words if w not in TYPE_ABBREVIATIONS]
+    type_words = [w for w in words if w in TYPE_ABBREVIATIONS]
+    phrase = " ".join(name_words or words)
+    hits = []
+    for regcode, name, quoted, company_type, status, turnover in rows:
+        tokens = tokenize(name)
+        if not all(any(t.startswith(w) for t in tokens) for w in name_words or words):
+            continue
+        if type_words and company_type.lower() not in type_words:
+            continue
+        display = " ".join(tokenize(quoted or name))
+        match = 0 if display == phrase else 1 if display.startswith(phrase) else 2
+        known = turnover is not None and turnover == turnover
+        hits.append(((status != "active", match, not known, -turnover if known else 0, regcode), regcode))
+    return [regcode for _, regcode in sorted(hits)[:limit]]
+
+
+def test_tokenize():
+    assert tokenize('SIA "Ādažu Maiznīca"') == ["sia", "adazu", "maiznica"]
+    assert tokenize("Rīgas ūdens, AS") == ["rigas", "udens", "as"]
+
+
+def test_matches_reference_ranking():
+    rows = companies()
+    index = CompanySearchIndex(rows)
+    queries = ["ma", "maiz", "maiznica", "maiznica p", "adazu", "rigas", "rīgas s", "balt", "baltic auto",
+               "auto", "sia auto", "auto as", "ik", "sia", "tet", "teta", "serv", "jana", "zz", "nami tet",
+               "s", "a", "sia a", "bdr t", "ret", "retais auto", "sia retais", "retais a", "r", "maiznica retais"]
+    for q in queries:
+        assert [d["regcode"] for d in index.search(q)] == reference(rows, q), q
+
+
+def test_document_fields():
+    index = CompanySearchIndex([(40003000007, 'SIA "Tet"', "Tet", "SIA", "active", 1e8)])
+    assert index.search("tet") == [
+        {"regcode": 40003000007, "name": 'SIA "Tet"', "name_in_quotes": "Tet", "type": "SIA"}]
+
+
+def test_reload_on_new_data_version():
+    built = []
+
+    def fake_load():
+        built.append(version)
+        return CompanySearchIndex([(len(built), f"SIA Index{len(built)}", None, "SIA", "active", 1)])
+
+    original = company_search.load_index, company_search.data_version, company_search.ENABLED
+    company_search.load_index = fake_load
+    company_search.data_version = lambda: version
+    company_search.ENABLED = True
+    try:
+        version = "v1"
+        company_search.start_reload()
+        wait_until(lambda: company_search._state["index"] is not None)
+        first = company_search.company_index()
+        assert first.search("index")[0]["regcode"] == 1
+        assert company_search.company_index() is first and built == ["v1"]
+
+        # New version: the old index keeps serving until the new one replaces it
+        version = "v2"
+        assert company_search.company_index() in (first, company_search._state["index"])
+        wait_until(lambda: company_search._state["index"] is not first)
+        assert company_search.company_index().search("index")[0]["regcode"] == 2
+        assert built == ["v1", "v2"]
+    finally:
+        company_search.load_index, company_search.data_version, company_search.ENABLED = original
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
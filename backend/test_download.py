@@ -0,0 +1,223 @@
+"""
+Download manager checks against a local HTTP stand-in for data.gov.lv.
+
+The stand-in server supports ETag / Last-Modified validators, If-None-Match,
+If-Modified-Since, Range / If-Range (416 past the end) and can cut a response short to simulate
+a dropped connection.
+
+Run:
+    cd backend
+    python test_download.py
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from etl import download
+from etl.csv_cache import CSVCache, fetch_resource
+
+LAST_MODIFIED = "Wed, 01 Oct 2025 03:00:00 GMT"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    files = {}        # path -> bytes
+    truncate = {}     # path -> bytes to send before dropping the connection
+    statuses = []     # (path, status) log
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.files.get(self.path)
+        if body is None:
+            self._reply(404)
+            return
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag or (
+                'If-None-Match' not in self.headers and self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            self._reply(304, etag=etag)
+            return
+
+        start = 0
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range') in (etag, LAST_MODIFIED):
+            start = int(range_header.split('=')[1].rstrip('-'))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(body)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                self.statuses.append((self.path, 416))
+                return
+
+        payload = body[start:]
+        status = 206 if start else 200
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.send_header('Content-Length', str(len(payload)))
+        if start:
+            self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        self.statuses.append((self.path, status))
+
+        cut = self.truncate.pop(self.path, None)
+        self.wfile.write(payload[:cut] if cut is not None else payload)
+        if cut is not None:
+            self.close_connection = True
+
+    def _reply(self, status, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.statuses.append((self.path, status))
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def reset_server(files):
+    StandInHandler.files = dict(files)
+    StandInHandler.truncate = {}
+    StandInHandler.statuses = []
+
+
+def test_conditional_download():
+    server, base = start_server()
+    try:
+        reset_server({'/register.csv': b'regcode;name\n1;A\n'})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'register.csv')
+
+            first = fetch_resource(f"{base}/register.csv", path)
+            assert first['changed'] is True
+            with open(path, 'rb') as f:
+                assert f.read() == b'regcode;name\n1;A\n'
+
+            second = fetch_resource(f"{base}/register.csv", path, first)
+            assert second['changed'] is False
+            assert StandInHandler.statuses[-1] == ('/register.csv', 304)
+
+            StandInHandler.files['/register.csv'] = b'regcode;name\n1;A\n2;B\n'
+            third = fetch_resource(f"{base}/register.csv", path, second)
+            assert third['changed'] is True
+            assert third['sha256'] != first['sha256']
+    finally:
+        server.shutdown()
+
+
+def test_resume_partial_download():
+    server, base = start_server()
+    try:
+        body = os.urandom(3 * 1024 * 1024)
+        reset_server({'/balance_sheets.csv': body})
+        StandInHandler.truncate['/balance_sheets.csv'] = 1024 * 1024
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'balance_sheets.csv')
+            try:
+                fetch_resource(f"{base}/balance_sheets.csv", path)
+                raise AssertionError("interrupted download should raise")
+            except AssertionError:
+                raise
+            except Exception:
+                pass
+            assert os.path.getsize(f"{path}.part") == 1024 * 1024
+
+            entry = fetch_resource(f"{base}/balance_sheets.csv", path)
+            assert StandInHandler.statuses[-1] == ('/balance_sheets.csv', 206)
+            assert entry['sha256'] == hashlib.sha256(body).hexdigest()
+            assert not os.path.exists(f"{path}.part")
+    finally:
+        server.shutdown()
+
+
+def test_complete_or_oversized_part_after_416():
+    server, base = start_server()
+    try:
+        body = b'regcode;name\n1;A\n2;B\n'
+        reset_server({'/register.csv': body})
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'register.csv')
+            url = f"{base}/register.csv"
+
+            # Every byte arrived but the run died before the rename
+            with open(f"{path}.part", 'wb') as f:
+                f.write(body)
+            with open(f"{path}.part.json", 'w') as f:
+                json.dump({'url': url, 'etag': etag, 'last_modified': LAST_MODIFIED}, f)
+            entry = fetch_resource(url, path)
+            assert StandInHandler.statuses == [('/register.csv', 416)]
+            assert entry['sha256'] == hashlib.sha256(body).hexdigest() and entry['etag'] == etag
+            assert not os.path.exists(f"{path}.part") and not os.path.exists(f"{path}.part.json")
+
+            # Part longer than the resource - discarded and fetched again in full
+            os.remove(path)
+            with open(f"{path}.part", 'wb') as f:
+                f.write(body + b'3;C\n')
+            with open(f"{path}.part.json", 'w') as f:
+                json.dump({'url': url, 'etag': etag, 'last_modified': LAST_MODIFIED}, f)
+            entry = fetch_resource(url, path)
+            assert StandInHandler.statuses[-2:] == [('/register.csv', 416), ('/register.csv', 200)]
+            with open(path, 'rb') as f:
+                assert f.read() == body
+            assert not os.path.exists(f"{path}.part")
+    finally:
+        server.shutdown()
+
+
+def test_parallel_sources_report_unchanged():
+    server, base = start_server()
+    try:
+        reset_server({f'/{k}.csv': f'{k};1\n'.encode() for k in ('register', 'officers', 'members')})
+        urls = {k: f"{base}/{k}.csv" for k in ('register', 'officers', 'members')}
+        with tempfile.TemporaryDirectory() as tmp:
+            original_dir = download.DOWNLOAD_DIR
+            download.DOWNLOAD_DIR = tmp
+            try:
+                first = download.download_sources(urls, max_workers=3)
+                assert all(r['changed'] for r in first.values())
+
+                StandInHandler.files['/officers.csv'] = b'officers;2\n'
+                second = download.download_sources(urls, max_workers=3)
+                assert {k for k, r in second.items() if r['changed']} == {'officers'}
+                assert os.path.exists(os.path.join(tmp, 'manifest.json'))
+            finally:
+                download.DOWNLOAD_DIR = original_dir
+    finally:
+        server.shutdown()
+
+
+def test_csv_cache_revalidates():
+    server, base = start_server()
+    try:
+        reset_server({'/income_statements.csv': b'statement_id;net_turnover\n1;100\n'})
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CSVCache(cache_dir=tmp)
+            url = f"{base}/income_statements.csv"
+            cache.get_cached_path(url)
+            assert not cache.is_unchanged(url)
+
+            # max_age_hours=0 forces a conditional revalidation instead of a full download
+            cache.get_cached_path(url, max_age_hours=0)
+            assert StandInHandler.statuses[-1] == ('/income_statements.csv', 304)
+            assert cache.is_unchanged(url)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
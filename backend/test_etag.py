@@ -0,0 +1,172 @@
+"""
+ETag / 304 for read-only endpoints keyed on data_version (no database needed).
+
+Run:
+    cd backend
+    python test_etag.py
+"""
+import pytest
+from fastapi import FastAPI, Query, Request, Response, BackgroundTasks
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.core import cache
+from app.core.cache import cached
+from app.core.etag import etag, etag_matches
+from app.routers import map_data
+from app.utils import access_control
+
+current_version = "2025-01-01 03:00:00"
+profile_stamps = {}
+
+
+async def access_from_header(request):
+    return request.headers.get("authorization") == "Bearer ok"
+
+
+def install_stand_ins():
+    cache.DATA_VERSION_CHECK_SECONDS = 0
+    cache.data_version = lambda: current_version
+    access_control.check_access = access_from_header
+
+
+install_stand_ins()
+
+
+@pytest.fixture(autouse=True)
+def stand_ins():
+    """Other test modules patch the same modules at import - reapplied per test (conftest restores)"""
+    install_stand_ins()
+
+
+def make_app():
+    app = FastAPI()
+    calls = []
+    not_modified = []
+
+    @app.get("/overview")
+    @etag()
+    @cached(ttl=60, name="t.etag")
+    def overview(year: int = Query(None), response: Response = None):
+        calls.append(year)
+        response.headers["Cache-Control"] = "public, max-age=3600"
+        return {"year": year}
+
+    async def viewed(regcode: str, request: Request, background_tasks: BackgroundTasks, **_):
+        not_modified.append(regcode)
+
+    @app.get("/companies/{regcode}")
+    @etag(vary_access=True, cache_control="private, no-cache", on_not_modified=viewed)
+    async def company(regcode: str, request: Request, background_tasks: BackgroundTasks):
+        calls.append(regcode)
+        if regcode == "0":
+            return JSONResponse({"detail": "not found"}, status_code=404)
+        return {"regcode": regcode}
+
+    async def stored_at(regcode: str, **_):
+        return profile_stamps.get(regcode)
+
+    @app.get("/profiles/{regcode}")
+    @etag(vary_access=True, variant=stored_at)
+    async def profile(regcode: str, request: Request):
+        calls.append(regcode)
+        return {"regcode": regcode, "stored": profile_stamps.get(regcode)}
+
+    app.include_router(map_data.router)
+    return TestClient(app), calls, not_modified
+
+
+def test_if_none_match_comparison():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"') and not etag_matches(None, '"a"')
+
+
+def test_304_without_running_handler():
+    client, calls, _ = make_app()
+    first = client.get("/overview?year=2024")
+    tag = first.headers["etag"]
+    assert first.status_code == 200 and first.json() == {"year": 2024}
+    assert first.headers["cache-control"] == "public, max-age=3600"
+
+    again = client.get("/overview?year=2024", headers={"If-None-Match": tag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == tag
+    assert client.get("/overview?year=2023", headers={"If-None-Match": tag}).status_code == 200
+    assert calls == [2024, 2023]
+
+
+def test_new_data_version_new_etag():
+    global current_version
+    client, calls, _ = make_app()
+    tag = client.get("/overview").headers["etag"]
+    current_version = "2025-02-01 03:00:00"
+    try:
+        r = client.get("/overview", headers={"If-None-Match": tag})
+        assert r.status_code == 200 and r.headers["etag"] != tag
+    finally:
+        current_version = "2025-01-01 03:00:00"
+
+
+def test_unknown_version_sends_no_etag():
+    global current_version
+    client, calls, _ = make_app()
+    current_version = None
+    try:
+        r = client.get("/overview", headers={"If-None-Match": "*"})
+        assert r.status_code == 200 and "etag" not in r.headers
+    finally:
+        current_version = "2025-01-01 03:00:00"
+
+
+def test_access_flag_is_part_of_company_etag():
+    client, calls, not_modified = make_app()
+    teaser = client.get("/companies/1")
+    assert teaser.headers["cache-control"] == "private, no-cache"
+    tag = teaser.headers["etag"]
+    assert client.get("/companies/1", headers={"If-None-Match": tag}).status_code == 304
+    assert not_modified == ["1"]
+
+    full = client.get("/companies/1", headers={"If-None-Match": tag, "Authorization": "Bearer ok"})
+    assert full.status_code == 200 and full.headers["etag"] != tag
+    assert calls == ["1", "1"]
+
+
+def test_variant_stamp_is_part_of_etag():
+    # profile rebuilt in the background: same data_version, new body -> new tag
+    client, calls, _ = make_app()
+    profile_stamps["1"] = "2025-01-01T04:00:00"
+    tag = client.get("/profiles/1").headers["etag"]
+    assert client.get("/profiles/1", headers={"If-None-Match": tag}).status_code == 304
+    profile_stamps["1"] = "2025-01-02T04:00:00"
+    r = client.get("/profiles/1", headers={"If-None-Match": tag})
+    assert r.status_code == 200 and r.headers["etag"] != tag and r.json()["stored"] == "2025-01-02T04:00:00"
+    assert calls == ["1", "1"]
+
+
+def test_errors_get_no_etag():
+    client, _, _ = make_app()
+    r = client.get("/companies/0")
+    assert r.status_code == 404 and "etag" not in r.headers
+
+
+def test_static_map_files_revalidate():
+    client, _, _ = make_app()
+    first = client.get("/map/cities")
+    assert first.status_code == 200
+    r = client.get("/map/cities", headers={"If-None-Match": first.headers["etag"]})
+    assert r.status_code == 304 and r.headers["etag"] == first.headers["etag"]
+
+
+def test_routers_have_etags():
+    from app.routers import industries, regions, companies
+    for fn in (industries.get_industry_detail, industries.get_top_100, regions.get_regions_overview,
+               companies.get_financial_history_endpoint, companies.get_company_details, map_data.get_geojson):
+        assert getattr(fn, "etag", False), fn.__name__
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
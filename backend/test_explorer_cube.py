@@ -0,0 +1,125 @@
+"""
+Explorer KPI totals from explorer_filter_cube: which filters the cube answers and
+that summing its cells gives the same totals as filtering the companies.
+
+The cube is built in Python from synthetic companies with the bucket rules of
+db/explorer_filter_cube.sql and queried on SQLite with the API's WHERE clause.
+
+Run:
+    cd backend
+    python test_explorer_cube.py
+"""
+import random
+import sqlite3
+from collections import defaultdict
+
+from app.routers.explore import cube_stats_query, nace_filter, EMPLOYEE_BOUNDS, TURNOVER_BOUNDS
+
+SECTIONS = {"62": "J", "47": "G", "01": "A"}
+
+
+def bucket(value, bounds):
+    return -1 if value is None else sum(value >= b for b in bounds)
+
+
+def companies(n=400):
+    rng = random.Random(7)
+    rows = []
+    for regcode in range(n):
+        rows.append({
+            "nace_code": rng.choice(["6201", "6202", "4711", "4791", "0111"]),
+            "status": rng.choice(["active", "liquidated", "other"]),
+            "is_pvn_payer": rng.random() < 0.4,
+            "has_sanctions": rng.random() < 0.05,
+            "turnover": rng.choice([None, 0, 5_000, 10_000, 250_000, 3e6, 60e6]),
+            "profit": rng.choice([None, -100, 0, 5_000]),
+            "employees": rng.choice([None, 0, 1, 9, 10, 49, 300]),
+        })
+    return rows
+
+
+def build_cube(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE explorer_filter_cube (sort_basis, status, nace_code, nace_section, atvk, is_pvn_payer,
+                    has_sanctions, size_bucket, turnover_band, company_count, total_turnover, total_profit,
+                    total_employees)""")
+    cells = defaultdict(lambda: [0, 0, 0, 0])
+    for r in rows:
+        bases = ["all"] + (["turnover"] if r["turnover"] else []) + (["profit"] if r["profit"] is not None else [])
+        for basis in bases:
+            cell = cells[(basis, r["status"], r["nace_code"], SECTIONS[r["nace_code"][:2]], "",
+                          r["is_pvn_payer"], r["has_sanctions"],
+                          bucket(r["employees"], EMPLOYEE_BOUNDS), bucket(r["turnover"], TURNOVER_BOUNDS))]
+            cell[0] += 1
+            cell[1] += r["turnover"] or 0
+            cell[2] += r["profit"] or 0
+            cell[3] += r["employees"] or 0
+    conn.executemany("INSERT INTO explorer_filter_cube VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                     [key + tuple(v) for key, v in cells.items()])
+    return conn
+
+
+def live_count(rows, sort_by, status, nace, min_turnover, min_employees, has_pvn, has_sanctions):
+    """The explorer's WHERE clauses, row by row"""
+    count = 0
+    for r in rows:
+        if status in ("active", "liquidated") and r["status"] != status:
+            continue
+        if nace and not any(r["nace_code"].startswith(code) or SECTIONS[r["nace_code"][:2]] == code.upper()
+                            for code in nace):
+            continue
+        if min_turnover and not (r["turnover"] is not None and r["turnover"] >= min_turnover):
+            continue
+        if min_employees and not (r["employees"] is not None and r["employees"] >= min_employees):
+            continue
+        if has_pvn and not r["is_pvn_payer"] or has_sanctions and not r["has_sanctions"]:
+            continue
+        if sort_by == "turnover" and not r["turnover"] or sort_by == "profit" and r["profit"] is None:
+            continue
+        count += 1
+    return count
+
+
+def test_cube_totals_match_live_filters():
+    rows = companies()
+    conn = build_cube(rows)
+    for sort_by in ("turnover", "profit", "employees"):
+        for status in ("all", "active", "liquidated"):
+            for nace in (None, ["62"], ["4711", "01"], ["g"], ["J", "0111"]):
+                for min_turnover, min_employees in ((None, None), (10_000, None), (None, 10), (1_000_000, 1)):
+                    for has_pvn, has_sanctions in ((None, None), (True, None), (None, True)):
+                        sql, params = cube_stats_query(sort_by, status, nace, None, min_turnover, None,
+                                                       min_employees, has_pvn, has_sanctions)
+                        got = conn.execute(sql, params).fetchone()[0]
+                        assert got == live_count(rows, sort_by, status, nace, min_turnover, min_employees,
+                                                 has_pvn, has_sanctions), (sort_by, status, nace)
+
+
+def test_nace_filter_levels():
+    assert nace_filter("g", "p", alias="e.") == ("e.nace_section = :p", "G")
+    assert nace_filter("62", "p", alias="e.") == ("e.nace2 = :p", "62")
+    assert nace_filter("6201", "p") == ("nace4 = :p", "6201")
+    assert nace_filter("62011", "p") == ("nace_code LIKE :p", "62011%")
+    assert nace_filter("62", "p", levels=False) == ("nace_code LIKE :p", "62%")
+
+
+def test_unaligned_filters_fall_back_to_live_query():
+    args = dict(sort_by="turnover", status="all", nace=None, region=None, min_turnover=None,
+                max_turnover=None, min_employees=None, has_pvn=None, has_sanctions=None)
+    assert cube_stats_query(**args) is not None
+    assert cube_stats_query(**{**args, "region": "Rīga"}) is None
+    assert cube_stats_query(**{**args, "max_turnover": 100_000}) is None
+    assert cube_stats_query(**{**args, "min_turnover": 12_345}) is None
+    assert cube_stats_query(**{**args, "min_employees": 7}) is None
+    assert cube_stats_query(**{**args, "sort_by": "reg_date", "min_employees": 10}) is None
+    assert cube_stats_query(**{**args, "min_employees": 10})[1]["min_size"] == 2
+    # Resolved territories filter the cube's atvk dimension
+    assert cube_stats_query(**args, territory_codes=["0100000", "0100001"])[1]["atvk_codes"] == ["0100000", "0100001"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
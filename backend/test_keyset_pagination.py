@@ -0,0 +1,107 @@
+"""
+Keyset pagination of /companies/list: cursors and the WHERE / ORDER BY they produce.
+
+The clauses are checked on SQLite (row values, NULLS FIRST / LAST): walking
+every page forward and back must reproduce the full ORDER BY with ties and
+NULLs. No Postgres needed.
+
+Run:
+    cd backend
+    python test_keyset_pagination.py
+"""
+import random
+import sqlite3
+
+from fastapi import HTTPException, Response
+
+from app.routers import explore
+from app.routers.explore import encode_cursor, decode_cursor, keyset_clause
+
+LIMIT = 7
+
+
+def make_table(nullable: bool):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE s (regcode INTEGER, v NUMERIC)")
+    rng = random.Random(1)
+    rows = []
+    for regcode in range(1, 60):
+        value = rng.choice([None, 1, 2.5, 3, 3, 10]) if nullable else rng.choice([1, 2.5, 3, 3, 10])
+        rows.append((regcode, value))
+    conn.executemany("INSERT INTO s VALUES (?, ?)", rows)
+    return conn
+
+
+def page(conn, desc: bool, nullable: bool, position=None):
+    where, params = "1=1", {}
+    direction = "DESC" if desc else "ASC"
+    order = f"v {direction} NULLS LAST, regcode {direction}"
+    backwards = position is not None and position["direction"] == "prev"
+    if position:
+        where = keyset_clause("v", "regcode", desc, nullable, not backwards, position["value"])
+        params = {"cursor_v": position["value"], "cursor_r": position["regcode"]}
+        if backwards:
+            direction = "ASC" if desc else "DESC"
+            order = f"v {direction} NULLS FIRST, regcode {direction}"
+    rows = conn.execute(f"SELECT regcode, v FROM s WHERE {where} ORDER BY {order} LIMIT {LIMIT}",
+                        params).fetchall()
+    return rows[::-1] if backwards else rows
+
+
+def cursor_at(row, direction):
+    value = None if row[1] is None else str(row[1])
+    return {"value": value, "regcode": row[0], "direction": direction}
+
+
+def test_walk_forward_and_back_matches_full_order():
+    for nullable in (False, True):
+        conn = make_table(nullable)
+        for desc in (True, False):
+            direction = "DESC" if desc else "ASC"
+            expected = conn.execute(f"SELECT regcode, v FROM s ORDER BY v {direction} NULLS LAST, "
+                                    f"regcode {direction}").fetchall()
+            pages = [page(conn, desc, nullable)]
+            while len(pages[-1]) == LIMIT:
+                pages.append(page(conn, desc, nullable, cursor_at(pages[-1][-1], "next")))
+            assert [r for p in pages for r in p] == expected, (nullable, desc)
+
+            # prev_cursor of every page returns exactly the page before it
+            for i in range(len(pages) - 1, 0, -1):
+                assert page(conn, desc, nullable, cursor_at(pages[i][0], "prev")) == pages[i - 1]
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("turnover", "desc", 1234567.89, 40003000007, 3, "next")
+    assert "=" not in token
+    assert decode_cursor(token, "turnover", "desc") == {
+        "value": "1234567.89", "regcode": 40003000007, "page": 3, "direction": "next"}
+
+
+def raises_400(fn, *args):
+    try:
+        fn(*args)
+    except HTTPException as e:
+        return e.status_code == 400
+    return False
+
+
+def test_bad_cursors_are_400():
+    token = encode_cursor("turnover", "desc", 10, 1, 2, "next")
+    assert raises_400(decode_cursor, "not-a-cursor", "turnover", "desc")
+    assert raises_400(decode_cursor, token, "profit", "desc")
+    assert raises_400(decode_cursor, token, "turnover", "asc")
+
+
+def test_deep_offset_page_needs_cursor():
+    args = dict(response=Response(), limit=50, sort_by="turnover", order="desc", nace=None, region=None,
+                territory=None, status="all", min_turnover=None, max_turnover=None, min_employees=None, year=None,
+                has_pvn=None, has_sanctions=None, cursor=None)
+    assert raises_400(lambda: explore.list_companies(page=explore.MAX_OFFSET_PAGE + 1, **args))
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
@@ -0,0 +1,181 @@
+"""
+ETL orchestrator checks with synthetic stages.
+
+etl_state is replaced by an in-memory dict, so no database is needed;
+stages sleep / write marker files instead of loading data.
+
+Run:
+    cd backend
+    python test_orchestrator.py
+"""
+import os
+import time
+import tempfile
+
+import etl
+from etl import orchestrator
+from etl.orchestrator import Stage, run_stages
+
+STATE = {}
+
+
+def _record_stage(name, status, fingerprint=None, error=None, run_id=None,
+                  duration=None, rows=None, peak_memory_mb=None):
+    row = STATE.setdefault(name, {})
+    row.update(status=status, run_id=run_id, error=error)
+    if status == 'SUCCESS':
+        row.update(fingerprint=fingerprint, rows=rows, seconds=duration, peak_memory_mb=peak_memory_mb)
+
+
+def _stored_fingerprints():
+    return {name: row.get('fingerprint') for name, row in STATE.items() if row['status'] in ('SUCCESS', 'SKIPPED')}
+
+
+def _resumable_run():
+    runs = {row['run_id'] for row in STATE.values()}
+    if not STATE or all(row['status'] in ('SUCCESS', 'SKIPPED') for row in STATE.values()):
+        return None, set()
+    assert len(runs) == 1
+    return runs.pop(), {name for name, row in STATE.items() if row['status'] in ('SUCCESS', 'SKIPPED')}
+
+
+orchestrator._ensure_state_table = lambda: None
+orchestrator._record_stage = _record_stage
+orchestrator._stored_fingerprints = _stored_fingerprints
+orchestrator._resumable_run = _resumable_run
+
+
+def marker_stage(workdir, name, seconds=0.0, fail_flag=None, **kwargs):
+    """Stage that sleeps, then appends (name, start, end) to a log file"""
+    def run(files, connections):
+        if fail_flag and os.path.exists(fail_flag):
+            raise RuntimeError(f"{name} failed on purpose")
+        start = time.time()
+        time.sleep(seconds)
+        with open(os.path.join(workdir, 'log'), 'a') as f:
+            f.write(f"{name} {start} {time.time()} {connections}\n")
+        return 7
+    return Stage(name, run, **kwargs)
+
+
+def read_log(workdir):
+    path = os.path.join(workdir, 'log')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: (float(a), float(b), int(c)) for name, a, b, c in (line.split() for line in f)}
+
+
+def dag(workdir, fail_flag=None):
+    return [
+        marker_stage(workdir, 'companies', 0.1, sources=['register']),
+        marker_stage(workdir, 'risks', 0.5, sources=['sanctions'], after=['companies']),
+        marker_stage(workdir, 'finance', 0.5, sources=['balance'], after=['companies'], fail_flag=fail_flag),
+        marker_stage(workdir, 'nace', 0.3, depends_on=['companies'], writes=['companies']),
+        marker_stage(workdir, 'pvn', 0.3, depends_on=['companies'], writes=['companies']),
+        marker_stage(workdir, 'graphs', 0.1, depends_on=['finance'], db_connections=None),
+    ]
+
+
+HASHES = {'register': 'a', 'sanctions': 'b', 'balance': 'c'}
+
+
+def test_parallel_with_budget():
+    STATE.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        summary = run_stages({}, HASHES, stages=dag(tmp), max_workers=3, db_connections=4)
+        log = read_log(tmp)
+        assert sorted(summary['ran']) == sorted(log)
+        # risks and finance overlap
+        assert log['risks'][0] < log['finance'][1] and log['finance'][0] < log['risks'][1]
+        # nace and pvn both write companies - never overlap
+        assert log['nace'][1] <= log['pvn'][0] or log['pvn'][1] <= log['nace'][0]
+        # graphs takes the whole connection budget
+        assert log['graphs'][2] == 4
+        assert STATE['risks']['rows'] == 7 and STATE['risks']['peak_memory_mb'] > 0
+
+
+def test_unchanged_inputs_skip():
+    STATE.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        run_stages({}, HASHES, stages=dag(tmp))
+        os.remove(os.path.join(tmp, 'log'))
+        summary = run_stages({}, {**HASHES, 'balance': 'changed'}, stages=dag(tmp))
+        assert sorted(summary['ran']) == ['finance', 'graphs'], summary
+
+
+def test_resume_after_failure():
+    STATE.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        fail_flag = os.path.join(tmp, 'fail')
+        open(fail_flag, 'w').close()
+        try:
+            run_stages({}, HASHES, force=True, stages=dag(tmp, fail_flag))
+            raise AssertionError("failed critical stage should raise")
+        except RuntimeError:
+            pass
+        assert STATE['finance']['status'] == 'FAILED'
+        assert STATE['graphs']['status'] == 'BLOCKED'
+
+        os.remove(fail_flag)
+        os.remove(os.path.join(tmp, 'log'))
+        summary = run_stages({}, HASHES, force=True, resume=True, stages=dag(tmp, fail_flag))
+        assert sorted(summary['ran']) == ['finance', 'graphs'], summary
+        assert sorted(read_log(tmp)) == ['finance', 'graphs']
+
+
+def test_non_critical_failure_does_not_block():
+    STATE.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        fail_flag = os.path.join(tmp, 'fail')
+        open(fail_flag, 'w').close()
+        stages = dag(tmp)
+        stages[4] = marker_stage(tmp, 'pvn', 0.1, depends_on=['companies'], writes=['companies'],
+                                 critical=False, fail_flag=fail_flag)
+        stages.append(marker_stage(tmp, 'views', 0.1, depends_on=['companies', 'risks', 'pvn']))
+        summary = run_stages({}, HASHES, stages=stages)
+        assert summary['failed'] == ['pvn'] and 'views' in summary['ran'], summary
+        # views ran on top of a failed pvn: not skipped once pvn succeeds
+        os.remove(fail_flag)
+        summary = run_stages({}, HASHES, stages=stages)
+        assert sorted(summary['ran']) == ['pvn', 'views'], summary
+
+
+def test_data_version_bumped_only_when_data_loaded():
+    bumps = []
+    outcome = {}
+
+    def fake_run_stages(files, source_hashes, force=False, resume=False):
+        if outcome.get('raise'):
+            raise RuntimeError("ETL stages did not complete: ['companies']")
+        return {'ran': outcome['ran'], 'skipped': [], 'failed': [], 'blocked': []}
+
+    originals = (etl.init_database, etl.download_sources, etl.run_stages, etl.bump_data_version)
+    etl.init_database = lambda: True
+    etl.download_sources = lambda urls: {}
+    etl.run_stages = fake_run_stages
+    etl.bump_data_version = lambda: bumps.append(1)
+    try:
+        outcome.update(ran=[])
+        etl.run_all_etl()
+        assert bumps == []
+        outcome.update(ran=['companies'])
+        etl.run_all_etl()
+        assert bumps == [1]
+        outcome.update({'raise': True})
+        try:
+            etl.run_all_etl()
+            raise AssertionError("failed run should raise")
+        except RuntimeError:
+            pass
+        assert bumps == [1]
+    finally:
+        etl.init_database, etl.download_sources, etl.run_stages, etl.bump_data_version = originals
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
@@ -0,0 +1,172 @@
+"""
+In-memory ownership graph vs. calculate_company_graphs_batch (no database needed).
+
+The batch function runs against a fake connection that answers its queries
+from the same synthetic rows; the graph gets them as COPY text frames.
+
+Run:
+    cd backend
+    python test_ownership_graph.py
+"""
+import json
+import random
+import datetime as dt
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.services.graph_service import calculate_company_graphs_batch
+from etl.ownership_graph import OwnershipGraph, PERSON_COLUMNS
+
+YEAR = 2024
+
+
+class FakeConn:
+    """Answers exactly the queries calculate_company_graphs_batch issues."""
+
+    def __init__(self, companies, persons, financials):
+        self.companies, self.persons, self.financials = companies, persons, financials
+
+    def execute(self, clause, params):
+        sql = str(clause)
+        names = {c['regcode']: c['name'] for c in self.companies}
+        if 'FROM companies WHERE regcode' in sql:
+            rows = [c for c in self.companies if c['regcode'] in params['r']]
+        elif 'as parent_regcode' in sql:
+            rows = [{'parent_regcode': p['legal_entity_regcode'], 'sub_regcode': p['company_regcode'],
+                     'sub_name': names[p['company_regcode']], 'number_of_shares': p['number_of_shares'],
+                     'share_nominal_value': p['share_nominal_value']}
+                    for p in self.persons if p['legal_entity_regcode'] in params['r'] and p['role'] == 'member']
+        elif 'as parent_name' in sql:
+            rows = [{'parent_name': p['person_name'], 'sub_regcode': p['company_regcode'],
+                     'sub_name': names[p['company_regcode']], 'number_of_shares': p['number_of_shares'],
+                     'share_nominal_value': p['share_nominal_value']}
+                    for p in self.persons if p['person_name'] in params['n'] and p['role'] == 'member'
+                    and p['legal_entity_regcode'] is None]
+        elif 'FROM financial_reports' in sql:
+            rows = [f for f in self.financials if f['company_regcode'] in params['codes'] and f['year'] == params['y']]
+        elif 'GROUP BY company_regcode' in sql:
+            totals = {}
+            for p in self.persons:
+                if p['company_regcode'] in params['r'] and p['role'] == 'member':
+                    totals[p['company_regcode']] = totals.get(p['company_regcode'], 0) + \
+                        (p['number_of_shares'] or 0) * (p['share_nominal_value'] or 0)
+            rows = [{'company_regcode': k, 'total': v} for k, v in totals.items()]
+        else:
+            rows = [p for p in self.persons if p['company_regcode'] in params['r']]
+        return SimpleNamespace(fetchall=lambda: [SimpleNamespace(**r) for r in rows])
+
+
+def as_text_frame(rows, columns):
+    """Rows as read_query returns them: Postgres text, NULL -> NaN"""
+    return pd.DataFrame([[None if r[c] is None else str(r[c]) for c in columns] for r in rows], columns=columns)
+
+
+def synthetic_registry(n_companies=300, seed=3):
+    rng = random.Random(seed)
+    regcodes = [40003000000 + i * 7 for i in range(n_companies)]
+    companies = [{'regcode': r, 'name': f'SIA "Uzņēmums {i}"'} for i, r in enumerate(regcodes)]
+    persons = []
+    for regcode in regcodes:
+        for k in range(rng.randint(0, 3)):
+            persons.append(dict.fromkeys(PERSON_COLUMNS) | {
+                'company_regcode': regcode, 'person_name': f'Valdes loceklis {regcode}-{k}', 'role': 'officer',
+                'person_code': rng.choice([None, '010180-*****']), 'position': 'BOARD_MEMBER',
+                'rights_of_representation': rng.choice(['INDIVIDUALLY', 'WITH_AT_LEAST']),
+                'representation_with_at_least': rng.choice([None, 0, 2]),
+                'date_from': dt.date(2015, 1, 1) + dt.timedelta(days=rng.randint(0, 3000)),
+            })
+        for k in range(rng.randint(0, 5)):
+            kind = rng.random()
+            member = dict.fromkeys(PERSON_COLUMNS) | {
+                'company_regcode': regcode, 'role': 'member', 'person_name': f'Dalībnieks {regcode}-{k}',
+                'number_of_shares': rng.choice([None, 0, 1, 10, 100, 1000]),
+                'share_nominal_value': rng.choice([None, 1.0, 0.5, 2.5]),
+                'share_currency': rng.choice([None, 'EUR', 'USD']),
+                'date_from': rng.choice([None, dt.date(2020, 2, 2)]),
+            }
+            if kind < 0.3:
+                member['legal_entity_regcode'] = rng.choice(regcodes + [90000000001])
+            elif kind < 0.45:
+                member['person_name'] = rng.choice(companies)['name']
+            persons.append(member)
+        if rng.random() < 0.3:
+            persons.append(dict.fromkeys(PERSON_COLUMNS) | {
+                'company_regcode': regcode, 'role': 'ubo', 'person_name': f'PLG {regcode}',
+                'nationality': 'LV', 'residence': 'LV', 'birth_date': dt.date(1970, 5, 5),
+            })
+    financials = [{'company_regcode': r, 'year': YEAR, 'turnover': float(rng.randint(0, 10 ** 6)),
+                   'employees': rng.choice([None, 3, 40]), 'total_assets': rng.choice([None, 1234.5])}
+                  for r in regcodes if rng.random() < 0.6]
+    return companies, persons, financials
+
+
+def build_graph(companies, persons, financials):
+    return OwnershipGraph(as_text_frame(companies, ['regcode', 'name']),
+                          as_text_frame(persons, PERSON_COLUMNS),
+                          as_text_frame(financials, ['company_regcode', 'turnover', 'employees', 'total_assets']))
+
+
+def normalized(graph):
+    """JSONB does not keep list order guarantees across query plans - compare sorted"""
+    graph = json.loads(json.dumps(graph))
+    for key, value in graph.items():
+        if isinstance(value, list):
+            graph[key] = sorted(value, key=lambda item: json.dumps(item, sort_keys=True))
+    return graph
+
+
+def test_matches_batch_version():
+    companies, persons, financials = synthetic_registry()
+    graph = build_graph(companies, persons, financials)
+    targets = graph.targets().tolist()
+    expected = calculate_company_graphs_batch(FakeConn(companies, persons, financials), targets, year=YEAR)
+    statuses = set()
+    for regcode in targets:
+        assert normalized(graph.graph(regcode)) == normalized(expected[regcode]), regcode
+        statuses.add(expected[regcode]['status'])
+    assert statuses == {'AUTONOMOUS', 'PARTNER', 'LINKED'}, statuses
+
+
+def test_targets_and_not_found():
+    companies, persons, financials = synthetic_registry(50)
+    graph = build_graph(companies, persons, financials)
+    linked = {p['company_regcode'] for p in persons} | {p['legal_entity_regcode'] for p in persons}
+    assert set(graph.targets().tolist()) == linked & {c['regcode'] for c in companies}
+    assert graph.graph(12345)['status'] == 'NOT_FOUND'
+
+
+def test_duplicate_name_is_not_a_parent():
+    companies = [{'regcode': 1, 'name': 'SIA A'}, {'regcode': 2, 'name': 'SIA A'}, {'regcode': 3, 'name': 'SIA B'}]
+    member = dict.fromkeys(PERSON_COLUMNS) | {'role': 'member', 'number_of_shares': 10, 'share_nominal_value': 1.0}
+    persons = [member | {'company_regcode': 3, 'person_name': 'SIA A'},
+               member | {'company_regcode': 2, 'person_name': 'SIA B'}]
+    graph = build_graph(companies, persons, [])
+    assert graph.graph(1)['status'] == 'AUTONOMOUS'
+    subsidiary = graph.graph(3)['linked'][-1]
+    assert subsidiary['relation'] == 'subsidiary' and subsidiary['regcode'] == 2
+
+
+def test_affected_neighbourhood():
+    companies = [{'regcode': r, 'name': f'SIA {n}'} for r, n in zip(range(1, 6), 'ABCDE')]
+    member = dict.fromkeys(PERSON_COLUMNS) | {'role': 'member', 'number_of_shares': 10, 'share_nominal_value': 1.0}
+    persons = [member | {'company_regcode': 2, 'person_name': 'SIA A', 'legal_entity_regcode': 1},
+               member | {'company_regcode': 3, 'person_name': 'SIA B'},
+               member | {'company_regcode': 4, 'person_name': 'Jānis'},
+               member | {'company_regcode': 5, 'person_name': 'SIA D', 'legal_entity_regcode': 4}]
+    graph = build_graph(companies, persons, [])
+    # owner (regcode), subsidiary (name fallback)
+    assert graph.affected([2]).tolist() == [1, 2, 3]
+    # name-fallback parent
+    assert graph.affected([3]).tolist() == [2, 3]
+    assert graph.affected([4, 999]).tolist() == [4, 5]
+    rows = list(graph.cache_rows([3, 999], source_version='v1'))
+    assert [(r[0], r[3]) for r in rows] == [(3, 'v1')]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
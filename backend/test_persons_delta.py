@@ -0,0 +1,126 @@
+"""
+Persons delta diff checks (no database needed).
+
+Run:
+    cd backend
+    python test_persons_delta.py
+"""
+import datetime as dt
+import pandas as pd
+
+from etl import loader
+from etl.process_persons import diff_persons, _read_current_persons, PERSON_KEY_COLS
+
+COLS = ['company_regcode', 'person_name', 'role', 'person_code', 'date_from',
+        'number_of_shares', 'legal_entity_regcode', 'position']
+VALUE_COLS = [c for c in COLS if c not in PERSON_KEY_COLS]
+
+
+def current_table(rows):
+    """DB state as read back through COPY TO STDOUT: every value is text"""
+    return pd.DataFrame(rows, columns=['id'] + COLS)
+
+
+def test_unchanged_snapshot_is_empty_delta():
+    new = pd.DataFrame([
+        [40003000001.0, 'Jānis Bērziņš', 'officer', '010180-*****', dt.date(2020, 1, 1), None, None, 'BOARD_MEMBER'],
+        [40003000002.0, 'Anna Liepa', 'member', None, dt.date(2021, 5, 5), 100.0, None, None],
+    ], columns=COLS)
+    current = current_table([
+        ['1', '40003000001', 'Jānis Bērziņš', 'officer', '010180-*****', '2020-01-01', None, None, 'BOARD_MEMBER'],
+        ['2', '40003000002', 'Anna Liepa', 'member', None, '2021-05-05', '100', None, None],
+    ])
+    inserts, updates, delete_ids, changed = diff_persons(new, current, VALUE_COLS)
+    assert inserts.empty and updates.empty and len(delete_ids) == 0 and not changed
+
+
+def test_insert_update_delete():
+    new = pd.DataFrame([
+        [40003000001.0, 'Jānis Bērziņš', 'officer', '010180-*****', dt.date(2020, 1, 1), None, None, 'BOARD_MEMBER'],
+        [40003000002.0, 'Anna Liepa', 'member', None, dt.date(2021, 5, 5), 150.0, None, None],
+        [40003000003.0, 'SIA X', 'member', None, None, 10.0, 40003000009.0, None],
+    ], columns=COLS)
+    current = current_table([
+        ['1', '40003000001', 'Jānis Bērziņš', 'officer', '010180-*****', '2020-01-01', None, None, 'BOARD_MEMBER'],
+        ['2', '40003000002', 'Anna Liepa', 'member', None, '2021-05-05', '100', None, None],
+        ['3', '40003000004', 'Pēteris Ozols', 'ubo', None, None, None, None, None],
+        ['4', '40003000002', 'Anna Liepa', 'member', None, '2021-05-05', '100', None, None],
+    ])
+    inserts, updates, delete_ids, changed = diff_persons(new, current, VALUE_COLS)
+    assert inserts['person_name'].tolist() == ['SIA X']
+    assert updates['id'].tolist() == ['2'] and updates['number_of_shares'].tolist() == [150.0]
+    # id 4 is a duplicate of id 2 (NULL person_code slips past UNIQUE)
+    assert sorted(delete_ids) == ['3', '4']
+    # member company 40003000009 is affected too
+    assert changed == {40003000002, 40003000003, 40003000004, 40003000009}
+
+
+def test_removed_name_fallback_member_affects_former_parent():
+    new = pd.DataFrame([
+        [40003000001.0, 'Jānis Bērziņš', 'officer', '010180-*****', None, None, None, 'BOARD_MEMBER'],
+    ], columns=COLS)
+    # SIA Alfa owned 40003000001 by name only (no legal_entity_regcode); the row is gone now
+    current = current_table([
+        ['1', '40003000001', 'Jānis Bērziņš', 'officer', '010180-*****', None, None, None, 'BOARD_MEMBER'],
+        ['2', '40003000001', 'SIA Alfa', 'member', None, None, '100', None, None],
+    ])
+    inserts, updates, delete_ids, changed = diff_persons(new, current, VALUE_COLS)
+    assert delete_ids.tolist() == ['2'] and changed == {40003000001}
+    inserts, updates, delete_ids, changed = diff_persons(new, current, VALUE_COLS,
+                                                         {'SIA Alfa': 40003000007})
+    assert changed == {40003000001, 40003000007}
+
+class _CopyConnection:
+    """raw_connection stand-in: COPY TO STDOUT writes the given Postgres CSV output"""
+
+    def __init__(self, output):
+        self.output = output
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, buf):
+        buf.write(self.output)
+
+    def close(self):
+        pass
+
+
+def test_null_and_empty_string_stay_distinct():
+    # position: '' on row 1, NULL on row 2 (COPY ... NULL '\N')
+    output = ("id,company_regcode,person_name,role,person_code,date_from,number_of_shares,"
+              "legal_entity_regcode,position\n"
+              "1,40003000001,Jānis Bērziņš,officer,\\N,\\N,\\N,\\N,\"\"\n"
+              "2,40003000002,Anna Liepa,officer,\\N,\\N,\\N,\\N,\\N\n")
+    original = loader.engine.raw_connection
+    loader.engine.raw_connection = lambda: _CopyConnection(output)
+    try:
+        current = _read_current_persons(COLS)
+    finally:
+        loader.engine.raw_connection = original
+    assert current['position'].tolist()[0] == '' and pd.isna(current['position'].tolist()[1])
+
+    new = pd.DataFrame([
+        [40003000001.0, 'Jānis Bērziņš', 'officer', None, None, None, None, ''],
+        [40003000002.0, 'Anna Liepa', 'officer', None, None, None, None, None],
+    ], columns=COLS)
+    inserts, updates, delete_ids, changed = diff_persons(new, current, VALUE_COLS)
+    assert inserts.empty and updates.empty and len(delete_ids) == 0
+
+    new.loc[1, 'position'] = ''
+    inserts, updates, delete_ids, changed = diff_persons(new, current, VALUE_COLS)
+    assert updates['id'].tolist() == ['2']
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
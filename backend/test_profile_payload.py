@@ -0,0 +1,179 @@
+"""
+Company profile cache payloads: stored bytes are served as-is (no database needed).
+
+Run:
+    cd backend
+    python test_profile_payload.py
+"""
+import gzip
+import json
+import asyncio
+import datetime as dt
+from decimal import Decimal
+from types import SimpleNamespace
+
+import brotli
+from fastapi import BackgroundTasks, Response
+from starlette.requests import Request
+
+from contextlib import contextmanager
+
+from app.core import payload, single_flight, shared_cache
+from app.routers import companies
+
+REGCODE = 40003000007
+PROFILE = {
+    "regcode": REGCODE, "name": "SIA Ābols", "registration_date": "2020-01-01", "has_full_access": True,
+    "total_capital": Decimal("2800.50"), "rating": {"date": dt.date(2024, 1, 1)}, "risk_level": "LOW",
+    "financial_history": [{"year": 2024, "turnover": 1500.0, "roe": float("nan")}],
+}
+
+
+class CompanyRow(SimpleNamespace):
+    """SELECT * FROM companies row - columns the test does not set are NULL"""
+    def __getattr__(self, name):
+        return None
+
+
+def fake_request(accept_encoding=None):
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    return Request({"type": "http", "headers": headers, "method": "GET", "path": "/"})
+
+
+def test_access_flags_envelope():
+    body = payload.dumps({"a": 1})
+    assert json.loads(payload.with_access_flags(body, True)) == {"has_full_access": True, "is_locked": False, "a": 1}
+    assert json.loads(payload.with_access_flags(body, False)) == {"has_full_access": False, "is_locked": True, "a": 1}
+    assert json.loads(payload.with_access_flags(b"{}", False)) == {"has_full_access": False, "is_locked": True}
+
+
+def test_encoded_variants_match_payload():
+    encoded = payload.encode_payload(PROFILE)
+    body = json.loads(encoded["payload"])
+    assert "has_full_access" not in body
+    assert body["total_capital"] == 2800.5 and body["rating"]["date"] == "2024-01-01"
+    assert body["financial_history"][0]["roe"] is None
+    for access in (False, True):
+        expected = payload.with_access_flags(encoded["payload"], access)
+        assert gzip.decompress(payload.access_variant(encoded["payload_gzip"], access)) == expected
+        assert brotli.decompress(payload.access_variant(encoded["payload_br"], access)) == expected
+
+
+def test_encoding_negotiation():
+    encoded = payload.encode_payload(PROFILE)
+    cases = {
+        "gzip, deflate, br": "br",
+        "gzip": "gzip",
+        "br;q=0, gzip;q=0.5": "gzip",
+        "*": "br",
+        None: None,
+        "identity": None,
+    }
+    for header, encoding in cases.items():
+        response = payload.profile_response(encoded["payload"], encoded["payload_gzip"][1], encoded["payload_br"][1],
+                                            True, fake_request(header))
+        assert response.headers.get("content-encoding") == encoding, header
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["content-length"] == str(len(response.body))
+        if encoding is None:
+            assert json.loads(response.body)["is_locked"] is False
+
+
+def patch(cached_row):
+    saved = []
+
+    if cached_row is not None:
+        cached_row = {"is_fresh": True, "updated_at": None} | cached_row
+
+    async def fetch_one(query, params=None):
+        if "company_profile_cache" in str(query):
+            # :access picks the variant for this access state in SQL
+            if cached_row and cached_row.get("payload_gzip"):
+                i = params["access"] - 1
+                return SimpleNamespace(**cached_row | {"payload_gzip": cached_row["payload_gzip"][i],
+                                                       "payload_br": cached_row["payload_br"][i]})
+            return SimpleNamespace(**cached_row) if cached_row else None
+        return CompanyRow(regcode=REGCODE, name="SIA Ābols")
+
+    class Conn:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, query, params):
+            saved.append((str(query), params))
+
+    class SyncConn:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, query, params):
+            saved.append((str(query), params))
+            return SimpleNamespace(fetchone=lambda: None)  # no fresh row written meanwhile
+
+    @contextmanager
+    def advisory_lock(lock_key, wait=True):
+        yield True
+
+    async def check_access(request):
+        return False
+
+    async def get_current_user(request):
+        return None
+
+    async def ensure_profile_cache_table():
+        pass
+
+    companies.fetch_one = fetch_one
+    companies.async_engine = SimpleNamespace(begin=Conn)
+    companies.engine = SimpleNamespace(connect=SyncConn, begin=SyncConn)
+    single_flight.advisory_lock = advisory_lock
+    shared_cache.set_backend(shared_cache.LocalBackend())
+    companies.check_access = check_access
+    companies.get_current_user = get_current_user
+    companies.ensure_profile_cache_table = ensure_profile_cache_table
+    companies.build_full_profile = lambda r, company: dict(PROFILE)
+    return saved
+
+
+def get_details(accept_encoding="gzip, br"):
+    return asyncio.run(companies.get_company_details(str(REGCODE), Response(), fake_request(accept_encoding),
+                                                     BackgroundTasks()))
+
+
+def test_hit_serves_stored_bytes():
+    encoded = payload.encode_payload(PROFILE)
+    saved = patch({**encoded, "profile_data": None})
+    response = get_details()
+    assert not saved
+    assert response.body == encoded["payload_br"][0]  # anonymous -> locked variant
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_miss_builds_encodes_and_saves():
+    saved = patch(None)
+    response = get_details(None)
+    assert [sql.split()[0] for sql, _ in saved] == ["SELECT", "INSERT"]
+    assert saved[1][1]["payload"] == payload.encode_payload(PROFILE)["payload"]
+    assert response.body == payload.with_access_flags(saved[1][1]["payload"], False)
+
+
+def test_legacy_jsonb_row_converted_once():
+    saved = patch({"payload": None, "payload_gzip": None, "payload_br": None,
+                   "profile_data": json.loads(payload.dumps(PROFILE))})
+    response = get_details("gzip")
+    assert len(saved) == 1 and saved[0][0].lstrip().startswith("UPDATE company_profile_cache")
+    assert json.loads(gzip.decompress(response.body))["is_locked"] is True
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
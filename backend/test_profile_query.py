@@ -0,0 +1,152 @@
+"""
+build_full_profile: one PROFILE_QUERY round-trip gives the same profile as the
+per-section helpers (no database needed).
+
+The fake connection answers PROFILE_QUERY the way Postgres does: every section
+as a json array (numbers as JSON numbers, dates as ISO strings), plus
+clock_timestamp() columns.
+
+Run:
+    cd backend
+    python test_profile_query.py
+"""
+import json
+import datetime as dt
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.routers import companies
+
+REGCODE = 40003000007
+FIN_COLUMNS = """year turnover profit employees cash_balance current_ratio quick_ratio cash_ratio net_profit_margin
+    roe roa debt_to_equity equity_ratio ebitda interest_expenses depreciation_expenses provision_for_income_taxes
+    by_nature_labour_expenses accounts_receivable inventories current_liabilities non_current_liabilities equity
+    total_assets total_current_assets cfo_im_net_operating_cash_flow cff_net_financing_cash_flow
+    cfi_acquisition_of_fixed_assets_intangible_assets cfo_im_income_taxes_paid""".split()
+
+SECTION_ROWS = {
+    "get_financial_history": [
+        dict.fromkeys(FIN_COLUMNS) | {"year": year, "turnover": Decimal(turnover), "profit": Decimal("-12.50"),
+                                      "employees": 4, "equity": Decimal("NaN")}
+        for year, turnover in ((2024, "1500.00"), (2023, "1000.00"), (2022, "0"))
+    ],
+    "get_risks": [
+        {"risk_type": "liquidation", "description": "x", "start_date": dt.date(2023, 5, 1), "risk_score": Decimal("0"),
+         "active": None, "sanction_program": None, "sanction_list_text": None, "legal_base_url": None,
+         "suspension_code": None, "suspension_grounds": None, "measure_type": None, "institution_name": None,
+         "case_number": None, "liquidation_type": "court", "liquidation_grounds": "y"},
+    ],
+    "get_persons": [
+        {"person_name": "Jānis", "role": "member", "share_percent": None, "date_from": dt.date(2020, 2, 2),
+         "person_code": "010180-*****", "birth_date": None, "position": None, "rights_of_representation": None,
+         "representation_with_at_least": None, "number_of_shares": Decimal("100"),
+         "share_nominal_value": Decimal("1.00"), "share_currency": "EUR", "legal_entity_regcode": None,
+         "nationality": None, "residence": None, "entity_type": "PHYSICAL_PERSON"},
+        {"person_name": "Anna", "role": "officer", "share_percent": None, "date_from": None,
+         "person_code": None, "birth_date": None, "position": "BOARD_MEMBER", "rights_of_representation": "WITH_AT_LEAST",
+         "representation_with_at_least": 2, "number_of_shares": None, "share_nominal_value": None,
+         "share_currency": None, "legal_entity_regcode": None, "nationality": "LV", "residence": "LV",
+         "entity_type": None},
+    ],
+    "get_procurements": [
+        {"authority_name": "Rīgas dome", "subject": "Remonts", "amount": Decimal("999.99"),
+         "contract_date": dt.date(2024, 3, 3)},
+    ],
+    "get_rating": [
+        {"rating_grade": "A", "rating_explanation": "ok", "last_evaluated_on": dt.date(2024, 1, 1)},
+    ],
+    "get_tax_history": [
+        {"year": 2024, "total_tax_paid": Decimal("5000"), "labor_tax_iin": Decimal("1000"),
+         "social_tax_vsaoi": Decimal("3409"), "avg_employees": Decimal("2"), "nace_code": "6201",
+         "avg_gross_salary": None, "avg_net_salary": None},
+    ],
+}
+COMPANY_TOTAL_CAPITAL = Decimal("2800.00")
+
+
+def to_pg_json(rows):
+    """What json_agg + psycopg2's json typecaster return"""
+    def default(value):
+        if isinstance(value, Decimal):
+            return float(value) if value.is_finite() else str(value)  # Postgres quotes NaN
+        return value.isoformat()
+    return json.loads(json.dumps(rows, default=default))
+
+
+class FakeConn:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def rollback(self):
+        pass
+
+    def execute(self, clause, params):
+        self.statements.append((str(clause), params))
+        sql = str(clause)
+        clock = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+        row = {"t_start": clock}
+        for i, (name, rows) in enumerate(SECTION_ROWS.items(), 1):
+            if f"AS {name}" not in sql:
+                continue
+            row[name] = to_pg_json(rows)
+            row[f"t_{name}"] = clock + dt.timedelta(milliseconds=10 * i)
+        row["company_total_capital"] = COMPANY_TOTAL_CAPITAL
+        return SimpleNamespace(fetchone=lambda: SimpleNamespace(**row))
+
+
+def expected_profile(base):
+    """The per-section helpers on typed (psycopg2) rows"""
+    typed = {name: [SimpleNamespace(**r) for r in rows] for name, rows in SECTION_ROWS.items()}
+    history = companies.financial_history_from_rows(typed["get_financial_history"])
+    risks, score = companies.risks_from_rows(typed["get_risks"])
+    ubos, members, officers, capital = companies.persons_from_rows(typed["get_persons"], COMPANY_TOTAL_CAPITAL)
+    return base | {
+        "financial_history": history, "tax_history": companies.tax_history_from_rows(typed["get_tax_history"]),
+        "rating": companies.rating_from_row(typed["get_rating"][0]), "risks": risks, "total_risk_score": score,
+        "ubos": ubos, "members": members, "officers": officers, "total_capital": capital,
+        "procurements": companies.procurements_from_rows(typed["get_procurements"]),
+    }
+
+
+def build(cached_graph=None):
+    conn = FakeConn()
+    companies.engine = SimpleNamespace(connect=lambda: conn)
+    companies.load_cached_graph = lambda c, r: (cached_graph, False)
+    profile = companies.build_full_profile(REGCODE, {"regcode": REGCODE, "name": "SIA A"})
+    return profile, conn.statements
+
+
+def test_one_statement_same_profile():
+    profile, statements = build()
+    assert len(statements) == 1 and statements[0][1] == {"r": REGCODE}
+    expected = expected_profile({"regcode": REGCODE, "name": "SIA A"})
+    for key, value in expected.items():
+        assert json.dumps(profile[key], default=str) == json.dumps(value, default=str), key
+    assert profile["financial_history"][0]["turnover_growth"] == 50.0
+    assert profile["risk_level"] == "HIGH"
+
+
+def test_cached_persons_skip_persons_section():
+    graph = {"officers": [{"name": "X"}], "members": [], "ubos": [], "total_capital": 5}
+    profile, statements = build(graph)
+    assert "AS get_persons" not in statements[0][0]
+    assert profile["officers"] == [{"name": "X"}] and profile["total_capital"] == 5
+
+
+def test_profile_query_binds_only_regcode():
+    for query in companies.PROFILE_QUERY.values():
+        assert set(query.compile().params) == {"r"}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
@@ -0,0 +1,153 @@
+"""
+app.core.cache: LRU / TTL / data_version invalidation of cached router functions (no database needed).
+
+Run:
+    cd backend
+    python test_response_cache.py
+"""
+import time
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Query, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.core import cache
+from app.core.cache import cached
+
+current_version = 1
+
+
+def install_stand_ins():
+    cache.data_version = lambda: current_version
+
+
+install_stand_ins()
+
+
+@pytest.fixture(autouse=True)
+def stand_ins():
+    """Other test modules patch the same module at import - reapplied per test (conftest restores)"""
+    install_stand_ins()
+
+
+def counting(**decorator_args):
+    calls = []
+
+    @cached(**decorator_args)
+    def endpoint(year: int = None, ids: list = None, response: Response = None):
+        calls.append((year, ids))
+        if response is not None:
+            response.headers["Cache-Control"] = "public, max-age=900"
+        return {"year": year, "n": len(calls)}
+    return endpoint, calls
+
+
+def test_keyed_by_arguments():
+    endpoint, calls = counting(ttl=60, name="t.args")
+    assert endpoint(2024) == endpoint(year=2024) == {"year": 2024, "n": 1}
+    endpoint(2023)
+    endpoint(2024, ids=[1, 2])
+    endpoint(2024, ids=[1, 2])
+    assert len(calls) == 3
+    assert endpoint.cache.stats()["hits"] == 2
+
+
+def test_lru_eviction():
+    endpoint, calls = counting(ttl=60, maxsize=2, name="t.lru")
+    endpoint(1), endpoint(2), endpoint(1), endpoint(3)  # 2 is least recently used
+    endpoint(1)
+    endpoint(2)
+    assert [c[0] for c in calls] == [1, 2, 3, 2]
+    assert endpoint.cache.stats()["evictions"] == 2
+
+
+def test_ttl_expiry():
+    endpoint, calls = counting(ttl=0.05, name="t.ttl")
+    endpoint(1)
+    endpoint(1)
+    time.sleep(0.06)
+    endpoint(1)
+    assert len(calls) == 2
+
+
+def test_data_version_change_clears_everything():
+    global current_version
+    endpoint, calls = counting(ttl=60, name="t.version")
+    endpoint(1), endpoint(2)
+    current_version = 2
+    endpoint(1), endpoint(2)
+    assert len(calls) == 4
+
+
+def test_error_status_not_cached():
+    @cached(ttl=60, name="t.error")
+    def endpoint(response: Response = None):
+        response.status_code = 500
+        return {"error": "boom"}
+
+    endpoint(response=Response())
+    endpoint(response=Response())
+    assert endpoint.cache.stats()["hits"] == 0
+
+
+def test_async_function():
+    calls = []
+
+    @cached(ttl=60, name="t.async")
+    async def endpoint(q: str):
+        calls.append(q)
+        return q.upper()
+
+    async def main():
+        return [await endpoint("a"), await endpoint("a"), await endpoint("b")]
+
+    assert asyncio.run(main()) == ["A", "A", "B"] and calls == ["a", "b"]
+
+
+class Body(BaseModel):
+    territory_ids: list
+    year: int = None
+
+
+def test_fastapi_route_params_and_headers_replayed():
+    app = FastAPI()
+    calls = []
+
+    @app.get("/years")
+    @cached(ttl=60, name="t.route")
+    def years(year: int = Query(None), response: Response = None):
+        calls.append(year)
+        response.headers["Cache-Control"] = "public, max-age=900"
+        return {"year": year}
+
+    @app.post("/compare")
+    @cached(ttl=60, name="t.body")
+    def compare(request: Body):
+        calls.append(request.territory_ids)
+        return {"ids": request.territory_ids}
+
+    client = TestClient(app)
+    for _ in range(2):
+        r = client.get("/years?year=2024")
+        assert r.json() == {"year": 2024} and r.headers["cache-control"] == "public, max-age=900"
+        assert client.post("/compare", json={"territory_ids": [1, 2]}).json() == {"ids": [1, 2]}
+    assert calls == [2024, [1, 2]]
+    assert cache.cache_stats()["caches"]["t.route"]["hits"] == 1
+
+
+def test_routers_are_cached():
+    from app.routers import search, industries, regions, dashboard, benchmarking
+    for fn in (search.get_stats, industries.get_industries_overview, industries.get_top_100,
+               regions.get_regions_overview, dashboard.get_home_dashboard, benchmarking.get_company_benchmark):
+        assert hasattr(fn, "cache"), fn.__name__
+    assert not hasattr(search, "_stats_cache")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
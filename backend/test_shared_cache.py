@@ -0,0 +1,130 @@
+"""
+Shared cache backend: cross-worker tier of @cached, profile / graph paths, ETL invalidation
+(no database or Redis needed - LocalBackend stands in for Redis).
+
+Run:
+    cd backend
+    python test_shared_cache.py
+"""
+import time
+import asyncio
+
+from fastapi import BackgroundTasks, Response
+from starlette.requests import Request
+
+from app.core import cache, payload, shared_cache
+from app.core.cache import cached
+from app.core.shared_cache import LocalBackend, RedisBackend, versioned_key
+from app.routers import companies
+
+cache.data_version = lambda: "v1"
+cache._version.update(value="v1", checked_at=time.monotonic() + 3600)
+companies.data_version = cache.data_version
+
+
+def fresh_backend():
+    backend = LocalBackend()
+    shared_cache.set_backend(backend)
+    return backend
+
+
+def test_local_backend_ttl_and_multi_get():
+    backend = fresh_backend()
+    backend.set_many({"a": b"1", "b": b"2"}, ttl=0.05)
+    backend.set("c", b"3", ttl=60)
+    assert backend.get_many(["a", "missing", "c"]) == [b"1", None, b"3"]
+    time.sleep(0.06)
+    assert backend.get_many(["a", "b", "c"]) == [None, None, b"3"]
+
+
+def test_redis_down_behaves_like_empty_cache():
+    backend = RedisBackend("redis://127.0.0.1:1/0")
+    assert backend.get_many(["a", "b"]) == [None, None]
+    backend.set("a", b"1", ttl=60)  # logged, not raised
+
+
+def test_cached_shared_between_workers():
+    fresh_backend()
+    calls = []
+
+    def make_worker():
+        # Same function in two processes: own in-process LRU, same shared key space
+        @cached(ttl=60, name="t.shared", shared=True)
+        def overview(year: int = None):
+            calls.append(year)
+            return {"year": year, "total": 1.5}
+        return overview
+
+    worker_a, worker_b = make_worker(), make_worker()
+    assert worker_a(2024) == {"year": 2024, "total": 1.5}
+    assert worker_b(2024) == {"year": 2024, "total": 1.5}
+    assert calls == [2024]
+
+
+def test_etl_publish_clears_in_process_caches():
+    backend = fresh_backend()
+    cache.start_invalidation_listener()
+    calls = []
+
+    @cached(ttl=60, name="t.invalidate")
+    def endpoint():
+        calls.append(1)
+        return 1
+
+    endpoint(), endpoint()
+    backend.publish(shared_cache.INVALIDATION_CHANNEL, "2025-01-01T03:00:00")
+    assert endpoint.cache.stats()["size"] == 0
+    cache._version["checked_at"] = time.monotonic() + 3600
+    endpoint()
+    assert len(calls) == 2
+
+
+def test_new_data_version_is_a_new_key_space():
+    assert versioned_key("v1", "graph", 1) != versioned_key("v2", "graph", 1)
+    assert versioned_key(None, "graph", 1) == "ur:0:graph:1"
+
+
+def fake_request():
+    return Request({"type": "http", "headers": [(b"accept-encoding", b"gzip")], "method": "GET", "path": "/"})
+
+
+def test_profile_shared_hit_needs_no_database():
+    fresh_backend()
+    encoded = payload.encode_payload({"regcode": 1, "name": "SIA A"})
+    companies.share_profile("v1", 1, "SIA A", encoded["payload"], {
+        access: (payload.access_variant(encoded["payload_gzip"], access), None) for access in (False, True)
+    }, "2025-01-01T04:00:00")
+
+    async def no_database(*args, **kwargs):
+        raise AssertionError("database queried on a shared hit")
+
+    async def access(request):
+        return False
+
+    async def no_user(request):
+        return None
+
+    companies.fetch_one = no_database
+    companies.ensure_profile_cache_table = no_database
+    companies.check_access = access
+    companies.get_current_user = no_user
+    response = asyncio.run(companies.get_company_details("1", Response(), fake_request(), BackgroundTasks()))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.body == encoded["payload_gzip"][0]
+
+
+def test_graph_shared_hit_and_write_through():
+    backend = fresh_backend()
+    companies.load_cached_graph = lambda conn, r: ({"status": "LINKED"}, False)
+    assert companies._get_graph_data_internal(None, 7) == {"status": "LINKED"}
+    assert backend.get(versioned_key("v1", "graph", 7)) == b'{"status":"LINKED"}'
+    companies.load_cached_graph = lambda conn, r: (_ for _ in ()).throw(AssertionError("database queried"))
+    assert companies._get_graph_data_internal(None, 7) == {"status": "LINKED"}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
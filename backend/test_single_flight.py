@@ -0,0 +1,217 @@
+"""
+Single-flight + stale-while-revalidate for the profile and graph caches (no database needed).
+
+The advisory lock is replaced by a process-local one; everything else is the
+real SingleFlight.
+
+Run:
+    cd backend
+    python test_single_flight.py
+"""
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from fastapi import BackgroundTasks, Response
+from starlette.requests import Request
+
+from app.core import single_flight, payload, shared_cache
+from app.core.single_flight import SingleFlight
+from app.routers import companies
+
+BUILD_SECONDS = 0.2
+held_locks = set()
+
+
+@contextmanager
+def fake_advisory_lock(lock_key, wait=True):
+    """wait=False and the key is held -> not acquired, like pg_try_advisory_lock"""
+    if lock_key in held_locks and not wait:
+        yield False
+        return
+    held_locks.add(lock_key)
+    try:
+        yield True
+    finally:
+        held_locks.discard(lock_key)
+
+
+def install_stand_ins():
+    single_flight.advisory_lock = fake_advisory_lock
+
+
+install_stand_ins()
+
+
+@pytest.fixture(autouse=True)
+def stand_ins():
+    """Other test modules patch the same modules at import - reapplied per test (conftest restores)"""
+    install_stand_ins()
+
+
+def slow_counter():
+    calls = []
+
+    def build(key):
+        calls.append(key)
+        time.sleep(BUILD_SECONDS)
+        return {"key": key, "n": len(calls)}
+    return build, calls
+
+
+def test_concurrent_sync_callers_share_one_run():
+    flight = SingleFlight("t1")
+    build, calls = slow_counter()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.run(1, build, 1))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [1]
+    assert results == [{"key": 1, "n": 1}] * 10
+    assert not flight.in_flight(1)
+
+
+def test_concurrent_async_callers_share_one_run():
+    flight = SingleFlight("t2")
+    build, calls = slow_counter()
+
+    async def main():
+        return await asyncio.gather(*(flight.run_async(k, build, k) for k in (1, 1, 1, 2, 2)))
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    assert sorted(calls) == [1, 2]
+    assert [r["key"] for r in results] == [1, 1, 1, 2, 2]
+    assert time.perf_counter() - start < 2 * BUILD_SECONDS
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("t3")
+
+    def fail(key):
+        time.sleep(BUILD_SECONDS)
+        raise ValueError(key)
+
+    async def main():
+        return await asyncio.gather(*(flight.run_async(1, fail, 1) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(e, ValueError) for e in asyncio.run(main()))
+    assert not flight.in_flight(1)
+
+
+def test_refresh_is_scheduled_once():
+    flight = SingleFlight("t4")
+    build, calls = slow_counter()
+    assert flight.refresh(1, build, 1)
+    assert not flight.refresh(1, build, 1)  # already running
+    assert flight.run(1, build, 1)["n"] == 1  # a miss meanwhile waits for the refresh
+    assert calls == [1]
+
+
+def test_refresh_skipped_when_another_process_holds_the_lock():
+    flight = SingleFlight("t5")
+    build, calls = slow_counter()
+    held_locks.add(single_flight.advisory_lock_key("t5", 1))
+    try:
+        assert flight.refresh(1, build, 1)
+        time.sleep(BUILD_SECONDS / 4)
+        assert calls == [] and not flight.in_flight(1)
+    finally:
+        held_locks.clear()
+
+
+def fake_request():
+    return Request({"type": "http", "headers": [], "method": "GET", "path": "/"})
+
+
+class CompanyRow(SimpleNamespace):
+    def __getattr__(self, name):
+        return None
+
+
+def patch_profile(cached_row):
+    refreshed = threading.Event()
+
+    async def fetch_one(query, params=None):
+        if "company_profile_cache" in str(query):
+            return cached_row
+        return CompanyRow(regcode=1, name="SIA A")
+
+    async def access(request):
+        return True
+
+    async def no_user(request):
+        return None
+
+    async def ready():
+        pass
+
+    def refresh_profile_cache(regcode, company):
+        time.sleep(BUILD_SECONDS)
+        refreshed.set()
+        return payload.encode_payload({"name": company["name"], "fresh": True})
+
+    companies.fetch_one = fetch_one
+    companies.check_access = access
+    companies.get_current_user = no_user
+    companies.ensure_profile_cache_table = ready
+    companies.refresh_profile_cache = refresh_profile_cache
+    companies.profile_flight = SingleFlight("profile-test")
+    shared_cache.set_backend(shared_cache.LocalBackend())
+    return refreshed
+
+
+def get_details():
+    return companies.get_company_details("1", Response(), fake_request(), BackgroundTasks())
+
+
+def test_stale_profile_served_immediately_and_refreshed_once():
+    encoded = payload.encode_payload({"name": "SIA A", "fresh": False})
+    stale = SimpleNamespace(payload=encoded["payload"], payload_gzip=None, payload_br=None,
+                            profile_data=None, updated_at=None, is_fresh=False)
+    refreshed = patch_profile(stale)
+
+    async def main():
+        return await asyncio.gather(*(get_details() for _ in range(5)))
+
+    start = time.perf_counter()
+    responses = asyncio.run(main())
+    assert time.perf_counter() - start < BUILD_SECONDS
+    assert all(b'"fresh":false' in r.body for r in responses)
+    assert refreshed.wait(2 * BUILD_SECONDS)
+
+
+def test_profile_misses_coalesced():
+    patch_profile(None)
+    builds = []
+    inner = companies.refresh_profile_cache
+    companies.refresh_profile_cache = lambda r, c: builds.append(r) or inner(r, c)
+
+    async def main():
+        return await asyncio.gather(*(get_details() for _ in range(5)))
+
+    responses = asyncio.run(main())
+    assert builds == [1]
+    assert all(b'"fresh":true' in r.body for r in responses)
+
+
+def test_stale_graph_served_and_recalculated_in_background():
+    calculated = threading.Event()
+    companies.load_cached_graph = lambda conn, r: ({"status": "OLD"}, True)
+    companies.graph_flight = SingleFlight("graph-test")
+    companies._refresh_graph = lambda r, year: calculated.set() or {"status": "NEW"}
+    assert companies._get_graph_data_internal(None, 1) == {"status": "OLD"}
+    assert calculated.wait(1)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
@@ -0,0 +1,81 @@
+"""
+Territory index behind the region filters and /regions/lookup: ids / ATVK codes
+expanded to child territories, free-text names resolved to territories.
+
+Built from a handful of `territories` rows - no database needed.
+
+Run:
+    cd backend
+    python test_territories.py
+"""
+from app.services.territories import TerritoryIndex, fold
+
+# id, code, name, type, level, parent_code, current
+ROWS = [
+    (1, "0100000", "Rīgas reģions", "REĢIONS", 1, None, True),
+    (2, "0200000", "Vidzemes reģions", "REĢIONS", 1, None, True),
+    (10, "0010000", "Rīga", "VALSTSPILSĒTU_PAŠVALDĪBA", 2, "0100000", True),
+    (11, "0130000", "Ādažu novads", "NOVADS", 2, "0100000", True),
+    (12, "0200200", "Valmieras novads", "NOVADS", 2, "0200000", True),
+    (20, "0130010", "Ādaži", "PILSĒTA", 3, "0130000", True),
+    (21, "0130040", "Carnikavas pagasts", "PAGASTS", 3, "0130000", True),
+    (22, "0200210", "Valmiera", "VALSTSPILSĒTA", 3, "0200200", True),
+    (30, "0800000", "Rīgas rajons", "NOVADS", 2, None, False),
+]
+
+
+def test_fold():
+    assert fold("  Ādažu Novads ") == "adazu novads"
+    assert fold("Rēzekne") == fold("rezekne")
+
+
+def test_expand_to_children():
+    index = TerritoryIndex(ROWS)
+    assert index.expand([1]) == {1, 10, 11, 20, 21}
+    assert index.expand([11]) == {11, 20, 21}
+    assert index.expand([20, 999]) == {20}
+
+
+def test_resolve_ids_and_codes():
+    index = TerritoryIndex(ROWS)
+    assert index.resolve(["0200000"]) == ({2, 12, 22}, [])
+    assert index.resolve(["11", "0010000"]) == ({10, 11, 20, 21}, [])
+    assert index.resolve(["11", "nope", "0999999"]) == ({11, 20, 21}, ["nope", "0999999"])
+    assert index.codes({11, 20}) == ["0130000", "0130010"]
+
+
+def test_lift_to_municipalities():
+    index = TerritoryIndex(ROWS)
+    assert index.lift([20], 2) == {11}
+    assert index.lift([21, 22, 10], 2) == {10, 11, 12}
+    assert index.lift(index.expand([1]), 2) == {10, 11}
+    assert index.lift([2], 2) == set()
+
+
+def test_match_region_names():
+    index = TerritoryIndex(ROWS)
+    assert index.match("Rīga") == {10}
+    assert index.match("riga") == {10}
+    assert index.match("Vidzeme") == {2, 12, 22}
+    assert index.match("Pierīga") == set()
+    assert index.match("  ") == set()
+
+
+def test_lookup_ranking():
+    index = TerritoryIndex(ROWS)
+    names = [t["name"] for t in index.lookup("rig")]
+    assert names == ["Rīgas reģions", "Rīga", "Rīgas rajons"]
+    assert [t["name"] for t in index.lookup("adaz")] == ["Ādažu novads", "Ādaži"]
+    assert [t["id"] for t in index.lookup("carnikava")] == [21]
+    assert [t["id"] for t in index.lookup("valmier", level=3)] == [22]
+    assert index.lookup("Valmiera")[0] == {
+        "id": 22, "code": "0200210", "name": "Valmiera", "type": "VALSTSPILSĒTA", "level": 3,
+        "parent_id": 12, "parent_name": "Valmieras novads"}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
@@ -0,0 +1,174 @@
+"""
+View refresh engine checks with synthetic views.
+
+etl_state and the Postgres catalog are replaced by in-memory stand-ins and
+_refresh_view sleeps / logs instead of refreshing, so no database is needed.
+
+Run:
+    cd backend
+    python test_view_refresh.py
+"""
+import time
+import importlib
+import threading
+
+from etl.refresh_materialized_views import View
+
+engine = importlib.import_module('etl.refresh_materialized_views')
+
+STATE = {}
+TABLES = {}
+EXISTING = set()
+LOG = []
+LOCK = threading.Lock()
+
+
+def _record_stage(name, status, fingerprint=None, error=None, run_id=None, duration=None, rows=None,
+                  peak_memory_mb=None, prefix=''):
+    row = STATE.setdefault(name, {})
+    row['status'] = status
+    if status in ('SUCCESS', 'SKIPPED'):
+        row['fingerprint'] = fingerprint
+    if status == 'SUCCESS':
+        row['rows'] = rows
+
+
+def _refresh_view(view, mode):
+    start = time.time()
+    time.sleep(0.3)
+    if view.name == 'broken':
+        raise RuntimeError("refresh failed on purpose")
+    with LOCK:
+        LOG.append((view.name, mode, start, time.time()))
+    EXISTING.add(view.name)
+    if mode == 'repoint':
+        # repoint_matview rebuilds the materialized views on top of the repointed one too
+        engine._repointed.update(REPOINT_REBUILDS.get(view.name, [view.name]))
+    return 42
+
+
+engine._ensure_state_table = lambda: None
+engine._stored_fingerprints = lambda prefix: {n: r.get('fingerprint') for n, r in STATE.items()
+                                              if r['status'] in ('SUCCESS', 'SKIPPED')}
+engine._record_stage = _record_stage
+engine._catalog_state = lambda tables, relations: ({t: TABLES.get(t) for t in tables if t in TABLES},
+                                                    set(relations) & EXISTING)
+engine._refresh_view = _refresh_view
+READING_OLD = set()
+REPOINT_REBUILDS = {}
+engine._swapped_out_readers = lambda relations: set(relations) & READING_OLD
+engine._drop_swapped_out = lambda: READING_OLD.clear()
+
+
+def setup(views):
+    STATE.clear()
+    LOG.clear()
+    EXISTING.clear()
+    TABLES.clear()
+    READING_OLD.clear()
+    REPOINT_REBUILDS.clear()
+    TABLES.update({'companies': [1, 10, 0, 0], 'finance': [2, 10, 0, 0], 'persons': [3, 10, 0, 0]})
+    engine.VIEWS = views
+
+
+def log():
+    return {name: (mode, start, end) for name, mode, start, end in LOG}
+
+
+def test_parallel_and_dependencies():
+    setup([View('stats', tables=['companies', 'finance']),
+           View('persons_mv', tables=['persons']),
+           View('dashboard', depends_on=['stats'])])
+    summary = engine.refresh_materialized_views(max_workers=3)
+    runs = log()
+    assert sorted(summary['refreshed']) == ['dashboard', 'persons_mv', 'stats'], summary
+    # independent views overlap, dependent view starts after its upstream
+    assert runs['stats'][1] < runs['persons_mv'][2] and runs['persons_mv'][1] < runs['stats'][2]
+    assert runs['dashboard'][1] >= runs['stats'][2]
+    assert STATE['stats']['rows'] == 42
+
+
+def test_unchanged_tables_skip():
+    setup([View('stats', tables=['companies', 'finance']),
+           View('persons_mv', tables=['persons']),
+           View('dashboard', depends_on=['stats'])])
+    engine.refresh_materialized_views()
+    LOG.clear()
+    TABLES['finance'] = [2, 10, 5, 0]       # 5 updates
+    summary = engine.refresh_materialized_views()
+    assert sorted(log()) == ['dashboard', 'stats'], summary
+    assert summary['skipped'] == ['persons_mv']
+
+
+def test_missing_view_and_changed_definition_are_created(tmp_sql='/tmp/test_view_refresh.sql'):
+    with open(tmp_sql, 'w') as f:
+        f.write("CREATE MATERIALIZED VIEW stats AS SELECT 1;")
+    view = View('stats', tables=['companies'], create_sql=tmp_sql)
+    setup([view])
+    engine.refresh_materialized_views()
+    assert log()['stats'][0] == 'create'
+    LOG.clear()
+    engine.refresh_materialized_views(force=True)
+    assert log()['stats'][0] == 'refresh'
+    LOG.clear()
+    with open(tmp_sql, 'w') as f:
+        f.write("CREATE MATERIALIZED VIEW stats AS SELECT 2;")
+    engine.refresh_materialized_views()
+    assert log()['stats'][0] == 'create'
+
+
+def test_recreated_upstream_recreates_downstream(tmp_sql='/tmp/test_view_refresh_cube.sql'):
+    with open(tmp_sql, 'w') as f:
+        f.write("CREATE MATERIALIZED VIEW cube AS SELECT * FROM stats;")
+    stats_sql = '/tmp/test_view_refresh_stats.sql'
+    with open(stats_sql, 'w') as f:
+        f.write("DROP MATERIALIZED VIEW IF EXISTS stats CASCADE; CREATE MATERIALIZED VIEW stats AS SELECT 1;")
+    setup([View('stats', tables=['companies'], create_sql=stats_sql),
+           View('cube', depends_on=['stats'], create_sql=tmp_sql)])
+    engine.refresh_materialized_views()
+    LOG.clear()
+    with open(stats_sql, 'w') as f:
+        f.write("DROP MATERIALIZED VIEW IF EXISTS stats CASCADE; CREATE MATERIALIZED VIEW stats AS SELECT 2;")
+    engine.refresh_materialized_views()
+    # CASCADE dropped cube together with stats - refreshing it would fail
+    assert log()['stats'][0] == 'create' and log()['cube'][0] == 'create'
+
+
+def test_view_reading_swapped_out_table_is_repointed(tmp_sql='/tmp/test_view_refresh_swap.sql'):
+    with open(tmp_sql, 'w') as f:
+        f.write("CREATE MATERIALIZED VIEW stats AS SELECT * FROM companies;")
+    setup([View('stats', tables=['companies'], create_sql=tmp_sql),
+           View('cube', depends_on=['stats']),
+           View('persons_mv', tables=['persons'])])
+    engine.refresh_materialized_views()
+    LOG.clear()
+    # companies was shadow-swapped: stats still reads companies__old
+    READING_OLD.add('stats')
+    REPOINT_REBUILDS['stats'] = ['stats', 'cube']
+    summary = engine.refresh_materialized_views(force=True)
+    runs = log()
+    assert runs['stats'][0] == 'repoint' and runs['persons_mv'][0] == 'refresh', summary
+    # cube was rebuilt on top of the new stats - not refreshed a second time
+    assert 'cube' not in runs and 'cube' in summary['refreshed']
+    assert STATE['cube']['status'] == 'SUCCESS'
+    assert not READING_OLD
+
+
+def test_failure_blocks_downstream():
+    setup([View('broken', tables=['companies']), View('dashboard', depends_on=['broken']),
+           View('persons_mv', tables=['persons'])])
+    try:
+        engine.refresh_materialized_views()
+        raise AssertionError("failed view should raise")
+    except RuntimeError:
+        pass
+    assert STATE['broken']['status'] == 'FAILED' and STATE['dashboard']['status'] == 'BLOCKED'
+    assert STATE['persons_mv']['status'] == 'SUCCESS'
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"{name}...", end=" ")
+            fn()
+            print("OK")
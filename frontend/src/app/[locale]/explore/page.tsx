@@ -23,6 +23,7 @@ function ExploreContent() {
     // Init state from URL
     const [filters, setFilters] = useState({
         page: Number(searchParams.get('page')) || 1,
+        cursor: searchParams.get('cursor') || '', // keyset position from meta.next_cursor / prev_cursor
         limit: 50,
         sort_by: searchParams.get('sort_by') || 'turnover',
         order: searchParams.get('order') || 'desc',
@@ -99,7 +100,7 @@ function ExploreContent() {
     }, [filters]);
 
     const handleFilterChange = (newFilters: any) => {
-        setFilters(prev => ({ ...prev, ...newFilters, page: 1 }));
+        setFilters(prev => ({ ...prev, ...newFilters, page: 1, cursor: '' }));
     };
 
     const handleSort = (key: string) => {
@@ -107,7 +108,8 @@ function ExploreContent() {
             ...prev,
             sort_by: key,
             order: prev.sort_by === key && prev.order === 'desc' ? 'asc' : 'desc',
-            page: 1
+            page: 1,
+            cursor: ''
         }));
     };
 
@@ -319,15 +321,15 @@ function ExploreContent() {
                 <div className="mt-6 flex justify-center gap-2">
                     <button
                         disabled={filters.page === 1 || loading}
-                        onClick={() => setFilters(p => ({ ...p, page: p.page - 1 }))}
+                        onClick={() => setFilters(p => ({ ...p, page: p.page - 1, cursor: meta?.prev_cursor || '' }))}
                         className="px-4 py-2 border rounded hover:bg-gray-50 disabled:opacity-50"
                     >
                         {tPagination('prev')}
                     </button>
                     <span className="px-4 py-2 text-gray-700 flex items-center">{tPagination('page', { page: filters.page })}</span>
                     <button
-                        disabled={!data.length || (data.length < filters.limit) || loading}
-                        onClick={() => setFilters(p => ({ ...p, page: p.page + 1 }))}
+                        disabled={!meta?.next_cursor || loading}
+                        onClick={() => setFilters(p => ({ ...p, page: p.page + 1, cursor: meta?.next_cursor || '' }))}
                         className="px-4 py-2 border rounded hover:bg-gray-50 disabled:opacity-50"
                     >
                         {tPagination('next')}